@@ -304,6 +304,10 @@ CELERY_ENABLE_UTC = True
 CELERY_TASK_DEFAULT_QUEUE='kubernetesgurubackend-queue'
 CELERY_RESULT_BACKEND = 'django-db' # django_celery_results
 CELERY_RESULT_EXTENDED=True
+CELERY_TASK_ROUTES = {
+    # Answered by their own workers, so they do not wait behind the data source tasks
+    'core.tasks.answer_github_event': {'queue': 'github-answers'},
+}
 
 RAW_QUESTIONS_TO_QUESTION_LIMIT_PER_TASK = config('RAW_QUESTIONS_TO_QUESTION_LIMIT_PER_TASK', default=4, cast=int)
 SIMILARITY_FETCH_BATCH_SIZE = config('SIMILARITY_FETCH_BATCH_SIZE', default=100, cast=int)
@@ -364,12 +368,21 @@ else:
 GS_BUCKET_NAME = 'gurubase-og-images'
 GS_DATA_SOURCES_BUCKET_NAME = 'gurubase-customguru-files'
 PDF_ICON_URL = 'https://s3.eu-central-1.amazonaws.com/anteon-strapi-cms-wuby8hpna3bdecoduzfibtrucp5x/pdf_icon_9268153e39.svg'
+PDF_MAX_FILE_SIZE_MB = config('PDF_MAX_FILE_SIZE_MB', default=100, cast=int)
+PDF_MAX_PAGES = config('PDF_MAX_PAGES', default=3000, cast=int)
+PDF_MAX_TEXT_SIZE_MB = config('PDF_MAX_TEXT_SIZE_MB', default=20, cast=int)
+PDF_DOWNLOAD_TIMEOUT_SECONDS = config('PDF_DOWNLOAD_TIMEOUT_SECONDS', default=60, cast=int)
+PDF_EXTRACTION_WORKERS = config('PDF_EXTRACTION_WORKERS', default=2, cast=int)
+PDF_EXTRACTION_PAGES_PER_TASK = config('PDF_EXTRACTION_PAGES_PER_TASK', default=10, cast=int)
+PDF_PAGE_TIMEOUT_SECONDS = config('PDF_PAGE_TIMEOUT_SECONDS', default=30, cast=int)
+PDF_TEXT_CACHE_TIMEOUT_SECONDS = config('PDF_TEXT_CACHE_TIMEOUT_SECONDS', default=60 * 60 * 24 * 30, cast=int)
 YOUTUBE_ICON_URL = 'https://s3.eu-central-1.amazonaws.com/anteon-strapi-cms-wuby8hpna3bdecoduzfibtrucp5x/youtube_dfa3f7b5b9.svg'
 STACKOVERFLOW_ICON_URL = 'https://cdn.jsdelivr.net/gh/devicons/devicon/icons/stackoverflow/stackoverflow-original.svg'
 WEBSITE_ICON_URL = 'https://cdn.jsdelivr.net/gh/devicons/devicon/icons/chrome/chrome-original.svg'
 FIRECRAWL_API_KEY = config('FIRECRAWL_API_KEY', default='xxx')
 LOG_STREAM_TIMES = config('LOG_STREAM_TIMES', default=False, cast=bool)
 DATA_SOURCE_RETRIEVAL_LOCK_DURATION_SECONDS = config('DATA_SOURCE_RETRIEVAL_LOCK_DURATION_SECONDS', default=600, cast=int)
+INTEGRATION_SYNC_LOCK_DURATION_SECONDS = config('INTEGRATION_SYNC_LOCK_DURATION_SECONDS', default=3600, cast=int)
 DATA_SOURCE_FETCH_BATCH_SIZE = config('DATA_SOURCE_FETCH_BATCH_SIZE', default=100, cast=int)
 TASK_FETCH_LIMIT = config('TASK_FETCH_LIMIT', default=1000, cast=int)
 SLACK_NOTIFIER_WEBHOOK_URL = config('SLACK_NOTIFIER_WEBHOOK_URL', default='xxx')
@@ -391,6 +404,9 @@ AUTH0_MANAGEMENT_API_DOMAIN = config('AUTH0_MANAGEMENT_API_DOMAIN', default='')
 
 SUMMARY_GENERATION_MODEL = config('SUMMARY_GENERATION_MODEL', default='gemini-1.5-flash-002') # gpt-4o-2024-08-06 or gemini-1.5-flash-002
 SUMMARY_QUESTION_GENERATION_MODEL = config('SUMMARY_QUESTION_GENERATION_MODEL', default='gemini-1.5-flash-002') # gpt-4o-mini-2024-07-18 or gemini-1.5-flash-002
+LLM_BATCH_PROVIDER = config('LLM_BATCH_PROVIDER', default='') # openai or local. Summarizations and question generations are sent in batch jobs, disabled if empty
+LLM_BATCH_LOCAL_DIR = config('LLM_BATCH_LOCAL_DIR', default=os.path.join(BASE_DIR, 'llm_batches')) # Used by the local provider
+LLM_BATCH_MAX_ATTEMPTS = config('LLM_BATCH_MAX_ATTEMPTS', default=3, cast=int) # A request that failed in this many jobs is not submitted again
 
 GENERATED_QUESTION_PER_GURU_LIMIT = config('GENERATED_QUESTION_PER_GURU_LIMIT', default=100, cast=int)
 GITHUB_TOKEN = config('GITHUB_TOKEN', default='')
@@ -420,23 +436,78 @@ DISCORD_CLIENT_ID = config('DISCORD_CLIENT_ID', default='')
 DISCORD_CLIENT_SECRET = config('DISCORD_CLIENT_SECRET', default='')
 DISCORD_REDIRECT_URI = config('DISCORD_REDIRECT_URI', default='')
 DISCORD_BOT_TOKEN = config('DISCORD_BOT_TOKEN', default='')
+DISCORD_MESSAGE_UPDATE_INTERVAL_SECONDS = config('DISCORD_MESSAGE_UPDATE_INTERVAL_SECONDS', default=1.0, cast=float) # Per channel, shared by the answers streamed in it
+DISCORD_INTEGRATION_CACHE_TIMEOUT_SECONDS = config('DISCORD_INTEGRATION_CACHE_TIMEOUT_SECONDS', default=300, cast=int) # Cleared on integration updates
 
 SLACK_CLIENT_ID = config('SLACK_CLIENT_ID', default='')
 SLACK_CLIENT_SECRET = config('SLACK_CLIENT_SECRET', default='')
+SLACK_EVENT_WORKER_CONCURRENCY = config('SLACK_EVENT_WORKER_CONCURRENCY', default=32, cast=int)
+SLACK_EVENT_WORKSPACE_CONCURRENCY = config('SLACK_EVENT_WORKSPACE_CONCURRENCY', default=4, cast=int)
+SLACK_EVENT_DEDUP_TIMEOUT_SECONDS = config('SLACK_EVENT_DEDUP_TIMEOUT_SECONDS', default=60 * 60, cast=int)
+SLACK_EVENT_CLAIM_IDLE_SECONDS = config('SLACK_EVENT_CLAIM_IDLE_SECONDS', default=300, cast=int) # Events of a crashed worker are claimed after this
+SLACK_EVENT_STREAM_MAX_LENGTH = config('SLACK_EVENT_STREAM_MAX_LENGTH', default=10000, cast=int)
+SLACK_EVENT_LEASE_SECONDS = config('SLACK_EVENT_LEASE_SECONDS', default=300, cast=int) # Longer than an answer takes
+SLACK_EVENT_MAX_ATTEMPTS = config('SLACK_EVENT_MAX_ATTEMPTS', default=3, cast=int)
+SLACK_MESSAGE_UPDATE_INTERVAL_SECONDS = config('SLACK_MESSAGE_UPDATE_INTERVAL_SECONDS', default=1.0, cast=float) # Per channel, shared by the answers streamed in it
 
 WEBSITE_EXTRACTION = config('WEBSITE_EXTRACTION', default='crawl4ai')
 
 API_CONCURRENCY_THROTTLE_RATE = config('API_CONCURRENCY_THROTTLE_RATE', default='10/m')
 WEBSHARE_TOKEN = config('WEBSHARE_TOKEN', default='')
 GITHUB_FILE_BATCH_SIZE = config('GITHUB_FILE_BATCH_SIZE', default=100, cast=int)
+GITHUB_REPO_MIRROR_DIR = config('GITHUB_REPO_MIRROR_DIR', default='') # Local mirror cache of the cloned repositories, disabled if empty
+GITHUB_FILE_READ_WORKERS = config('GITHUB_FILE_READ_WORKERS', default=8, cast=int)
+CONFLUENCE_SITE_CONCURRENCY = config('CONFLUENCE_SITE_CONCURRENCY', default=5, cast=int) # Concurrent page fetches per Confluence site, per process
+JIRA_FETCH_CONCURRENCY = config('JIRA_FETCH_CONCURRENCY', default=8, cast=int)
+JIRA_REQUESTS_PER_MINUTE = config('JIRA_REQUESTS_PER_MINUTE', default=300, cast=int) # Per Jira site, shared by all workers, disabled if 0
+ZENDESK_FETCH_CONCURRENCY = config('ZENDESK_FETCH_CONCURRENCY', default=8, cast=int)
+ZENDESK_REQUESTS_PER_MINUTE = config('ZENDESK_REQUESTS_PER_MINUTE', default=200, cast=int) # Per Zendesk account, shared by all workers, disabled if 0
+INTEGRATION_MAX_THROTTLE_RETRIES = config('INTEGRATION_MAX_THROTTLE_RETRIES', default=5, cast=int)
+INTEGRATION_MAX_RETRY_AFTER_SECONDS = config('INTEGRATION_MAX_RETRY_AFTER_SECONDS', default=60, cast=int)
+HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS = config('HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS', default=10, cast=int)
+HTTP_CLIENT_READ_TIMEOUT_SECONDS = config('HTTP_CLIENT_READ_TIMEOUT_SECONDS', default=60, cast=int) # For the requests that do not set their own timeout
+HTTP_CLIENT_MAX_RETRIES = config('HTTP_CLIENT_MAX_RETRIES', default=3, cast=int)
+HTTP_CLIENT_BACKOFF_FACTOR = config('HTTP_CLIENT_BACKOFF_FACTOR', default=0.5, cast=float)
+HTTP_CLIENT_MAX_BACKOFF_SECONDS = config('HTTP_CLIENT_MAX_BACKOFF_SECONDS', default=60, cast=int) # Also caps the Retry-After waits
+HTTP_CLIENT_POOL_HOSTS = config('HTTP_CLIENT_POOL_HOSTS', default=50, cast=int) # Hosts whose keep-alive connections are kept
+HTTP_CLIENT_HOST_MAX_CONCURRENCY = config('HTTP_CLIENT_HOST_MAX_CONCURRENCY', default=32, cast=int) # Per host, per process
+HTTP_CLIENT_METRICS_LOG_INTERVAL_SECONDS = config('HTTP_CLIENT_METRICS_LOG_INTERVAL_SECONDS', default=300, cast=int) # 0 disables the metrics logs
+MILVUS_DELETE_BATCH_SIZE = config('MILVUS_DELETE_BATCH_SIZE', default=1000, cast=int)
+CONTENT_BLOB_ZSTD_LEVEL = config('CONTENT_BLOB_ZSTD_LEVEL', default=3, cast=int)
 CRAWL_INACTIVE_THRESHOLD_SECONDS = config('CRAWL_INACTIVE_THRESHOLD_SECONDS', default=7, cast=int)
+CRAWL_STATE_FLUSH_INTERVAL_SECONDS = config('CRAWL_STATE_FLUSH_INTERVAL_SECONDS', default=2, cast=float)
+CRAWL_STATE_FLUSH_BATCH_SIZE = config('CRAWL_STATE_FLUSH_BATCH_SIZE', default=200, cast=int)
+CRAWL_STOP_FLAG_TIMEOUT_SECONDS = config('CRAWL_STOP_FLAG_TIMEOUT_SECONDS', default=60 * 60 * 24, cast=int)
+SITEMAP_REQUEST_TIMEOUT_SECONDS = config('SITEMAP_REQUEST_TIMEOUT_SECONDS', default=10, cast=int)
+SITEMAP_MAX_SITEMAPS = config('SITEMAP_MAX_SITEMAPS', default=200, cast=int)
 ADMIN_EMAIL = config('ADMIN_EMAIL', default='')
 MAILGUN_API_KEY = config('MAILGUN_API_KEY', default='')
 FIRECRAWL_BATCH_SIZE = config('FIRECRAWL_BATCH_SIZE', default=5, cast=int)
 FIRECRAWL_TIMEOUT_MS = config('FIRECRAWL_TIMEOUT_MS', default=30000, cast=int)
+CRAWL4AI_BATCH_SIZE = config('CRAWL4AI_BATCH_SIZE', default=10, cast=int)
+CRAWL4AI_POOL_SIZE = config('CRAWL4AI_POOL_SIZE', default=4, cast=int) # Number of browser contexts (one page each) scraping concurrently
+CRAWL4AI_SESSION_MAX_PAGES = config('CRAWL4AI_SESSION_MAX_PAGES', default=25, cast=int)
+CRAWL4AI_BROWSER_MAX_PAGES = config('CRAWL4AI_BROWSER_MAX_PAGES', default=200, cast=int)
+CRAWL4AI_PAGE_TIMEOUT_SECONDS = config('CRAWL4AI_PAGE_TIMEOUT_SECONDS', default=120, cast=int)
+CRAWL4AI_PAGES_PER_MINUTE = config('CRAWL4AI_PAGES_PER_MINUTE', default=0, cast=int) # Shared by all workers, disabled if 0
+FIRECRAWL_PAGES_PER_MINUTE = config('FIRECRAWL_PAGES_PER_MINUTE', default=100, cast=int) # Shared by all workers, disabled if 0
+WEBSITE_SCRAPE_MAX_CONCURRENCY = config('WEBSITE_SCRAPE_MAX_CONCURRENCY', default=50, cast=int)
+WEBSITE_SCRAPE_HOST_INITIAL_CONCURRENCY = config('WEBSITE_SCRAPE_HOST_INITIAL_CONCURRENCY', default=5, cast=int)
+WEBSITE_SCRAPE_HOST_MAX_CONCURRENCY = config('WEBSITE_SCRAPE_HOST_MAX_CONCURRENCY', default=20, cast=int)
+WEBSITE_SCRAPE_HOST_REQUESTS_PER_SECOND = config('WEBSITE_SCRAPE_HOST_REQUESTS_PER_SECOND', default=2, cast=float) # Politeness towards the scraped sites, disabled if 0
+WEBSITE_SCRAPE_MAX_THROTTLE_RETRIES = config('WEBSITE_SCRAPE_MAX_THROTTLE_RETRIES', default=3, cast=int)
 YOUTUBE_API_KEY = config('YOUTUBE_API_KEY', default='')
+YOUTUBE_FETCH_CONCURRENCY = config('YOUTUBE_FETCH_CONCURRENCY', default=8, cast=int)
+YOUTUBE_TRANSCRIPT_CACHE_TIMEOUT_SECONDS = config('YOUTUBE_TRANSCRIPT_CACHE_TIMEOUT_SECONDS', default=60 * 60 * 24 * 30, cast=int)
 GITHUB_APP_CLIENT_ID = config('GITHUB_APP_CLIENT_ID', default='')
 GITHUB_SECRET_KEY = config('GITHUB_SECRET_KEY', default='')
 GITHUB_CONTEXT_CHAR_LIMIT = config('GITHUB_CONTEXT_CHAR_LIMIT', default=5000, cast=int)
+GITHUB_INTEGRATION_CACHE_TIMEOUT_SECONDS = config('GITHUB_INTEGRATION_CACHE_TIMEOUT_SECONDS', default=300, cast=int) # Cleared on integration updates
+GITHUB_DELIVERY_DEDUP_TIMEOUT_SECONDS = config('GITHUB_DELIVERY_DEDUP_TIMEOUT_SECONDS', default=24 * 60 * 60, cast=int)
+GITHUB_ANSWER_INSTALLATION_CONCURRENCY = config('GITHUB_ANSWER_INSTALLATION_CONCURRENCY', default=3, cast=int)
+GITHUB_ANSWER_SLOT_TIMEOUT_SECONDS = config('GITHUB_ANSWER_SLOT_TIMEOUT_SECONDS', default=600, cast=int) # Slots of crashed workers are freed after this
+GITHUB_ANSWER_RETRY_SECONDS = config('GITHUB_ANSWER_RETRY_SECONDS', default=10, cast=int)
 SLACK_CUSTOM_GURU_NOTIFIER_WEBHOOK_URL = config('SLACK_CUSTOM_GURU_NOTIFIER_WEBHOOK_URL', default='')
-BETA_FEAT_ON = config('BETA_FEAT_ON', default=False, cast=bool)
\ No newline at end of file
+BETA_FEAT_ON = config('BETA_FEAT_ON', default=False, cast=bool)
+SUMMARY_CACHE_TIMEOUT_SECONDS = config('SUMMARY_CACHE_TIMEOUT_SECONDS', default=60*60*24, cast=int) # 0 disables the summary cache
+CONTEXT_RELEVANCE_CACHE_TIMEOUT_SECONDS = config('CONTEXT_RELEVANCE_CACHE_TIMEOUT_SECONDS', default=60*60*24, cast=int) # 0 disables the context relevance cache
\ No newline at end of file
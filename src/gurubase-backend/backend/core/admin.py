@@ -3,6 +3,7 @@ from django.contrib import admin
 from core.exceptions import ValidationError
 from core.models import (APIKey,
                          Binge, CrawlState, Integration, 
+                         LLMBatchJob, 
                          LLMEval, 
                          LinkReference, 
                          LinkValidity, 
@@ -22,6 +23,7 @@ from core.models import (APIKey,
                          Thread, 
                          WidgetId,
                          GithubFile,
+                         DataSourceChunk,
                          GuruCreationForm)
 from django.utils.html import format_html
 import logging
@@ -167,7 +169,7 @@ class ContentPageStatisticsAdmin(admin.ModelAdmin):
 class GuruTypeAdmin(admin.ModelAdmin):
     list_display = ['id', 'slug', 'active', 'has_sitemap_added_questions', 'icon_url', 'stackoverflow_tag', 'domain_knowledge', 'colors', 'custom', 'maintainers_list', 'github_repos', 'text_embedding_model', 'code_embedding_model', 'date_created', 'date_updated', 'github_details_updated_date']
     search_fields = ['id', 'slug', 'icon_url', 'stackoverflow_tag', 'domain_knowledge', 'date_created', 'date_updated', 'maintainers__email']
-    list_filter = ('active', 'custom', 'has_sitemap_added_questions', 'text_embedding_model', 'code_embedding_model')
+    list_filter = ('active', 'custom', 'has_sitemap_added_questions', 'text_embedding_model', 'code_embedding_model', 'summary_mode', 'prompt_layout')
     ordering = ('-id',)
     readonly_fields = ('id', 'slug', 'milvus_collection_name', 'typesense_collection_name')
     filter_horizontal = ('maintainers',)
@@ -424,11 +426,14 @@ class WidgetIdAdmin(admin.ModelAdmin):
 
 @admin.register(GithubFile)
 class GitHubFileAdmin(admin.ModelAdmin):
-    list_display = ['id', 'repository_link', 'link_to_file', 'size', 'in_milvus', 'doc_ids']
+    list_display = ['id', 'repository_link', 'link_to_file', 'size', 'in_milvus']
     list_filter = ('in_milvus', RepositoryFilter, 'data_source__guru_type__slug')
     search_fields = ['id', 'path']
     ordering = ('-id',)
 
+    def delete_queryset(self, request, queryset):
+        GithubFile.bulk_delete(queryset)
+
     def repository_link(self, obj):
         return format_html(f'<a href="{obj.repository_link}" target="_blank">{obj.repo_title}</a>')
     repository_link.short_description = 'Repository'
@@ -438,6 +443,15 @@ class GitHubFileAdmin(admin.ModelAdmin):
     link_to_file.short_description = 'File'
 
 
+@admin.register(DataSourceChunk)
+class DataSourceChunkAdmin(admin.ModelAdmin):
+    list_display = ['id', 'data_source', 'github_file', 'milvus_id', 'split_num', 'date_created']
+    list_filter = ('data_source__guru_type__slug',)
+    search_fields = ['id', 'milvus_id', 'data_source__id']
+    ordering = ('-id',)
+    raw_id_fields = ('data_source', 'github_file')
+
+
 @admin.register(APIKey)
 class APIKeyAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'integration', 'key', 'date_created', 'date_updated']
@@ -471,6 +485,14 @@ class CrawlStateAdmin(admin.ModelAdmin):
     search_fields = ['id', 'url']
     ordering = ('-id',)
 
+@admin.register(LLMBatchJob)
+class LLMBatchJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'guru_type', 'kind', 'provider', 'external_id', 'model', 'status', 'date_created', 'date_updated']
+    list_filter = ('kind', 'status', 'provider')
+    search_fields = ['id', 'external_id', 'guru_type__slug']
+    ordering = ('-id',)
+    raw_id_fields = ('guru_type',)
+
 @admin.register(GuruCreationForm)
 class GuruCreationFormAdmin(admin.ModelAdmin):
     list_display = ['id', 'notified', 'source', 'name', 'email', 'github_repo', 'docs_url', 'date_created', 'date_updated']
@@ -4,21 +4,27 @@ import random
 import re
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from langchain_community.document_loaders import YoutubeLoader, PyPDFLoader
+from langchain_community.document_loaders import YoutubeLoader
 from abc import ABC, abstractmethod
 from core.guru_types import get_guru_type_object_by_maintainer
 from core.proxy import format_proxies, get_random_proxies
 from core.exceptions import JiraContentExtractionError, NotFoundError, PDFContentExtractionError, WebsiteContentExtractionError, WebsiteContentExtractionThrottleError, YouTubeContentExtractionError, ZendeskContentExtractionError
 from core.models import DataSource, DataSourceExists, CrawlState
 from core.gcp import replace_media_root_with_nginx_base_url
+from core.pdf_extraction import extract_pdf_text
 import unicodedata
 from core.github.data_source_handler import process_github_repository, extract_repo_name
-from core.requester import ConfluenceRequester, JiraRequester, ZendeskRequester, get_web_scraper, YouTubeRequester
+from core.requester import THROTTLE_STATUS_PATTERN, ConfluenceRequester, JiraRequester, ZendeskRequester, get_web_scraper, YouTubeRequester
 import scrapy
 from scrapy.crawler import CrawlerProcess
 from multiprocessing import Process
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+from collections import deque
+import zlib
+import requests
+from xml.etree import ElementTree as ET
 from typing import List, Set, Tuple
 from django.utils import timezone
 from core.utils import get_default_settings
@@ -27,11 +33,37 @@ from youtube_transcript_api import NoTranscriptFound
 logger = logging.getLogger(__name__)
 
 
-def youtube_content_extraction(youtube_url):
+def youtube_content_extraction(youtube_url, title=None):
+    """
+    Extracts the transcript of the YouTube video, with its title in the metadata.
+    The title is fetched with the video if not given. The transcripts are cached by video id, so the videos
+    that are in several playlists or channels of the guru type are fetched once.
+    """
+    from django.core.cache import caches
+    from core.models import ContentBlob
+
     try:
-        loader = YoutubeLoader.from_youtube_url(
-            youtube_url, 
-            add_video_info=True,
+        video_id = YoutubeLoader.extract_video_id(youtube_url)
+    except Exception as e:
+        logger.error(f"Error extracting content from YouTube URL {youtube_url}: {traceback.format_exc()}")
+        raise YouTubeContentExtractionError(f"Error extracting content from the YouTube URL")
+
+    cache = caches['alternate']
+    cache_key = f'youtube_transcript:{video_id}'
+    try:
+        cached = cache.get(cache_key)
+        if cached:
+            # The blob may have been pruned since
+            content = ContentBlob.load_many([cached['content_hash']]).get(cached['content_hash'])
+            if content is not None:
+                return {"metadata": {**cached['metadata'], **({'title': title} if title else {})}, "content": content}
+    except Exception as e:
+        logger.warning(f"Error reading the cached transcript of YouTube video {video_id}: {e}")
+
+    try:
+        loader = YoutubeLoader(
+            video_id,
+            add_video_info=title is None,
             language=["en", 'hi', 'es', 'zh-Hans', 'zh-Hant', 'ar'], # The top 5 most spoken languages
             translation="en",
             chunk_size_seconds=30,
@@ -66,9 +98,67 @@ def youtube_content_extraction(youtube_url):
     # Remove the trailing newlines
     document_dict['content'] = document_dict['content'].strip()
 
+    if title:
+        document_dict['metadata']['title'] = title
+
+    try:
+        content_hash = ContentBlob.store_many([document_dict['content']])[0]
+        cache.set(
+            cache_key,
+            {'metadata': document_dict['metadata'], 'content_hash': content_hash},
+            timeout=settings.YOUTUBE_TRANSCRIPT_CACHE_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Error caching the transcript of YouTube video {video_id}: {e}")
+
     return document_dict
 
 
+def prefetch_youtube_contents(data_sources):
+    """
+    Fetches the transcripts of the YouTube data sources concurrently, in a pool of YOUTUBE_FETCH_CONCURRENCY threads.
+    The titles are fetched in batches from the YouTube API beforehand, if there is an API key.
+    Returns (title, content) by data source URL. The videos whose transcript could not be fetched are left out,
+    they are fetched one by one with youtube_content_extraction, which raises their error.
+    """
+    from core.models import DataSource
+
+    video_ids = {}
+    for ds in data_sources:
+        if ds.type != DataSource.Type.YOUTUBE:
+            continue
+        try:
+            video_ids[ds.url] = YoutubeLoader.extract_video_id(ds.url)
+        except Exception:
+            continue
+    if not video_ids:
+        return {}
+
+    titles = {}
+    try:
+        youtube_requester = YouTubeRequester()
+        if youtube_requester.api_key:
+            titles = youtube_requester.get_video_titles(list(set(video_ids.values())))
+    except Exception as e:
+        logger.warning(f"Error fetching the titles of YouTube videos: {e}")
+
+    def fetch_content(url):
+        try:
+            content = youtube_content_extraction(url, titles.get(video_ids[url]))
+            return content['metadata']['title'], content['content']
+        except Exception as e:
+            logger.warning(f"Error prefetching YouTube video {url}: {e}")
+            return None
+
+    urls = list(video_ids.keys())
+    contents = {}
+    with ThreadPoolExecutor(max_workers=settings.YOUTUBE_FETCH_CONCURRENCY) as executor:
+        for url, content in zip(urls, executor.map(fetch_content, urls)):
+            if content:
+                contents[url] = content
+    return contents
+
+
 def jira_content_extraction(integration, jira_issue_link):
     try:
         jira_requester = JiraRequester(integration)
@@ -109,8 +199,7 @@ def zendesk_ticket_content_extraction(integration, ticket_url):
 def pdf_content_extraction(pdf_path):
     try:
         pdf_path = replace_media_root_with_nginx_base_url(pdf_path)
-        loader = PyPDFLoader(pdf_path)
-        pages = loader.load()
+        return extract_pdf_text(pdf_path)
     except Exception as e:
         logger.error(f"Error extracting content from PDF {pdf_path}: {traceback.format_exc()}")
         try:
@@ -121,10 +210,6 @@ def pdf_content_extraction(pdf_path):
         except Exception as e:
             error_message = 'Unknown error'
         raise PDFContentExtractionError(error_message)
-    
-    content = '\n'.join([page.page_content for page in pages])
-    sanitized_content = content.replace('\x00', '')
-    return sanitized_content
 
 
 def website_content_extraction(url):
@@ -161,8 +246,8 @@ def website_content_extraction(url):
 
 def _update_data_source_success(data_source, title, content, scrape_tool):
     """Update data source with successful scrape results"""
-    data_source.title = title
-    data_source.content = content
+    data_source.title = clean_title(title)
+    data_source.content = clean_content(content)
     data_source.scrape_tool = scrape_tool
     data_source.error = ""
     data_source.user_error = ""
@@ -186,9 +271,21 @@ def _update_data_source_throttled(data_source, error):
     data_source.error = str(error)
     data_source.user_error = str(error)
 
-def process_website_data_sources_batch(data_sources):
+def _is_throttle_error(error):
+    """Whether the scrape was throttled, from the exception type, or the status code of an error message"""
+    if isinstance(error, WebsiteContentExtractionThrottleError):
+        return True
+    return bool(THROTTLE_STATUS_PATTERN.search(str(error)))
+
+def _is_timeout_error(error):
+    error = error.lower()
+    return 'timeout' in error or 'timed out' in error
+
+def process_website_data_sources_batch(data_sources, concurrency_controller=None):
     """
     Process multiple website data sources in batch.
+    If a concurrency controller is given, the scrapes wait for its rate limits and report their outcome to it.
+    Urls throttled by their host are not retried and are left NOT_PROCESSED.
     Returns: List of processed data sources
     """
     urls = [ds.url for ds in data_sources]
@@ -197,9 +294,14 @@ def process_website_data_sources_batch(data_sources):
     
     def process_urls(urls_to_process):
         """Process a batch of URLs and return remaining URLs to retry"""
+        if concurrency_controller:
+            concurrency_controller.acquire(urls_to_process)
+
         try:
             successful_results, failed_urls = scraper.scrape_urls_batch(urls_to_process)
         except WebsiteContentExtractionThrottleError as e:
+            if concurrency_controller:
+                concurrency_controller.on_backend_throttle()
             # Mark all data sources as NOT_PROCESSED when throttled
             for url in urls_to_process:
                 _update_data_source_throttled(url_to_data_source[url], e)
@@ -214,6 +316,8 @@ def process_website_data_sources_batch(data_sources):
                     content, 
                     scrape_tool
                 )
+                if concurrency_controller:
+                    concurrency_controller.on_success(url)
         
         # Handle failed URLs and collect URLs to retry
         failed_url_set = {url for url, _ in failed_urls}
@@ -223,6 +327,15 @@ def process_website_data_sources_batch(data_sources):
         for url in urls_to_process:
             if url in failed_url_set:
                 error = next((error for failed_url, error in failed_urls if failed_url == url), "")
+                is_throttle_error = _is_throttle_error(error)
+                # The scrapers give either the exception or its message
+                error = str(error)
+                if concurrency_controller and (is_throttle_error or _is_timeout_error(error)):
+                    concurrency_controller.on_throttle(url)
+                if is_throttle_error:
+                    _update_data_source_throttled(url_to_data_source[url], error)
+                    continue
+
                 _update_data_source_failure(
                     url_to_data_source[url],
                     error,
@@ -305,7 +418,7 @@ def sanitize_filename(filename):
     return clean_filename
 
 
-def fetch_data_source_content(integration, data_source):
+def fetch_data_source_content(integration, data_source, prefetched_contents=None):
     from core.models import DataSource
 
     if data_source.type == DataSource.Type.PDF:
@@ -317,22 +430,26 @@ def fetch_data_source_content(integration, data_source):
         data_source.content = content
         data_source.scrape_tool = scrape_tool
     elif data_source.type == DataSource.Type.YOUTUBE:
-        content = youtube_content_extraction(data_source.url)
-        data_source.title = content['metadata']['title']
-        data_source.content = content['content']
+        prefetched_content = (prefetched_contents or {}).get(data_source.url)
+        if prefetched_content:
+            data_source.title, data_source.content = prefetched_content
+        else:
+            content = youtube_content_extraction(data_source.url)
+            data_source.title = content['metadata']['title']
+            data_source.content = content['content']
         data_source.scrape_tool = 'youtube'
     elif data_source.type == DataSource.Type.JIRA:
-        title, content = jira_content_extraction(integration, data_source.url)
+        title, content = (prefetched_contents or {}).get(data_source.url) or jira_content_extraction(integration, data_source.url)
         data_source.title = title
         data_source.content = content
         data_source.scrape_tool = 'jira'
     elif data_source.type == DataSource.Type.ZENDESK:
-        title, content = zendesk_content_extraction(integration, data_source.url)
+        title, content = (prefetched_contents or {}).get(data_source.url) or zendesk_content_extraction(integration, data_source.url)
         data_source.title = title
         data_source.content = content
         data_source.scrape_tool = 'zendesk'
     elif data_source.type == DataSource.Type.CONFLUENCE:
-        title, content = confluence_content_extraction(integration, data_source.url)
+        title, content = (prefetched_contents or {}).get(data_source.url) or confluence_content_extraction(integration, data_source.url)
         data_source.title = title
         data_source.content = content
         data_source.scrape_tool = 'confluence'
@@ -558,10 +675,168 @@ class GitHubRepoStrategy(DataSourceStrategy):
             }
 
 
+NOT_FOLLOW_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.pdf', '.css', '.js']
+NOT_FOLLOW_WORDS = ["/release-notes/", "/releases/","/generated", "/cdn-cgi/", "/_modules/", 
+                    "/_static/", "/_sources/", "/_generated/", "/_downloads/", "/_sources/", 
+                    "/_autosummary/", "/tags/", "/tag/"]
+# Sitemaps list the translated pages too, which the spider filters by their html lang
+NON_ENGLISH_LOCALES = {"ar", "cs", "de", "es", "fa", "fr", "he", "hi", "it", "ja", "ko", "nl", "pl", "pt", "pt-br",
+                       "ru", "sv", "th", "tr", "uk", "vi", "zh", "zh-cn", "zh-tw", "zh-hans", "zh-hant"}
+
+
+def is_crawlable_url(url, start_url, original_url):
+    """Whether a discovered url is in the crawl scope and not an asset, versioned or generated page."""
+    clean_url = url.split('#')[0].split('?')[0]
+
+    if not clean_url.startswith(start_url) and not clean_url.startswith(original_url):
+        return False
+
+    if any(clean_url.endswith(ext) for ext in NOT_FOLLOW_EXTENSIONS):
+        return False
+
+    if re.search(r"/v\d+.*(?:/|$)", clean_url):
+        return False
+
+    if any(word in clean_url for word in NOT_FOLLOW_WORDS):
+        return False
+
+    return True
+
+
+def get_robots_sitemaps(url, session):
+    """Returns the sitemaps listed in the robots.txt of the url's site."""
+    parsed_url = urlparse(url)
+    try:
+        response = session.get(f'{parsed_url.scheme}://{parsed_url.netloc}/robots.txt', timeout=settings.SITEMAP_REQUEST_TIMEOUT_SECONDS)
+    except requests.RequestException as e:
+        logger.warning(f"Error fetching robots.txt of {url}: {e}")
+        return []
+
+    if response.status_code != 200:
+        return []
+
+    return [
+        line.split(':', 1)[1].strip()
+        for line in response.text.splitlines()
+        if line.lower().startswith('sitemap:') and line.split(':', 1)[1].strip()
+    ]
+
+
+def iter_sitemap_urls(sitemap_urls, session, should_stop=None):
+    """
+    Yields the page urls of the given sitemaps, following nested sitemap indexes breadth first.
+    Sitemaps are parsed while they are downloaded and parsed elements are discarded, so large sitemaps are not held in memory.
+    should_stop is checked before each sitemap is fetched, to stop early when the crawl is stopped.
+    """
+    queue = deque(sitemap_urls)
+    visited = set()
+    while queue and len(visited) < settings.SITEMAP_MAX_SITEMAPS:
+        if should_stop and should_stop():
+            return
+        sitemap_url = queue.popleft()
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+
+        try:
+            with session.get(sitemap_url, stream=True, timeout=settings.SITEMAP_REQUEST_TIMEOUT_SECONDS) as response:
+                if response.status_code != 200:
+                    continue
+
+                parser = ET.XMLPullParser(events=('start', 'end'))
+                decompressor = None
+                root = None
+                loc = None
+                for i, chunk in enumerate(response.iter_content(chunk_size=64 * 1024)):
+                    # .xml.gz sitemaps are served as gzip files, not with a gzip content encoding
+                    if i == 0 and chunk[:2] == b'\x1f\x8b':
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    parser.feed(decompressor.decompress(chunk) if decompressor else chunk)
+
+                    for event, element in parser.read_events():
+                        if root is None:
+                            root = element
+                        if event != 'end':
+                            continue
+
+                        tag = element.tag.rsplit('}', 1)[-1]
+                        if tag == 'loc':
+                            loc = (element.text or '').strip()
+                        elif tag in ('url', 'sitemap'):
+                            if loc and tag == 'url':
+                                yield loc
+                            elif loc:
+                                queue.append(loc)
+                            loc = None
+                            root.clear()
+        except (requests.RequestException, ET.ParseError, zlib.error) as e:
+            logger.warning(f"Error reading sitemap {sitemap_url}: {e}")
+
+
+def discover_sitemap_urls(url, link_limit=None, proxies=None, should_stop=None):
+    """
+    Discovers the crawlable urls of a website from its sitemaps.
+    Sitemaps are taken from the robots.txt, falling back to the sitemap.xml of the url and of its site.
+    The urls are only candidates, the spider requests them to check their status and language.
+    """
+    parsed_url = urlparse(url)
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0'
+    if proxies:
+        proxy = random.choice(proxies)
+        session.proxies = {'http': proxy, 'https': proxy}
+
+    sitemaps = get_robots_sitemaps(url, session)
+    if not sitemaps:
+        sitemaps = list(dict.fromkeys([
+            f"{url.rstrip('/')}/sitemap.xml",
+            f'{parsed_url.scheme}://{parsed_url.netloc}/sitemap.xml',
+        ]))
+
+    start_path = parsed_url.path.rstrip('/')
+    urls = {}
+    for sitemap_url in iter_sitemap_urls(sitemaps, session, should_stop=should_stop):
+        if not is_crawlable_url(sitemap_url, url, url):
+            continue
+
+        # The first path segment after the start url, e.g. /docs/fr/... for https://example.com/docs
+        segments = urlparse(sitemap_url).path[len(start_path):].strip('/').split('/')
+        if segments[0].lower() in NON_ENGLISH_LOCALES:
+            continue
+
+        normalized_url = InternalLinkSpider.normalize_url(sitemap_url)
+        if normalized_url not in urls:
+            urls[normalized_url] = sitemap_url
+            if link_limit and len(urls) >= link_limit:
+                break
+
+    return list(urls.values())
+
+
 def run_spider_process(url, crawl_state_id, link_limit):
     """Run spider in a separate process"""
     try:
-        settings = {
+        known_urls = []
+        discovery_mode = CrawlState.DiscoveryMode.SITEMAP_FIRST
+        if crawl_state_id:
+            discovery_mode = CrawlState.objects.filter(id=crawl_state_id).values_list('discovery_mode', flat=True).first() or discovery_mode
+
+        if discovery_mode == CrawlState.DiscoveryMode.SITEMAP_FIRST:
+            proxies = format_proxies(get_random_proxies()) if settings.ENV != 'selfhosted' else None
+            should_stop = (lambda: CrawlState.is_stop_requested(crawl_state_id)) if crawl_state_id else None
+            known_urls = discover_sitemap_urls(
+                url,
+                link_limit=link_limit if settings.ENV != 'selfhosted' else None,
+                proxies=proxies,
+                should_stop=should_stop
+            )
+            if should_stop and should_stop():
+                # The crawl state is already marked as stopped
+                logger.info(f"Crawl of {url} stopped during sitemap discovery")
+                return
+            logger.info(f"Discovered {len(known_urls)} urls from the sitemaps of {url}")
+
+        crawler_settings = {
             'LOG_ENABLED': False,
             'ROBOTSTXT_OBEY': False,
             'DOWNLOAD_TIMEOUT': 10,
@@ -575,13 +850,14 @@ def run_spider_process(url, crawl_state_id, link_limit):
             'AUTOTHROTTLE_TARGET_CONCURRENCY': 50,
         }
         
-        process = CrawlerProcess(settings)
+        process = CrawlerProcess(crawler_settings)
         process.crawl(
             InternalLinkSpider,
             start_urls=[url],
             original_url=url,
             crawl_state_id=crawl_state_id,
-            link_limit=link_limit
+            link_limit=link_limit,
+            known_urls=known_urls
         )
         process.start()
     except Exception as e:
@@ -623,10 +899,20 @@ class InternalLinkSpider(scrapy.Spider):
             super().__init__(*args, **kwargs)
             self.start_url = self.start_urls[0]
             self.original_url = kwargs.get('original_url')
+            # Urls discovered before crawling (e.g. from sitemaps), requested along with the start url
+            self.known_urls: List[str] = kwargs.get('known_urls') or []
+            self.normalized_known_urls: Set[str] = {self.normalize_url(url) for url in self.known_urls}
             self.internal_links: Set[str] = set()
+            # Internal links whose page was requested from a known url, possibly redirected
+            self.known_internal_links: Set[str] = set()
+            # Normalized urls that are already scheduled, to skip duplicate hrefs in O(1)
+            self.seen_urls: Set[str] = {self.normalize_url(self.start_url)}
             self.crawl_state_id = kwargs.get('crawl_state_id')
             self.link_limit = kwargs.get('link_limit', 1500)
             self.should_close = False
+            self.link_limit_reached = False
+            self.last_flush_time = time.monotonic()
+            self.last_flush_count = 0
             if settings.ENV != 'selfhosted':
                 proxies = format_proxies(get_random_proxies())
             else:
@@ -639,17 +925,73 @@ class InternalLinkSpider(scrapy.Spider):
             CrawlState.objects.get(id=self.crawl_state_id).end_time = timezone.now()
             CrawlState.objects.get(id=self.crawl_state_id).save()
 
+    @staticmethod
+    def normalize_url(url):
+        return url.split('#')[0].rstrip('/')
+
+    def make_request(self, url):
+        if settings.ENV == 'selfhosted':
+            meta = {'download_timeout': 10}
+        else:
+            meta = {'download_timeout': 10, 'proxy': random.choice(self.proxies)}
+        return scrapy.Request(
+            url,
+            callback=self.parse,
+            errback=self.handle_error,
+            meta=meta
+        )
+
+    def start_requests(self):
+        """
+        Requests the start url, then the known urls. They go through parse like linked pages,
+        so they are filtered by status and language and the links on them are followed.
+        """
+        yield from super().start_requests()
+        for url in self.known_urls:
+            normalized_url = self.normalize_url(url)
+            if normalized_url not in self.seen_urls:
+                self.seen_urls.add(normalized_url)
+                yield self.make_request(url)
+
+    def stop_spider(self):
+        self.should_close = True
+        # Tell scrapy to stop the spider
+        self.crawler.engine.close_spider(self, 'Crawl stopped by user')
+
     def check_crawl_state(self):
         """Check if the crawl should be stopped"""
-        if self.crawl_state_id:
-            crawl_state = CrawlState.objects.get(id=self.crawl_state_id)
-            if crawl_state.status == CrawlState.Status.STOPPED:
-                self.should_close = True
-                # Tell scrapy to stop the spider
-                self.crawler.engine.close_spider(self, 'Crawl stopped by user')
-                return True
+        if self.should_close:
+            return True
+        if self.crawl_state_id and CrawlState.is_stop_requested(self.crawl_state_id):
+            self.stop_spider()
+            return True
         return False
 
+    def flush_crawl_state(self):
+        """
+        Writes the discovered urls to the crawl state once per flush interval or batch of new links, instead of on every page.
+        The update only applies to running crawls, so it also detects crawls stopped without the stop flag.
+        """
+        if not self.crawl_state_id:
+            return
+
+        new_links = len(self.internal_links) - self.last_flush_count
+        interval_passed = time.monotonic() - self.last_flush_time >= settings.CRAWL_STATE_FLUSH_INTERVAL_SECONDS
+        if not interval_passed and new_links < settings.CRAWL_STATE_FLUSH_BATCH_SIZE:
+            return
+
+        updated = CrawlState.objects.filter(
+            id=self.crawl_state_id,
+            status=CrawlState.Status.RUNNING
+        ).update(discovered_urls=list(self.internal_links))
+        self.last_flush_time = time.monotonic()
+        self.last_flush_count = len(self.internal_links)
+
+        if not updated and not self.should_close:
+            status = CrawlState.objects.filter(id=self.crawl_state_id).values_list('status', flat=True).first()
+            if status == CrawlState.Status.STOPPED:
+                self.stop_spider()
+
     def parse(self, response):
         try:
             # First check if crawl has been stopped
@@ -674,20 +1016,22 @@ class InternalLinkSpider(scrapy.Spider):
             if response.status == 200 and is_english:
                 if response.url.startswith(self.start_url) or response.url.startswith(self.original_url):
                     self.internal_links.add(response.url)
-                    if self.crawl_state_id:
-                        crawl_state = CrawlState.objects.get(id=self.crawl_state_id)
-                        if crawl_state.status == CrawlState.Status.RUNNING:
-                            crawl_state.discovered_urls = list(self.internal_links)
-                            crawl_state.save(update_fields=['discovered_urls'])
+                    requested_url = (response.meta.get('redirect_urls') or [response.url])[0]
+                    if self.normalize_url(requested_url) in self.normalized_known_urls or self.normalize_url(response.url) in self.normalized_known_urls:
+                        self.known_internal_links.add(response.url)
+                    self.flush_crawl_state()
 
                 if settings.ENV != 'selfhosted' and len(self.internal_links) >= self.link_limit:
-                    if self.crawl_state_id:
+                    # Only the first page over the limit looks up the crawl state
+                    if self.crawl_state_id and not self.link_limit_reached:
                         crawl_state = CrawlState.objects.get(id=self.crawl_state_id)
                         if not crawl_state.user.is_admin:
                             crawl_state.status = CrawlState.Status.FAILED
                             crawl_state.error_message = f"Link limit of {self.link_limit} exceeded"
                             crawl_state.end_time = timezone.now()
                             crawl_state.save()
+                            self.crawler.engine.close_spider(self, 'Link limit exceeded')
+                    self.link_limit_reached = True
                     return
 
                 if len(self.internal_links) % 100 == 0:
@@ -699,36 +1043,13 @@ class InternalLinkSpider(scrapy.Spider):
 
                 for href in response.css('a::attr(href)').getall():
                     full_url = urljoin(response.url, href)
-                    clean_url = full_url.split('#')[0].split('?')[0]
-
-                    if not clean_url.startswith(self.start_url) and not clean_url.startswith(self.original_url):
+                    if not is_crawlable_url(full_url, self.start_url, self.original_url):
                         continue
                     
-                    if any(clean_url.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.pdf', '.css', '.js']):
-                        continue
-
-                    if re.search(r"/v\d+.*(?:/|$)", clean_url):
-                        continue
-
-                    not_follow_words = ["/release-notes/", "/releases/","/generated", "/cdn-cgi/", "/_modules/", 
-                                      "/_static/", "/_sources/", "/_generated/", "/_downloads/", "/_sources/", 
-                                      "/_autosummary/", "/tags/", "/tag/"]
-                    if any(word in clean_url for word in not_follow_words):
-                        continue
-                    
-                    normalized_url = full_url.rstrip('/')
-                    if not any(link.rstrip('/') == normalized_url for link in self.internal_links):
-                        if settings.ENV == 'selfhosted':
-                            meta = {'download_timeout': 10}
-                            time.sleep(0.1)
-                        else:
-                            meta = {'download_timeout': 10, 'proxy': random.choice(self.proxies)}
-                        yield scrapy.Request(
-                            full_url, 
-                            callback=self.parse,
-                            errback=self.handle_error,
-                            meta=meta
-                        )
+                    normalized_url = self.normalize_url(full_url)
+                    if normalized_url not in self.seen_urls:
+                        self.seen_urls.add(normalized_url)
+                        yield self.make_request(full_url)
         except Exception as e:
             logger.error(f"Exception {e} for url {response.url}")
             logger.error(f"Exception traceback: {traceback.format_exc()}")
@@ -754,6 +1075,8 @@ class InternalLinkSpider(scrapy.Spider):
                     crawl_state.status = CrawlState.Status.STOPPED if self.should_close else CrawlState.Status.COMPLETED
                     crawl_state.end_time = timezone.now()
                     crawl_state.discovered_urls = list(self.internal_links)
+                    crawl_state.discovered_from_sitemap = len(self.internal_links.intersection(self.known_internal_links))
+                    crawl_state.discovered_from_links = len(self.internal_links.difference(self.known_internal_links))
                     crawl_state.save()
             except Exception as e:
                 logger.error(f"Error updating crawl state on spider close: {str(e)}")
@@ -775,7 +1098,7 @@ class CrawlService:
         return user
 
     @staticmethod
-    def start_crawl(guru_slug, user, url, source=CrawlState.Source.API):
+    def start_crawl(guru_slug, user, url, source=CrawlState.Source.API, discovery_mode=None):
         from core.serializers import CrawlStateSerializer
         from core.tasks import crawl_website
         import re
@@ -792,6 +1115,10 @@ class CrawlService:
         if not url_pattern.match(url):
             return {'msg': 'Invalid URL format'}, 400
 
+        discovery_mode = discovery_mode or CrawlState.DiscoveryMode.SITEMAP_FIRST
+        if discovery_mode not in CrawlState.DiscoveryMode.values:
+            return {'msg': f'Invalid discovery mode. Must be one of: {", ".join(CrawlState.DiscoveryMode.values)}'}, 400
+
         user = CrawlService.get_user(user)
         try:
             guru_type = CrawlService.validate_and_get_guru_type(guru_slug, user)
@@ -818,7 +1145,8 @@ class CrawlService:
             link_limit=link_limit,
             guru_type=guru_type,
             user=user,
-            source=source
+            source=source,
+            discovery_mode=discovery_mode
         )
         crawl_website.delay(url, crawl_state.id, link_limit)
         return CrawlStateSerializer(crawl_state).data, 200
@@ -832,9 +1160,7 @@ class CrawlService:
         try:
             crawl_state = CrawlState.objects.get(id=crawl_id)
             if crawl_state.status == CrawlState.Status.RUNNING:
-                crawl_state.status = CrawlState.Status.STOPPED
-                crawl_state.end_time = datetime.now(UTC)
-                crawl_state.save()
+                crawl_state.stop()
             return CrawlStateSerializer(crawl_state).data, 200
         except CrawlState.DoesNotExist:
             return {'msg': 'Crawl not found'}, 404
@@ -900,13 +1226,13 @@ class YouTubeService:
         try:
             # Fetch videos using YouTubeRequester
             youtube = YouTubeRequester()
-            videos = youtube.fetch_all_playlist_videos(playlist_id)
+            video_ids = [video_id for page in youtube.iter_playlist_video_ids(playlist_id) for video_id in page]
             
             # Format response
             response_data = {
                 'playlist_id': playlist_id,
-                'video_count': len(videos),
-                'videos': [f"https://www.youtube.com/watch?v={video['contentDetails']['videoId']}" for video in videos]
+                'video_count': len(video_ids),
+                'videos': [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
                 # 'videos': [{
                     # 'title': video['snippet']['title'],
                     # 'description': video['snippet']['description'],
@@ -959,14 +1285,18 @@ class YouTubeService:
         try:
             # Fetch videos using YouTubeRequester
             youtube = YouTubeRequester()
-            videos = youtube.fetch_all_channel_videos(username=username, channel_id=channel_id)
+            video_ids = [
+                video_id
+                for page in youtube.iter_channel_video_ids(username=username, channel_id=channel_id)
+                for video_id in page
+            ]
             
             # Format response
             response_data = {
                 'channel_identifier': username or channel_id,
                 'identifier_type': 'username' if username else 'channel_id',
-                'video_count': len(videos),
-                'videos': [f"https://www.youtube.com/watch?v={video['contentDetails']['videoId']}" for video in videos]
+                'video_count': len(video_ids),
+                'videos': [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
                 # 'videos': [{
                     # 'title': video['snippet']['title'],
                     # 'description': video['snippet']['description'],
@@ -993,6 +1323,55 @@ class ConfluenceContentExtractionError(Exception):
     pass
 
 
+def prefetch_integration_contents(integration, data_sources):
+    """
+    Fetches the contents of the Jira, Zendesk or Confluence data sources of the integration concurrently,
+    within the limits of the integration.
+    Returns (title, content) by data source URL. Confluence space overviews and the contents that could not be fetched
+    are left out, they are fetched one by one with their extraction function.
+    """
+    from core.models import DataSource, Integration
+
+    def fetch_contents(ids_by_url, fetch):
+        if not ids_by_url:
+            return {}
+        items = fetch(list(set(ids_by_url.values())))
+        return {
+            url: (items[item_id]['title'], items[item_id]['content'])
+            for url, item_id in ids_by_url.items()
+            if item_id in items
+        }
+
+    if not integration:
+        return {}
+
+    if integration.type == Integration.Type.JIRA:
+        issue_keys = {ds.url: ds.url.split('/')[-1] for ds in data_sources if ds.type == DataSource.Type.JIRA}
+        return fetch_contents(issue_keys, JiraRequester(integration).get_issues) if issue_keys else {}
+
+    if integration.type == Integration.Type.ZENDESK:
+        zendesk_urls = [ds.url for ds in data_sources if ds.type == DataSource.Type.ZENDESK]
+        if not zendesk_urls:
+            return {}
+        zendesk_requester = ZendeskRequester(integration)
+        article_ids = {url: url.split('/')[-1].split('-')[0] for url in zendesk_urls if 'articles' in url}
+        ticket_ids = {url: url.split('/')[-1] for url in zendesk_urls if 'articles' not in url}
+        return {
+            **fetch_contents(article_ids, zendesk_requester.get_articles),
+            **fetch_contents(ticket_ids, zendesk_requester.get_tickets)
+        }
+
+    if integration.type == Integration.Type.CONFLUENCE:
+        page_ids = {
+            ds.url: ds.url.split('/')[-2]
+            for ds in data_sources
+            if ds.type == DataSource.Type.CONFLUENCE and not ds.url.endswith('/overview')
+        }
+        return fetch_contents(page_ids, ConfluenceRequester(integration).get_pages_content) if page_ids else {}
+
+    return {}
+
+
 def confluence_content_extraction(integration, confluence_page_url):
     try:
         confluence_requester = ConfluenceRequester(integration)
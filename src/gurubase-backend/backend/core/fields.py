@@ -0,0 +1,126 @@
+from django import forms
+from django.db import models
+
+
+class CompressedTextDescriptor:
+    """
+    Resolves the text of a CompressedTextField lazily from its content blob.
+    Rows without a blob hash (not backfilled yet) resolve to their legacy text column.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        content_hash = getattr(instance, self.field.attname)
+        if content_hash is None:
+            if self.field.legacy_field:
+                return getattr(instance, self.field.legacy_field)
+            return None
+
+        # The cached text is keyed by its hash, so it is discarded when the hash is refreshed from the db
+        cached = instance.__dict__.get(self.field.cache_name)
+        if cached is None or cached[0] != content_hash:
+            from core.models import ContentBlob
+            cached = (content_hash, ContentBlob.load(content_hash))
+            instance.__dict__[self.field.cache_name] = cached
+        return cached[1]
+
+    def __set__(self, instance, value):
+        from core.models import ContentBlob
+
+        content_hash = ContentBlob.get_hash(value) if value is not None else None
+        if content_hash is not None and content_hash != instance.__dict__.get(self.field.attname):
+            instance.__dict__[self.field.pending_name] = True
+        instance.__dict__[self.field.attname] = content_hash
+        instance.__dict__[self.field.cache_name] = (content_hash, value)
+
+        if self.field.legacy_field:
+            setattr(instance, self.field.legacy_field, None)
+
+
+class CompressedTextField(models.CharField):
+    """
+    Stores text in the content addressed ContentBlob table and keeps its sha256 in a `<name>_hash` column.
+    The text is read on first access and its blob is written on save.
+    """
+
+    def __init__(self, *args, legacy_field=None, **kwargs):
+        kwargs['max_length'] = 64
+        self.legacy_field = legacy_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['max_length']
+        if self.legacy_field:
+            kwargs['legacy_field'] = self.legacy_field
+        return name, path, args, kwargs
+
+    def get_attname(self):
+        return f'{self.name}_hash'
+
+    def contribute_to_class(self, cls, name, private_only=False):
+        super().contribute_to_class(cls, name, private_only=private_only)
+        self.cache_name = f'_{name}_text'
+        self.pending_name = f'_{name}_pending'
+        setattr(cls, name, CompressedTextDescriptor(self))
+
+    def pre_save(self, model_instance, add):
+        if model_instance.__dict__.get(self.pending_name):
+            from core.models import ContentBlob
+            ContentBlob.store_many([model_instance.__dict__[self.cache_name][1]])
+            del model_instance.__dict__[self.pending_name]
+        return getattr(model_instance, self.attname)
+
+    def value_from_object(self, obj):
+        return getattr(obj, self.name)
+
+    def formfield(self, **kwargs):
+        # Skip CharField.formfield, the form edits the text and not the 64 character hash
+        return models.Field.formfield(self, **{
+            'form_class': forms.CharField,
+            'widget': forms.Textarea,
+            **kwargs,
+        })
+
+
+def get_compressed_text_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, CompressedTextField)]
+
+
+def save_compressed_text(instances):
+    """Writes the pending content blobs of the instances with a single query, e.g. before a bulk_create."""
+    from core.models import ContentBlob
+
+    pending = []
+    for instance in instances:
+        for field in get_compressed_text_fields(type(instance)):
+            if instance.__dict__.get(field.pending_name):
+                pending.append((instance, field))
+
+    ContentBlob.store_many([instance.__dict__[field.cache_name][1] for instance, field in pending])
+    for instance, field in pending:
+        del instance.__dict__[field.pending_name]
+
+
+def prefetch_compressed_text(instances, *field_names):
+    """Loads the texts of the given compressed text fields of the instances with a single query."""
+    from core.models import ContentBlob
+
+    instances = list(instances)
+    if not instances:
+        return instances
+
+    fields = [instances[0]._meta.get_field(name) for name in field_names]
+    hashes = {getattr(instance, field.attname) for instance in instances for field in fields} - {None}
+    texts = ContentBlob.load_many(hashes)
+    for instance in instances:
+        for field in fields:
+            content_hash = getattr(instance, field.attname)
+            if content_hash in texts:
+                instance.__dict__[field.cache_name] = (content_hash, texts[content_hash])
+    return instances
@@ -6,7 +6,7 @@ import time
 import redis
 import hmac
 import hashlib
-import requests
+from core.http_client import get_http_session
 
 from core.github.models import GithubEvent
 from core.integrations.helpers import cleanup_title, get_trust_score_emoji, strip_first_header
@@ -129,32 +129,12 @@ class GithubAppHandler:
             if existing_token:
                 return existing_token
 
-            # Get a new app JWT
-            app_jwt = self._get_or_create_app_jwt(client_id, private_key)
-
-            # Request new installation access token
-            response = requests.post(
-                f"https://api.github.com/app/installations/{installation_id}/access_tokens",
-                headers={
-                    "Accept": "application/vnd.github+json",
-                    "Authorization": f"Bearer {app_jwt}",
-                    "X-GitHub-Api-Version": "2022-11-28"
-                }
-            )
-            
-            if response.status_code != 201:
-                raise GithubTokenError(f"Failed to get installation token. Status: {response.status_code}, Response: {response.text}")
-                
-            token_data = response.json()
-            
-            # Store in Redis with TTL of 55 minutes (slightly less than 1 hour expiration)
-            self.redis_client.setex(
-                redis_key,
-                3300,  # 55 minutes in seconds
-                token_data['token']
-            )
-            
-            return token_data['token']
+            # Only one worker requests a new token when it expires, the others wait for it and reuse it
+            with self.redis_client.lock(f'{redis_key}_lock', timeout=30, blocking_timeout=30):
+                existing_token = self.redis_client.get(redis_key)
+                if existing_token:
+                    return existing_token
+                return self._create_installation_jwt(installation_id, redis_key, client_id, private_key)
 
         except (GithubTokenError, GithubPrivateKeyError) as e:
             raise e
@@ -162,11 +142,40 @@ class GithubAppHandler:
             logger.error(f"Error getting GitHub installation access token: {e}")
             raise GithubInstallationTokenError(f"Failed to get GitHub installation access token: {str(e)}") from e
 
+    def _create_installation_jwt(self, installation_id, redis_key, client_id: str = None, private_key: str = None):
+        """Request a new installation access token and store it in Redis."""
+        # Get a new app JWT
+        app_jwt = self._get_or_create_app_jwt(client_id, private_key)
+
+        # Request new installation access token
+        response = get_http_session().post(
+            f"https://api.github.com/app/installations/{installation_id}/access_tokens",
+            headers={
+                "Accept": "application/vnd.github+json",
+                "Authorization": f"Bearer {app_jwt}",
+                "X-GitHub-Api-Version": "2022-11-28"
+            }
+        )
+        
+        if response.status_code != 201:
+            raise GithubTokenError(f"Failed to get installation token. Status: {response.status_code}, Response: {response.text}")
+            
+        token_data = response.json()
+        
+        # Store in Redis with TTL of 55 minutes (slightly less than 1 hour expiration)
+        self.redis_client.setex(
+            redis_key,
+            3300,  # 55 minutes in seconds
+            token_data['token']
+        )
+        
+        return token_data['token']
+
     def respond_to_github_issue_event(self, api_url, installation_id, formatted_response):
         installation_jwt = self._get_or_create_installation_jwt(installation_id)
 
         # Post the formatted response
-        response = requests.post(
+        response = get_http_session().post(
             f"{api_url}/comments",
             headers={
                 "Authorization": f"Bearer {installation_jwt}",
@@ -216,7 +225,7 @@ class GithubAppHandler:
             }
             
             # Make the GraphQL request
-            response = requests.post(
+            response = get_http_session().post(
                 self.github_graphql_url,
                 headers={
                     "Authorization": f"Bearer {installation_jwt}",
@@ -283,7 +292,7 @@ class GithubAppHandler:
             }
             
             # Make the GraphQL request
-            response = requests.post(
+            response = get_http_session().post(
                 self.github_graphql_url,
                 headers={
                     "Authorization": f"Bearer {installation_jwt}",
@@ -521,7 +530,7 @@ class GithubAppHandler:
             url = f"{api_url}/comments?sort=created&direction=desc&per_page=100"
             
             # Make the API request
-            response = requests.get(
+            response = get_http_session().get(
                 url,
                 headers={
                     "Authorization": f"Bearer {installation_jwt}",
@@ -556,7 +565,7 @@ class GithubAppHandler:
             url = f"{api_url}"
             
             # Make the API request
-            response = requests.get(
+            response = get_http_session().get(
                 url,
                 headers={
                     "Authorization": f"Bearer {installation_jwt}",
@@ -588,7 +597,7 @@ class GithubAppHandler:
             installation_jwt = self._get_or_create_app_jwt(client_id, private_key)
 
             # Make the API request
-            response = requests.get(
+            response = get_http_session().get(
                 f"{self.github_api_url}/app/installations/{installation_id}",
                 headers={
                     "Accept": "application/vnd.github+json",
@@ -623,7 +632,7 @@ class GithubAppHandler:
             access_token = self._get_or_create_installation_jwt(installation_id, client_id, private_key)
             
             # Fetch repositories
-            response = requests.get(
+            response = get_http_session().get(
                 f"{self.github_api_url}/installation/repositories?per_page=100",
                 headers={
                     "Accept": "application/vnd.github+json",
@@ -657,7 +666,7 @@ class GithubAppHandler:
             app_jwt = self._get_or_create_app_jwt()
             
             # Make the DELETE request
-            response = requests.delete(
+            response = get_http_session().delete(
                 f"{self.github_api_url}/app/installations/{installation_id}",
                 headers={
                     "Accept": "application/vnd.github+json",
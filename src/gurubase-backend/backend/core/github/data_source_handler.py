@@ -1,4 +1,7 @@
 import os
+import fcntl
+import hashlib
+import shutil
 import tempfile
 import logging
 from git import Repo
@@ -8,6 +11,7 @@ from core.utils import get_default_settings
 from core.exceptions import GitHubRepoContentExtractionError, GithubInvalidRepoError, GithubRepoSizeLimitError, GithubRepoFileCountLimitError
 import re
 import glob
+from concurrent.futures import ThreadPoolExecutor
 
 
 logger = logging.getLogger(__name__)
@@ -139,15 +143,110 @@ def extract_repo_name(repo_url):
     except Exception as e:
         raise GitHubRepoContentExtractionError(f"Invalid GitHub repository URL: {repo_url}")
 
-def clone_repository(repo_url):
-    """Clone a GitHub repository to a temporary directory."""
+# Skipped while reading and excluded from the sparse checkout
+ignored_directories = [
+    '.git', 'node_modules', '__pycache__', 'build', 'dist',
+    'venv', 'env', '.venv', '.env',  # Python virtual environments
+    'target', 'out',  # Java/Maven/Gradle build directories
+    'bin', 'obj',  # .NET build directories
+    'vendor',  # PHP/Go dependencies
+    'coverage', '.coverage',  # Test coverage reports
+    '.idea', '.vscode',  # IDE directories
+    'tmp', 'temp',  # Temporary directories
+    '.next', '.nuxt',  # Next.js/Nuxt.js build directories
+    'logs', 'log'  # Log directories
+]
+
+def get_sparse_checkout_patterns(include=True, glob_pattern=None):
+    """Convert the glob filter of a data source into sparse checkout patterns.
+    
+    The checked out files are a superset of the files accepted by read_repository, which still applies the glob filter.
+    Patterns without a slash are anchored to the repository root, as glob matches them only at the top level.
+    """
+    globs = []
+    if glob_pattern:
+        for pattern in expand_braces(glob_pattern):
+            pattern = pattern.strip()
+            # Like compile_glob_pattern, empty and "." segments (e.g. a leading "./") are ignored, git would match nothing with them
+            segments = [segment for segment in pattern.split('/') if segment and segment != '.']
+            if not segments:
+                continue
+            normalized = '/'.join(segments) + ('/' if pattern.endswith('/') else '')
+            globs.append(normalized if len(segments) > 1 else f'/{normalized}')
+
+    if globs and include:
+        patterns = list(globs)
+    else:
+        patterns = ['/*']
+        patterns.extend(f'!{pattern}' for pattern in globs)
+
+    patterns.extend(f'!{directory}/' for directory in ignored_directories if directory != '.git')
+    return patterns
+
+def get_remote_default_branch(repo):
+    """Get the default branch of the origin remote, None if it cannot be resolved."""
+    output = repo.git.ls_remote('--symref', 'origin', 'HEAD')
+    for line in output.splitlines():
+        if line.startswith('ref: refs/heads/') and line.endswith('HEAD'):
+            return line[len('ref: refs/heads/'):].split('\t')[0]
+    return None
+
+def update_repository_mirror(repo_url):
+    """Create or update the local mirror of a repository and return its path.
+    
+    Mirrors are bare clones of the latest commit of the default branch. Later syncs only fetch the new objects.
+    """
+    os.makedirs(settings.GITHUB_REPO_MIRROR_DIR, exist_ok=True)
+    mirror_path = os.path.join(settings.GITHUB_REPO_MIRROR_DIR, f'{hashlib.sha256(repo_url.encode()).hexdigest()}.git')
+
+    # Syncs of the same repository can run concurrently on the same worker
+    with open(f'{mirror_path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if os.path.exists(mirror_path):
+            try:
+                mirror = Repo(mirror_path)
+                branch = get_remote_default_branch(mirror)
+                if branch:
+                    mirror.git.fetch('--depth', '1', 'origin', f'+refs/heads/{branch}:refs/heads/{branch}')
+                    mirror.git.symbolic_ref('HEAD', f'refs/heads/{branch}')
+                    mirror.git.gc('--auto')
+                    mirror.close()
+                    logger.info(f"Updated the mirror of repository {repo_url}")
+                    return mirror_path
+                mirror.close()
+            except Exception as e:
+                logger.warning(f"Error updating the mirror of repository {repo_url}, cloning it again: {str(e)}")
+            shutil.rmtree(mirror_path, ignore_errors=True)
+
+        Repo.clone_from(repo_url, mirror_path, bare=True, depth=1).close()
+        logger.info(f"Created the mirror of repository {repo_url}")
+        return mirror_path
+
+def clone_repository(repo_url, include=True, glob_pattern=None):
+    """Clone a GitHub repository to a temporary directory.
+    
+    Only the latest commit is cloned, and only the files that can match the glob filter are checked out.
+    If GITHUB_REPO_MIRROR_DIR is set, the repository is cloned, with its own objects, from a local mirror that is updated in place.
+    Otherwise, blobs are fetched lazily, for the checked out files only.
+    """
     try:
         logger.info(f"Cloning repository {repo_url}")
         # Create a temporary directory
         temp_dir = tempfile.mkdtemp()
         
         # Clone the repository
-        repo = Repo.clone_from(repo_url, temp_dir)
+        if settings.GITHUB_REPO_MIRROR_DIR:
+            mirror_path = update_repository_mirror(repo_url)
+            # Not shared with the mirror: a concurrent sync may prune or recreate the mirror while this clone checks out.
+            # The local clone hardlinks the objects of the mirror, so it is still cheap.
+            repo = Repo.clone_from(mirror_path, temp_dir, no_checkout=True)
+        else:
+            repo = Repo.clone_from(repo_url, temp_dir, no_checkout=True, depth=1, single_branch=True, filter='blob:none')
+
+        repo.git.config('core.sparseCheckout', 'true')
+        with open(os.path.join(repo.git_dir, 'info', 'sparse-checkout'), 'w') as f:
+            f.write('\n'.join(get_sparse_checkout_patterns(include, glob_pattern)) + '\n')
+        repo.git.read_tree('-mu', 'HEAD')
         
         logger.info(f"Cloned repository {repo_url}")
         return temp_dir, repo
@@ -177,118 +276,181 @@ def get_file_content(file_path):
         logger.warning(f"Error reading file {file_path}: {str(e)}")
         return None
     
-def read_repository(repo_path, include=True, glob_pattern=None):
-    """Get the directory structure and file contents of the repository.
+def translate_glob_segment(segment):
+    """Translate a path segment of a glob pattern into a regex that does not cross directories."""
+    regex = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = segment.find(']', i + 2 if segment[i + 1:i + 2] in ('!', ']') else i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                content = segment[i + 1:end].replace('\\', '\\\\').replace('[', '\\[')
+                if content.startswith('!'):
+                    content = '^' + content[1:]
+                regex.append(f'[{content}]')
+                i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+def compile_glob_pattern(glob_pattern):
+    """Compile a glob pattern into a regex matching relative file paths.
     
-    Args:
-        repo_path (str): Path to the repository
-        include (bool): If True, only include files matching glob_pattern. If False, exclude files matching glob_pattern.
-        glob_pattern (str): Glob pattern to filter files. If None or empty, no filtering is applied.
-                          Supports brace expansion, e.g., "**/*.{js,ts}" will match both .js and .ts files.
+    Matches the same paths as glob.glob(pattern, recursive=True) from the repository root:
+    "**" matches zero or more directories, wildcards do not match hidden names,
+    and brace patterns like "**/*.{js,ts}" are expanded.
     """
-    structure = []
-    logger.info(f"Reading repository {repo_path}")
+    alternatives = []
+    for pattern in expand_braces(glob_pattern):
+        # Patterns ending with a slash only match directories
+        if pattern.endswith('/'):
+            continue
+        segments = [segment for segment in pattern.split('/') if segment and segment != '.']
+        regex = ''
+        for i, segment in enumerate(segments):
+            last = i == len(segments) - 1
+            if segment == '**':
+                regex += r'(?:(?!\.)[^/]+/)*(?!\.)[^/]+' if last else r'(?:(?!\.)[^/]+/)*'
+                continue
+            if glob.has_magic(segment) and not segment.startswith('.'):
+                regex += r'(?!\.)'
+            regex += translate_glob_segment(segment)
+            if not last:
+                regex += '/'
+        if regex:
+            alternatives.append(f'(?:{regex})')
 
+    if not alternatives:
+        # Matches nothing
+        return re.compile('(?!)')
+    return re.compile('^(?:' + '|'.join(alternatives) + ')$')
+
+def list_repository_files(repo_path, include=True, glob_pattern=None, file_count_limit=None, size_limit_bytes=None):
+    """List the files to read from the repository as (relative path, size) tuples, without reading them.
+    
+    Each file is stat'ed once. Raises as soon as the file count or the total size limit is exceeded.
+    """
     default_settings = get_default_settings()
 
     package_manifest_files = set(default_settings.package_manifest_files) # Turn into set to optimize existence check
     code_file_extensions = set(default_settings.code_file_extensions) # Turn into set to optimize existence check
 
-    # If glob pattern is provided, get matching files
-    matching_files = set()
-    if glob_pattern:
-        # Handle brace expansion and collect all matching files
-        patterns = expand_braces(glob_pattern)
-        for pattern in patterns:
-            # Make glob pattern relative to repo_path
-            full_pattern = os.path.join(repo_path, pattern)
-            matching_files.update(os.path.relpath(f, repo_path) for f in glob.glob(full_pattern, recursive=True))
+    matcher = compile_glob_pattern(glob_pattern) if glob_pattern else None
 
+    files_to_read = []
+    total_size = 0
     for root, dirs, files in os.walk(repo_path):
-        # Skip .git directory
-        if '.git' in dirs:
-            dirs.remove('.git')
-        
         # Skip common build directories and cache
-        dirs[:] = [d for d in dirs if d not in [
-            '.git', 'node_modules', '__pycache__', 'build', 'dist',
-            'venv', 'env', '.venv', '.env',  # Python virtual environments
-            'target', 'out',  # Java/Maven/Gradle build directories
-            'bin', 'obj',  # .NET build directories
-            'vendor',  # PHP/Go dependencies
-            'coverage', '.coverage',  # Test coverage reports
-            '.idea', '.vscode',  # IDE directories
-            'tmp', 'temp',  # Temporary directories
-            '.next', '.nuxt',  # Next.js/Nuxt.js build directories
-            'logs', 'log'  # Log directories
-        ]]
+        dirs[:] = [d for d in dirs if d not in ignored_directories]
         
         # Add files at current level
         for file in sorted(files):
-            file_path = os.path.join(root, file)
-            relative_path = os.path.relpath(file_path, repo_path)
-            
             # Process only if it's a code file or package manifest
             _, ext = os.path.splitext(file.lower())
-            if ext in code_file_extensions or file in package_manifest_files:
-                # Skip files larger than 10MB
-                if os.path.getsize(file_path) > 1024 * 1024 * 10:
+            if ext not in code_file_extensions and file not in package_manifest_files:
+                continue
+
+            file_path = os.path.join(root, file)
+            relative_path = os.path.relpath(file_path, repo_path)
+
+            # Apply glob pattern filtering if pattern is provided
+            if matcher:
+                matches_pattern = matcher.match(relative_path.replace(os.sep, '/')) is not None
+                if (include and not matches_pattern) or (not include and matches_pattern):
                     continue
-                
-                # Apply glob pattern filtering if pattern is provided
-                if glob_pattern:
-                    matches_pattern = relative_path in matching_files
-                    if (include and not matches_pattern) or (not include and matches_pattern):
-                        continue
-                
-                content = get_file_content(file_path)
-                structure.append({
-                    'path': relative_path,
+
+            try:
+                size = os.stat(file_path).st_size
+            except OSError as e:
+                logger.warning(f"Error reading file {file_path}: {str(e)}")
+                continue
+
+            # Skip files larger than 10MB
+            if size > 1024 * 1024 * 10:
+                continue
+
+            files_to_read.append((relative_path, size))
+            total_size += size
+
+            if file_count_limit is not None and len(files_to_read) > file_count_limit:
+                raise GithubRepoFileCountLimitError(f"The codebase exceeds the maximum file limit of {file_count_limit} files supported")
+            if size_limit_bytes is not None and total_size > size_limit_bytes:
+                raise GithubRepoSizeLimitError(f"The codebase exceeds the maximum size limit of {size_limit_bytes / (1024 * 1024):g} MB supported")
+
+    return files_to_read
+
+def iter_repository(repo_path, include=True, glob_pattern=None, batch_size=None, file_count_limit=None, size_limit_bytes=None):
+    """Yield the files of the repository in batches of {'path', 'content', 'size'} dicts.
+    
+    The limits are checked before any file is read. Files of a batch are read in parallel.
+    
+    Args:
+        repo_path (str): Path to the repository
+        include (bool): If True, only include files matching glob_pattern. If False, exclude files matching glob_pattern.
+        glob_pattern (str): Glob pattern to filter files. If None or empty, no filtering is applied.
+                          Supports brace expansion, e.g., "**/*.{js,ts}" will match both .js and .ts files.
+        batch_size (int): Number of files per batch. Defaults to GITHUB_FILE_BATCH_SIZE.
+        file_count_limit (int): Maximum number of files, None for no limit.
+        size_limit_bytes (int): Maximum total size of the files, None for no limit.
+    """
+    logger.info(f"Reading repository {repo_path}")
+    batch_size = batch_size or settings.GITHUB_FILE_BATCH_SIZE
+
+    files_to_read = list_repository_files(repo_path, include, glob_pattern, file_count_limit, size_limit_bytes)
+
+    with ThreadPoolExecutor(max_workers=settings.GITHUB_FILE_READ_WORKERS) as executor:
+        for i in range(0, len(files_to_read), batch_size):
+            batch = files_to_read[i:i + batch_size]
+            contents = executor.map(get_file_content, [os.path.join(repo_path, path) for path, _ in batch])
+            yield [
+                {
+                    'path': path,
                     'content': content,
-                    'size': os.path.getsize(file_path)
-                })
+                    'size': size
+                }
+                for (path, size), content in zip(batch, contents)
+            ]
 
     logger.info(f"Repository structure and contents read")
-    return structure
 
-def save_repository(data_source, structure, default_branch):
-    """Save the read repository structure and contents to the database."""
+def read_repository(repo_path, include=True, glob_pattern=None):
+    """Get the directory structure and file contents of the repository.
+    
+    Args:
+        repo_path (str): Path to the repository
+        include (bool): If True, only include files matching glob_pattern. If False, exclude files matching glob_pattern.
+        glob_pattern (str): Glob pattern to filter files. If None or empty, no filtering is applied.
+                          Supports brace expansion, e.g., "**/*.{js,ts}" will match both .js and .ts files.
+    """
+    return [file for batch in iter_repository(repo_path, include, glob_pattern) for file in batch]
+
+def save_repository(data_source, batches, default_branch):
+    """Save the read repository files to the database, batch by batch."""
     from core.models import GithubFile
-    bulk_save = []
+    from core.fields import save_compressed_text
 
-    if settings.ENV != 'selfhosted':
-        if len(structure) > data_source.guru_type.github_file_count_limit_per_repo_soft:
-            raise GithubRepoFileCountLimitError(f"The codebase ({len(structure)}) exceeds the maximum file limit of {data_source.guru_type.github_file_count_limit_per_repo_soft} files supported")
+    for batch in batches:
+        bulk_save = [
+            GithubFile(
+                data_source=data_source,
+                path=file['path'],
+                content=file['content'],
+                size=file['size'],
+                link=f'{data_source.url}/tree/{default_branch}/{file["path"]}'
+            )
+            for file in batch
+        ]
 
-        # Calculate total size of all files
-        total_size = sum(file['size'] for file in structure)
-        
-        # Check if total size exceeds limit
-        if total_size > data_source.guru_type.github_repo_size_limit_mb * 1024 * 1024:
-            raise GithubRepoSizeLimitError(f"The codebase ({total_size / (1024 * 1024):.2f} MB) exceeds the maximum size limit of {data_source.guru_type.github_repo_size_limit_mb} MB supported")
-
-    for file in structure:
-        bulk_save.append(GithubFile(
-            data_source=data_source,
-            path=file['path'],
-            content=file['content'],
-            size=file['size'],
-            link=f'{data_source.url}/tree/{default_branch}/{file["path"]}'
-        ))
-
-        if len(bulk_save) >= 100:
-            try:
-                GithubFile.objects.bulk_create(bulk_save)
-            except Exception as e:
-                for file in bulk_save:
-                    try:
-                        file.save()
-                    except Exception as e:
-                        logger.error(f"Error saving GitHub file {file.path}: {e}")
-            bulk_save = []
-
-    if bulk_save:
         try:
+            save_compressed_text(bulk_save)
             GithubFile.objects.bulk_create(bulk_save)
         except Exception as e:
             for file in bulk_save:
@@ -303,19 +465,30 @@ def process_github_repository(data_source):
     try:
         repo_url = data_source.url
         # Clone the repository
-        temp_dir, repo = clone_repository(repo_url)
+        temp_dir, repo = clone_repository(
+            repo_url,
+            data_source.github_glob_include,
+            data_source.github_glob_pattern)
         
         # Check default branch name
         default_branch = repo.active_branch.name
         logger.info(f"Default branch name: {default_branch}")
         
+        file_count_limit = None
+        size_limit_bytes = None
+        if settings.ENV != 'selfhosted':
+            file_count_limit = data_source.guru_type.github_file_count_limit_per_repo_soft
+            size_limit_bytes = data_source.guru_type.github_repo_size_limit_mb * 1024 * 1024
+
         # Get repository structure and contents
-        structure = read_repository(
+        batches = iter_repository(
             temp_dir, 
             data_source.github_glob_include, 
-            data_source.github_glob_pattern)
+            data_source.github_glob_pattern,
+            file_count_limit=file_count_limit,
+            size_limit_bytes=size_limit_bytes)
 
-        save_repository(data_source, structure, default_branch)
+        save_repository(data_source, batches, default_branch)
         
         # Clean up temporary directory
         repo.close()
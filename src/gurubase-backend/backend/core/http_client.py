@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPMetrics:
+    """
+    Request count, errors, latency, statuses and response bytes per upstream host, for this process.
+    A snapshot is logged every HTTP_CLIENT_METRICS_LOG_INTERVAL_SECONDS, with the requests sent since the start of the process.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+        self.last_log = time.monotonic()
+
+    def record(self, host, status, latency, size):
+        with self.lock:
+            metrics = self.hosts.setdefault(host, {
+                'requests': 0,
+                'errors': 0,
+                'latency_seconds': 0.0,
+                'max_latency_seconds': 0.0,
+                'bytes': 0,
+                'statuses': Counter(),
+            })
+            metrics['requests'] += 1
+            metrics['latency_seconds'] += latency
+            metrics['max_latency_seconds'] = max(metrics['max_latency_seconds'], latency)
+            metrics['bytes'] += size
+            if status is None or status >= 400:
+                metrics['errors'] += 1
+            metrics['statuses'][status or 'error'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                host: {
+                    **metrics,
+                    'statuses': dict(metrics['statuses']),
+                    'average_latency_seconds': metrics['latency_seconds'] / metrics['requests'],
+                }
+                for host, metrics in self.hosts.items()
+            }
+
+    def log_snapshot_if_due(self):
+        interval = settings.HTTP_CLIENT_METRICS_LOG_INTERVAL_SECONDS
+        with self.lock:
+            if not interval or time.monotonic() - self.last_log < interval:
+                return
+            self.last_log = time.monotonic()
+
+        for host, metrics in sorted(self.snapshot().items()):
+            logger.info(
+                f"HTTP metrics of process {os.getpid()} for {host}: {metrics['requests']} requests, {metrics['errors']} errors, "
+                f"{metrics['average_latency_seconds']:.3f}s average and {metrics['max_latency_seconds']:.3f}s max latency, "
+                f"{metrics['bytes']} bytes, statuses {metrics['statuses']}"
+            )
+
+
+class CappedRetry(Retry):
+    """Retry that waits at most backoff_max, including for the Retry-After header"""
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.backoff_max)
+
+
+class PooledSession(requests.Session):
+    """
+    Session shared by the outgoing requests of the process, see get_http_session.
+    - Keep-alive connection pools per host
+    - Default (connect, read) timeout for the requests that do not give one
+    - Retries with jittered backoff on connection errors, and on throttles and gateway errors of idempotent requests,
+      following the Retry-After header
+    - At most HTTP_CLIENT_HOST_MAX_CONCURRENCY concurrent requests per host
+    - Latency, status and bytes of the requests per host, in metrics logged periodically
+    """
+    def __init__(self):
+        super().__init__()
+        # Shared by the requests of all the integrations, so cookies set for one must not be sent with the others
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        retry = CappedRetry(
+            total=settings.HTTP_CLIENT_MAX_RETRIES,
+            backoff_factor=settings.HTTP_CLIENT_BACKOFF_FACTOR,
+            backoff_jitter=settings.HTTP_CLIENT_BACKOFF_FACTOR,
+            backoff_max=settings.HTTP_CLIENT_MAX_BACKOFF_SECONDS,
+            status_forcelist=[429, 502, 503, 504],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_CLIENT_POOL_HOSTS,
+            pool_maxsize=settings.HTTP_CLIENT_HOST_MAX_CONCURRENCY,
+            max_retries=retry,
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+        self.timeout = (settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS, settings.HTTP_CLIENT_READ_TIMEOUT_SECONDS)
+        self.metrics = HTTPMetrics()
+        self.host_semaphores = {}
+        self.host_semaphores_lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def get_host_semaphore(self, host):
+        with self.host_semaphores_lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(settings.HTTP_CLIENT_HOST_MAX_CONCURRENCY)
+            return self.host_semaphores[host]
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        host = (urlparse(url).hostname or '').lower()
+
+        start = time.perf_counter()
+        status, size = None, 0
+        try:
+            with self.get_host_semaphore(host):
+                response = super().request(method, url, *args, **kwargs)
+            status = response.status_code
+            # The body of a streamed response is not read yet
+            if kwargs.get('stream'):
+                size = int(response.headers.get('Content-Length') or 0)
+            else:
+                size = len(response.content)
+            return response
+        finally:
+            latency = time.perf_counter() - start
+            self.metrics.record(host, status, latency, size)
+            logger.debug(f"{method} {host} {status} in {latency:.3f}s, {size} bytes")
+            self.metrics.log_snapshot_if_due()
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> PooledSession:
+    """Returns the HTTP session of this process, creating it on first use (and after a fork)"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None or _http_session.pid != os.getpid():
+            _http_session = PooledSession()
+        return _http_session
+
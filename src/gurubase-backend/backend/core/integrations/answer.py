@@ -0,0 +1,110 @@
+import logging
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from core.guru_types import get_guru_type_object
+from core.handlers.response_handlers import APIResponseHandler
+from core.models import Binge, Integration, Question
+from core.throttling import ConcurrencyThrottleApiKey
+from core.utils import APIAskResponse, APIType, api_ask, search_question
+
+logger = logging.getLogger(__name__)
+
+INTEGRATION_API_TYPES = {
+    Integration.Type.DISCORD: APIType.DISCORD,
+    Integration.Type.SLACK: APIType.SLACK,
+    Integration.Type.GITHUB: APIType.GITHUB,
+}
+
+
+def check_integration_throttle(integration: Integration):
+    """
+    Applies the per API key throttle of the answer API (ConcurrencyThrottleApiKey) to the integration's API key.
+    Returns the throttle error message, or None if the question is allowed.
+    """
+    throttle = ConcurrencyThrottleApiKey()
+    request = SimpleNamespace(META={'HTTP_X_API_KEY': integration.api_key.key})
+    if throttle.allow_request(request, None):
+        return None
+    return f"Request was throttled. Expected available in {int(throttle.wait() or 0)} seconds."
+
+
+async def ask_integration_question(integration: Integration, question: str, binge: Binge, fetch_existing: bool):
+    """
+    Asks the question in the binge, as the API key of the integration.
+    The integration should be fetched with its guru_type and api_key__user, so no query runs on the event loop.
+    The guru type is fetched again, as the integration may be cached, and only active gurus answer like the answer API.
+    The preparation of the answer (summary, contexts) runs in a thread, the new answer is then streamed on the event loop.
+    """
+    throttle_error = await sync_to_async(check_integration_throttle, thread_sensitive=False)(integration)
+    if throttle_error:
+        return APIAskResponse.from_error(throttle_error)
+
+    try:
+        guru_type_object = await sync_to_async(get_guru_type_object, thread_sensitive=False)(integration.guru_type.slug)
+    except Exception as e:
+        return APIAskResponse.from_error(str(e))
+
+    parent = await Question.objects.filter(binge=binge).order_by('-date_updated').afirst()
+    return await sync_to_async(api_ask, thread_sensitive=False)(
+        question=question,
+        guru_type=guru_type_object,
+        binge=binge,
+        parent=parent,
+        fetch_existing=fetch_existing,
+        api_type=INTEGRATION_API_TYPES[integration.type],
+        user=integration.api_key.user,
+        async_stream=True
+    )
+
+
+async def stream_integration_answer(integration: Integration, question: str, binge: Binge):
+    """Async version of the streaming answer API for the integrations, yielding the text of the answer"""
+    api_response = await ask_integration_question(integration, question, binge, fetch_existing=False)
+    if api_response.error:
+        # Surfaced by get_integration_answer, like the answer API does
+        logger.info(f"No answer streamed for the question {question}: {api_response.error}")
+        return
+
+    if api_response.is_existing:
+        yield api_response.content
+        return
+
+    async for chunk in api_response.content:
+        yield chunk
+
+
+def format_integration_answer(question_obj: Question, binge: Binge) -> dict:
+    response_data = APIResponseHandler.format_question_response(question_obj)
+    if not binge.root_question:
+        binge.root_question = question_obj
+        binge.save()
+    return response_data
+
+
+async def get_integration_answer(integration: Integration, question: str, binge: Binge) -> dict:
+    """
+    Async version of the non-streaming answer API for the integrations.
+    Returns the answer streamed before by stream_integration_answer, in the format of the answer API.
+    """
+    api_response = await ask_integration_question(integration, question, binge, fetch_existing=True)
+    if api_response.error:
+        return {'msg': api_response.error}
+
+    question_obj = api_response.question_obj
+    if not api_response.is_existing:
+        # The answer was not saved before, e.g. the stream was interrupted
+        async for _ in api_response.content:
+            pass
+        question_obj = await sync_to_async(search_question, thread_sensitive=False)(
+            user=integration.api_key.user,
+            guru_type_object=integration.guru_type,
+            binge=binge,
+            slug=None,
+            question=api_response.question,
+            will_check_binge_auth=False,
+            include_api=True
+        )
+        if not question_obj:
+            return {'msg': "Sorry, I couldn't process your request."}
+
+    return await sync_to_async(format_integration_answer, thread_sensitive=False)(question_obj, binge)
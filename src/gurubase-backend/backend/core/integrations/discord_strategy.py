@@ -1,6 +1,6 @@
 import logging
 from django.conf import settings
-import requests
+from core.http_client import get_http_session
 
 from core.integrations.strategy import IntegrationStrategy
 logger = logging.getLogger(__name__)
@@ -23,7 +23,7 @@ class DiscordStrategy(IntegrationStrategy):
             'code': code,
             'redirect_uri': settings.DISCORD_REDIRECT_URI
         }
-        response = requests.post(token_url, data=data)
+        response = get_http_session().post(token_url, data=data)
         if not response.ok:
             logger.error(f"Discord API error: {response.text}")
             raise ValueError(f"Discord API error: {response.text}")
@@ -41,7 +41,7 @@ class DiscordStrategy(IntegrationStrategy):
     def list_channels(self) -> list:
         def _list_channels() -> list:
             integration = self.get_integration()
-            channels_response = requests.get(
+            channels_response = get_http_session().get(
                 f'https://discord.com/api/guilds/{integration.external_id}/channels',
                 headers={'Authorization': f"Bot {self._get_bot_token(integration)}"}
             )
@@ -96,7 +96,7 @@ class DiscordStrategy(IntegrationStrategy):
                     'content': '👋 Hello! This is a test message from your Guru. I am working correctly!'
                 }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = get_http_session().post(url, headers=headers, json=data)
             response.raise_for_status()
             return True
 
@@ -119,7 +119,7 @@ class DiscordStrategy(IntegrationStrategy):
                 'client_secret': settings.DISCORD_CLIENT_SECRET,
                 'token': integration.access_token
             }
-            response = requests.post(token_url, headers=headers, data=data)
+            response = get_http_session().post(token_url, headers=headers, data=data)
             response.raise_for_status()
 
         return self.handle_api_call(_revoke_token)
@@ -134,7 +134,7 @@ class DiscordStrategy(IntegrationStrategy):
                 'grant_type': 'refresh_token',
                 'refresh_token': refresh_token
             }
-            response = requests.post(token_url, data=data)
+            response = get_http_session().post(token_url, data=data)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -143,7 +143,7 @@ class DiscordStrategy(IntegrationStrategy):
 
     def fetch_workspace_details(self, bot_token: str) -> dict:
         """Fetch Discord guild details using bot token"""
-        response = requests.get(
+        response = get_http_session().get(
             'https://discord.com/api/v10/users/@me/guilds',
             headers={
                 'Authorization': f'Bot {bot_token}',
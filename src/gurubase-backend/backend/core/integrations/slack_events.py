@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SLACK_EVENTS_STREAM = 'slack_events'
+SLACK_EVENTS_GROUP = 'slack_event_workers'
+
+redis_client = redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    charset="utf-8",
+    decode_responses=True,
+)
+
+
+def is_slack_bot_mention(data):
+    """Whether the event is a user message mentioning the bot, the only events the bot answers"""
+    event = data.get('event') or {}
+    if event.get('type') != 'message' or 'subtype' in event or event.get('user') == event.get('bot_id'):
+        return False
+    bot_user_id = (data.get('authorizations') or [{}])[0].get('user_id')
+    return bool(bot_user_id and f"<@{bot_user_id}>" in event.get('text', ''))
+
+
+def enqueue_slack_event(data):
+    """
+    Adds the Slack event to the durable event queue, unless it was already received.
+    Slack redelivers the events it does not get a response for in 3 seconds, with the same event_id.
+    Returns False for such duplicates.
+    """
+    event_id = data.get('event_id')
+    if event_id and not redis_client.set(f'slack_event:{event_id}', 1, nx=True, ex=settings.SLACK_EVENT_DEDUP_TIMEOUT_SECONDS):
+        return False
+
+    redis_client.xadd(
+        SLACK_EVENTS_STREAM,
+        {'data': json.dumps(data)},
+        maxlen=settings.SLACK_EVENT_STREAM_MAX_LENGTH,
+        approximate=True
+    )
+    return True
+
+
+class SlackEventWorker:
+    """
+    Consumes the Slack event queue on a single event loop.
+    - At most SLACK_EVENT_WORKER_CONCURRENCY events are handled at once, and at most
+      SLACK_EVENT_WORKSPACE_CONCURRENCY of them per workspace, so a burst in one workspace does not starve the others.
+    - An event is removed from the queue once handled. The events of a crashed worker, and the events whose handling
+      failed, are claimed by the others after SLACK_EVENT_CLAIM_IDLE_SECONDS. An event is dropped after
+      SLACK_EVENT_MAX_ATTEMPTS failed attempts.
+    - An event is marked as handled, keyed by its event_id, only after it is answered. While it is being answered,
+      a lease of SLACK_EVENT_LEASE_SECONDS, renewed until the answer is sent, keeps the worker that claimed it from
+      answering it a second time. The lease is taken only once the event has its turn in the workspace.
+    """
+    def __init__(self, handler, consumer_name=None):
+        self.handler = handler
+        self.consumer_name = consumer_name or f'{socket.gethostname()}-{os.getpid()}'
+        self.redis = redis.asyncio.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=0,
+            decode_responses=True,
+        )
+        self.workspace_semaphores = {}
+        self.tasks = set()
+        self.last_claim = 0
+
+    async def create_group(self):
+        try:
+            await self.redis.xgroup_create(SLACK_EVENTS_STREAM, SLACK_EVENTS_GROUP, id='0', mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def get_workspace_semaphore(self, team_id):
+        if team_id not in self.workspace_semaphores:
+            self.workspace_semaphores[team_id] = asyncio.Semaphore(settings.SLACK_EVENT_WORKSPACE_CONCURRENCY)
+        return self.workspace_semaphores[team_id]
+
+    async def remove_entry(self, entry_id):
+        await self.redis.xack(SLACK_EVENTS_STREAM, SLACK_EVENTS_GROUP, entry_id)
+        await self.redis.xdel(SLACK_EVENTS_STREAM, entry_id)
+
+    async def handle_entry(self, entry_id, fields):
+        try:
+            try:
+                data = json.loads(fields['data'])
+            except (KeyError, ValueError) as e:
+                logger.error(f"Dropping the malformed Slack event {entry_id}: {e}")
+                await self.remove_entry(entry_id)
+                return
+            await self.handle_event(entry_id, data)
+        except Exception as e:
+            # Left pending, the event is claimed again after SLACK_EVENT_CLAIM_IDLE_SECONDS
+            logger.error(f"Error while handling Slack event {entry_id}: {e}", exc_info=True)
+        finally:
+            self.pending.release()
+
+    async def renew_lease(self, lease_key):
+        """Keeps the lease of an event while it is being answered, however long the answer takes"""
+        while True:
+            await asyncio.sleep(settings.SLACK_EVENT_LEASE_SECONDS / 3)
+            await self.redis.expire(lease_key, settings.SLACK_EVENT_LEASE_SECONDS)
+
+    async def handle_event(self, entry_id, data):
+        event_id = data.get('event_id') or entry_id
+        handled_key = f'slack_event_handled:{event_id}'
+        if await self.redis.exists(handled_key):
+            logger.info(f"Skipping the already handled Slack event {event_id}")
+            await self.remove_entry(entry_id)
+            return
+
+        # The lease is taken once the event can be answered. Events waiting for their turn may be claimed by the
+        # others in the meantime, the lease and the handled mark below keep them from being answered twice.
+        async with self.get_workspace_semaphore(data.get('team_id')):
+            async with self.slots:
+                lease_key = f'slack_event_processing:{event_id}'
+                if not await self.redis.set(lease_key, self.consumer_name, nx=True, ex=settings.SLACK_EVENT_LEASE_SECONDS):
+                    # Being handled by another worker, or by a crashed one until its lease expires
+                    logger.info(f"Slack event {event_id} is being handled by another worker")
+                    return
+
+                if await self.redis.exists(handled_key):
+                    # Handled by another worker while this one was waiting
+                    logger.info(f"Skipping the already handled Slack event {event_id}")
+                    await self.redis.delete(lease_key)
+                    await self.remove_entry(entry_id)
+                    return
+
+                attempts_key = f'slack_event_attempts:{event_id}'
+                attempts = await self.redis.incr(attempts_key)
+                await self.redis.expire(attempts_key, settings.SLACK_EVENT_DEDUP_TIMEOUT_SECONDS)
+                lease_renewal = asyncio.create_task(self.renew_lease(lease_key))
+                try:
+                    await self.handler(data)
+                except Exception as e:
+                    await self.redis.delete(lease_key)
+                    if attempts >= settings.SLACK_EVENT_MAX_ATTEMPTS:
+                        logger.error(f"Dropping Slack event {event_id} after {attempts} failed attempts: {e}", exc_info=True)
+                        await self.remove_entry(entry_id)
+                    else:
+                        logger.warning(f"Attempt {attempts} of Slack event {event_id} failed, it will be retried: {e}", exc_info=True)
+                    return
+                finally:
+                    lease_renewal.cancel()
+
+                await self.redis.set(handled_key, 1, ex=settings.SLACK_EVENT_DEDUP_TIMEOUT_SECONDS)
+                await self.redis.delete(lease_key)
+                await self.remove_entry(entry_id)
+
+    async def start(self, entries):
+        for entry_id, fields in entries:
+            await self.pending.acquire()
+            task = asyncio.create_task(self.handle_entry(entry_id, fields))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def claim_stale_entries(self):
+        self.last_claim = time.monotonic()
+        _, entries, _ = await self.redis.xautoclaim(
+            SLACK_EVENTS_STREAM,
+            SLACK_EVENTS_GROUP,
+            self.consumer_name,
+            min_idle_time=settings.SLACK_EVENT_CLAIM_IDLE_SECONDS * 1000,
+            count=settings.SLACK_EVENT_WORKER_CONCURRENCY
+        )
+        if entries:
+            logger.info(f"Claimed {len(entries)} stale Slack events")
+        await self.start(entries)
+
+    async def run(self):
+        # Reads ahead of the handled events, so the events of a busy workspace waiting for their turn do not hold back the others
+        self.slots = asyncio.Semaphore(settings.SLACK_EVENT_WORKER_CONCURRENCY)
+        self.pending = asyncio.Semaphore(settings.SLACK_EVENT_WORKER_CONCURRENCY * 4)
+        await self.create_group()
+        logger.info(f"Slack event worker {self.consumer_name} started")
+
+        while True:
+            if time.monotonic() - self.last_claim > settings.SLACK_EVENT_CLAIM_IDLE_SECONDS:
+                await self.claim_stale_entries()
+
+            response = await self.redis.xreadgroup(
+                SLACK_EVENTS_GROUP,
+                self.consumer_name,
+                {SLACK_EVENTS_STREAM: '>'},
+                count=settings.SLACK_EVENT_WORKER_CONCURRENCY,
+                block=5000
+            )
+            for _, entries in response or []:
+                await self.start(entries)
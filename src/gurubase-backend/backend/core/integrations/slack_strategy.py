@@ -1,6 +1,6 @@
 import logging
 from django.conf import settings
-import requests
+from core.http_client import get_http_session
 
 from core.integrations.strategy import IntegrationStrategy
 
@@ -14,7 +14,7 @@ class SlackStrategy(IntegrationStrategy):
             'client_secret': settings.SLACK_CLIENT_SECRET,
             'code': code
         }
-        response = requests.post(token_url, data=data)
+        response = get_http_session().post(token_url, data=data)
         response.raise_for_status()
         return response.json()
 
@@ -39,7 +39,7 @@ class SlackStrategy(IntegrationStrategy):
                 if cursor:
                     params['cursor'] = cursor
                     
-                response = requests.get(
+                response = get_http_session().get(
                     'https://slack.com/api/conversations.list',
                     headers={'Authorization': f"Bearer {integration.access_token}"},
                     params=params
@@ -95,7 +95,7 @@ class SlackStrategy(IntegrationStrategy):
             headers = {
                 'Authorization': f'Bearer {integration.access_token}'
             }
-            response = requests.get(revoke_url, headers=headers)
+            response = get_http_session().get(revoke_url, headers=headers)
             response_data = response.json()
             
             if not response_data.get('ok', False):
@@ -112,7 +112,7 @@ class SlackStrategy(IntegrationStrategy):
 
     def fetch_workspace_details(self, bot_token: str) -> dict:
         """Fetch Slack workspace details using bot token"""
-        response = requests.post(
+        response = get_http_session().post(
             'https://slack.com/api/auth.test',
             headers={
                 'Authorization': f'Bearer {bot_token}'
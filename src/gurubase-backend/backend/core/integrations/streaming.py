@@ -0,0 +1,179 @@
+import asyncio
+import codecs
+import logging
+import threading
+import time
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+STREAMING_INDICATOR = ':clock1: _streaming..._'
+
+
+async def iter_streaming_content(streaming_content):
+    """
+    Yields the chunks of a sync streaming response.
+    The whole response is iterated in a single worker thread, instead of switching threads for every chunk.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for chunk in streaming_content:
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            if hasattr(streaming_content, 'close'):
+                streaming_content.close()
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = asyncio.ensure_future(sync_to_async(produce, thread_sensitive=False)())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # Stops generating the answer if the consumer gave up on it
+        stopped.set()
+        await producer
+
+
+async def iter_answer_lines(streaming_content):
+    """
+    Yields the lines of a streamed answer as they complete, the last one possibly without a newline.
+    streaming_content is either the content of a sync streaming response or an async iterator.
+    """
+    if not hasattr(streaming_content, '__aiter__'):
+        streaming_content = iter_streaming_content(streaming_content)
+
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    line_buffer = ''
+    async for chunk in streaming_content:
+        line_buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else str(chunk)
+        *lines, line_buffer = line_buffer.split('\n')
+        for line in lines:
+            yield line
+    line_buffer += decoder.decode(b'', final=True)
+    if line_buffer:
+        yield line_buffer
+
+
+class IncrementalFormatter:
+    """
+    Formats a streamed answer line by line, so each line is formatted once instead of reformatting the whole answer.
+    Like strip_first_header, the leading title of the answer is dropped. Blank lines are skipped while streaming.
+    """
+    def __init__(self, format_line):
+        self.format_line = format_line
+        self.text = ''
+        self.started = False
+        self.header_stripped = False
+
+    def add_line(self, line):
+        """Adds the line to the text, and returns its formatted version ('' if the line is skipped)"""
+        if not line.strip():
+            return ''
+        if not self.started:
+            self.started = True
+            if line.startswith('#'):
+                self.header_stripped = True
+                return ''
+        elif self.header_stripped and not self.text:
+            line = line.lstrip()
+
+        formatted = self.format_line(line) + '\n'
+        self.text += formatted
+        return formatted
+
+
+class ChannelRateLimiter:
+    """Spaces the message updates sent to a channel at least min_interval apart, or longer once the platform throttles them"""
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.next_time = 0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_time = time.monotonic() + self.min_interval
+
+    def on_throttle(self, retry_after):
+        self.next_time = max(self.next_time, time.monotonic() + retry_after)
+
+
+channel_rate_limiters = {}
+
+
+def get_channel_rate_limiter(key, min_interval):
+    """Returns the rate limiter shared by the conversations in the channel, e.g. 'slack:C123'"""
+    if key not in channel_rate_limiters:
+        if len(channel_rate_limiters) >= 10000:
+            channel_rate_limiters.clear()
+        channel_rate_limiters[key] = ChannelRateLimiter(min_interval)
+    return channel_rate_limiters[key]
+
+
+class CoalescingMessageUpdater:
+    """
+    Keeps a chat message up to date with the latest text given to update(), without waiting for the platform.
+    Updates are sent in the background through the rate limiter of the channel. The texts given while an update
+    is waiting or in flight are coalesced, so only the latest one is sent next.
+    - send: async callable that replaces the text of the message
+    - get_retry_after: returns the seconds to wait if the send error is a throttle, None otherwise
+    """
+    def __init__(self, send, rate_limiter, get_retry_after=None, max_throttle_retries=5):
+        self.send = send
+        self.rate_limiter = rate_limiter
+        self.get_retry_after = get_retry_after or (lambda e: None)
+        self.max_throttle_retries = max_throttle_retries
+        self.latest = None
+        self.sent = None
+        self.task = None
+
+    def update(self, text):
+        """Schedules the text to be sent. Raises the error of a previously failed update."""
+        if self.task and self.task.done() and not self.task.cancelled() and self.task.exception():
+            raise self.task.exception()
+        self.latest = text
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        throttle_retries = 0
+        while self.latest != self.sent:
+            await self.rate_limiter.wait()
+            text = self.latest
+            try:
+                await self.send(text)
+            except Exception as e:
+                retry_after = self.get_retry_after(e)
+                if retry_after is None or throttle_retries >= self.max_throttle_retries:
+                    raise
+                throttle_retries += 1
+                logger.warning(f"Message update throttled, retrying after {retry_after} seconds")
+                self.rate_limiter.on_throttle(retry_after)
+                continue
+            self.sent = text
+
+    async def flush(self):
+        """Waits until the latest text is sent, raising the error if it could not be"""
+        if self.task:
+            await self.task
+
+    def cancel(self):
+        """Drops the pending update, e.g. before replacing the message with an error"""
+        if self.task:
+            self.task.cancel()
@@ -0,0 +1,491 @@
+import io
+import json
+import logging
+import os
+import re
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from django.conf import settings
+from django.db import transaction
+from core.guru_types import get_guru_type_prompt_map
+from core.models import DataSource, LLMBatchJob, Summarization, SummaryQuestionGeneration
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBatchError(Exception):
+    pass
+
+
+def get_strict_json_schema(schema):
+    """
+    The JSON schema of a pydantic model for the strict structured outputs: every property is required
+    and no other property is allowed.
+    """
+    if isinstance(schema, list):
+        return [get_strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    schema = {key: get_strict_json_schema(value) for key, value in schema.items()}
+    if schema.get('type') == 'object' and 'properties' in schema:
+        schema['additionalProperties'] = False
+        schema['required'] = list(schema['properties'])
+    return schema
+
+
+class LLMBatchProvider(ABC):
+    """
+    Runs LLM requests as a batch job, asynchronously and outside of the rate limits of the interactive requests.
+    A request is a dict with custom_id, model, prompt and response_format (summary or questions).
+    """
+    name = None
+    # Price of the batch tokens relative to the regular ones
+    cost_multiplier = 1
+
+    def supports_model(self, model_name):
+        return True
+
+    @abstractmethod
+    def submit(self, requests):
+        """Submits the requests, returns the id of the batch job"""
+        pass
+
+    @abstractmethod
+    def get_results(self, external_id):
+        """
+        Returns None while the job is running. Then returns by custom id either {'response': dict, 'usage': dict}
+        or {'error': str}. Raises LLMBatchError if the job failed as a whole.
+        """
+        pass
+
+
+class OpenAIBatchProvider(LLMBatchProvider):
+    """The OpenAI Batch API, at half the price of the regular requests, completed within 24 hours"""
+    name = 'openai'
+    cost_multiplier = 0.5
+
+    def __init__(self):
+        from core.requester import OpenAIRequester
+        requester = OpenAIRequester()
+        requester._ensure_client_initialized()
+        self.client = requester.client
+        self.is_ollama = requester._is_ollama
+
+    def supports_model(self, model_name):
+        return not self.is_ollama and model_name.startswith('gpt')
+
+    def get_response_format(self, response_format):
+        from core.requester import DataSourceSummary, QuestionGenerationResponse
+        response_formats = {'summary': DataSourceSummary, 'questions': QuestionGenerationResponse}
+        model = response_formats[response_format]
+        return {
+            'type': 'json_schema',
+            'json_schema': {
+                'name': model.__name__,
+                'schema': get_strict_json_schema(model.model_json_schema()),
+                'strict': True,
+            },
+        }
+
+    def submit(self, requests):
+        lines = [
+            json.dumps({
+                'custom_id': request['custom_id'],
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': request['model'],
+                    'messages': [{'role': 'user', 'content': request['prompt']}],
+                    'response_format': self.get_response_format(request['response_format']),
+                    'temperature': 0,
+                },
+            })
+            for request in requests
+        ]
+        input_file = self.client.files.create(file=('batch.jsonl', io.BytesIO('\n'.join(lines).encode())), purpose='batch')
+        batch = self.client.batches.create(input_file_id=input_file.id, endpoint='/v1/chat/completions', completion_window='24h')
+        return batch.id
+
+    def get_results(self, external_id):
+        batch = self.client.batches.retrieve(external_id)
+        if batch.status in ('validating', 'in_progress', 'finalizing', 'cancelling'):
+            return None
+        if batch.status == 'failed':
+            raise LLMBatchError(f"OpenAI batch {external_id} failed: {batch.errors}")
+
+        # Expired and cancelled batches have the results of the requests completed until then
+        results = {}
+        for file_id in [batch.output_file_id, batch.error_file_id]:
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                if item.get('error') or response.get('status_code') != 200:
+                    results[item['custom_id']] = {'error': str(item.get('error') or response.get('body'))}
+                    continue
+                body = response['body']
+                results[item['custom_id']] = {
+                    'response': json.loads(body['choices'][0]['message']['content']),
+                    'usage': {
+                        'prompt_tokens': body['usage']['prompt_tokens'],
+                        'completion_tokens': body['usage']['completion_tokens'],
+                        'cached_prompt_tokens': (body['usage'].get('prompt_tokens_details') or {}).get('cached_tokens', 0),
+                    },
+                }
+        return results
+
+
+class LocalBatchProvider(LLMBatchProvider):
+    """
+    Stand-in provider backed by files under LLM_BATCH_LOCAL_DIR, for tests and local development.
+    The requests of a job are written to {job}/input.jsonl, and the job is complete once {job}/output.jsonl exists,
+    see complete.
+    """
+    name = 'local'
+
+    def __init__(self, directory=None):
+        self.directory = directory or settings.LLM_BATCH_LOCAL_DIR
+
+    def submit(self, requests):
+        external_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.directory, external_id))
+        with open(os.path.join(self.directory, external_id, 'input.jsonl'), 'w') as f:
+            for request in requests:
+                f.write(json.dumps(request) + '\n')
+        return external_id
+
+    def get_requests(self, external_id):
+        with open(os.path.join(self.directory, external_id, 'input.jsonl')) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def complete(self, external_id, respond):
+        """Completes the job with the responses returned by respond(request). The requests it raises for fail."""
+        with open(os.path.join(self.directory, external_id, 'output.jsonl'), 'w') as f:
+            for request in self.get_requests(external_id):
+                try:
+                    result = {'response': respond(request), 'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_prompt_tokens': 0}}
+                except Exception as e:
+                    result = {'error': str(e)}
+                f.write(json.dumps({'custom_id': request['custom_id'], **result}) + '\n')
+
+    def get_results(self, external_id):
+        output_path = os.path.join(self.directory, external_id, 'output.jsonl')
+        if not os.path.exists(output_path):
+            return None
+        results = {}
+        with open(output_path) as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    results[item.pop('custom_id')] = item
+        return results
+
+
+def get_llm_batch_provider(model_name):
+    """Returns the provider of LLM_BATCH_PROVIDER if batch jobs are enabled and it can run the model, None otherwise"""
+    if not settings.LLM_BATCH_PROVIDER:
+        return None
+
+    if settings.LLM_BATCH_PROVIDER == OpenAIBatchProvider.name:
+        provider = OpenAIBatchProvider()
+    elif settings.LLM_BATCH_PROVIDER == LocalBatchProvider.name:
+        provider = LocalBatchProvider()
+    else:
+        raise ValueError(f"Invalid LLM batch provider: {settings.LLM_BATCH_PROVIDER}")
+
+    if not provider.supports_model(model_name):
+        logger.warning(f"LLM batch provider {provider.name} does not support the model {model_name}, running the requests one by one")
+        return None
+    return provider
+
+
+def get_failed_attempts(guru_type, kind):
+    """Returns the number of jobs each request of the guru type failed in, by custom id"""
+    attempts = Counter()
+    for failed_requests in LLMBatchJob.objects.filter(guru_type=guru_type, kind=kind).exclude(failed_requests={}).values_list('failed_requests', flat=True):
+        attempts.update(failed_requests.keys())
+    return attempts
+
+
+class LLMBatch:
+    """
+    Collects the LLM requests of a guru type, and what to create from their results, into a batch job.
+    Each request has a custom id naming what it creates, so a result is never applied twice.
+    """
+    def __init__(self, guru_type, kind, model_name):
+        self.guru_type = guru_type
+        self.kind = kind
+        self.model_name = model_name
+        self.requests = []
+        self.targets = {}
+
+    def add(self, custom_id, prompt, response_format, target):
+        if custom_id in self.targets:
+            return
+        self.requests.append({'custom_id': custom_id, 'model': self.model_name, 'prompt': prompt, 'response_format': response_format})
+        self.targets[custom_id] = target
+
+    def add_initial_summarization(self, data_source, source_content, content_metadata, split_num, chunk_count):
+        from core.prompts import summarize_data_sources_prompt
+        prompt_map = get_guru_type_prompt_map(self.guru_type.slug, only_active=False)
+        self.add(
+            f'initial_summarization:{data_source.id}:{split_num}',
+            summarize_data_sources_prompt.format(**prompt_map, content=source_content),
+            'summary',
+            {
+                'type': 'initial_summarization',
+                'data_source_id': data_source.id,
+                'source_content': source_content,
+                'content_metadata': content_metadata,
+                'split_num': split_num,
+                'chunk_count': chunk_count,
+            }
+        )
+
+    def add_merged_summarization(self, source_content, content_metadata, summarizations, is_root, data_source=None):
+        from core.prompts import summarize_data_sources_prompt
+        prompt_map = get_guru_type_prompt_map(self.guru_type.slug, only_active=False)
+        summarization_ids = sorted(s.id for s in summarizations)
+        self.add(
+            f'merged_summarization:{",".join(map(str, summarization_ids))}',
+            summarize_data_sources_prompt.format(**prompt_map, content=source_content),
+            'summary',
+            {
+                'type': 'merged_summarization',
+                'data_source_id': data_source.id if data_source else None,
+                'source_content': source_content,
+                'content_metadata': content_metadata,
+                'summarization_ids': summarization_ids,
+                'is_root': is_root,
+            }
+        )
+
+    def add_question_generation(self, summarization):
+        from core.prompts import generate_questions_from_summary_prompt
+        prompt_map = get_guru_type_prompt_map(self.guru_type.slug)
+        self.add(
+            f'question_generation:{summarization.id}',
+            generate_questions_from_summary_prompt.format(**prompt_map, summary=summarization.result_content),
+            'questions',
+            {'type': 'question_generation', 'summarization_id': summarization.id}
+        )
+
+    def submit(self, provider):
+        """
+        Submits the collected requests, except the ones that already failed LLM_BATCH_MAX_ATTEMPTS times.
+        Returns the job or None if there are no requests to submit.
+        """
+        if not self.requests:
+            return None
+
+        attempts = get_failed_attempts(self.guru_type, self.kind)
+        requests = [request for request in self.requests if attempts[request['custom_id']] < settings.LLM_BATCH_MAX_ATTEMPTS]
+        if len(requests) < len(self.requests):
+            logger.info(f"Skipped {len(self.requests) - len(requests)} LLM batch requests of guru type {self.guru_type.slug} that failed {settings.LLM_BATCH_MAX_ATTEMPTS} times")
+        if not requests:
+            return None
+
+        external_id = provider.submit(requests)
+        job = LLMBatchJob.objects.create(
+            guru_type=self.guru_type,
+            kind=self.kind,
+            provider=provider.name,
+            external_id=external_id,
+            model=self.model_name,
+            targets={request['custom_id']: self.targets[request['custom_id']] for request in requests},
+        )
+        logger.info(f"Submitted LLM batch job {job.id} with {len(requests)} requests for guru type {self.guru_type.slug}")
+        return job
+
+
+def get_batch_usages(model_name, usage, cost_multiplier):
+    from core.utils import get_llm_usage, get_prompt_cache_hit_ratio
+    cost_dollars = get_llm_usage(model_name, usage['prompt_tokens'], usage['completion_tokens'], usage['cached_prompt_tokens'])
+    # get_llm_usage returns a tuple for the models without pricing
+    price_eval_success = isinstance(cost_dollars, (int, float))
+    usages = {
+        'prompt_tokens': usage['prompt_tokens'],
+        'completion_tokens': usage['completion_tokens'],
+        'cached_prompt_tokens': usage['cached_prompt_tokens'],
+        'cost_dollars': cost_dollars * cost_multiplier if price_eval_success else 0,
+        'price_eval_success': price_eval_success,
+        'model': model_name,
+        'batch': True,
+    }
+    usages['prompt_cache_hit_ratio'] = get_prompt_cache_hit_ratio(usage['prompt_tokens'], usage['cached_prompt_tokens'])
+    return usages
+
+
+def get_summarization_fields(job, response, usages):
+    return {
+        'guru_type': job.guru_type,
+        'result_content': re.sub(r'<METADATA>.*?</METADATA>', '', response['summary']),
+        'summary_suitable': response['summary_suitable'],
+        'reasoning': response['reasoning'],
+        'model': job.model,
+        'usages': usages,
+    }
+
+
+def apply_initial_summarization(job, target, response, usages):
+    if Summarization.objects.filter(
+        is_data_source_summarization=True,
+        data_source_ref_id=target['data_source_id'],
+        initial=True,
+        split_num=target['split_num']
+    ).exists():
+        return
+
+    Summarization.objects.create(
+        **get_summarization_fields(job, response, usages),
+        is_data_source_summarization=True,
+        data_source_ref_id=target['data_source_id'],
+        content_metadata=target['content_metadata'],
+        initial=True,
+        source_content=target['source_content'],
+        is_root=target['chunk_count'] == 1,
+        processed=False,
+        split_num=target['split_num'],
+    )
+
+
+def apply_merged_summarization(job, target, response, usages):
+    summarizations = Summarization.objects.filter(id__in=target['summarization_ids'])
+    # The summarizations are already merged, by this job or another one
+    if len(summarizations) != len(target['summarization_ids']) or any(s.processed for s in summarizations):
+        return
+
+    new_summarization = Summarization.objects.create(
+        **get_summarization_fields(job, response, usages),
+        is_data_source_summarization=target['data_source_id'] is not None,
+        data_source_ref_id=target['data_source_id'],
+        content_metadata=target['content_metadata'],
+        source_content=target['source_content'],
+        is_root=target['is_root'],
+        processed=False,
+        initial=False,
+    )
+    new_summarization.summarization_refs.set(summarizations)
+    summarizations.update(processed=True)
+
+    if target['data_source_id'] is None:
+        # The previous summarization of the guru type is merged into the new ones
+        Summarization.objects.filter(id__in=target['summarization_ids'], is_data_source_summarization=False).update(is_root=False)
+        if target['is_root']:
+            Summarization.objects.filter(
+                guru_type=job.guru_type,
+                is_data_source_summarization=False,
+                is_root=True
+            ).exclude(id=new_summarization.id).update(is_root=False)
+    elif target['is_root']:
+        DataSource.objects.filter(id=target['data_source_id']).update(final_summarization_created=True)
+
+
+def apply_question_generation(job, target, response, usages):
+    summarization = Summarization.objects.filter(id=target['summarization_id']).first()
+    if not summarization or summarization.question_generation_ref_id:
+        return
+
+    question_generation = SummaryQuestionGeneration.objects.create(
+        summarization_ref=summarization,
+        guru_type=job.guru_type,
+        questions=response['questions'],
+        summary_sufficient=response['summary_sufficient'],
+        model=job.model,
+        usages=usages
+    )
+    summarization.question_generation_ref = question_generation
+    summarization.save()
+
+
+TARGET_APPLIERS = {
+    'initial_summarization': apply_initial_summarization,
+    'merged_summarization': apply_merged_summarization,
+    'question_generation': apply_question_generation,
+}
+
+
+def update_initial_summarizations_created(targets):
+    """Marks the data sources whose chunks are all summarized"""
+    chunk_counts = {
+        target['data_source_id']: target['chunk_count']
+        for target in targets
+        if target['type'] == 'initial_summarization'
+    }
+    for data_source_id, chunk_count in chunk_counts.items():
+        created_count = Summarization.objects.filter(
+            is_data_source_summarization=True,
+            data_source_ref_id=data_source_id,
+            initial=True
+        ).count()
+        if created_count >= chunk_count:
+            updates = {'initial_summarizations_created': True}
+            if chunk_count == 1:
+                updates['final_summarization_created'] = True
+            DataSource.objects.filter(id=data_source_id).update(**updates)
+
+
+def log_exhausted_requests(job):
+    """Logs the failed requests of the job that reached LLM_BATCH_MAX_ATTEMPTS, so they are not submitted again"""
+    attempts = get_failed_attempts(job.guru_type, job.kind)
+    for custom_id, error in job.failed_requests.items():
+        if attempts[custom_id] >= settings.LLM_BATCH_MAX_ATTEMPTS:
+            logger.error(f"Request {custom_id} of guru type {job.guru_type.slug} failed in {attempts[custom_id]} LLM batch jobs, giving up: {error}")
+
+
+def apply_llm_batch_job(job, provider):
+    """
+    Applies the results of the job if it is complete. Returns whether the job is finished.
+    The failed requests are recorded on the job and left for the next jobs, as their work is still pending,
+    until they fail LLM_BATCH_MAX_ATTEMPTS times.
+    """
+    try:
+        results = provider.get_results(job.external_id)
+    except LLMBatchError as e:
+        logger.error(f"LLM batch job {job.id} failed: {e}")
+        job.status = LLMBatchJob.Status.FAILED
+        job.error = str(e)
+        job.failed_requests = {custom_id: str(e) for custom_id in job.targets}
+        job.save()
+        log_exhausted_requests(job)
+        return True
+    if results is None:
+        return False
+
+    with transaction.atomic():
+        job = LLMBatchJob.objects.select_for_update().get(id=job.id)
+        if job.status != LLMBatchJob.Status.SUBMITTED:
+            return True
+
+        for custom_id, target in job.targets.items():
+            result = results.get(custom_id) or {'error': 'No result'}
+            if 'error' in result:
+                job.failed_requests[custom_id] = result['error']
+                logger.warning(f"Request {custom_id} of LLM batch job {job.id} failed: {result['error']}")
+                continue
+            usages = get_batch_usages(job.model, result['usage'], provider.cost_multiplier)
+            TARGET_APPLIERS[target['type']](job, target, result['response'], usages)
+
+        update_initial_summarizations_created(job.targets.values())
+        job.status = LLMBatchJob.Status.APPLIED
+        if job.failed_requests:
+            job.error = f"{len(job.failed_requests)} of {len(job.targets)} requests failed"
+        job.save()
+        if job.failed_requests:
+            log_exhausted_requests(job)
+
+    logger.info(f"Applied LLM batch job {job.id} for guru type {job.guru_type.slug}")
+    return True
+
+
+def apply_pending_llm_batch_jobs(guru_type, kind, provider):
+    """Applies the completed jobs of the guru type. Returns whether all of them are finished."""
+    finished = True
+    for job in LLMBatchJob.objects.filter(guru_type=guru_type, kind=kind, status=LLMBatchJob.Status.SUBMITTED, provider=provider.name):
+        finished = apply_llm_batch_job(job, provider) and finished
+    return finished
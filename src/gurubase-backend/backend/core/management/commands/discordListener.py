@@ -7,14 +7,13 @@ import aiohttp
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from core.integrations.helpers import NotEnoughData, NotRelated, cleanup_title, get_trust_score_emoji
-from core.models import Integration, Thread
-from asgiref.sync import sync_to_async
-from core.utils import create_fresh_binge
+from core.integrations.streaming import STREAMING_INDICATOR, CoalescingMessageUpdater, IncrementalFormatter, get_channel_rate_limiter, iter_answer_lines
+from core.integrations.answer import get_integration_answer, stream_integration_answer
+from core.models import Binge, Integration, Thread
+from core.requester import close_async_openai_clients
 import time
 from django.core.cache import caches
 import requests
-from core.views import api_answer
-from rest_framework.test import APIRequestFactory
 
 class BotTokenValidationException(Exception):
     pass
@@ -22,14 +21,6 @@ class BotTokenValidationException(Exception):
 class Command(BaseCommand):
     help = 'Starts a Discord listener bot'
 
-    def __init__(self):
-        super().__init__()
-        # Cache timeout in seconds (e.g., 5 minutes)
-        # Set to 0 to disable caching
-        # This is because dynamic channel updates are not immediately reflected
-        # And this may result in bad UX, and false positive bug reports
-        self.cache_timeout = 0
-
     def strip_first_header(self, content):
         """Remove the first header (starting with # and ending with newline) from content."""
         if content.startswith('#'):
@@ -40,6 +31,18 @@ class Command(BaseCommand):
                 return content[newline_index + 1:].lstrip()
         return content
 
+    def format_streamed_line(self, line):
+        """Formats a line of the streamed answer for Discord: links are not embedded, and separator headers are removed."""
+        line = re.sub(r'(\[.*?\]\()(http[^\)]+)(\))', r'\1<\2>\3', line)
+        return re.sub(r'\s*#{4,}\s*', '', line)
+
+    def get_message_updater(self, message, rate_limiter):
+        # discord.py waits out the rate limits itself, the edits given meanwhile are coalesced
+        async def send(text):
+            await message.edit(content=text)
+
+        return CoalescingMessageUpdater(send, rate_limiter)
+
     def format_response(self, response):
         formatted_msg = []
         content = self.strip_first_header(response['content'])
@@ -82,138 +85,50 @@ class Command(BaseCommand):
         
         return "\n".join(formatted_msg)
 
-    async def get_guru_type_slug(self, integration):
-        # Wrap the guru_type access in sync_to_async
-        guru_type = await sync_to_async(lambda: integration.guru_type)()
-        return await sync_to_async(lambda: guru_type.slug)()
-
-    async def get_api_key(self, integration):
-        # Wrap the guru_type access in sync_to_async
-        api_key = await sync_to_async(lambda: integration.api_key)()
-        return await sync_to_async(lambda: api_key.key)()
-
     async def get_guild_integration(self, guild_id):
         # Try to get integration from cache first
         cache = caches['alternate']
         cache_key = f"discord_integration:{guild_id}"
-        integration = cache.get(cache_key)
+        integration = await cache.aget(cache_key)
         
         if not integration:
             try:
-                # If not in cache, get from database
-                integration = await sync_to_async(Integration.objects.get)(
+                # If not in cache, get from database, with everything answering needs so nothing is lazily fetched later
+                integration = await Integration.objects.select_related('guru_type', 'api_key__user').aget(
                     type=Integration.Type.DISCORD,
                     external_id=guild_id
                 )
-                # Cache for 5 minutes
-                cache.set(cache_key, integration, timeout=self.cache_timeout)
+                # Cleared when the integration is updated, so channel updates apply right away
+                await cache.aset(cache_key, integration, timeout=settings.DISCORD_INTEGRATION_CACHE_TIMEOUT_SECONDS)
             except Integration.DoesNotExist:
                 logging.error(f"No integration found for guild {guild_id}", exc_info=True)
                 return None
         
         return integration
 
-    async def get_or_create_thread_binge(self, thread_id, integration, guru_type_object):
+    async def get_or_create_thread_binge(self, thread_id, integration):
         try:
             # Try to get existing thread
-            thread = await sync_to_async(Thread.objects.get)(thread_id=thread_id, integration=integration)
-            # Get binge asynchronously
-            binge = await sync_to_async(lambda: thread.binge)()
-            return binge
+            thread = await Thread.objects.select_related('binge').aget(thread_id=thread_id, integration=integration)
+            return thread.binge
         except Thread.DoesNotExist:
             # Create new binge and thread without needing a question
-            binge = await sync_to_async(create_fresh_binge)(guru_type_object, None)
-            await sync_to_async(Thread.objects.create)(
+            binge = await Binge.objects.acreate(guru_type=integration.guru_type, owner=None)
+            await Thread.objects.acreate(
                 thread_id=thread_id,
                 binge=binge,
                 integration=integration
             )
             return binge
 
-    async def stream_answer(self, guru_type, question, api_key, binge_id=None):
-        # Create request using APIRequestFactory
-        factory = APIRequestFactory()
-        
-        request_data = {
-            'question': question,
-            'stream': True,
-            'short_answer': True
-        }
-        if binge_id:
-            request_data['session_id'] = str(binge_id)
-            
-        request = factory.post(
-            f'/api/v1/{guru_type}/answer/',
-            request_data,
-            HTTP_X_API_KEY=api_key,
-            format='json'
-        )
-        
-        # Call api_answer directly in a sync context
-        response = await sync_to_async(api_answer)(request, guru_type)
-        
-        # Handle StreamingHttpResponse
-        if hasattr(response, 'streaming_content'):
-            buffer = ""
-            line_buffer = ""
-            
-            # Create an async wrapper for the generator iteration
-            @sync_to_async
-            def get_next_chunk():
-                try:
-                    return next(response.streaming_content)
-                except StopIteration:
-                    return None
-            
-            # Iterate over the generator asynchronously
-            while True:
-                chunk = await get_next_chunk()
-                if chunk is None:
-                    # Yield any remaining text in the buffer
-                    if line_buffer.strip():
-                        buffer += line_buffer
-                        yield buffer
-                    break
-                    
-                if chunk:
-                    text = chunk.decode('utf-8') if isinstance(chunk, bytes) else str(chunk)
-                    line_buffer += text
-                    
-                    # Check if we have complete lines
-                    while '\n' in line_buffer:
-                        line, line_buffer = line_buffer.split('\n', 1)
-                        if line.strip():
-                            buffer += line + '\n'
-                            yield buffer
-
-    async def get_finalized_answer(self, guru_type, question, api_key, binge_id=None):
-        # Create request using APIRequestFactory
-        factory = APIRequestFactory()
-        
-        request_data = {
-            'question': question,
-            'stream': False,
-            'short_answer': True,
-            'fetch_existing': True
-        }
-        if binge_id:
-            request_data['session_id'] = str(binge_id)
-            
-        request = factory.post(
-            f'/api/v1/{guru_type}/answer/',
-            request_data,
-            HTTP_X_API_KEY=api_key,
-            format='json'
-        )
-        
+    async def stream_answer(self, integration, question, binge):
+        # The answer is streamed on the event loop, so the conversations do not hold a thread each
+        async for line in iter_answer_lines(stream_integration_answer(integration, question, binge)):
+            yield line
+
+    async def get_finalized_answer(self, integration, question, binge):
         try:
-            # Call api_answer directly
-            response = await sync_to_async(api_answer)(request, guru_type)
-            
-            # Convert response to dict if it's a Response object
-            if hasattr(response, 'data'):
-                return response.data, True
-            return response, True
+            return await get_integration_answer(integration, question, binge), True
         except Exception as e:
             return str(e), False
 
@@ -265,6 +180,15 @@ class Command(BaseCommand):
         intents.message_content = True
         client = discord.Client(intents=intents, connector=None)
 
+        close_client = client.close
+
+        async def close():
+            # The answers share the AsyncOpenAI client of the event loop, closed with the Discord client
+            await close_async_openai_clients()
+            await close_client()
+
+        client.close = close
+
         @client.event
         async def on_ready():
             self.stdout.write(self.style.SUCCESS(f'We have logged in as {client.user}'))
@@ -285,8 +209,7 @@ class Command(BaseCommand):
 
             # Get integration from cache/database
             integration = await self.get_guild_integration(guild_id)
-            await sync_to_async(lambda: print(f'integration: {integration}'))()
-            if not integration or not await sync_to_async(lambda: integration.access_token)():
+            if not integration or not integration.access_token:
                 return
 
             try:
@@ -296,7 +219,7 @@ class Command(BaseCommand):
                 if isinstance(message.channel, discord.Thread):
                     channel_id = str(message.channel.parent_id)
                 
-                channels = await sync_to_async(lambda: integration.channels)()
+                channels = integration.channels
                 channel_allowed = False
                 question = message.content.replace(f'<@{client.user.id}>', '').strip()
 
@@ -306,20 +229,12 @@ class Command(BaseCommand):
                         break
                 
                 if not channel_allowed:
-                    guru_type_slug = await self.get_guru_type_slug(integration)
                     await self.send_channel_unauthorized_message(
                         message, 
-                        guru_type_slug, 
+                        integration.guru_type.slug, 
                         question)
                     return
 
-                # Remove the bot mention from the message
-                
-                # Get guru type slug and API key
-                guru_type_slug = await self.get_guru_type_slug(integration)
-                api_key = await self.get_api_key(integration)
-                guru_type_object = await sync_to_async(lambda: integration.guru_type)()
-
                 # Handle message in thread or create new thread
                 try:
                     if message.channel.type == discord.ChannelType.public_thread:
@@ -330,10 +245,8 @@ class Command(BaseCommand):
                         # Get or create thread and binge
                         binge = await self.get_or_create_thread_binge(
                             str(message.channel.id),
-                            integration,
-                            guru_type_object
+                            integration
                         )
-                        binge_id = binge.id
                     else:
                         # If not in thread, create a thread and send thinking message there
                         thread = await message.create_thread(
@@ -345,77 +258,43 @@ class Command(BaseCommand):
                         # Create new thread and binge
                         binge = await self.get_or_create_thread_binge(
                             str(thread.id),
-                            integration,
-                            guru_type_object
+                            integration
                         )
-                        binge_id = binge.id
                     
-                    last_update = time.time()
-                    update_interval = 0.5  # Update every 0.5 seconds
+                    rate_limiter = get_channel_rate_limiter(f'discord:{thread.id}', settings.DISCORD_MESSAGE_UPDATE_INTERVAL_SECONDS)
                     messages = [thinking_msg]  # List to keep track of all messages
-                    previous_content = ""  # Track the total content we've seen before
-                    message_contents = {"thinking": ""}  # Track actual content of each message
+                    message_content = ""  # Content of the last message
+                    updater = self.get_message_updater(thinking_msg, rate_limiter)
+                    formatter = IncrementalFormatter(self.format_streamed_line)
                     
-                    # First, stream the response
-                    async for streamed_content in self.stream_answer(
-                        guru_type_slug,
-                        question,
-                        api_key,
-                        binge_id
-                    ):
-                        current_time = time.time()
-                        if current_time - last_update >= update_interval:
-                            # Strip header from streamed content
-                            cleaned_content = self.strip_first_header(streamed_content)
-                            if cleaned_content:
-                                # Get the new content by removing what we've seen before
-                                if previous_content and cleaned_content.startswith(previous_content):
-                                    new_content = cleaned_content[len(previous_content):]
-                                else:
-                                    new_content = cleaned_content
-                                    
-                                if new_content:  # Only proceed if we have new content
-                                    new_content = re.sub(r'(\[.*?\]\()(http[^\)]+)(\))', r'\1<\2>\3', new_content)
-                                    new_content = re.sub(r'\s*#{4,}\s*', '', new_content)
-                                    current_message = messages[-1]  # Get the last message
-                                    current_msg_id = str(current_message.id)
-                                    if current_msg_id not in message_contents:
-                                        message_contents[current_msg_id] = ""
-                                    
-                                    # Check if adding new content would exceed limit
-                                    if len(message_contents[current_msg_id] + new_content) + len('\n:clock1: _streaming..._') > 1900:
-                                        # Remove streaming indicator from current message
-                                        await current_message.edit(content=message_contents[current_msg_id])
-                                        
-                                        # Create new message with just the new content in the thread
-                                        new_message = await thread.send(new_content + '\n:clock1: _streaming..._')
-                                        messages.append(new_message)
-                                        message_contents[str(new_message.id)] = new_content
-                                    else:
-                                        # Update current message with combined content
-                                        message_contents[current_msg_id] += new_content
-                                        await current_message.edit(
-                                            content=message_contents[current_msg_id] + '\n:clock1: _streaming..._'
-                                        )
-                                    
-                                    previous_content = cleaned_content  # Update what we've seen
-                                last_update = current_time
+                    # First, stream the response. Only the new lines are formatted, and the edits are coalesced by the updater
+                    async for line in self.stream_answer(integration, question, binge):
+                        new_content = formatter.add_line(line)
+                        if not new_content:
+                            continue
+
+                        # Check if adding new content would exceed limit
+                        if len(message_content + new_content) + len('\n' + STREAMING_INDICATOR) > 1900:
+                            # Remove streaming indicator from current message
+                            updater.update(message_content)
+                            await updater.flush()
+                            
+                            # Create new message with just the new content in the thread
+                            await rate_limiter.wait()
+                            new_message = await thread.send(new_content + '\n' + STREAMING_INDICATOR)
+                            messages.append(new_message)
+                            message_content = new_content
+                            updater = self.get_message_updater(new_message, rate_limiter)
+                        else:
+                            # Update current message with combined content
+                            message_content += new_content
+                            updater.update(message_content + '\n' + STREAMING_INDICATOR)
+                    await updater.flush()
                     
                     # After streaming is done, fetch the formatted response
-                    response, success = await self.get_finalized_answer(
-                        guru_type_slug,
-                        question,
-                        api_key,
-                        binge_id
-                    )
+                    response, success = await self.get_finalized_answer(integration, question, binge)
                     
                     if success:
-                        # Clean up streaming indicators from all messages
-                        for msg in messages[:-1]:
-                            msg_id = str(msg.id)
-                            if msg_id in message_contents:
-                                await msg.edit(content=message_contents[msg_id])
-                        
                         # Format metadata
                         trust_score = response.get('trust_score', 0)
                         trust_emoji = get_trust_score_emoji(trust_score)
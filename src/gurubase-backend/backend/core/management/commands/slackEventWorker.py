@@ -0,0 +1,27 @@
+import asyncio
+import logging
+from django.core.management.base import BaseCommand
+from core.integrations.slack_events import SlackEventWorker
+from core.requester import close_async_openai_clients
+from core.views import answer_slack_event
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    try:
+        await SlackEventWorker(handler=answer_slack_event).run()
+    finally:
+        await close_async_openai_clients()
+
+
+class Command(BaseCommand):
+    help = 'Starts the worker answering the queued Slack events'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting Slack event worker...'))
+
+        try:
+            asyncio.run(run_worker())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Shutting down Slack event worker...'))
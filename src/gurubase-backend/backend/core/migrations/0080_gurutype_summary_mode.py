@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2025-05-05 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0079_gurutype_custom_instruction_prompt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gurutype',
+            name='summary_mode',
+            field=models.CharField(choices=[('LLM', 'Separate summary call'), ('FAST', 'Fast path (local heuristic, refined from the answer)')], default='LLM', max_length=20),
+        ),
+    ]
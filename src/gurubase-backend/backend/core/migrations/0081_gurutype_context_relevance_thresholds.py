@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2025-05-06 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0080_gurutype_summary_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gurutype',
+            name='context_relevance_drop_threshold',
+            field=models.FloatField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='gurutype',
+            name='context_relevance_keep_threshold',
+            field=models.FloatField(blank=True, default=None, null=True),
+        ),
+    ]
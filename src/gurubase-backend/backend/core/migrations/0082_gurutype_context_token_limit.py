@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2025-05-07 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0081_gurutype_context_relevance_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gurutype',
+            name='context_token_limit',
+            field=models.IntegerField(default=0),
+        ),
+    ]
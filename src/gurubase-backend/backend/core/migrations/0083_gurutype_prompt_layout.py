@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2025-05-08 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0082_gurutype_context_token_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gurutype',
+            name='prompt_layout',
+            field=models.CharField(choices=[('DEFAULT', 'Default'), ('CACHE_FRIENDLY', 'Static guru prefix first (prompt caching friendly)')], default='DEFAULT', max_length=20),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.18 on 2025-05-09 11:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 5000
+
+
+def move_doc_ids_to_chunks(apps, schema_editor):
+    DataSource = apps.get_model('core', 'DataSource')
+    GithubFile = apps.get_model('core', 'GithubFile')
+    DataSourceChunk = apps.get_model('core', 'DataSourceChunk')
+
+    chunks = []
+
+    def add_chunks(data_source_id, doc_ids, github_file_id=None):
+        for split_num, doc_id in enumerate(doc_ids, start=1):
+            chunks.append(DataSourceChunk(
+                data_source_id=data_source_id,
+                github_file_id=github_file_id,
+                milvus_id=int(doc_id),
+                split_num=split_num,
+            ))
+        if len(chunks) >= BATCH_SIZE:
+            DataSourceChunk.objects.bulk_create(chunks, batch_size=BATCH_SIZE)
+            chunks.clear()
+
+    for data_source_id, doc_ids in DataSource.objects.exclude(doc_ids=[]).exclude(doc_ids__isnull=True).values_list('id', 'doc_ids').iterator():
+        # Ids of github files are added below with their files
+        file_doc_ids = set()
+        for file_id, file_doc_id_list in GithubFile.objects.filter(data_source_id=data_source_id).exclude(doc_ids=[]).exclude(doc_ids__isnull=True).values_list('id', 'doc_ids').iterator():
+            file_doc_ids.update(file_doc_id_list)
+            add_chunks(data_source_id, file_doc_id_list, github_file_id=file_id)
+        add_chunks(data_source_id, [doc_id for doc_id in doc_ids if doc_id not in file_doc_ids])
+
+    if chunks:
+        DataSourceChunk.objects.bulk_create(chunks, batch_size=BATCH_SIZE)
+
+
+def move_chunks_to_doc_ids(apps, schema_editor):
+    DataSource = apps.get_model('core', 'DataSource')
+    GithubFile = apps.get_model('core', 'GithubFile')
+    DataSourceChunk = apps.get_model('core', 'DataSourceChunk')
+
+    doc_ids_by_data_source = {}
+    doc_ids_by_file = {}
+    for data_source_id, github_file_id, milvus_id in DataSourceChunk.objects.order_by('id').values_list('data_source_id', 'github_file_id', 'milvus_id').iterator():
+        doc_ids_by_data_source.setdefault(data_source_id, []).append(milvus_id)
+        if github_file_id:
+            doc_ids_by_file.setdefault(github_file_id, []).append(milvus_id)
+
+    for data_source_id, doc_ids in doc_ids_by_data_source.items():
+        DataSource.objects.filter(id=data_source_id).update(doc_ids=doc_ids)
+    for github_file_id, doc_ids in doc_ids_by_file.items():
+        GithubFile.objects.filter(id=github_file_id).update(doc_ids=doc_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0083_gurutype_prompt_layout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSourceChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('milvus_id', models.BigIntegerField(db_index=True)),
+                ('split_num', models.PositiveIntegerField(default=0)),
+                ('content_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('data_source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='core.datasource')),
+                ('github_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='core.githubfile')),
+            ],
+        ),
+        migrations.RunPython(move_doc_ids_to_chunks, move_chunks_to_doc_ids),
+    ]
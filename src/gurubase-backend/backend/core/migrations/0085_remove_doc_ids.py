@@ -0,0 +1,21 @@
+# Generated by Django 4.2.18 on 2025-05-09 11:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0084_datasourcechunk'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='datasource',
+            name='doc_ids',
+        ),
+        migrations.RemoveField(
+            model_name='githubfile',
+            name='doc_ids',
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.18 on 2025-05-12 09:47
+
+import core.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0085_remove_doc_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('compressed_size', models.PositiveBigIntegerField(default=0)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # The raw text columns are kept until scripts/onetime/backfill_content_blobs.py moves them into content blobs
+        migrations.RenameField(
+            model_name='datasource',
+            old_name='content',
+            new_name='legacy_content',
+        ),
+        migrations.RenameField(
+            model_name='datasource',
+            old_name='original_content',
+            new_name='legacy_original_content',
+        ),
+        migrations.RenameField(
+            model_name='githubfile',
+            old_name='content',
+            new_name='legacy_content',
+        ),
+        migrations.AlterField(
+            model_name='datasource',
+            name='legacy_content',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='datasource',
+            name='legacy_original_content',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='githubfile',
+            name='legacy_content',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasource',
+            name='content',
+            field=core.fields.CompressedTextField(blank=True, db_index=True, legacy_field='legacy_content', null=True),
+        ),
+        migrations.AddField(
+            model_name='datasource',
+            name='original_content',
+            field=core.fields.CompressedTextField(blank=True, db_index=True, legacy_field='legacy_original_content', null=True),
+        ),
+        migrations.AddField(
+            model_name='githubfile',
+            name='content',
+            field=core.fields.CompressedTextField(blank=True, db_index=True, legacy_field='legacy_content', null=True),
+        ),
+    ]
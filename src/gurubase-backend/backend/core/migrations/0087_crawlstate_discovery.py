@@ -0,0 +1,28 @@
+# Generated by Django 4.2.18 on 2025-05-13 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0086_contentblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crawlstate',
+            name='discovery_mode',
+            field=models.CharField(choices=[('SITEMAP_FIRST', 'Sitemaps first, links fill the gaps'), ('LINKS', 'Links only')], default='SITEMAP_FIRST', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='crawlstate',
+            name='discovered_from_sitemap',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='crawlstate',
+            name='discovered_from_links',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2025-05-20 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0087_crawlstate_discovery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integration',
+            name='jira_sync_watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='integration',
+            name='zendesk_ticket_sync_cursor',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.18 on 2025-05-27 09:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0088_integration_sync_cursors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SUMMARIZATION', 'Summarization'), ('QUESTION_GENERATION', 'Question generation')], max_length=50)),
+                ('provider', models.CharField(max_length=50)),
+                ('external_id', models.CharField(max_length=200)),
+                ('model', models.TextField()),
+                ('status', models.CharField(choices=[('SUBMITTED', 'Submitted'), ('APPLIED', 'Applied'), ('FAILED', 'Failed')], default='SUBMITTED', max_length=50)),
+                ('targets', models.JSONField(default=dict)),
+                ('failed_requests', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('guru_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.gurutype')),
+            ],
+        ),
+    ]
@@ -230,6 +230,14 @@ def delete_vectors_by_filter(collection_name, filter):
     # logger.info(f'Deleted {response["delete_count"]} vectors from collection {collection_name}')
 
 
+def delete_vectors_by_ids(collection_name, ids, batch_size=None):
+    """Deletes the vectors with the given primary keys using `id in [...]` filters in batches."""
+    batch_size = batch_size or settings.MILVUS_DELETE_BATCH_SIZE
+    ids = [int(id) for id in ids]
+    for i in range(0, len(ids), batch_size):
+        delete_vectors_by_filter(collection_name, f'id in {ids[i:i + batch_size]}')
+
+
 def search_for_closest(collection_name, vector, guru_type, sitemap_constraint, top_k=1, column='title'):
     if column not in ['title', 'description', 'content']:
         raise ValueError(f'Invalid column: {column}')
@@ -1,3 +1,4 @@
+import hashlib
 import secrets
 from django.db import transaction
 import traceback
@@ -8,11 +9,14 @@ from django.conf import settings
 from django.db import models
 from django.db.models import Index
 from datetime import datetime
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from urllib.parse import urlparse
 from django.core.validators import URLValidator, MaxValueValidator
+import zstandard
 
 from accounts.models import User
+from core.fields import CompressedTextField, prefetch_compressed_text
 
 logger = logging.getLogger(__name__)
 
@@ -300,6 +304,14 @@ class GuruType(models.Model):
         OPENAI_TEXT_EMBEDDING_3_LARGE = "OPENAI_TEXT_EMBEDDING_3_LARGE", "OpenAI - text-embedding-3-large"
         OPENAI_TEXT_EMBEDDING_ADA_002 = "OPENAI_TEXT_EMBEDDING_ADA_002", "OpenAI - text-embedding-ada-002"
 
+    class PromptLayout(models.TextChoices):
+        DEFAULT = "DEFAULT", "Default"
+        CACHE_FRIENDLY = "CACHE_FRIENDLY", "Static guru prefix first (prompt caching friendly)"
+
+    class SummaryMode(models.TextChoices):
+        LLM = "LLM", "Separate summary call"
+        FAST = "FAST", "Fast path (local heuristic, refined from the answer)"
+
     slug = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=50, blank=True, null=True)
     maintainers = models.ManyToManyField(User, blank=True, related_name='maintained_guru_types')
@@ -349,6 +361,22 @@ class GuruType(models.Model):
         blank=True
     )
     send_notification = models.BooleanField(default=False)
+    summary_mode = models.CharField(
+        max_length=20,
+        choices=SummaryMode.choices,
+        default=SummaryMode.LLM,
+    )
+    # Context relevance is judged without the LLM if every context is reranked above the keep threshold or below the drop threshold
+    # and at least one context is above the keep threshold. Null disables the bypass.
+    context_relevance_keep_threshold = models.FloatField(null=True, blank=True, default=None)
+    context_relevance_drop_threshold = models.FloatField(null=True, blank=True, default=None)
+    # Token budget of the contexts in the answer prompt. 0 means no limit.
+    context_token_limit = models.IntegerField(default=0)
+    prompt_layout = models.CharField(
+        max_length=20,
+        choices=PromptLayout.choices,
+        default=PromptLayout.DEFAULT,
+    )
 
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
@@ -356,6 +384,12 @@ class GuruType(models.Model):
     def __str__(self):
         return self.slug
 
+    def clean(self):
+        keep_threshold = self.context_relevance_keep_threshold
+        drop_threshold = self.context_relevance_drop_threshold
+        if keep_threshold is not None and drop_threshold is not None and keep_threshold <= drop_threshold:
+            raise ValidationError({'context_relevance_keep_threshold': 'The keep threshold must be greater than the drop threshold'})
+
     def save(self, *args, **kwargs):
         from core.utils import validate_slug
         from core.guru_types import generate_milvus_collection_name, generate_typesense_collection_name
@@ -629,6 +663,62 @@ class LLMEval(models.Model):
         return self.prompt_tokens + self.completion_tokens
 
 
+class ContentBlob(models.Model):
+    """Zstd compressed text, keyed by the sha256 of the text so identical contents are stored once."""
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveBigIntegerField(default=0)  # Uncompressed, in bytes
+    compressed_size = models.PositiveBigIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash
+
+    @staticmethod
+    def get_hash(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def compress(text):
+        return zstandard.ZstdCompressor(level=settings.CONTENT_BLOB_ZSTD_LEVEL).compress(text.encode('utf-8'))
+
+    @staticmethod
+    def decompress(data):
+        return zstandard.ZstdDecompressor().decompress(bytes(data)).decode('utf-8')
+
+    @classmethod
+    def store_many(cls, texts):
+        """Stores the texts that are not stored yet and returns their hashes in order."""
+        texts_by_hash = {cls.get_hash(text): text for text in texts}
+        existing = set(cls.objects.filter(hash__in=texts_by_hash.keys()).values_list('hash', flat=True))
+
+        blobs = []
+        for content_hash, text in texts_by_hash.items():
+            if content_hash in existing:
+                continue
+            data = cls.compress(text)
+            blobs.append(cls(hash=content_hash, data=data, size=len(text.encode('utf-8')), compressed_size=len(data)))
+
+        # Concurrent writers may store the same text, which is identical anyway
+        cls.objects.bulk_create(blobs, ignore_conflicts=True)
+        return list(texts_by_hash.keys())
+
+    @classmethod
+    def load_many(cls, hashes):
+        """Returns a dict of hash to text for the given hashes."""
+        texts = {}
+        for content_hash, data in cls.objects.filter(hash__in=list(hashes)).values_list('hash', 'data'):
+            texts[content_hash] = cls.decompress(data)
+        return texts
+
+    @classmethod
+    def load(cls, content_hash):
+        texts = cls.load_many([content_hash])
+        if content_hash not in texts:
+            logger.error(f"Content blob {content_hash} not found")
+        return texts.get(content_hash)
+
+
 class DataSource(models.Model):
     class Type(models.TextChoices):
         PDF = "PDF"
@@ -659,11 +749,9 @@ class DataSource(models.Model):
         blank=True,
         null=True
     )
-    content = models.TextField(null=True, blank=True)
+    content = CompressedTextField(null=True, blank=True, db_index=True, legacy_field='legacy_content')
+    legacy_content = models.TextField(null=True, blank=True, editable=False)  # Until backfilled into content blobs
     in_milvus = models.BooleanField(default=False)
-    doc_ids = models.JSONField(
-        default=list, blank=True, null=True
-    )  # If written to milvus
     status = models.CharField(
         max_length=50,
         choices=[(tag.value, tag.value) for tag in Status],
@@ -672,7 +760,8 @@ class DataSource(models.Model):
     error = models.TextField(default='', blank=True, null=False)
     user_error = models.TextField(default='', blank=True, null=False)
     content_rewritten = models.BooleanField(default=False)
-    original_content = models.TextField(null=True, blank=True)
+    original_content = CompressedTextField(null=True, blank=True, db_index=True, legacy_field='legacy_original_content')
+    legacy_original_content = models.TextField(null=True, blank=True, editable=False)  # Until backfilled into content blobs
 
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
@@ -801,12 +890,11 @@ class DataSource(models.Model):
         if self.type == DataSource.Type.GITHUB_REPO:
             github_files = GithubFile.objects.filter(data_source=self, in_milvus=False)
             logger.info(f"Writing {len(github_files)} GitHub files to Milvus. Repository: {self.url}")
-            doc_ids = self.doc_ids
             
             # Process files in batches
             batch_size = settings.GITHUB_FILE_BATCH_SIZE
             for i in range(0, len(github_files), batch_size):
-                batch = github_files[i:i + batch_size]
+                batch = prefetch_compressed_text(github_files[i:i + batch_size], 'content')
                 logger.info(f"Processing batch {i//batch_size + 1} of {(len(github_files) + batch_size - 1)//batch_size}. Repository: {self.url}")
                 
                 # Prepare all texts and metadata for the batch
@@ -884,23 +972,23 @@ class DataSource(models.Model):
                     # Distribute IDs back to files based on chunk counts and prepare for bulk update
                     start_idx = 0
                     files_to_update = []
+                    chunks = []
                     for file, chunk_count in zip(batch, file_text_counts):
                         end_idx = start_idx + chunk_count
-                        file_ids = batch_ids[start_idx:end_idx]
-                        file.doc_ids = file_ids
+                        chunks.extend(DataSourceChunk.build(
+                            self, batch_ids[start_idx:end_idx], all_texts[start_idx:end_idx], github_file=file
+                        ))
                         file.in_milvus = True
                         files_to_update.append(file)
                         start_idx = end_idx
-                        doc_ids.extend(file_ids)
                     
-                    # Bulk update all files in this batch
-                    GithubFile.objects.bulk_update(files_to_update, ['doc_ids', 'in_milvus'])
+                    # Bulk create the chunks and update all files in this batch
+                    DataSourceChunk.objects.bulk_create(chunks)
+                    GithubFile.objects.bulk_update(files_to_update, ['in_milvus'])
                     
                 except Exception as e:
                     logger.error(f"Error writing batch to Milvus: {str(e)}")
                     continue
-
-            self.doc_ids = doc_ids
         else:
             splitted = split_text(
                 self.content,
@@ -948,15 +1036,13 @@ class DataSource(models.Model):
             # Write to milvus with the correct collection name and dimension
             ids = insert_vectors(collection_name, docs, dimension=dimension)
             # Update the model
-            if self.doc_ids is None:
-                self.doc_ids = []
-            self.doc_ids += ids
+            DataSourceChunk.objects.bulk_create(DataSourceChunk.build(self, ids, splitted))
 
         self.in_milvus = True
         self.save()
 
     def delete_from_milvus(self, overridden_model=None):
-        from core.milvus_utils import delete_vectors
+        from core.milvus_utils import delete_vectors_by_ids
         from core.utils import get_embedding_model_config
 
         if not self.in_milvus:
@@ -970,18 +1056,19 @@ class DataSource(models.Model):
             else:
                 model = self.guru_type.text_embedding_model
 
-        ids = self.doc_ids
+        chunks = DataSourceChunk.objects.filter(data_source=self)
+        ids = list(chunks.values_list('milvus_id', flat=True))
         if self.type == DataSource.Type.GITHUB_REPO:
             collection_name, dimension = get_embedding_model_config(model, sync=False)
         else:
             collection_name = self.guru_type.milvus_collection_name
-        delete_vectors(collection_name, ids)
+        delete_vectors_by_ids(collection_name, ids)
 
-        self.doc_ids = []
+        chunks.delete()
         self.in_milvus = False
 
         if self.type == DataSource.Type.GITHUB_REPO:
-            GithubFile.objects.filter(data_source=self).update(in_milvus=False, doc_ids=[])
+            GithubFile.objects.filter(data_source=self).update(in_milvus=False)
 
         self.save()
 
@@ -1029,7 +1116,7 @@ class DataSource(models.Model):
         except Exception as e:
             logger.error(f"Error scraping main content for data source {self.id}: {str(e)}", exc_info=True)
 
-    def create_initial_summarizations(self, max_length=settings.SUMMARIZATION_MAX_LENGTH, chunk_overlap=settings.SUMMARIZATION_OVERLAP_LENGTH):
+    def create_initial_summarizations(self, max_length=settings.SUMMARIZATION_MAX_LENGTH, chunk_overlap=settings.SUMMARIZATION_OVERLAP_LENGTH, batch=None):
         """
         Summarizes the content of the data source by using RecursiveCharacterTextSplitter and generating summaries.
         Continues from where it left off if there are existing summarizations.
@@ -1037,6 +1124,7 @@ class DataSource(models.Model):
         Args:
             max_length: The maximum length of the summarization chunks.
             chunk_overlap: The overlap length between the summarization chunks.
+            batch: If given, the chunks are added to this LLMBatch instead, and summarized when its job is applied.
         """
         from core.requester import OpenAIRequester
         from core.utils import split_text, summarize_text
@@ -1057,6 +1145,23 @@ class DataSource(models.Model):
 
         content_metadata = [self.get_metadata()]
 
+        if batch:
+            existing_split_nums = set(Summarization.objects.filter(
+                is_data_source_summarization=True,
+                data_source_ref=self,
+                initial=True
+            ).values_list('split_num', flat=True))
+            for i, chunk in enumerate(chunks, start=1):
+                if i not in existing_split_nums:
+                    chunk = f'\n<METADATA>{content_metadata}</METADATA>\n\n{chunk}'
+                    batch.add_initial_summarization(self, chunk, content_metadata, i, len(chunks))
+            if existing_split_nums.issuperset(range(1, len(chunks) + 1)):
+                self.initial_summarizations_created = True
+                if len(chunks) == 1:
+                    self.final_summarization_created = True
+                self.save()
+            return
+
         # Summarize each chunk (if multiple) and combine them into a single summarization
         if len(chunks) > 1:
             for i, chunk in enumerate(chunks[last_split_num:], start=last_split_num + 1):
@@ -1624,6 +1729,35 @@ class SummaryQuestionGeneration(models.Model):
         return f'{self.id}'
 
 
+class LLMBatchJob(models.Model):
+    """Background LLM requests of a guru type submitted together to a batch provider, see core.llm_batch"""
+    class Kind(models.TextChoices):
+        SUMMARIZATION = "SUMMARIZATION", "Summarization"
+        QUESTION_GENERATION = "QUESTION_GENERATION", "Question generation"
+
+    class Status(models.TextChoices):
+        SUBMITTED = "SUBMITTED", "Submitted"
+        APPLIED = "APPLIED", "Applied"
+        FAILED = "FAILED", "Failed"
+
+    guru_type = models.ForeignKey(GuruType, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=50, choices=Kind.choices)
+    provider = models.CharField(max_length=50)
+    external_id = models.CharField(max_length=200)
+    model = models.TextField()
+    status = models.CharField(max_length=50, choices=Status.choices, default=Status.SUBMITTED)
+    # What to create from the result of each request, by the custom id of the request
+    targets = models.JSONField(default=dict)
+    # Errors of the requests that failed, by custom id. They are submitted again until LLM_BATCH_MAX_ATTEMPTS
+    failed_requests = models.JSONField(default=dict)
+    error = models.TextField(null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.id} - {self.guru_type.slug} - {self.kind} ({self.status})"
+
+
 class Binge(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     guru_type = models.ForeignKey(GuruType, on_delete=models.CASCADE)
@@ -1781,10 +1915,10 @@ class GithubFile(models.Model):
 
     path = models.CharField(max_length=2000)
     link = models.URLField(max_length=2000)
-    content = models.TextField()
+    content = CompressedTextField(null=True, blank=True, db_index=True, legacy_field='legacy_content')
+    legacy_content = models.TextField(null=True, blank=True, editable=False)  # Until backfilled into content blobs
     size = models.PositiveIntegerField()
     in_milvus = models.BooleanField(default=False)
-    doc_ids = models.JSONField(default=list, blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
@@ -1889,7 +2023,7 @@ class GithubFile(models.Model):
         ids = list(insert_vectors(collection_name, docs, code=True, dimension=dimension))
         
         # Update the model
-        self.doc_ids = ids
+        DataSourceChunk.objects.bulk_create(DataSourceChunk.build(self.data_source, ids, splitted, github_file=self))
         self.in_milvus = True
         self.save()
 
@@ -1897,29 +2031,95 @@ class GithubFile(models.Model):
         return ids
 
     def delete_from_milvus(self):
-        from core.milvus_utils import delete_vectors
+        from core.milvus_utils import delete_vectors_by_ids
         from core.utils import get_embedding_model_config
         code_collection_name, code_dimension = get_embedding_model_config(self.data_source.guru_type.code_embedding_model)
-        delete_vectors(code_collection_name, self.doc_ids)
 
-        data_source = self.data_source
+        chunks = DataSourceChunk.objects.filter(github_file=self)
+        delete_vectors_by_ids(code_collection_name, list(chunks.values_list('milvus_id', flat=True)))
+        chunks.delete()
 
-        # Check for invalid doc_ids
-        invalid_doc_ids = [doc_id for doc_id in self.doc_ids if doc_id not in data_source.doc_ids]
-        valid_doc_ids = [doc_id for doc_id in self.doc_ids if doc_id in data_source.doc_ids]
+        self.in_milvus = False
+        self.save()
 
-        if invalid_doc_ids:
-            logger.error(f"Found doc_ids of github file {self.path} that don't exist in data_source: {invalid_doc_ids}. guru_type: {self.data_source.guru_type.slug}. Github link: {self.link}")
+    @classmethod
+    def bulk_delete(cls, queryset):
+        """
+        Deletes the github files of the queryset along with their Milvus vectors.
+        Vectors are deleted by id filter in batches and the chunks are deleted with set based queries.
+        The pre_delete signal only handles single object deletes, as the files are no
+        longer in Milvus by the time they are deleted here.
+        """
+        from core.milvus_utils import delete_vectors_by_ids
+        from core.utils import get_embedding_model_config
 
-        if valid_doc_ids:
-            for doc_id in valid_doc_ids:
-                data_source.doc_ids.remove(doc_id)
-            data_source.save()
+        file_ids = list(queryset.values_list('id', flat=True))
+        if not file_ids:
+            return 0
 
-        self.in_milvus = False
-        self.doc_ids = []
-        self.save()
+        batch_size = settings.MILVUS_DELETE_BATCH_SIZE
+        collection_names = {}
+        deleted_count = 0
+        for i in range(0, len(file_ids), batch_size):
+            files = cls.objects.filter(id__in=file_ids[i:i + batch_size])
+            chunks = DataSourceChunk.objects.filter(github_file__in=files)
+
+            milvus_ids_by_data_source = {}
+            for data_source_id, milvus_id in chunks.values_list('data_source_id', 'milvus_id'):
+                milvus_ids_by_data_source.setdefault(data_source_id, []).append(milvus_id)
+
+            for data_source_id, milvus_ids in milvus_ids_by_data_source.items():
+                if data_source_id not in collection_names:
+                    data_source = DataSource.objects.select_related('guru_type').get(id=data_source_id)
+                    collection_names[data_source_id], _ = get_embedding_model_config(data_source.guru_type.code_embedding_model)
+                delete_vectors_by_ids(collection_names[data_source_id], milvus_ids)
+
+            chunks.delete()
+            # The files are no longer in Milvus, so their pre_delete signals do not delete them again
+            files.update(in_milvus=False)
+            deleted_count += files.only('id', 'in_milvus', 'data_source').delete()[0]
+
+        logger.info(f"Bulk deleted {deleted_count} github files from {len(collection_names)} data sources")
+        return deleted_count
+
+
+class DataSourceChunk(models.Model):
+    """A chunk of a data source or a github file written to Milvus."""
+    data_source = models.ForeignKey(
+        DataSource,
+        on_delete=models.CASCADE,
+        related_name='chunks')
+    github_file = models.ForeignKey(
+        GithubFile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='chunks')
+    milvus_id = models.BigIntegerField(db_index=True)
+    split_num = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=64, default='', blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return f"{self.data_source_id} - {self.milvus_id}"
+
+    @staticmethod
+    def get_content_hash(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def build(cls, data_source, milvus_ids, texts, github_file=None):
+        """Returns unsaved chunks for the given Milvus ids and their texts, numbered from 1."""
+        return [
+            cls(
+                data_source=data_source,
+                github_file=github_file,
+                milvus_id=milvus_id,
+                split_num=split_num,
+                content_hash=cls.get_content_hash(text),
+            )
+            for split_num, (milvus_id, text) in enumerate(zip(milvus_ids, texts), start=1)
+        ]
 
 
 class APIKey(models.Model):
@@ -1970,6 +2170,7 @@ class Integration(models.Model):
     jira_api_key = models.TextField(null=True, blank=True)
     jira_user_email = models.TextField(null=True, blank=True)
     jira_domain = models.TextField(null=True, blank=True)
+    jira_sync_watermark = models.DateTimeField(null=True, blank=True)  # Issues updated since are reindexed on the next sync
 
     confluence_api_token = models.TextField(null=True, blank=True)
     confluence_user_email = models.TextField(null=True, blank=True)
@@ -1978,6 +2179,7 @@ class Integration(models.Model):
     zendesk_domain = models.TextField(null=True, blank=True)
     zendesk_api_token = models.TextField(null=True, blank=True)
     zendesk_user_email = models.TextField(null=True, blank=True)
+    zendesk_ticket_sync_cursor = models.TextField(null=True, blank=True)  # Cursor of the incremental ticket export
 
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
@@ -2048,6 +2250,10 @@ class CrawlState(models.Model):
         UI = "UI", "User Interface"
         API = "API", "API"
 
+    class DiscoveryMode(models.TextChoices):
+        SITEMAP_FIRST = "SITEMAP_FIRST", "Sitemaps first, links fill the gaps"
+        LINKS = "LINKS", "Links only"
+
     url = models.URLField(max_length=2000)
     status = models.CharField(
         max_length=50,
@@ -2060,6 +2266,13 @@ class CrawlState(models.Model):
         default=Source.API,
     )
     discovered_urls = models.JSONField(default=list)
+    discovery_mode = models.CharField(
+        max_length=30,
+        choices=DiscoveryMode.choices,
+        default=DiscoveryMode.SITEMAP_FIRST,
+    )
+    discovered_from_sitemap = models.IntegerField(default=0)
+    discovered_from_links = models.IntegerField(default=0)
     error_message = models.TextField(blank=True, null=True)
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
@@ -2071,6 +2284,26 @@ class CrawlState(models.Model):
     def __str__(self):
         return f"Crawl {self.id} - {self.url} ({self.status}) - {self.guru_type.name} - {self.user.email if self.user else 'selfhosted'}"
 
+    @staticmethod
+    def get_stop_flag_key(crawl_state_id):
+        return f'crawl_stop:{crawl_state_id}'
+
+    @classmethod
+    def is_stop_requested(cls, crawl_state_id):
+        """Checks the Redis stop flag, so running spiders do not query the crawl state on every page."""
+        from django.core.cache import caches
+        return bool(caches['alternate'].get(cls.get_stop_flag_key(crawl_state_id)))
+
+    def stop(self, error_message=None):
+        """Stops the crawl and raises its stop flag for the running spider."""
+        from django.core.cache import caches
+        self.status = CrawlState.Status.STOPPED
+        self.end_time = timezone.now()
+        if error_message:
+            self.error_message = error_message
+        self.save()
+        caches['alternate'].set(self.get_stop_flag_key(self.id), True, timeout=settings.CRAWL_STOP_FLAG_TIMEOUT_SECONDS)
+
 
 class GuruCreationForm(models.Model):
 
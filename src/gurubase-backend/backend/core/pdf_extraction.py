@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+
+class PDFPageTimeoutError(Exception):
+    pass
+
+
+def _raise_page_timeout(signum, frame):
+    raise PDFPageTimeoutError()
+
+
+def extract_page_range(path, start, end, page_timeout_seconds):
+    """
+    Extracts the text of the pages [start, end) of the PDF, in a pool process.
+    A page taking longer than page_timeout_seconds is skipped with an empty text.
+    """
+    reader = PdfReader(path)
+    texts = []
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout)
+    try:
+        for page_number in range(start, end):
+            signal.setitimer(signal.ITIMER_REAL, page_timeout_seconds)
+            try:
+                texts.append(reader.pages[page_number].extract_text() or '')
+            except PDFPageTimeoutError:
+                logger.warning(f"Skipped page {page_number + 1} of PDF {path}, its extraction timed out")
+                texts.append('')
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        signal.signal(signal.SIGALRM, previous_handler)
+    return texts
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers):
+    """Returns the process pool of this process, recreating it if one of its processes died"""
+    global _executor
+    with _executor_lock:
+        if _executor is None or _executor._broken:
+            # Forking is not safe in the threaded celery workers
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+@contextmanager
+def open_pdf(pdf_path, max_bytes, timeout):
+    """
+    Yields the local path and sha256 of the PDF, downloading it first if it is a url.
+    The download is streamed to a temporary file and aborted once it exceeds max_bytes.
+    """
+    sha256 = hashlib.sha256()
+    if os.path.isfile(pdf_path):
+        if os.path.getsize(pdf_path) > max_bytes:
+            raise ValueError(f"The PDF is larger than {max_bytes // (1024 * 1024)} MB")
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        yield pdf_path, sha256.hexdigest()
+        return
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'file.pdf')
+        size = 0
+        with requests.get(pdf_path, stream=True, timeout=timeout) as response, open(path, 'wb') as f:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"The PDF is larger than {max_bytes // (1024 * 1024)} MB")
+                sha256.update(chunk)
+                f.write(chunk)
+        yield path, sha256.hexdigest()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def iter_pdf_pages(path, max_pages, max_text_bytes, workers, pages_per_task, page_timeout_seconds):
+    """
+    Yields the texts of the pages of the PDF in order, while later pages are extracted in the process pool.
+    Raises ValueError if the PDF has more than max_pages pages or more than max_text_bytes of text.
+    """
+    page_count = len(PdfReader(path).pages)
+    if page_count > max_pages:
+        raise ValueError(f"The PDF has {page_count} pages, more than the limit of {max_pages}")
+
+    executor = get_executor(workers)
+    futures = [
+        executor.submit(extract_page_range, path, start, min(start + pages_per_task, page_count), page_timeout_seconds)
+        for start in range(0, page_count, pages_per_task)
+    ]
+    text_bytes = 0
+    try:
+        for future in futures:
+            for text in future.result():
+                text_bytes += len(text.encode('utf-8'))
+                if text_bytes > max_text_bytes:
+                    raise ValueError(f"The PDF has more than {max_text_bytes // (1024 * 1024)} MB of text")
+                yield text
+    except BrokenProcessPool:
+        raise ValueError("The PDF extraction process crashed")
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_pdf_text(pdf_path):
+    """
+    Extracts the text of the PDF at the path or url, page by page in a process pool.
+    The text is cached by the hash of the file, so reprocessing the same file skips the extraction.
+    """
+    # The pages are extracted in spawned processes that do not set Django up, so the models are not imported at the top
+    from django.core.cache import caches
+    from core.models import ContentBlob
+
+    cache = caches['alternate']
+    with open_pdf(pdf_path, settings.PDF_MAX_FILE_SIZE_MB * 1024 * 1024, settings.PDF_DOWNLOAD_TIMEOUT_SECONDS) as (path, file_hash):
+        cache_key = f'pdf_text:{file_hash}'
+        text_hash = cache.get(cache_key)
+        if text_hash:
+            # The blob may have been pruned since
+            text = ContentBlob.load_many([text_hash]).get(text_hash)
+            if text is not None:
+                return text
+
+        pages = iter_pdf_pages(
+            path,
+            max_pages=settings.PDF_MAX_PAGES,
+            max_text_bytes=settings.PDF_MAX_TEXT_SIZE_MB * 1024 * 1024,
+            workers=settings.PDF_EXTRACTION_WORKERS,
+            pages_per_task=settings.PDF_EXTRACTION_PAGES_PER_TASK,
+            page_timeout_seconds=settings.PDF_PAGE_TIMEOUT_SECONDS,
+        )
+        text = '\n'.join(pages).replace('\x00', '')
+
+    text_hash = ContentBlob.store_many([text])[0]
+    cache.set(cache_key, text_hash, timeout=settings.PDF_TEXT_CACHE_TIMEOUT_SECONDS)
+    return text
@@ -1,3 +1,5 @@
+from string import Template
+
 summary_short_answer_addition = """
 This should be no more than {widget_answer_max_length} words.
 """
@@ -110,21 +112,23 @@ And the answer to the last question is:
 Now, the user asked another question.
 """
     
-prompt_template = """
+# The answer prompts are built from the fragments below, so the default and the prompt caching friendly layouts share their instructions.
+answer_prompt_role = """
 You are a {guru_type} Guru with extensive knowledge about {domain_knowledge}. Your task is to answer questions thoughtfully and accurately, using the contexts provided and adhering to strict guidelines.
 
 {github_details_if_applicable}
+"""
 
-{binge_answer_prompt}
-
-First, carefully read and analyze the following contexts:
-
+answer_prompt_contexts = """
 <contexts>
 {contexts}
 </contexts>
 
 {github_context}
+"""
 
+# $user_intent and $answer_length are filled per layout, the default layout gives the values and the cached one refers to them
+answer_prompt_guidelines = Template("""
 When answering the question, follow these guidelines:
 {custom_instruction_section}
 1. Use only the information provided in the contexts. Do not use prior knowledge or hallucinate information.
@@ -135,10 +139,10 @@ When answering the question, follow these guidelines:
 6. Demonstrate concepts with examples when possible.
 7. Use code blocks for any code snippets.
 8. Use exact names from contexts for functions/classes/methods.
-9. Answer the question based on the user's intent: {user_intent}.
+9. Answer the question based on the user's intent$user_intent.
 10. If a code context is given (enclosed with <Code context>), make use of it as much as you can for answering the question as long as it is relevant. Try to make references to the given code.
 
-Based on this intent, provide a {answer_length} words answer to the user question and question that is the prettier version of the user question with the grammar fixed and more readable.
+Based on $answer_length to the user question and question that is the prettier version of the user question with the grammar fixed and more readable.
 
 Format your answer in markdown (.md) format, following these rules:
 1. Start with an h1 (#) header that matches the question exactly.
@@ -157,12 +161,101 @@ Handling Edge Cases:
   - Suggest how to rephrase the question to relate to {guru_type}.
 
 Use the markdown guide provided earlier for proper formatting.
+""")
 
+answer_prompt_date = """
 Remember, today's date is {date}. Use this information if any date-related questions arise.
 
 I will give you the user question and question.
 """
 
+prompt_template = (
+    answer_prompt_role
+    + "\n{binge_answer_prompt}\n\nFirst, carefully read and analyze the following contexts:\n"
+    + answer_prompt_contexts
+    + answer_prompt_guidelines.substitute(
+        user_intent=': {user_intent}',
+        answer_length='this intent, provide a {answer_length} words answer',
+    )
+    + answer_prompt_date
+)
+
+
+# The same for all gurus, so it starts the prefix of the prompt caching friendly layout.
+# Providers only cache prompts of at least 1024 tokens (OpenAI), the guide keeps the static prefix above that.
+answer_prompt_markdown_guide = """
+Markdown guide for the answers:
+
+Headers:
+- Use a single h1 (#) header at the top of the answer, matching the question.
+- Use h2 (##) headers for the main sections of longer answers, and h3 (###) headers for their subsections.
+- Do not skip header levels, and do not end headers with punctuation.
+- Keep headers short and descriptive. Do not use bold or links inside headers.
+
+Paragraphs and emphasis:
+- Keep paragraphs short, two to four sentences each, separated by a blank line.
+- Use bold (**text**) for the critical terms, warnings and the key points of the answer. Do not bold whole sentences.
+- Use italics (*text*) sparingly, for terms that are introduced for the first time.
+- Use inline code (`text`) for the names of functions, classes, methods, variables, commands, options, file names, paths and configuration keys.
+
+Lists:
+- Use numbered lists (1., 2., 3.) for steps that must be followed in order.
+- Use bullet lists (-) for options, features and other items without an order.
+- Keep the items parallel in structure, and start each item with a capital letter.
+- Nest lists at most one level deep, indenting the nested items by two spaces.
+
+Code blocks:
+- Use fenced code blocks with three backticks for every code snippet, command and configuration file.
+- Always add the language after the opening backticks, for example python, javascript, bash, yaml or json.
+- Keep the snippets minimal and focused on the question, and make them complete enough to run or copy.
+- Put the commands to run in a terminal in bash code blocks, without a shell prompt in front of them.
+- Explain the important lines of a snippet after the code block, not inside long comments.
+
+Tables:
+- Use tables to compare options, versions or features over the same attributes.
+- Add a header row and keep the cells short. Do not put code blocks or lists inside the cells.
+
+Links and references:
+- Use descriptive link texts like [Installation guide](link), never bare urls or texts like "here" or "this link".
+- Only link to the urls given in the contexts. Do not make up urls.
+- Group the references at the end of the answer under a "## References" header when there are several of them.
+
+Notes and warnings:
+- Use blockquotes (>) for notes, tips and warnings that should stand out from the rest of the answer.
+- Start them with a bold label, for example **Note:**, **Tip:** or **Warning:**.
+
+Wording:
+- Write in a clear, neutral and technical tone, addressing the user as "you".
+- Prefer active voice and present tense, and use the exact terms of the contexts consistently.
+- Define the abbreviations and the domain specific terms the first time they appear, unless they are common knowledge.
+- Do not repeat the question, and do not add filler sentences that do not help to answer it.
+- Mention the versions, platforms or configurations an answer depends on when the contexts state them.
+
+Structure of an answer:
+- Start with a short direct answer to the question in the first paragraph after the h1 header.
+- Follow with the details, steps, examples and explanations, in sections when the answer is long.
+- End with a short summary or the next steps when they help the user, without repeating the whole answer.
+"""
+
+# Prompt caching friendly version of prompt_template.
+# The static prefix only depends on the guru type, so it is sent first and cached by the providers.
+# Everything that changes per question is in the dynamic suffix, sent after it.
+cached_prompt_template_prefix = (
+    answer_prompt_markdown_guide
+    + answer_prompt_role
+    + "\nYou will be given the contexts, the user's intent, the answer length and the user question and question after these instructions.\n"
+    + answer_prompt_guidelines.substitute(
+        user_intent='',
+        answer_length='the intent, provide an answer with the given number of words',
+    )
+)
+
+cached_prompt_template_suffix = (
+    "\n{binge_answer_prompt}\n\nCarefully read and analyze the following contexts:\n"
+    + answer_prompt_contexts
+    + "\nThe user's intent is: {user_intent}.\nProvide a {answer_length} words answer.\n"
+    + answer_prompt_date
+)
 
 seo_friendly_title_template = """
 <question> is a title. Avoid using command tones or phrases like 'how can you.'. Instead, aim for a direct and to-the-point style and clearly state the subject without using phrases like 'explained,' 'key differences,' or similar. Try to keep it under 60 characters when possible, but don't sacrifice clarity or meaning for brevity.
@@ -1,9 +1,16 @@
+import os
+import copy
 import json
+import re
 import time
+import atexit
 import logging
+import threading
+from datetime import datetime, UTC
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from pydantic import BaseModel, Field
-from typing import List, Tuple
+from typing import List, Tuple, Union
 from django.conf import settings
 from openai import OpenAI
 import requests
@@ -21,6 +28,7 @@ import html2text
 logging.getLogger("openai").setLevel(logging.ERROR)
 logging.getLogger("httpx").setLevel(logging.ERROR)
 from core.exceptions import ThrottlingException
+from core.http_client import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +122,11 @@ class AnswerRelevance(BaseModel):
 class MainContent(BaseModel):
     main_content: str = Field(..., description="Main content of the website")
 
+class DataSourceSummary(BaseModel):
+    summary_suitable: bool = Field(..., description="Whether the content is suitable to be summarized")
+    reasoning: str = Field(..., description="Reasoning of the suitability")
+    summary: str = Field(..., description="Summary of the content")
+
 class QuestionGenerationResponse(BaseModel):
     summary_sufficient: bool = Field(..., description="Whether the summary is sufficient to answer the questions")
     questions: List[str] = Field(..., description="List of questions")
@@ -121,6 +134,9 @@ class QuestionGenerationResponse(BaseModel):
 class OrderGitHubFilesByImportance(BaseModel):
     files: List[str] = Field(..., description="List of files ordered by their importance")
 
+# Status code of a throttled request in an error message, e.g. "Status code: 429. Rate limit exceeded."
+THROTTLE_STATUS_PATTERN = re.compile(r'\bstatus code:?\s*429\b', re.IGNORECASE)
+
 class WebScraper(ABC):
     """Abstract base class for web scrapers"""
     @abstractmethod
@@ -243,19 +259,166 @@ class FirecrawlScraper(WebScraper):
             if "Bad Request" in error_str and "no longer supported" in error_str:
                 failed_urls = self._extract_failing_indices(error_str, urls)
                 return [], failed_urls or [(url, error_str) for url in urls]
-            elif "429" in error_str:
+            elif THROTTLE_STATUS_PATTERN.search(error_str):
                 raise WebsiteContentExtractionThrottleError(error_str)
 
             logger.error(f"Batch scraping failed: {error_str}")
             return [], [(url, f"Batch scraping failed: {error_str}") for url in urls]
 
-class Crawl4AIScraper(WebScraper):
-    """Crawl4AI implementation of WebScraper using AsyncWebCrawler"""
-    def __init__(self):
+# Playwright errors after which the browser can no longer be used
+BROWSER_CRASH_ERRORS = (
+    'Target page, context or browser has been closed',
+    'Browser has been closed',
+    'Browser closed',
+    'Target crashed',
+    'Connection closed',
+)
+
+
+class Crawl4AIBrowserPool:
+    """
+    Keeps a headless browser alive across scrapes in this process, as starting it dominates the scraping time.
+    The browser is driven from a dedicated event loop thread. Pages are scraped through `size` reusable sessions
+    (a browser context with a single page each), so a batch scrapes up to `size` pages concurrently.
+    A session is recycled after `session_max_pages` pages, and the browser after `browser_max_pages` pages or a crash.
+    """
+    def __init__(self, size, session_max_pages, browser_max_pages, page_timeout_seconds):
+        self.size = size
+        self.session_max_pages = session_max_pages
+        self.browser_max_pages = browser_max_pages
+        self.page_timeout_seconds = page_timeout_seconds
         self.browser_config = BrowserConfig(
             headless=True
         )
-        
+        self.pid = os.getpid()
+
+        self.crawler = None
+        self.browser_pages = 0
+        self.in_flight = 0
+        self.recycle_requested = False
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='crawl4ai-browser-pool', daemon=True)
+        self.thread.start()
+        # The asyncio primitives are bound to the loop, so they are created on it
+        asyncio.run_coroutine_threadsafe(self._setup(), self.loop).result()
+
+    async def _setup(self):
+        self.condition = asyncio.Condition()
+        self.all_sessions = [{'id': f'crawl4ai-pool-{self.pid}-{i}', 'pages': 0} for i in range(self.size)]
+        self.sessions = asyncio.Queue()
+        for session in self.all_sessions:
+            self.sessions.put_nowait(session)
+
+    async def _close_crawler(self):
+        crawler, self.crawler = self.crawler, None
+        self.browser_pages = 0
+        # Closing the browser closes the contexts of all sessions
+        for session in self.all_sessions:
+            session['pages'] = 0
+        if crawler:
+            try:
+                await crawler.close()
+            except Exception as e:
+                logger.warning(f"Error while closing the Crawl4AI browser: {e}")
+
+    async def _acquire_crawler(self):
+        async with self.condition:
+            # A recycle waits for the pages in flight to finish
+            await self.condition.wait_for(lambda: not self.recycle_requested or self.in_flight == 0)
+            if self.recycle_requested:
+                logger.info(f"Recycling the Crawl4AI browser after {self.browser_pages} pages")
+                await self._close_crawler()
+                self.recycle_requested = False
+            if self.crawler is None:
+                self.crawler = await AsyncWebCrawler(config=self.browser_config).start()
+            self.in_flight += 1
+            return self.crawler
+
+    async def _release_crawler(self, crashed):
+        async with self.condition:
+            self.in_flight -= 1
+            self.browser_pages += 1
+            if crashed or self.browser_pages >= self.browser_max_pages:
+                self.recycle_requested = True
+            self.condition.notify_all()
+
+    async def _scrape(self, url, run_config):
+        session = await self.sessions.get()
+        crashed = False
+        try:
+            crawler = await self._acquire_crawler()
+            try:
+                session_config = copy.copy(run_config)
+                session_config.session_id = session['id']
+                result = await asyncio.wait_for(
+                    crawler.arun(url=url, config=session_config),
+                    timeout=self.page_timeout_seconds
+                )
+                crashed = not result.success and any(error in (result.error_message or '') for error in BROWSER_CRASH_ERRORS)
+                return result
+            except Exception as e:
+                # A timed out or failed run may leave the page in an unknown state
+                crashed = True
+                return e
+            finally:
+                session['pages'] += 1
+                if crashed or session['pages'] >= self.session_max_pages:
+                    session['pages'] = 0
+                    try:
+                        await crawler.crawler_strategy.kill_session(session['id'])
+                    except Exception as e:
+                        logger.warning(f"Error while recycling the Crawl4AI session {session['id']}: {e}")
+                await self._release_crawler(crashed)
+        except Exception as e:
+            return e
+        finally:
+            self.sessions.put_nowait(session)
+
+    async def _scrape_many(self, urls, run_config):
+        return await asyncio.gather(*[self._scrape(url, run_config) for url in urls])
+
+    def scrape(self, urls, run_config):
+        """
+        Scrapes the urls concurrently with the pooled browser.
+        Returns the CrawlResult, or the raised exception, of each url in order.
+        """
+        return asyncio.run_coroutine_threadsafe(self._scrape_many(urls, run_config), self.loop).result()
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_crawler(), self.loop).result(timeout=30)
+        except Exception as e:
+            logger.warning(f"Error while closing the Crawl4AI browser pool: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_crawl4ai_browser_pool = None
+_crawl4ai_browser_pool_lock = threading.Lock()
+
+
+def get_crawl4ai_browser_pool() -> Crawl4AIBrowserPool:
+    """Returns the browser pool of this process, creating it on first use (and after a fork)"""
+    global _crawl4ai_browser_pool
+    with _crawl4ai_browser_pool_lock:
+        if _crawl4ai_browser_pool is None or _crawl4ai_browser_pool.pid != os.getpid():
+            _crawl4ai_browser_pool = Crawl4AIBrowserPool(
+                size=settings.CRAWL4AI_POOL_SIZE,
+                session_max_pages=settings.CRAWL4AI_SESSION_MAX_PAGES,
+                browser_max_pages=settings.CRAWL4AI_BROWSER_MAX_PAGES,
+                page_timeout_seconds=settings.CRAWL4AI_PAGE_TIMEOUT_SECONDS,
+            )
+            atexit.register(_crawl4ai_browser_pool.close)
+        return _crawl4ai_browser_pool
+
+
+class Crawl4AIScraper(WebScraper):
+    """Crawl4AI implementation of WebScraper using the pooled AsyncWebCrawler"""
+    def __init__(self):
+        self.pool = get_crawl4ai_browser_pool()
+
         # Configure markdown generator with content filter
         md_generator = DefaultMarkdownGenerator(
             # content_filter=PruningContentFilter()
@@ -272,65 +435,97 @@ class Crawl4AIScraper(WebScraper):
             wait_for='body',  # Wait for body to be present
         )
 
-    def scrape_url(self, url: str) -> Tuple[str, str]:
-        async def _scrape():
-            try:
-                async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                    result = await crawler.arun(url=url, config=self.run_config)
-                    
-                    if not result.success:
-                        status_code = result.status_code or 500
-                        if status_code == 429:
-                            raise WebsiteContentExtractionThrottleError(
-                                f"Status code: {status_code}. Rate limit exceeded."
-                            )
-                        else:
-                            raise WebsiteContentExtractionError(
-                                f"Status code: {status_code}. Error: {result.error_message}"
-                            )
-
-                    # Get the title from metadata or use URL as fallback
-                    title = result.metadata.get('title', url) if result.metadata else url
-                    
-                    # Try different markdown properties in order of preference
-                    content = None
-                    if hasattr(result, 'markdown'):
-                        if hasattr(result.markdown, 'fit_markdown') and result.markdown.fit_markdown:
-                            content = result.markdown.fit_markdown
-                        elif hasattr(result.markdown, 'raw_markdown') and result.markdown.raw_markdown:
-                            content = result.markdown.raw_markdown
-                        else:
-                            content = result.markdown
-                    
-                    if not content:
-                        raise WebsiteContentExtractionError("No content found")
+        # If we hit the navigation error, try one more time with increased timeouts
+        self.retry_run_config = copy.copy(self.run_config)
+        self.retry_run_config.wait_for_timeout = 10000  # Increase to 10 seconds
+        self.retry_run_config.page_timeout = 90000     # Increase to 90 seconds
+
+    def _get_title_and_content(self, url, result) -> Tuple[str, str]:
+        if isinstance(result, Exception):
+            raise result
+
+        if not result.success:
+            status_code = result.status_code or 500
+            if status_code == 429:
+                raise WebsiteContentExtractionThrottleError(
+                    f"Status code: {status_code}. Rate limit exceeded."
+                )
+            else:
+                raise WebsiteContentExtractionError(
+                    f"Status code: {status_code}. Error: {result.error_message}"
+                )
 
-                    return title, content
+        # Get the title from metadata or use URL as fallback
+        title = result.metadata.get('title', url) if result.metadata else url
+        
+        # Try different markdown properties in order of preference
+        content = None
+        if hasattr(result, 'markdown'):
+            if hasattr(result.markdown, 'fit_markdown') and result.markdown.fit_markdown:
+                content = result.markdown.fit_markdown
+            elif hasattr(result.markdown, 'raw_markdown') and result.markdown.raw_markdown:
+                content = result.markdown.raw_markdown
+            else:
+                content = result.markdown
+        
+        if not content:
+            raise WebsiteContentExtractionError("No content found")
+
+        return title or url, content
+
+    def _scrape(self, urls: List[str]) -> List[Union[Tuple[str, str], Exception]]:
+        """Returns the (title, content) tuple, or the raised exception, of each url in order"""
+        results = self.pool.scrape(urls, self.run_config)
+
+        scraped = []
+        for url, result in zip(urls, results):
+            try:
+                scraped.append(self._get_title_and_content(url, result))
             except Exception as e:
                 logger.error(f"Error scraping URL {url}: {str(e)}")
-                if "Page.content: Unable to retrieve content because the page is navigating" in str(e):
-                    # If we hit the navigation error, try one more time with increased timeouts
-                    self.run_config.wait_for_timeout = 10000  # Increase to 10 seconds
-                    self.run_config.page_timeout = 90000     # Increase to 90 seconds
-                    async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                        result = await crawler.arun(url=url, config=self.run_config)
-                        title = result.metadata.get('title', url) if result.metadata else url
-                        content = result.markdown
-                        if not content:
-                            raise WebsiteContentExtractionError("No content found after retry")
-                        return title, content
-                else:
-                    raise
+                scraped.append(e)
 
-        # Run the async function in the event loop
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            # If no event loop exists, create a new one
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        return loop.run_until_complete(_scrape())
+        retry_indices = [
+            i for i, result in enumerate(scraped)
+            if isinstance(result, Exception) and "Page.content: Unable to retrieve content because the page is navigating" in str(result)
+        ]
+        if retry_indices:
+            retry_urls = [urls[i] for i in retry_indices]
+            for i, url, result in zip(retry_indices, retry_urls, self.pool.scrape(retry_urls, self.retry_run_config)):
+                try:
+                    scraped[i] = self._get_title_and_content(url, result)
+                except Exception as e:
+                    logger.error(f"Error scraping URL {url} after retry: {str(e)}")
+                    scraped[i] = e
+
+        return scraped
+
+    def scrape_url(self, url: str) -> Tuple[str, str]:
+        result = self._scrape([url])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def scrape_urls_batch(self, urls: List[str]) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]]]:
+        """
+        Scrape multiple URLs concurrently with the browser pool.
+        Returns: Tuple[
+            List[Tuple[url: str, title: str, content: str]],  # Successful results
+            List[Tuple[url: str, error: Exception]]  # Failed URLs with their exceptions
+        ]
+        """
+        successful_results = []
+        failed_urls = []
+        for url, result in zip(urls, self._scrape(urls)):
+            # Throttles come from the scraped hosts and not from Crawl4AI, so they are reported per url.
+            # The exception is kept so that they are told apart by type.
+            if isinstance(result, Exception):
+                failed_urls.append((url, result))
+            else:
+                title, content = result
+                successful_results.append((url, title, content))
+
+        return successful_results, failed_urls
 
 def get_web_scraper() -> WebScraper:
     """Factory function to get the appropriate web scraper based on settings"""
@@ -357,10 +552,37 @@ class GuruRequester():
 
     def get_processed_raw_questions(self, page_num):
         url = f"{self.base_url}/{GURU_ENDPOINTS['processed_raw_questions']}/?page_num={page_num}"
-        response = requests.get(url, headers=self.headers)
+        response = get_http_session().get(url, headers=self.headers)
         return response.json()
 
 
+# (api_key, base_url) -> (event loop, AsyncOpenAI client). The connection pool of a client is bound to its event loop.
+_async_openai_clients = {}
+
+
+def get_async_openai_client(api_key, base_url):
+    """
+    Returns the AsyncOpenAI client of the provider for the running event loop, creating it on the first call.
+    Long running listeners share one client, and its connection pool, across all of their answers.
+    """
+    from openai import AsyncOpenAI
+
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url)
+    if key not in _async_openai_clients or _async_openai_clients[key][0] is not loop:
+        _async_openai_clients[key] = (loop, AsyncOpenAI(api_key=api_key, base_url=base_url))
+    return _async_openai_clients[key][1]
+
+
+async def close_async_openai_clients():
+    """Closes the AsyncOpenAI clients of the running event loop, to be awaited before the loop stops."""
+    loop = asyncio.get_running_loop()
+    for key, (client_loop, client) in list(_async_openai_clients.items()):
+        if client_loop is loop:
+            del _async_openai_clients[key]
+            await client.close()
+
+
 class OpenAIRequester():
     def __init__(self):
         self.client = None
@@ -651,6 +873,33 @@ class OpenAIRequester():
             stream_options={"include_usage": True},
         )
 
+    def ask_question_with_async_stream(self, messages, model_name=settings.GPT_MODEL):
+        """
+        Same as ask_question_with_stream, with the async OpenAI client.
+        
+        Args:
+            messages (list): List of message dictionaries with role and content
+            model_name (str): The model to use for generation
+        
+        Returns:
+            Coroutine: To be awaited in the caller's event loop, returning an async stream of response chunks
+        """
+        model_name = self._get_model_name(model_name)
+        # Same provider as the sync client. The async client does not hold a thread while the answer streams.
+        api_key, base_url = self.client.api_key, str(self.client.base_url)
+
+        async def create_stream():
+            async_client = get_async_openai_client(api_key, base_url)
+            return await async_client.chat.completions.create(
+                model=model_name,
+                temperature=0,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+        return create_stream()
+
     def get_summary(self, prompt, question, model_name=settings.GPT_MODEL):
         """
         Get a summary response from OpenAI.
@@ -903,7 +1152,7 @@ class GitHubRequester():
         owner = github_url.split('https://github.com/')[1].split('/')[0]
         repo = github_url.split('https://github.com/')[1].split('/')[1]
         url = f"{self.base_url}/{owner}/{repo}"
-        response = requests.get(url, headers=self.headers, timeout=10)
+        response = get_http_session().get(url, headers=self.headers, timeout=10)
         if response.status_code != 200:
             raise ValueError(f"Error getting GitHub repo details for {github_url}. Status code: {response.status_code}. Response: {response.text}")
         # {"status": "403", "message": "API rate limit exceeded for 34.66.36.109. (But here's the good news: Authenticated requests get a higher rate limit. Check out the documentation for more details.)"}
@@ -911,6 +1160,26 @@ class GitHubRequester():
             raise ValueError(f"GitHub API rate limit exceeded for {github_url}")
         return response.json()
 
+def fetch_concurrently(fetch, keys, max_workers):
+    """
+    Calls fetch for each key in a thread pool.
+    Returns the results by key, the keys whose fetch raised a ValueError are logged and left out.
+    """
+    def fetch_key(key):
+        try:
+            return fetch(key)
+        except ValueError as e:
+            logger.warning(f"Error fetching {key}: {str(e)}")
+            return None
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for key, result in zip(keys, executor.map(fetch_key, keys)):
+            if result:
+                results[key] = result
+    return results
+
+
 class JiraRequester():
     def __init__(self, integration):
         """
@@ -919,12 +1188,22 @@ class JiraRequester():
             integration (Integration): Integration model instance containing Jira credentials
         """
         from atlassian import Jira
+        from core.throttling import get_integration_request_budget
         self.url = f"https://{integration.jira_domain}"
+        # Throttled requests are retried after their Retry-After delay
         self.jira = Jira(
             url=self.url,
             username=integration.jira_user_email,
-            password=integration.jira_api_key
+            password=integration.jira_api_key,
+            backoff_and_retry=True,
+            max_backoff_retries=settings.INTEGRATION_MAX_THROTTLE_RETRIES,
+            max_backoff_seconds=settings.INTEGRATION_MAX_RETRY_AFTER_SECONDS
         )
+        self.request_budget = get_integration_request_budget('jira', integration.jira_domain, settings.JIRA_REQUESTS_PER_MINUTE)
+
+    def _wait_for_request_budget(self):
+        if self.request_budget:
+            self.request_budget.acquire()
 
     def list_issues(self, jql_query, start=0, max_results=50):
         """
@@ -940,6 +1219,7 @@ class JiraRequester():
         """
         try:
             # Get issues using JQL
+            self._wait_for_request_budget()
             issues_data = self.jira.jql(jql_query, start=start, limit=max_results)
             issues = []
             
@@ -966,6 +1246,61 @@ class JiraRequester():
             else:
                 raise ValueError(str(e))
 
+    def iter_updated_issues(self, since, batch_size=100):
+        """
+        Yield the Jira issues updated since the given time in batches, oldest first
+        Args:
+            since (datetime): Aware datetime of the previous sync
+            batch_size (int): Maximum number of results to fetch per request
+        Yields:
+            list: Issues with their id, link and update time
+        Raises:
+            ValueError: If API request fails
+        """
+        # JQL dates are in the timezone of the user, so the watermark is given as a relative date.
+        # It is rounded up a minute, the issues indexed after their update are skipped by the caller.
+        minutes = int((datetime.now(UTC) - since).total_seconds() // 60) + 1
+        jql_query = f"updated >= -{minutes}m ORDER BY updated ASC"
+        start = 0
+        try:
+            while True:
+                self._wait_for_request_budget()
+                issues_data = self.jira.jql(jql_query, start=start, limit=batch_size, fields='updated')
+                issues = issues_data.get('issues', [])
+                if not issues:
+                    break
+
+                yield [
+                    {
+                        'id': issue.get('id'),
+                        'link': f"{self.url}/browse/{issue.get('key')}",
+                        'updated_at': issue.get('fields', {}).get('updated')
+                    }
+                    for issue in issues
+                ]
+
+                start += len(issues)
+                if start >= issues_data.get('total', 0):
+                    break
+        except Exception as e:
+            logger.error(f"Error listing updated Jira issues: {str(e)}", exc_info=True)
+            if "401" in str(e):
+                raise ValueError("Invalid Jira credentials")
+            elif "403" in str(e):
+                raise ValueError("Jira API access forbidden")
+            else:
+                raise ValueError(str(e))
+
+    def get_issues(self, issue_keys):
+        """
+        Get the details of multiple Jira issues concurrently, within the request budget of the Jira site
+        Args:
+            issue_keys (list): Keys of the Jira issues
+        Returns:
+            dict: Issue details by issue key. The issues that could not be fetched are left out.
+        """
+        return fetch_concurrently(self.get_issue, issue_keys, settings.JIRA_FETCH_CONCURRENCY)
+
     def get_issue(self, issue_key):
         """
         Get detailed information about a specific Jira issue
@@ -978,6 +1313,7 @@ class JiraRequester():
         """
         try:
             # Get issue details
+            self._wait_for_request_budget()
             issue = self.jira.issue(issue_key)
             
             fields = issue.get('fields', {})
@@ -1044,9 +1380,21 @@ class ZendeskRequester():
         if not all([integration.zendesk_domain, integration.zendesk_user_email, integration.zendesk_api_token]):
             raise ValueError("Zendesk credentials (domain, email, api_token) are missing in the integration settings.")
 
+        from core.throttling import get_integration_request_budget
         self.domain = integration.zendesk_domain
         self.base_url = f"https://{self.domain}/api/v2"
         self.auth = (f"{integration.zendesk_user_email}/token", integration.zendesk_api_token)
+        self.session = get_http_session()
+        self.request_budget = get_integration_request_budget('zendesk', self.domain, settings.ZENDESK_REQUESTS_PER_MINUTE)
+
+    def _get(self, url, params=None, timeout=20):
+        """
+        GET request within the request budget of the Zendesk account.
+        Throttled requests are retried by the session after the Retry-After delay of the response.
+        """
+        if self.request_budget:
+            self.request_budget.acquire()
+        return self.session.get(url, params=params, auth=self.auth, timeout=timeout)
 
     def list_tickets(self, batch_size=100):
         """
@@ -1059,25 +1407,23 @@ class ZendeskRequester():
             ValueError: If API request fails
         """
         all_tickets = []
-        # Use the standard tickets endpoint and filter in Python
-        url = f"{self.base_url}/tickets.json?page[size]={batch_size}&sort_by=created_at&sort_order=desc"
+        # The export search filters the solved tickets on the server, and unlike the search endpoint it is not capped at 1000 results
+        url = f"{self.base_url}/search/export.json"
+        params = {'query': 'type:ticket status:solved', 'filter[type]': 'ticket', 'page[size]': batch_size}
 
         try:
             while url:
-                response = requests.get(url, auth=self.auth, timeout=20)
+                response = self._get(url, params=params)
                 response.raise_for_status() # Raises HTTPError for bad responses (4xx or 5xx)
 
                 data = response.json()
-                tickets_batch = data.get('tickets', [])
-
-                # Filter for solved tickets and format
-                for ticket in tickets_batch:
-                    if ticket.get('status') == 'solved':
-                        all_tickets.append(self._format_ticket(ticket))
+                for ticket in data.get('results', []):
+                    all_tickets.append(self._format_ticket(ticket))
 
-                # Check for cursor-based pagination meta data
+                # Check for cursor-based pagination meta data. The next link carries the query and the cursor.
                 if data.get('meta', {}).get('has_more'):
                     url = data.get('links', {}).get('next')
+                    params = None
                 else:
                     url = None # Exit loop if no more pages
 
@@ -1100,6 +1446,63 @@ class ZendeskRequester():
             logger.error(f"Unexpected error listing Zendesk tickets: {e}", exc_info=True)
             raise ValueError(f"An unexpected error occurred: {str(e)}")
 
+    def iter_changed_tickets(self, cursor=None, start_time=None):
+        """
+        Yield the Zendesk tickets changed since a previous export, using the incremental ticket export.
+        Args:
+            cursor (str, optional): Cursor returned by the previous export
+            start_time (int, optional): Unix time to start the export from if there is no cursor
+        Yields:
+            tuple: (list of formatted tickets, cursor to continue the export from after them)
+        Raises:
+            ValueError: If API request fails
+        """
+        url = f"{self.base_url}/incremental/tickets/cursor.json"
+        params = {'cursor': cursor} if cursor else {'start_time': start_time}
+
+        try:
+            while True:
+                response = self._get(url, params=params)
+                response.raise_for_status()
+
+                data = response.json()
+                tickets = [
+                    self._format_ticket(ticket)
+                    for ticket in data.get('tickets', [])
+                    if ticket.get('status') != 'deleted'
+                ]
+                # The cursor is returned even if there are no changes, it is kept otherwise
+                cursor = data.get('after_cursor') or cursor
+                yield tickets, cursor
+
+                if data.get('end_of_stream') or not cursor:
+                    break
+                params = {'cursor': cursor}
+        except requests.exceptions.RequestException as e:
+            status_code = e.response.status_code if e.response is not None else None
+            error_text = str(e)
+            if status_code == 401:
+                error_text = "Authentication failed. Check Zendesk email and API token."
+            elif status_code == 403:
+                error_text = "Permission denied. Ensure the API token has the required scopes."
+            elif status_code == 404:
+                 error_text = f"Resource not found or invalid Zendesk domain: {self.domain}"
+            elif status_code == 429:
+                error_text = "Zendesk API rate limit exceeded."
+
+            logger.error(f"Zendesk API error exporting changed tickets: {error_text}", exc_info=True)
+            raise ValueError(f"Failed to export changed Zendesk tickets: {error_text}")
+
+    def get_tickets(self, ticket_ids):
+        """
+        Get the details and comments of multiple Zendesk tickets concurrently, within the request budget of the account
+        Args:
+            ticket_ids (list): IDs of the Zendesk tickets
+        Returns:
+            dict: Formatted ticket data by ticket ID. The tickets that could not be fetched are left out.
+        """
+        return fetch_concurrently(self.get_ticket, ticket_ids, settings.ZENDESK_FETCH_CONCURRENCY)
+
     def get_ticket(self, ticket_id):
         """
         Get details and comments for a specific Zendesk ticket and format them.
@@ -1113,7 +1516,7 @@ class ZendeskRequester():
         try:
             # 1. Fetch ticket details
             ticket_url = f"{self.base_url}/tickets/{ticket_id}.json"
-            response = requests.get(ticket_url, auth=self.auth, timeout=15)
+            response = self._get(ticket_url, timeout=15)
             response.raise_for_status() # Raise HTTPError for bad status codes
             ticket_data = response.json().get('ticket', {})
 
@@ -1173,7 +1576,7 @@ class ZendeskRequester():
 
         try:
             while url:
-                response = requests.get(url, auth=self.auth, timeout=20)
+                response = self._get(url)
                 response.raise_for_status()
 
                 data = response.json()
@@ -1269,7 +1672,7 @@ class ZendeskRequester():
 
         try:
             while url:
-                response = requests.get(url, auth=self.auth, timeout=20)
+                response = self._get(url)
                 response.raise_for_status()
 
                 data = response.json()
@@ -1299,6 +1702,16 @@ class ZendeskRequester():
             logger.error(f"Unexpected error listing Zendesk articles: {e}", exc_info=True)
             raise ValueError(f"An unexpected error occurred: {str(e)}")
 
+    def get_articles(self, article_ids):
+        """
+        Get multiple Zendesk help center articles and their comments concurrently, within the request budget of the account
+        Args:
+            article_ids (list): IDs of the Zendesk articles
+        Returns:
+            dict: Formatted article data by article ID. The articles that could not be fetched are left out.
+        """
+        return fetch_concurrently(self.get_article, article_ids, settings.ZENDESK_FETCH_CONCURRENCY)
+
     def get_article(self, article_id, batch_size=100):
         """
         Get a specific Zendesk help center article and its comments, formatted similarly to tickets.
@@ -1313,7 +1726,7 @@ class ZendeskRequester():
         try:
             # Fetch article details
             article_url = f"{self.base_url}/help_center/articles/{article_id}.json"
-            response = requests.get(article_url, auth=self.auth, timeout=15)
+            response = self._get(article_url, timeout=15)
             response.raise_for_status()
             article_data = response.json().get('article', {})
 
@@ -1362,7 +1775,7 @@ class ZendeskRequester():
 
         try:
             while url:
-                response = requests.get(url, auth=self.auth, timeout=20)
+                response = self._get(url)
                 response.raise_for_status()
                 data = response.json()
                 comments = data.get('comments', [])
@@ -1456,7 +1869,7 @@ class CloudflareRequester():
             ]
         }
         try:
-            response = requests.post(url, headers=self.headers, json=data, timeout=10)
+            response = get_http_session().post(url, headers=self.headers, json=data, timeout=10)
 
             if response.status_code != 200:
                 logger.error(f"Error purging cache for {guru_slug}/{question_slug}. Status code: {response.status_code}")
@@ -1475,7 +1888,7 @@ class RerankerRequester():
     def rerank_health_check(self):
         data = json.dumps({"query":"What is Deep Learning?", "texts": ["Deep Learning is not...", "Deep learning is..."]})
         try:
-            response = requests.post(settings.RERANK_API_URL, headers=self.headers, data=data, timeout=10)
+            response = get_http_session().post(settings.RERANK_API_URL, headers=self.headers, data=data, timeout=10)
         except Exception as e:
             logger.error(f"Error reranking health check", exc_info=True)
             return False
@@ -1509,7 +1922,7 @@ class Auth0Requester():
         headers = {'content-type': 'application/x-www-form-urlencoded'}
 
         try:
-            response = requests.post(url, headers=headers, data=data, timeout=10)
+            response = get_http_session().post(url, headers=headers, data=data, timeout=10)
             response.raise_for_status()
             token_data = response.json()
             self.token = token_data['access_token']
@@ -1529,7 +1942,7 @@ class Auth0Requester():
         headers = {'Authorization': f'Bearer {token}'}
         
         try:
-            response = requests.delete(url, headers=headers, timeout=10)
+            response = get_http_session().delete(url, headers=headers, timeout=10)
             if not response.ok:
                 logger.error(f"Error deleting user {user_id}. Status code: {response.status_code}. Response: {response.text}")
                 return False
@@ -1549,7 +1962,7 @@ class WebshareRequester():
 
     def get_proxies(self):
         url = f"{self.base_url}/proxy/list?mode=direct&page=1&page_size=100&valid=true&ordering=-last_verification,created_at"
-        response = requests.get(url, headers=self.headers, timeout=10)
+        response = get_http_session().get(url, headers=self.headers, timeout=10)
         if not response.ok:
             logger.error(f"Error getting proxies from Webshare. Status code: {response.status_code}. Response: {response.text}")
             return []
@@ -1570,7 +1983,7 @@ class MailgunRequester():
             "text": body
         }
         try:
-            email_response = requests.post(url="https://api.mailgun.net/v3/mail.getanteon.com/messages",
+            email_response = get_http_session().post(url="https://api.mailgun.net/v3/mail.getanteon.com/messages",
                                         auth=("api", self.api_key),
                                         data=data)
 
@@ -1611,7 +2024,7 @@ class YouTubeRequester():
                 "maxResults": 1,
                 "key": self.api_key
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             return data.get("items", [])[0]
@@ -1644,7 +2057,7 @@ class YouTubeRequester():
             else:
                 params["id"] = channel_id
                 
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -1686,7 +2099,7 @@ class YouTubeRequester():
                 if next_page_token:
                     params["pageToken"] = next_page_token
                     
-                response = requests.get(url, params=params, timeout=10)
+                response = get_http_session().get(url, params=params, timeout=10)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -1709,6 +2122,106 @@ class YouTubeRequester():
             else:
                 raise ValueError(f"Failed to fetch playlist videos: {str(e)}")
                 
+    def iter_playlist_video_ids(self, playlist_id):
+        """
+        Yield the video ids of a playlist, a page of at most 50 at a time. Only the ids are requested.
+        Args:
+            playlist_id (str): ID of the playlist
+        Yields:
+            list: Video ids of the page
+        Raises:
+            ValueError: If API request fails
+        """
+        next_page_token = None
+        try:
+            while True:
+                params = {
+                    "part": "contentDetails",
+                    "fields": "nextPageToken,items/contentDetails/videoId",
+                    "maxResults": 50,
+                    "playlistId": playlist_id,
+                    "key": self.api_key
+                }
+                if next_page_token:
+                    params["pageToken"] = next_page_token
+
+                response = get_http_session().get(f"{self.base_url}/playlistItems", params=params, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+
+                yield [item['contentDetails']['videoId'] for item in data.get("items", [])]
+
+                next_page_token = data.get("nextPageToken")
+                if not next_page_token:
+                    break
+
+        except requests.exceptions.RequestException as e:
+            if response.status_code == 404:
+                raise ValueError(f"Playlist not found: {playlist_id}")
+            elif response.status_code == 403:
+                if '"YouTube Data API v3 has not been used in project' in response.text:
+                    raise ValueError("YouTube API is not enabled for this project. Please enable it in the project settings.")
+                else:
+                   raise ValueError("YouTube API quota exceeded or invalid API key")
+            else:
+                raise ValueError(f"Failed to fetch playlist videos: {str(e)}")
+
+    def get_channel_uploads_playlist_id(self, username=None, channel_id=None):
+        """
+        Get the ID of the playlist of the uploads of a channel
+        Args:
+            username (str, optional): YouTube channel username
+            channel_id (str, optional): YouTube channel ID
+        Returns:
+            str: ID of the uploads playlist
+        """
+        channel_data = self.fetch_channel(username=username, channel_id=channel_id)
+        if not channel_data.get("items"):
+            raise ValueError(f"Channel not found: {username or channel_id}")
+        return channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+    def iter_channel_video_ids(self, username=None, channel_id=None):
+        """
+        Yield the video ids of a channel, from its uploads playlist, a page of at most 50 at a time
+        Args:
+            username (str, optional): YouTube channel username
+            channel_id (str, optional): YouTube channel ID
+        Yields:
+            list: Video ids of the page
+        """
+        try:
+            uploads_playlist_id = self.get_channel_uploads_playlist_id(username=username, channel_id=channel_id)
+            yield from self.iter_playlist_video_ids(uploads_playlist_id)
+        except ValueError as e:
+            raise ValueError(f"Failed to fetch channel videos: {str(e)}")
+
+    def get_video_titles(self, video_ids):
+        """
+        Get the titles of videos, 50 videos per request
+        Args:
+            video_ids (list): IDs of the videos
+        Returns:
+            dict: Titles by video ID. Unavailable videos are left out.
+        Raises:
+            ValueError: If API request fails
+        """
+        titles = {}
+        try:
+            for i in range(0, len(video_ids), 50):
+                params = {
+                    "part": "snippet",
+                    "fields": "items(id,snippet/title)",
+                    "id": ",".join(video_ids[i:i + 50]),
+                    "key": self.api_key
+                }
+                response = get_http_session().get(f"{self.base_url}/videos", params=params, timeout=10)
+                response.raise_for_status()
+                for item in response.json().get("items", []):
+                    titles[item['id']] = item['snippet']['title']
+            return titles
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Failed to fetch video titles: {str(e)}")
+
     def fetch_all_channel_videos(self, username=None, channel_id=None):
         """
         Fetch all videos from a channel by first getting the uploads playlist ID
@@ -1719,14 +2232,8 @@ class YouTubeRequester():
             list: List of all video items from the channel
         """
         try:
-            # First get the channel details to get the uploads playlist ID
-            channel_data = self.fetch_channel(username=username, channel_id=channel_id)
-            if not channel_data.get("items"):
-                raise ValueError(f"Channel not found: {username or channel_id}")
-                
-            # Get the uploads playlist ID
-            uploads_playlist_id = channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
-            
+            uploads_playlist_id = self.get_channel_uploads_playlist_id(username=username, channel_id=channel_id)
+
             # Now fetch all videos from the uploads playlist
             return self.fetch_all_playlist_videos(uploads_playlist_id)
             
@@ -1748,7 +2255,7 @@ class OllamaRequester():
             tuple: (is_healthy: bool, models: list, error: str)
         """
         try:
-            response = requests.get(f"{self.base_url}/api/tags", headers=self.headers, timeout=10)
+            response = get_http_session().get(f"{self.base_url}/api/tags", headers=self.headers, timeout=10)
             if response.status_code != 200:
                 return False, [], f"Ollama API returned status code {response.status_code}"
             
@@ -1771,7 +2278,7 @@ class OllamaRequester():
             tuple: (is_embedding_valid: bool, is_base_valid: bool, error: str)
         """
         try:
-            response = requests.get(f"{self.base_url}/api/tags", headers=self.headers, timeout=10)
+            response = get_http_session().get(f"{self.base_url}/api/tags", headers=self.headers, timeout=10)
             if response.status_code != 200:
                 return False, False, f"Ollama API returned status code {response.status_code}"
             
@@ -1791,7 +2298,7 @@ class OllamaRequester():
     def embed_text(self, text, model_name):
         url = f"{self.base_url}/api/embeddings"
         data = json.dumps({"model": model_name, "prompt": text})
-        response = requests.post(url, headers=self.headers, data=data, timeout=10)
+        response = get_http_session().post(url, headers=self.headers, data=data, timeout=10)
         if response.status_code != 200:
             logger.error(f"Ollama API text embedding failed. Text: {text}. Model: {model_name}. Status code: {response.status_code}. {response.text}")
             return False, f"Ollama API returned status code {response.status_code}"
@@ -1806,6 +2313,18 @@ class OllamaRequester():
             results.append(result)
         return True, results
 
+_confluence_site_semaphores = {}
+_confluence_site_semaphores_lock = threading.Lock()
+
+
+def get_confluence_site_semaphore(domain):
+    """Returns the semaphore limiting the concurrent requests of this process to the Confluence site"""
+    with _confluence_site_semaphores_lock:
+        if domain not in _confluence_site_semaphores:
+            _confluence_site_semaphores[domain] = threading.BoundedSemaphore(settings.CONFLUENCE_SITE_CONCURRENCY)
+        return _confluence_site_semaphores[domain]
+
+
 class ConfluenceRequester():
     def __init__(self, integration):
         """
@@ -1912,10 +2431,55 @@ class ConfluenceRequester():
             'url': f"{self.url}/wiki/spaces/{space.get('key')}/pages/{page.get('id')}"
         }
 
+    def iter_pages(self, cql=None):
+        """
+        Yield the Confluence pages matching the CQL query, or all pages if no CQL is provided.
+        The query runs on the content search endpoint and the results are followed with its cursor,
+        so only the matching pages are fetched, one batch at a time.
+
+        Args:
+            cql (str, optional): Confluence Query Language query to filter pages.
+
+        Yields:
+            dict: Formatted page data
+
+        Raises:
+            ValueError: If API request fails
+        """
+        # The listing only includes pages, like the listing of the spaces did.
+        # A trailing ORDER BY clause is not valid inside the parentheses, so it is kept after them.
+        order_by = ''
+        if cql:
+            match = re.match(r'^(.*?)\s*(\bORDER\s+BY\b(?!.*\bORDER\s+BY\b).*)$', cql, re.IGNORECASE | re.DOTALL)
+            if match:
+                cql, order_by = match.group(1), f' {match.group(2).strip()}'
+        cql = f"type=page AND ({cql}){order_by}" if cql and cql.strip() else f"type=page{order_by}"
+        try:
+            response = self.confluence.get(
+                'rest/api/content/search',
+                params={'cql': cql, 'limit': 100, 'expand': 'space'}
+            )
+            while response:
+                for page in response.get('results', []):
+                    yield self._format_page(page)
+
+                next_link = response.get('_links', {}).get('next')
+                if not next_link or not response.get('results'):
+                    break
+                # The next link is relative to the base url and carries the cursor and the query
+                response = self.confluence.get(next_link.lstrip('/'))
+
+        except Exception as e:
+            if "401" in str(e):
+                raise ValueError("Invalid Confluence credentials")
+            elif "403" in str(e):
+                raise ValueError("Confluence API access forbidden")
+            else:
+                raise ValueError(str(e))
+
     def list_pages(self, cql=None):
         """
         List Confluence pages using CQL or list all pages if no CQL is provided.
-        This method combines the functionality of listing spaces and pages.
         
         Args:
             cql (str, optional): Confluence Query Language query to filter pages.
@@ -1930,93 +2494,29 @@ class ConfluenceRequester():
         Raises:
             ValueError: If API request fails
         """
-        try:
-            # Get all pages from all spaces
-            all_pages = []
-            
-            spaces_data = self.confluence.get_all_spaces()
-            spaces = spaces_data.get('results', [])
-            
-            # For each space, get all pages with proper pagination
-            for space in spaces:
-                space_key = space.get('key')
-                space_name = space.get('name', '')
-                try:
-                    # Use pagination to get all pages from the space
-                    page_start = 0
-                    page_limit = 100  # Fetch 100 pages at a time
-                    while True:
-                        pages_batch = self.confluence.get_all_pages_from_space(
-                            space_key, 
-                            start=page_start, 
-                            limit=page_limit
-                        )
-                        
-                        if not pages_batch:
-                            break
-                            
-                        for page in pages_batch:
-                            formatted_page = self._format_page(page, space_key, space_name)
-                            all_pages.append(formatted_page)
-                            
-                        # If we got fewer pages than requested, we've reached the end
-                        if len(pages_batch) < page_limit:
-                            break
-                            
-                        # Move to the next page
-                        page_start += page_limit
-                        
-                except Exception as e:
-                    # Continue to next space if there's an error with this one
-                    logger.warning(f"Error fetching pages from space {space_key}: {str(e)}")
-                    continue
-            
-            # Filter pages by CQL if provided
-            if cql:
-                # Implement pagination for the CQL query as well
-                cql_page_ids = set()
-                cql_start = 0
-                cql_limit = 100  # Fetch 100 results at a time
-                
-                while True:
-                    cql_results = self.confluence.cql(cql, start=cql_start, limit=cql_limit)
-                    results = cql_results.get('results', [])
-                    
-                    if not results:
-                        break
-                        
-                    for result in results:
-                        content = result.get('content', {})
-                        cql_page_ids.add(content.get('id'))
-                    
-                    # If we got fewer results than requested, we've reached the end
-                    if len(results) < cql_limit:
-                        break
-                        
-                    # Move to the next page
-                    cql_start += cql_limit
-                
-                # Filter the all_pages list to only include pages that match the CQL
-                filtered_pages = [page for page in all_pages if page.get('id') in cql_page_ids]
-                
-                return {
-                    'pages': filtered_pages,
-                    'page_count': len(filtered_pages)
-                }
-            
-            # No CQL filtering, just return all pages
-            return {
-                'pages': all_pages,
-                'page_count': len(all_pages)
-            }
-                
-        except Exception as e:
-            if "401" in str(e):
-                raise ValueError("Invalid Confluence credentials")
-            elif "403" in str(e):
-                raise ValueError("Confluence API access forbidden")
-            else:
-                raise ValueError(str(e))
+        pages = list(self.iter_pages(cql))
+        return {
+            'pages': pages,
+            'page_count': len(pages)
+        }
+
+    def get_pages_content(self, page_ids, include_comments=True):
+        """
+        Get the contents of multiple Confluence pages concurrently.
+        The requests to the site are limited by CONFLUENCE_SITE_CONCURRENCY, shared by all the requesters of the process.
+        Args:
+            page_ids (list): IDs of the Confluence pages
+            include_comments (bool): Whether to include comments
+        Returns:
+            dict: Page details with content by page ID. The pages that could not be fetched are left out.
+        """
+        site_semaphore = get_confluence_site_semaphore(self.domain)
+
+        def get_page(page_id):
+            with site_semaphore:
+                return self.get_page_content(page_id, include_comments)
+
+        return fetch_concurrently(get_page, page_ids, settings.CONFLUENCE_SITE_CONCURRENCY)
 
     def get_page_content(self, page_id, include_comments=True):
         """
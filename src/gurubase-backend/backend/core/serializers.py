@@ -73,7 +73,7 @@ class WidgetIdSerializer(serializers.ModelSerializer):
 class DataSourceSerializer(serializers.ModelSerializer):
     class Meta:
         model = DataSource
-        exclude = ['file', 'doc_ids', 'content', 'guru_type']
+        exclude = ['file', 'content', 'original_content', 'legacy_content', 'legacy_original_content', 'guru_type']
 
     def to_representation(self, instance):
         from core.utils import format_github_repo_error
@@ -190,7 +190,7 @@ class SettingsSerializer(serializers.ModelSerializer):
 class CrawlStateSerializer(serializers.ModelSerializer):
     class Meta:
         model = CrawlState
-        fields = ['id', 'url', 'status', 'guru_type', 'discovered_urls', 'start_time', 'end_time']
+        fields = ['id', 'url', 'status', 'guru_type', 'discovered_urls', 'discovery_mode', 'discovered_from_sitemap', 'discovered_from_links', 'start_time', 'end_time']
 
     def to_representation(self, instance):
         repr = super().to_representation(instance)
@@ -5,11 +5,12 @@ import string
 import requests
 from django.db.models.signals import pre_delete, post_delete, post_save, pre_save
 from django.conf import settings
+from django.core.cache import caches
 from django.dispatch import receiver
 from accounts.models import User
 from core.utils import embed_text, generate_og_image, draw_text, get_default_embedding_dimensions, get_embedder_and_model, get_embedding_model_config
 from core import milvus_utils
-from core.models import GithubFile, GuruType, Question, RawQuestion, DataSource
+from core.models import GithubFile, GuruType, Question, RawQuestion, DataSource, DataSourceChunk
 
 from PIL import ImageColor
 from django.core.exceptions import ValidationError
@@ -562,7 +563,7 @@ def clear_data_source(sender, instance: DataSource, **kwargs):
         instance.delete_from_milvus()
 
     if instance.type == DataSource.Type.GITHUB_REPO:
-        GithubFile.objects.filter(data_source=instance).delete()
+        GithubFile.bulk_delete(GithubFile.objects.filter(data_source=instance))
 
 
 @receiver(post_save, sender=GuruType)
@@ -747,7 +748,7 @@ def update_data_source_in_milvus(sender, instance: DataSource, **kwargs):
     old_instance = DataSource.objects.get(id=instance.id)
 
     title_changed = old_instance.title != instance.title
-    if title_changed and instance.in_milvus and instance.doc_ids:
+    if title_changed and instance.in_milvus and DataSourceChunk.objects.filter(data_source=instance).exists():
         collection_name = instance.guru_type.milvus_collection_name
         if milvus_utils.collection_exists(collection_name=collection_name):
             docs = milvus_utils.fetch_vectors(collection_name, f'metadata["link"] == "{instance.url}"')
@@ -755,7 +756,7 @@ def update_data_source_in_milvus(sender, instance: DataSource, **kwargs):
                 doc['metadata']['title'] = instance.title
                 
             # Remove the old vectors
-            milvus_utils.delete_vectors(collection_name, [str(doc['id']) for doc in docs])
+            milvus_utils.delete_vectors_by_ids(collection_name, [doc['id'] for doc in docs])
 
             for doc in docs:
                 del doc['id']
@@ -763,7 +764,10 @@ def update_data_source_in_milvus(sender, instance: DataSource, **kwargs):
             # Insert the new vectors
             dimension = get_embedding_model_config(instance.guru_type.code_embedding_model)[1]
             ids = milvus_utils.insert_vectors(collection_name, docs, dimension=dimension)
-            instance.doc_ids = list(ids)
+            DataSourceChunk.objects.filter(data_source=instance).delete()
+            DataSourceChunk.objects.bulk_create(
+                DataSourceChunk.build(instance, list(ids), [doc.get('text', '') for doc in docs])
+            )
 
 @receiver(pre_delete, sender=GuruType)
 def delete_guru_type_questions(sender, instance: GuruType, **kwargs):
@@ -990,6 +994,15 @@ def handle_integration_deletion(sender, instance, **kwargs):
         from .github.app_handler import GithubAppHandler
         GithubAppHandler(instance).clear_redis_cache()
 
+@receiver(post_save, sender=Integration)
+@receiver(post_delete, sender=Integration)
+def clear_integration_cache(sender, instance, **kwargs):
+    """The Discord listener and the GitHub webhook cache the integrations, drop the stale one so updates apply right away."""
+    if instance.type == Integration.Type.DISCORD:
+        caches['alternate'].delete(f"discord_integration:{instance.external_id}")
+    elif instance.type == Integration.Type.GITHUB:
+        caches['alternate'].delete(f"github_integration:{instance.external_id}")
+
 @receiver(post_save, sender=GuruCreationForm)
 def notify_admin_on_guru_creation_form_submission(sender, instance, **kwargs):
     if instance.notified:
@@ -11,11 +11,14 @@ import redis
 import requests
 from core.exceptions import WebsiteContentExtractionThrottleError, GithubInvalidRepoError, GithubRepoSizeLimitError, GithubRepoFileCountLimitError, YouTubeContentExtractionError
 from core import milvus_utils
-from core.data_sources import fetch_data_source_content, get_internal_links, process_website_data_sources_batch
-from core.requester import FirecrawlScraper, GuruRequester, OpenAIRequester, get_web_scraper
+from core.data_sources import fetch_data_source_content, get_internal_links, prefetch_integration_contents, prefetch_youtube_contents, process_website_data_sources_batch
+from core.requester import GuruRequester, OpenAIRequester, get_web_scraper
+from core.throttling import get_scrape_concurrency_controller
 from core.guru_types import get_guru_type_names, get_guru_type_object
-from core.models import DataSource, Favicon, GuruType, Integration, LLMEval, LinkReference, LinkValidity, Question, Settings, Summarization, SummaryQuestionGeneration, LLMEvalResult, GuruType, GithubFile, CrawlState
-from core.utils import finalize_data_source_summarizations, embed_texts, generate_questions_from_summary, get_default_embedding_dimensions, get_links, get_llm_usage, get_milvus_client, get_more_seo_friendly_title, get_most_similar_questions, guru_type_has_enough_generated_questions, create_guru_type_summarization, simulate_summary_and_answer, validate_guru_type, vector_db_fetch, with_redis_lock, generate_og_image, get_default_settings, send_question_request_for_cloudflare_cache, send_guru_type_request_for_cloudflare_cache, get_embedding_model_config
+from core.models import DataSource, Favicon, GuruType, Integration, LLMBatchJob, LLMEval, LinkReference, LinkValidity, Question, Settings, Summarization, SummaryQuestionGeneration, LLMEvalResult, GuruType, GithubFile, CrawlState, ContentBlob
+from core.fields import save_compressed_text
+from core.llm_batch import LLMBatch, apply_pending_llm_batch_jobs, get_llm_batch_provider
+from core.utils import finalize_data_source_summarizations, embed_texts, generate_questions_from_summary, get_default_embedding_dimensions, get_links, get_llm_usage, get_milvus_client, get_more_seo_friendly_title, get_most_similar_questions, guru_type_has_enough_generated_questions, create_guru_type_summarization, get_summary_generation_model, get_summary_question_generation_model, simulate_summary_and_answer, validate_guru_type, vector_db_fetch, with_redis_lock, generate_og_image, get_default_settings, send_question_request_for_cloudflare_cache, send_guru_type_request_for_cloudflare_cache, get_embedding_model_config
 from django.conf import settings
 import time
 import re
@@ -277,7 +280,6 @@ def data_source_retrieval(guru_type_slug=None, countdown=0):
 
         # Get the web scraper type
         scraper, scrape_tool = get_web_scraper()
-        is_firecrawl = isinstance(scraper, FirecrawlScraper)
 
         # Group data sources by type
         website_sources = []
@@ -288,25 +290,30 @@ def data_source_retrieval(guru_type_slug=None, countdown=0):
             else:
                 other_sources.append(data_source)
 
-        # Process website sources in batches if using Firecrawl
-        if website_sources and is_firecrawl:
-            batch_size = settings.FIRECRAWL_BATCH_SIZE
-            
-            for i in range(0, len(website_sources), batch_size):
-                batch = website_sources[i:i + batch_size]
+        # Process website sources in batches, Firecrawl scrapes them with its batch API and Crawl4AI with its browser pool.
+        # The batch sizes adapt to the throttles of the scraper and of the scraped hosts
+        if website_sources:
+            concurrency_controller = get_scrape_concurrency_controller(scrape_tool)
+            pending_sources = list(website_sources)
+            throttle_retries = 0
+
+            while pending_sources:
+                batch = concurrency_controller.next_batch(pending_sources)
                 try:
-                    processed_sources = process_website_data_sources_batch(batch)
+                    processed_sources = process_website_data_sources_batch(batch, concurrency_controller)
                     
                     # Group sources by status for bulk updates
                     success_sources = []
                     failed_sources = []
+                    throttled_sources = []
                     
                     with transaction.atomic():
                         for data_source in processed_sources:
                             if data_source.status == DataSource.Status.NOT_PROCESSED:
-                                raise WebsiteContentExtractionThrottleError(f'Throttle in batch. Stopping all subsequent extraction for guru type {guru_type_slug}')
+                                throttled_sources.append(data_source)
                             elif not data_source.error:
                                 data_source.status = DataSource.Status.SUCCESS
+                                data_source.last_successful_index_date = datetime.now()
                                 success_sources.append(data_source)
                             else:
                                 data_source.status = DataSource.Status.FAIL
@@ -314,9 +321,11 @@ def data_source_retrieval(guru_type_slug=None, countdown=0):
                         
                         # Bulk update sources
                         if success_sources:
+                            # bulk_update does not call pre_save, so the content blobs are written beforehand
+                            save_compressed_text(success_sources)
                             DataSource.objects.bulk_update(
                                 success_sources,
-                                ['status', 'error', 'user_error', 'title', 'content', 'scrape_tool']
+                                ['status', 'error', 'user_error', 'title', 'content', 'legacy_content', 'scrape_tool', 'last_successful_index_date']
                             )
                         if failed_sources:
                             DataSource.objects.bulk_update(
@@ -333,17 +342,28 @@ def data_source_retrieval(guru_type_slug=None, countdown=0):
                                 data_source.status = DataSource.Status.FAIL
                                 data_source.error = str(e)
                                 data_source.save()
+
+                    if throttled_sources:
+                        throttle_retries += 1
+                        if throttle_retries > settings.WEBSITE_SCRAPE_MAX_THROTTLE_RETRIES:
+                            raise WebsiteContentExtractionThrottleError(f'Throttled in {throttle_retries} batches in a row. Stopping all subsequent extraction for guru type {guru_type_slug}')
+                        # The throttled sources are retried with the reduced concurrency
+                        logger.info(f"Throttled for {len(throttled_sources)} Website URLs, retrying them with reduced concurrency")
+                        pending_sources = throttled_sources + pending_sources
+                        time.sleep(2 ** throttle_retries)
+                    else:
+                        throttle_retries = 0
                                 
                 except WebsiteContentExtractionThrottleError as e:
                     logger.warning(f"Throttled for batch Website URLs. Error: {e}")
-                    # Mark all sources in batch as NOT_PROCESSED and stop processing
+                    # Mark the throttled sources in batch as NOT_PROCESSED and stop processing
+                    throttled_sources = [data_source for data_source in batch if data_source.status == DataSource.Status.NOT_PROCESSED]
                     with transaction.atomic():
-                        for data_source in batch:
-                            data_source.status = DataSource.Status.NOT_PROCESSED
+                        for data_source in throttled_sources:
                             data_source.error = str(e)
                             data_source.user_error = str(e)
                         DataSource.objects.bulk_update(
-                            batch,
+                            throttled_sources,
                             ['status', 'error', 'user_error']
                         )
                     # Stop processing remaining batches if we hit rate limit
@@ -361,21 +381,34 @@ def data_source_retrieval(guru_type_slug=None, countdown=0):
                             ['status', 'error', 'user_error']
                         )
 
-        # Process other sources (and website sources if not using Firecrawl) individually
-        sources_to_process = other_sources + (website_sources if not is_firecrawl else [])
+        # Process other sources individually
+        sources_to_process = other_sources
         jira_integration = Integration.objects.filter(type=Integration.Type.JIRA, guru_type=guru_type_object).first()
         zendesk_integration = Integration.objects.filter(type=Integration.Type.ZENDESK, guru_type=guru_type_object).first()
         confluence_integration = Integration.objects.filter(type=Integration.Type.CONFLUENCE, guru_type=guru_type_object).first()
+        # Jira issues, Zendesk tickets and articles and Confluence pages are fetched concurrently beforehand,
+        # within the limits of their integrations
+        prefetched_contents = {}
+        for integration in [jira_integration, zendesk_integration, confluence_integration]:
+            try:
+                prefetched_contents.update(prefetch_integration_contents(integration, sources_to_process))
+            except Exception as e:
+                logger.warning(f"Error while prefetching the contents of integration {integration.id}: {e}", exc_info=True)
+        # So are the YouTube transcripts
+        try:
+            prefetched_contents.update(prefetch_youtube_contents(sources_to_process))
+        except Exception as e:
+            logger.warning(f"Error while prefetching the YouTube contents: {e}", exc_info=True)
         for data_source in sources_to_process:
             try:
                 if data_source.type == DataSource.Type.JIRA:
-                    data_source = fetch_data_source_content(jira_integration, data_source)
+                    data_source = fetch_data_source_content(jira_integration, data_source, prefetched_contents)
                 elif data_source.type == DataSource.Type.ZENDESK:
-                    data_source = fetch_data_source_content(zendesk_integration, data_source)
+                    data_source = fetch_data_source_content(zendesk_integration, data_source, prefetched_contents)
                 elif data_source.type == DataSource.Type.CONFLUENCE:
-                    data_source = fetch_data_source_content(confluence_integration, data_source)
+                    data_source = fetch_data_source_content(confluence_integration, data_source, prefetched_contents)
                 else:
-                    data_source = fetch_data_source_content(None, data_source)
+                    data_source = fetch_data_source_content(None, data_source, prefetched_contents)
                 data_source.status = DataSource.Status.SUCCESS
             except WebsiteContentExtractionThrottleError as e:
                 logger.warning(f"Throttled for URL {data_source.url}. Error: {e}")
@@ -743,6 +776,36 @@ def check_favicon_validity():
             favicon.save()
     logger.info("Checked favicon validity")
 
+def submit_summarization_batch(guru_type, provider, model_name):
+    """
+    Runs the next step of the summarization of the guru type as a batch job. The steps are the initial summarizations,
+    then each merge layer of the data source summarizations, then each merge layer of the guru type summarization.
+    A step is submitted once the job of the previous one is applied.
+    """
+    if not apply_pending_llm_batch_jobs(guru_type, LLMBatchJob.Kind.SUMMARIZATION, provider):
+        logger.info(f"Waiting for the summarization batch jobs of guru type {guru_type.slug}")
+        return
+
+    batch = LLMBatch(guru_type, LLMBatchJob.Kind.SUMMARIZATION, model_name)
+    data_sources = DataSource.objects.filter(status=DataSource.Status.SUCCESS, initial_summarizations_created=False, guru_type=guru_type)[:settings.TASK_FETCH_LIMIT]
+    for data_source in data_sources.iterator(chunk_size=100):
+        try:
+            data_source.create_initial_summarizations(batch=batch)
+        except Exception as e:
+            logger.error(f"Error while creating initial summarizations for data source {data_source.id}: {str(e)}")
+    if batch.submit(provider):
+        return
+
+    data_sources = DataSource.objects.filter(initial_summarizations_created=True, status=DataSource.Status.SUCCESS, final_summarization_created=False, guru_type=guru_type)[:settings.TASK_FETCH_LIMIT]
+    for data_source in data_sources.iterator(chunk_size=100):
+        finalize_data_source_summarizations(data_source, batch=batch)
+    if batch.submit(provider):
+        return
+
+    create_guru_type_summarization(guru_type, batch=batch)
+    batch.submit(provider)
+
+
 @shared_task
 def summarize_data_sources(guru_type_slugs=["*"]):
     """
@@ -771,6 +834,12 @@ def summarize_data_sources(guru_type_slugs=["*"]):
             guru_type: The guru type object
         """
         # logger.info(f"Summarizing data sources for guru type: {guru_type_slug}")
+        _, model_name = get_summary_generation_model()
+        provider = get_llm_batch_provider(model_name)
+        if provider:
+            submit_summarization_batch(guru_type, provider, model_name)
+            return
+
         data_sources = DataSource.objects.filter(status=DataSource.Status.SUCCESS, initial_summarizations_created=False, guru_type=guru_type)[:settings.TASK_FETCH_LIMIT]
         for data_source in data_sources.iterator(chunk_size=100):
             if len(data_source.content) > 1000:
@@ -833,6 +902,12 @@ def generate_questions_from_summaries(guru_type_slugs=["*"]):
             guru_type_slug: The slug of the guru type
             guru_type: The guru type object
         """
+        _, model_name = get_summary_question_generation_model()
+        provider = get_llm_batch_provider(model_name)
+        if provider and not apply_pending_llm_batch_jobs(guru_type, LLMBatchJob.Kind.QUESTION_GENERATION, provider):
+            logger.info(f"Waiting for the question generation batch jobs of guru type {guru_type_slug}")
+            return
+
         enough_generated, total_generated = guru_type_has_enough_generated_questions(guru_type)
         if enough_generated:
             logger.info(f"Guru type {guru_type_slug} has enough generated questions, skipping")
@@ -866,10 +941,19 @@ def generate_questions_from_summaries(guru_type_slugs=["*"]):
         # Get the random summarizations
         summarizations = Summarization.objects.filter(id__in=random_ids)
 
+        # The sample is sized for the remaining question count, so a batch takes all of it
+        batch = LLMBatch(guru_type, LLMBatchJob.Kind.QUESTION_GENERATION, model_name) if provider else None
         for summarization in summarizations.iterator(chunk_size=100):
             if not summarization.guru_type:
                 logger.error(f"Summarization {summarization.id} has no guru type")
                 continue
+
+            if batch:
+                try:
+                    batch.add_question_generation(summarization)
+                except Exception as e:
+                    logger.error(f"Error while adding the question generation of summarization {summarization.id} to the batch: {str(e)}")
+                continue
             
             questions, model_name, usages = generate_questions_from_summary(
                 summarization.result_content, 
@@ -893,6 +977,9 @@ def generate_questions_from_summaries(guru_type_slugs=["*"]):
             if total_generated >= settings.GENERATED_QUESTION_PER_GURU_LIMIT:
                 logger.info(f"Guru type {guru_type_slug} has reached the limit of {settings.GENERATED_QUESTION_PER_GURU_LIMIT} generated questions, stopping")
                 break
+
+        if batch:
+            batch.submit(provider)
     
     if guru_type_slugs and guru_type_slugs != ["*"]:
         for guru_type_slug in guru_type_slugs:
@@ -1423,7 +1510,7 @@ def update_github_repositories(successful_repos=True):
     """
 
     def process_guru_type(guru_type):
-        from core.github.data_source_handler import clone_repository, read_repository
+        from core.github.data_source_handler import clone_repository, iter_repository
         from django.db import transaction
         import os
         from datetime import datetime        
@@ -1440,67 +1527,81 @@ def update_github_repositories(successful_repos=True):
         for data_source in data_sources:
             try:
                 # Clone the repository
-                temp_dir, repo = clone_repository(data_source.url)
+                temp_dir, repo = clone_repository(
+                    data_source.url,
+                    data_source.github_glob_include,
+                    data_source.github_glob_pattern)
                 
                 try:
-                    # Read the repository structure
-                    structure = read_repository(
-                        temp_dir, 
-                        data_source.github_glob_include, 
-                        data_source.github_glob_pattern)
-
-                    if len(structure) > data_source.guru_type.github_file_count_limit_per_repo_hard:
-                        raise GithubRepoFileCountLimitError(
-                            f"The codebase ({len(structure)}) exceeds the maximum file limit of {data_source.guru_type.github_file_count_limit_per_repo_hard} files supported."
-                        )
-
-                    # Calculate total size
-                    total_size = sum(file['size'] for file in structure)
-                    if total_size > data_source.guru_type.github_repo_size_limit_mb * 1024 * 1024:
-                        raise GithubRepoSizeLimitError(
-                            f"The codebase ({total_size / (1024 * 1024):.2f} MB) exceeds the maximum size limit of {data_source.guru_type.github_repo_size_limit_mb} MB supported."
-                        )
-                    
                     # Get existing files for this data source
                     existing_files = {
                         f.path: f for f in GithubFile.objects.filter(data_source=data_source)
                     }
                     
                     # Track current files in repo
-                    current_paths = {file_info['path'] for file_info in structure}
-                    
-                    files_to_delete = []
-                    files_to_create = []
+                    current_paths = set()
+                    changed = False
+
+                    def save_changes(files_to_delete, files_to_create):
+                        # Bulk process the changes in a transaction
+                        with transaction.atomic():
+                            # Mark the data source as not written to Milvus along with its first saved batch.
+                            # If the run fails midway, the next run skips the saved files by their hashes and writes them to Milvus with the rest.
+                            if data_source.in_milvus:
+                                data_source.in_milvus = False
+                                data_source.save(update_fields=['in_milvus'])
+
+                            # Delete from DB and Milvus in bulk
+                            if files_to_delete:
+                                deleted_count = GithubFile.bulk_delete(GithubFile.objects.filter(
+                                    id__in=[f.id for f in files_to_delete]
+                                ))
+                                logger.info(f"Deleted {deleted_count} files for data source {data_source.id}")
+                            
+                            # Create new files in DB
+                            if files_to_create:
+                                save_compressed_text(files_to_create)
+                                created_files = GithubFile.objects.bulk_create(files_to_create)
+                                logger.info(f"Created {len(created_files)} files for data source {str(data_source)}")
                     
-                    # Find deleted files
-                    deleted_files = [
-                        existing_files[path] for path in existing_files.keys() 
-                        if path not in current_paths
-                    ]
-                    files_to_delete.extend(deleted_files)
+                    # Read the repository in batches, the limits are checked before any file is read
+                    batches = iter_repository(
+                        temp_dir, 
+                        data_source.github_glob_include, 
+                        data_source.github_glob_pattern,
+                        file_count_limit=data_source.guru_type.github_file_count_limit_per_repo_hard,
+                        size_limit_bytes=data_source.guru_type.github_repo_size_limit_mb * 1024 * 1024)
                     
-                    # Process each file in the new structure
-                    for file_info in structure:
-                        path = file_info['path']
-                        content = file_info['content']
-                        size = file_info['size']
-                        
-                        # Get the file's last modification timestamp from git
-                        file_path = os.path.join(temp_dir, path)
-                        try:
-                            # Get the last commit that modified this file
-                            last_commit = next(repo.iter_commits(paths=path))
-                            last_modified = datetime.fromtimestamp(last_commit.committed_date, tz=UTC)
-                        except Exception as e:
-                            logger.warning(f"Could not get last commit for {path}: {str(e)}")
-                            continue
-                        
-                        if path in existing_files:
-                            existing_file = existing_files[path]
-                            # Check if file was modified after our last update
-                            if last_modified > existing_file.date_updated:
-                                # Mark for deletion and recreation
-                                files_to_delete.append(existing_file)
+                    # Process each file in the new structure. The changes are saved batch by batch, so only one batch of contents is kept in memory.
+                    for batch in batches:
+                        files_to_delete = []
+                        files_to_create = []
+                        for file_info in batch:
+                            path = file_info['path']
+                            content = file_info['content']
+                            size = file_info['size']
+                            current_paths.add(path)
+                            
+                            if path in existing_files:
+                                existing_file = existing_files[path]
+                                # Check if file was modified since our last update.
+                                # Repositories are cloned shallow, so the file history is not available to compare commit dates.
+                                # Contents are compared by their blob hashes, without loading the stored contents.
+                                existing_hash = existing_file.content_hash or ContentBlob.get_hash(existing_file.content or '')
+                                if ContentBlob.get_hash(content) != existing_hash:
+                                    # Mark for deletion and recreation
+                                    files_to_delete.append(existing_file)
+                                    files_to_create.append(
+                                        GithubFile(
+                                            data_source=data_source,
+                                            path=path,
+                                            content=content,
+                                            size=size,
+                                            link=f'{data_source.url}/tree/{data_source.default_branch}/{path}'
+                                        )
+                                    )
+                            else:
+                                # New file, just create it
                                 files_to_create.append(
                                     GithubFile(
                                         data_source=data_source,
@@ -1510,35 +1611,22 @@ def update_github_repositories(successful_repos=True):
                                         link=f'{data_source.url}/tree/{data_source.default_branch}/{path}'
                                     )
                                 )
-                        else:
-                            # New file, just create it
-                            files_to_create.append(
-                                GithubFile(
-                                    data_source=data_source,
-                                    path=path,
-                                    content=content,
-                                    size=size,
-                                    link=f'{data_source.url}/tree/{data_source.default_branch}/{path}'
-                                )
-                            )
+
+                        if files_to_delete or files_to_create:
+                            save_changes(files_to_delete, files_to_create)
+                            changed = True
                     
-                    # Bulk process the changes in a transaction
-                    if files_to_delete or files_to_create:
-                        with transaction.atomic():
-                            # Delete from DB (no need to delete from Milvus as it is handled by signals)
-                            if files_to_delete:
-                                deleted_count = GithubFile.objects.filter(
-                                    id__in=[f.id for f in files_to_delete]
-                                ).delete()
-                                logger.info(f"Deleted {deleted_count} files for data source {data_source.id}")
-                            
-                            # Create new files in DB
-                            if files_to_create:
-                                created_files = GithubFile.objects.bulk_create(files_to_create)
-                                logger.info(f"Created {len(created_files)} files for data source {str(data_source)}")
-                        
+                    # Find deleted files
+                    deleted_files = [
+                        existing_files[path] for path in existing_files.keys() 
+                        if path not in current_paths
+                    ]
+                    if deleted_files:
+                        save_changes(deleted_files, [])
+                        changed = True
+
+                    if changed:
                         # Update data source timestamp
-                        data_source.doc_ids = DataSource.objects.get(id=data_source.id).doc_ids # Reflect the latest doc_ids updated by the signals
                         data_source.save()  # This will update date_updated
 
                     data_source.in_milvus = False
@@ -1573,7 +1661,7 @@ def update_github_repositories(successful_repos=True):
                 data_source.error = error_msg
                 data_source.status = DataSource.Status.FAIL
                 if data_source.last_successful_index_date:
-                    user_error = f"An issue occurred while reindexing the codebase. The repository size ({total_size / (1024 * 1024):.2f} MB) has grown beyond our size limit of {data_source.guru_type.github_repo_size_limit_mb} MB. No worries though - this guru still uses the codebase indexed on {data_source.last_successful_index_date.strftime('%B %d')}. Reindexing will be attempted again later."
+                    user_error = f"An issue occurred while reindexing the codebase. The repository size has grown beyond our size limit of {data_source.guru_type.github_repo_size_limit_mb} MB. No worries though - this guru still uses the codebase indexed on {data_source.last_successful_index_date.strftime('%B %d')}. Reindexing will be attempted again later."
                 else:
                     user_error = str(e)
                 data_source.user_error = user_error
@@ -1586,7 +1674,7 @@ def update_github_repositories(successful_repos=True):
                 data_source.error = error_msg
                 data_source.status = DataSource.Status.FAIL
                 if data_source.last_successful_index_date:
-                    user_error = f"An issue occurred while reindexing the codebase. The repository has grown to {len(structure)} files, which exceeds our file count limit of {data_source.guru_type.github_file_count_limit_per_repo_hard} files. No worries though - this guru still uses the codebase indexed on {data_source.last_successful_index_date.strftime('%B %d')}. Reindexing will be attempted again later."
+                    user_error = f"An issue occurred while reindexing the codebase. The repository has grown beyond our file count limit of {data_source.guru_type.github_file_count_limit_per_repo_hard} files. No worries though - this guru still uses the codebase indexed on {data_source.last_successful_index_date.strftime('%B %d')}. Reindexing will be attempted again later."
                 else:
                     user_error = str(e)
                 data_source.user_error = user_error
@@ -1626,6 +1714,90 @@ def update_github_repositories(successful_repos=True):
     
     logger.info("Completed GitHub repositories update task")
 
+def get_outdated_data_source_ids(guru_type, data_source_type, items):
+    """
+    Returns the ids of the indexed data sources of the items (tickets or issues with their link and update time)
+    that were updated after their last index
+    """
+    links = {item['link']: item['updated_at'] for item in items if item['link'] and item['updated_at']}
+    if not links:
+        return []
+
+    indexed_data_sources = DataSource.objects.filter(
+        guru_type=guru_type,
+        type=data_source_type,
+        status=DataSource.Status.SUCCESS,
+        url__in=list(links),
+    ).values_list('id', 'url', 'last_successful_index_date')
+
+    return [
+        data_source_id
+        for data_source_id, url, last_successful_index_date in indexed_data_sources
+        if not last_successful_index_date or datetime.fromisoformat(links[url]) > last_successful_index_date
+    ]
+
+
+@shared_task
+def sync_integration_data_sources():
+    """
+    Periodic task to reindex the Zendesk ticket and Jira issue data sources changed since the last sync.
+    The changes are listed with the incremental ticket export of Zendesk and an `updated` JQL watermark for Jira,
+    which are stored on the integrations. Only the data sources updated after their last index are reindexed.
+    """
+    from core.requester import JiraRequester, ZendeskRequester
+
+    @with_redis_lock(
+        redis_client,
+        lambda guru_type_slug: f'integration_sync_lock_{guru_type_slug}',
+        settings.INTEGRATION_SYNC_LOCK_DURATION_SECONDS,
+    )
+    def sync_guru_type_integrations(guru_type_slug, integrations):
+        outdated_data_source_ids = []
+        for integration in integrations:
+            try:
+                if integration.type == Integration.Type.ZENDESK:
+                    requester = ZendeskRequester(integration)
+                    # The data sources are indexed after the integration is created, so older changes are already indexed
+                    start_time = int(min(integration.date_created, timezone.now() - timedelta(minutes=2)).timestamp())
+                    for tickets, cursor in requester.iter_changed_tickets(integration.zendesk_ticket_sync_cursor, start_time):
+                        outdated_data_source_ids += get_outdated_data_source_ids(integration.guru_type, DataSource.Type.ZENDESK, tickets)
+                        # Saved after every page, an interrupted sync continues from there
+                        integration.zendesk_ticket_sync_cursor = cursor
+                        Integration.objects.filter(id=integration.id).update(zendesk_ticket_sync_cursor=cursor)
+                else:
+                    requester = JiraRequester(integration)
+                    sync_time = timezone.now()
+                    for issues in requester.iter_updated_issues(integration.jira_sync_watermark or integration.date_created):
+                        outdated_data_source_ids += get_outdated_data_source_ids(integration.guru_type, DataSource.Type.JIRA, issues)
+                    Integration.objects.filter(id=integration.id).update(jira_sync_watermark=sync_time)
+            except Exception as e:
+                logger.error(f"Error syncing {integration.type} integration {integration.id}: {e}", exc_info=True)
+                continue
+
+        if not outdated_data_source_ids:
+            return
+
+        logger.info(f"Reindexing {len(outdated_data_source_ids)} changed data sources of guru type {guru_type_slug}")
+        for data_source in DataSource.objects.filter(id__in=outdated_data_source_ids):
+            data_source.reindex()
+        data_source_retrieval.delay(guru_type_slug=guru_type_slug)
+
+    integrations = Integration.objects.filter(
+        type__in=[Integration.Type.ZENDESK, Integration.Type.JIRA]
+    ).select_related('guru_type')
+
+    integrations_by_guru_type = {}
+    for integration in integrations:
+        integrations_by_guru_type.setdefault(integration.guru_type.slug, []).append(integration)
+
+    for guru_type_slug, guru_type_integrations in integrations_by_guru_type.items():
+        try:
+            sync_guru_type_integrations(guru_type_slug=guru_type_slug, integrations=guru_type_integrations)
+        except Exception as e:
+            logger.error(f"Error syncing the integrations of guru type {guru_type_slug}: {traceback.format_exc()}")
+            continue
+
+
 @shared_task
 def crawl_website(url: str, crawl_state_id: int, link_limit: int):
     """
@@ -1666,10 +1838,7 @@ def stop_inactive_ui_crawls():
     )
     
     for crawl in inactive_crawls:
-        crawl.status = CrawlState.Status.STOPPED
-        crawl.end_time = now()
-        crawl.error_message = f"Crawl automatically stopped due to inactivity (no status checks for over {threshold_seconds} seconds)"
-        crawl.save()
+        crawl.stop(error_message=f"Crawl automatically stopped due to inactivity (no status checks for over {threshold_seconds} seconds)")
         
     # return f"Stopped {inactive_crawls.count()} inactive UI crawls"
 
@@ -1704,7 +1873,7 @@ def reindex_text_embedding_model(guru_type_id: int, old_model: str, new_model: s
         
         # First delete from old collection
         for ds in non_github_data_sources:
-            # Trigger delete from milvus anyways even if we drop the collection, to set their in_milvus = False and doc_ids = []
+            # Trigger delete from milvus anyways even if we drop the collection, to set their in_milvus = False and delete their chunks
             ds.delete_from_milvus(overridden_model=old_model)
 
         if old_dimension != new_dimension:
@@ -1788,3 +1957,71 @@ def scrape_main_content(data_source_ids: List[int]):
         data_source.scrape_main_content()
     
     logger.info("Completed scraping main content for all data sources")
+
+
+@shared_task(bind=True, max_retries=None, ignore_result=True)
+def answer_github_event(self, installation_id, data):
+    """
+    Answers the GitHub issue or discussion event received by the webhook, and posts the reply comment.
+    At most GITHUB_ANSWER_INSTALLATION_CONCURRENCY events are answered at once per installation,
+    the others are retried until a slot frees up.
+    """
+    from rest_framework.test import APIRequestFactory
+    from core.github.app_handler import GithubAppHandler
+    from core.github.event_handler import GitHubEventFactory, GitHubEventHandler
+    from core.throttling import RedisConcurrencySlots
+    from core.utils import create_fresh_binge
+    from core.views import api_answer
+
+    slots = RedisConcurrencySlots(
+        f'github_answer_slots:{installation_id}',
+        limit=settings.GITHUB_ANSWER_INSTALLATION_CONCURRENCY,
+        timeout=settings.GITHUB_ANSWER_SLOT_TIMEOUT_SECONDS
+    )
+    token = slots.acquire()
+    if not token:
+        raise self.retry(countdown=settings.GITHUB_ANSWER_RETRY_SECONDS)
+
+    try:
+        integration = Integration.objects.select_related('guru_type', 'api_key').get(type=Integration.Type.GITHUB, external_id=installation_id)
+        bot_name = integration.github_bot_name
+        github_handler = GithubAppHandler(integration)
+
+        event_type = GitHubEventHandler.find_github_event_type(data)
+        event_handler = GitHubEventFactory.get_handler(event_type, integration, github_handler)
+        event_data = event_handler.extract_event_data(data)
+
+        # Create a new binge
+        binge = create_fresh_binge(integration.guru_type, None)
+        guru_type = integration.guru_type.slug
+
+        # Prepare payload for the API
+        payload = {
+            'question': github_handler.cleanup_user_question(event_data['body'], bot_name),
+            'stream': False,
+            'short_answer': True,
+            'fetch_existing': False,
+            'session_id': binge.id
+        }
+
+        if event_data['api_url']:
+            payload['github_api_url'] = event_data['api_url']
+
+        # Create request with API key from integration
+        request = APIRequestFactory().post(
+            f'/api/v1/{guru_type}/answer/',
+            payload,
+            HTTP_X_API_KEY=integration.api_key.key,
+            format='json'
+        )
+
+        response = api_answer(request, guru_type)
+
+        # Handle the response using the event handler
+        event_handler.handle_response(response, event_data, bot_name)
+    except Integration.DoesNotExist:
+        logger.error(f"No integration found for installation {installation_id}")
+    except Exception as e:
+        logger.error(f"Error answering GitHub event of installation {installation_id}: {e}", exc_info=True)
+    finally:
+        slots.release(token)
@@ -0,0 +1,81 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.requester import ConfluenceRequester
+
+
+def get_requester(confluence):
+    integration = SimpleNamespace(confluence_domain='example.atlassian.net', confluence_user_email='', confluence_api_token='')
+    with patch('atlassian.Confluence', return_value=confluence):
+        return ConfluenceRequester(integration)
+
+
+def get_page(page_id):
+    return {'id': page_id, 'title': f'Page {page_id}', 'space': {'key': 'DEV', 'name': 'Development'}, '_links': {'webui': f'/spaces/DEV/pages/{page_id}'}}
+
+
+class ConfluenceListPagesTests(SimpleTestCase):
+    def test_search_is_followed_with_the_cursor(self):
+        confluence = MagicMock()
+        confluence.get.side_effect = [
+            {'results': [get_page('1'), get_page('2')], '_links': {'next': '/rest/api/content/search?cursor=abc'}},
+            {'results': [get_page('3')], '_links': {}},
+        ]
+
+        result = get_requester(confluence).list_pages(cql="space=DEV")
+
+        self.assertEqual([page['id'] for page in result['pages']], ['1', '2', '3'])
+        self.assertEqual(result['pages'][0]['space_name'], 'Development')
+        first_call, next_call = confluence.get.call_args_list
+        self.assertEqual(first_call.kwargs['params']['cql'], 'type=page AND (space=DEV)')
+        self.assertEqual(next_call.args[0], 'rest/api/content/search?cursor=abc')
+        confluence.get_all_spaces.assert_not_called()
+
+    def test_order_by_is_kept_outside_the_condition(self):
+        confluence = MagicMock()
+        confluence.get.return_value = {'results': [], '_links': {}}
+        requester = get_requester(confluence)
+
+        requester.list_pages(cql="space=DEV order by lastmodified desc")
+        requester.list_pages(cql="ORDER BY title")
+        requester.list_pages()
+
+        self.assertEqual(
+            [call.kwargs['params']['cql'] for call in confluence.get.call_args_list],
+            ['type=page AND (space=DEV) order by lastmodified desc', 'type=page ORDER BY title', 'type=page']
+        )
+
+    def test_errors(self):
+        confluence = MagicMock()
+        confluence.get.side_effect = Exception('401 Client Error')
+
+        with self.assertRaisesMessage(ValueError, 'Invalid Confluence credentials'):
+            get_requester(confluence).list_pages()
+
+
+@override_settings(CONFLUENCE_SITE_CONCURRENCY=2)
+class ConfluencePagesContentTests(SimpleTestCase):
+    def test_pages_are_fetched_concurrently_within_the_limit(self):
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def get_page_content(page_id, include_comments=True):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.02)
+            with lock:
+                running['now'] -= 1
+            if page_id == '3':
+                raise ValueError('Confluence page 3 not found')
+            return {'id': page_id}
+
+        requester = get_requester(MagicMock())
+        requester.domain = 'concurrency.atlassian.net'
+        with patch.object(requester, 'get_page_content', side_effect=get_page_content):
+            pages = requester.get_pages_content(['1', '2', '3', '4', '5'])
+
+        self.assertEqual(sorted(pages), ['1', '2', '4', '5'])
+        self.assertEqual(running['max'], 2)
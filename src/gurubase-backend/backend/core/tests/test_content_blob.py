@@ -0,0 +1,92 @@
+from django.test import TestCase
+from core.fields import prefetch_compressed_text, save_compressed_text
+from core.models import ContentBlob, DataSource, GithubFile, GuruType
+
+
+class ContentBlobTests(TestCase):
+    def setUp(self):
+        self.guru_type = GuruType.objects.create(
+            name='Test Guru',
+            slug='test-guru',
+            domain_knowledge='Test domain knowledge',
+            milvus_collection_name='test_guru_collection'
+        )
+        self.data_source = DataSource.objects.create(
+            type=DataSource.Type.GITHUB_REPO,
+            title='Test GitHub Repo',
+            guru_type=self.guru_type,
+            url='https://github.com/test/repo',
+            default_branch='main'
+        )
+
+    def create_file(self, path, content):
+        return GithubFile.objects.create(
+            data_source=self.data_source,
+            path=path,
+            link=f'https://github.com/test/repo/blob/main/{path}',
+            content=content,
+            size=len(content)
+        )
+
+    def test_identical_contents_are_stored_once(self):
+        file1 = self.create_file('a.py', 'print("Hello")')
+        file2 = self.create_file('b.py', 'print("Hello")')
+
+        self.assertEqual(file1.content_hash, file2.content_hash)
+        self.assertEqual(ContentBlob.objects.filter(hash=file1.content_hash).count(), 1)
+
+        blob = ContentBlob.objects.get(hash=file1.content_hash)
+        self.assertEqual(blob.size, len('print("Hello")'))
+        self.assertNotEqual(bytes(blob.data), b'print("Hello")')
+
+    def test_content_is_resolved_lazily(self):
+        file = self.create_file('a.py', 'def f():\n    return 1\n')
+
+        file = GithubFile.objects.get(id=file.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(file.content, 'def f():\n    return 1\n')
+        with self.assertNumQueries(0):
+            self.assertEqual(file.content, 'def f():\n    return 1\n')
+
+    def test_legacy_content_is_used_until_backfilled(self):
+        file = self.create_file('a.py', 'new')
+        GithubFile.objects.filter(id=file.id).update(content=None, legacy_content='old')
+
+        file.refresh_from_db()
+        self.assertEqual(file.content, 'old')
+
+        file.content = 'updated'
+        file.save()
+        file.refresh_from_db()
+        self.assertEqual(file.content, 'updated')
+        self.assertIsNone(file.legacy_content)
+
+    def test_bulk_create_and_prefetch(self):
+        files = [
+            GithubFile(
+                data_source=self.data_source,
+                path=f'file{i}.py',
+                link=f'https://github.com/test/repo/blob/main/file{i}.py',
+                content=f'print({i % 2})',
+                size=8
+            )
+            for i in range(4)
+        ]
+        save_compressed_text(files)
+        GithubFile.objects.bulk_create(files)
+        self.assertEqual(ContentBlob.objects.count(), 2)
+
+        with self.assertNumQueries(2):
+            files = prefetch_compressed_text(GithubFile.objects.filter(data_source=self.data_source).order_by('path'), 'content')
+            self.assertEqual([file.content for file in files], ['print(0)', 'print(1)', 'print(0)', 'print(1)'])
+
+    def test_original_content_shares_the_blob(self):
+        self.data_source.content = 'Page content'
+        self.data_source.save()
+        self.data_source.original_content = self.data_source.content
+        self.data_source.save()
+
+        data_source = DataSource.objects.get(id=self.data_source.id)
+        self.assertEqual(data_source.original_content, 'Page content')
+        self.assertEqual(data_source.content_hash, data_source.original_content_hash)
+        self.assertEqual(ContentBlob.objects.filter(hash=data_source.content_hash).count(), 1)
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+from django.test import TestCase
+from core.utils import join_splits, pack_contexts
+
+
+def make_doc(link, closest_split_num, splits):
+    return {
+        'prefix': 'Text',
+        'entity': {
+            'text': join_splits(splits),
+            'merged_splits': splits,
+            'metadata': {'split_num': closest_split_num, 'link': link, 'title': link, 'type': 'WEBSITE'},
+        },
+    }
+
+
+# 100 tokens each with the estimated token counts
+SPLIT = 'x' * 396
+
+
+@patch('core.utils.get_tokenizer', return_value=None)
+class PackContextsTests(TestCase):
+    def setUp(self):
+        self.contexts = [
+            make_doc('a', 3, {1: SPLIT, 2: SPLIT, 3: SPLIT, 4: SPLIT, 5: SPLIT}),
+            make_doc('b', 1, {1: SPLIT, 2: SPLIT}),
+            make_doc('c', 1, {1: SPLIT}),
+        ]
+        self.reranked_scores = [{'link': 'a', 'score': 0.9}, {'link': 'b', 'score': 0.5}, {'link': 'c', 'score': 0.2}]
+
+    def test_no_limit(self, _):
+        contexts, reranked_scores, stats = pack_contexts(self.contexts, self.reranked_scores, 0)
+
+        self.assertEqual(contexts, self.contexts)
+        self.assertEqual(stats['dropped_contexts'], 0)
+
+    def test_fits_in_budget(self, _):
+        contexts, reranked_scores, stats = pack_contexts(self.contexts, self.reranked_scores, 10000)
+
+        self.assertEqual(contexts, self.contexts)
+        self.assertEqual(stats['packed_tokens'], stats['total_tokens'])
+        self.assertEqual(stats['trimmed_tokens'], 0)
+
+    def test_trims_neighbors_before_dropping(self, _):
+        contexts, reranked_scores, stats = pack_contexts(self.contexts, self.reranked_scores, 700)
+
+        self.assertEqual([ctx['entity']['metadata']['link'] for ctx in contexts], ['a', 'b', 'c'])
+        self.assertEqual(stats['dropped_contexts'], 0)
+        self.assertEqual(stats['trimmed_contexts'], 2)
+        # The closest split and its nearest neighbors are kept
+        self.assertEqual(contexts[0]['entity']['text'], join_splits({2: SPLIT, 3: SPLIT, 4: SPLIT}))
+        self.assertEqual(contexts[1]['entity']['text'], SPLIT)
+        self.assertLessEqual(stats['packed_tokens'], 700)
+
+    def test_drops_lowest_ranked_contexts(self, _):
+        contexts, reranked_scores, stats = pack_contexts(self.contexts, self.reranked_scores, 350)
+
+        self.assertEqual([ctx['entity']['metadata']['link'] for ctx in contexts], ['a', 'b'])
+        self.assertEqual(reranked_scores, self.reranked_scores[:2])
+        self.assertEqual(stats['dropped_contexts'], 1)
+        self.assertEqual(stats['dropped_tokens'], 160)
+
+    def test_stackoverflow_other_answers_are_trimmed(self, _):
+        context = {
+            'prefix': 'Text',
+            'question': make_doc('q', 1, {1: SPLIT}),
+            'accepted_answer': make_doc('q-accepted', 1, {1: SPLIT}),
+            'other_answers': [make_doc('q-other', 1, {1: SPLIT})],
+        }
+        contexts, _, stats = pack_contexts([context], [{'link': 'q', 'score': 0.9}], 300)
+
+        self.assertEqual(contexts[0]['other_answers'], [])
+        self.assertEqual(contexts[0]['accepted_answer']['entity']['text'], SPLIT)
+        self.assertEqual(stats['trimmed_tokens'], 100)
@@ -0,0 +1,120 @@
+from unittest.mock import MagicMock
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+from core.models import GuruType
+from core.utils import (
+    get_cached_context_relevances,
+    get_context_relevance_bypass_scores,
+    get_context_relevance_cache_keys,
+    get_judged_context_relevances,
+    set_cached_context_relevances,
+)
+
+
+def get_context(text, link):
+    return {'prefix': 'Text', 'entity': {'text': text, 'metadata': {'type': 'WEBSITE', 'link': link, 'title': link}}}
+
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'alternate': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'context-relevance-tests'},
+}
+
+
+@override_settings(ENV='test')
+class ContextRelevanceBypassTests(TestCase):
+    def setUp(self):
+        self.guru_type = MagicMock()
+        self.guru_type.context_relevance_keep_threshold = 0.8
+        self.guru_type.context_relevance_drop_threshold = 0.1
+
+    def test_bypasses_when_scores_are_separated(self):
+        scores = get_context_relevance_bypass_scores(self.guru_type, [0.95, 0.85, 0.05])
+        self.assertEqual(scores, [0.95, 0.85, 0.05])
+
+    def test_judges_ambiguous_scores(self):
+        self.assertIsNone(get_context_relevance_bypass_scores(self.guru_type, [0.95, 0.5, 0.05]))
+
+    def test_judges_when_nothing_is_relevant(self):
+        self.assertIsNone(get_context_relevance_bypass_scores(self.guru_type, [0.05, 0.02]))
+
+    def test_disabled_without_thresholds(self):
+        self.guru_type.context_relevance_keep_threshold = None
+        self.assertIsNone(get_context_relevance_bypass_scores(self.guru_type, [0.95]))
+
+    @override_settings(ENV='selfhosted')
+    def test_disabled_in_selfhosted(self):
+        self.assertIsNone(get_context_relevance_bypass_scores(self.guru_type, [1, 1]))
+
+
+@override_settings(ENV='test', GPT_MODEL='gpt-4o', CACHES=LOCMEM_CACHES, CONTEXT_RELEVANCE_CACHE_TIMEOUT_SECONDS=60)
+class ContextRelevanceCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['alternate'].clear()
+        self.guru_type = MagicMock(slug='gurubase', prompt_map={'guru_type': 'Gurubase', 'domain_knowledge': 'AI'})
+        self.contexts = [get_context('Install it with pip', 'https://a.com'), get_context('Run the server', 'https://b.com')]
+
+    def get_keys(self, contexts=None):
+        return get_context_relevance_cache_keys(self.guru_type, 'How to install?', 'how to install', 'install', contexts or self.contexts)
+
+    def test_judged_scores_are_cached(self):
+        keys = self.get_keys()
+        self.assertEqual(get_cached_context_relevances(keys), [None, None])
+
+        set_cached_context_relevances({keys[0]: 0.9})
+
+        self.assertEqual(get_cached_context_relevances(keys), [0.9, None])
+
+    def test_keys_do_not_depend_on_the_context_position(self):
+        self.assertEqual(self.get_keys()[1], self.get_keys(self.contexts[::-1])[0])
+
+    def test_keys_change_with_the_prompt_and_the_model(self):
+        keys = self.get_keys()
+
+        self.guru_type.prompt_map = {**self.guru_type.prompt_map, 'domain_knowledge': 'Search'}
+        prompt_keys = self.get_keys()
+        with self.settings(GPT_MODEL='gpt-4o-mini'):
+            model_keys = self.get_keys()
+
+        self.assertTrue(set(keys).isdisjoint(prompt_keys))
+        self.assertTrue(set(prompt_keys).isdisjoint(model_keys))
+
+    @override_settings(ENV='selfhosted')
+    def test_not_cached_in_selfhosted(self):
+        keys = self.get_keys()
+        set_cached_context_relevances({keys[0]: 0.9})
+
+        self.assertEqual(get_cached_context_relevances(keys), [None, None])
+        self.assertIsNone(caches['alternate'].get(keys[0]))
+
+
+class JudgedContextRelevanceTests(SimpleTestCase):
+    def test_scores_are_mapped_by_context_number(self):
+        # The 2nd and 4th contexts were cached, the others were judged as contexts 1 to 3
+        judged = [{'context_num': 3, 'score': 0.3}, {'context_num': 1, 'score': 0.9}, {'context_num': 2, 'score': 0.5}]
+
+        self.assertEqual(get_judged_context_relevances([0, 2, 4], judged), {4: 0.3, 0: 0.9, 2: 0.5})
+
+    def test_dropped_duplicate_and_out_of_range_items_are_skipped(self):
+        judged = [
+            {'context_num': 2, 'score': 0.8},
+            {'context_num': 2, 'score': 0.1},
+            {'context_num': 4, 'score': 0.7},
+            {'context_num': 0, 'score': 0.6},
+            {'score': 0.5},
+        ]
+
+        # The first context got no score, so nothing is cached for it
+        self.assertEqual(get_judged_context_relevances([1, 3, 5], judged), {3: 0.8})
+
+
+class ContextRelevanceThresholdValidationTests(SimpleTestCase):
+    def test_keep_threshold_must_be_greater_than_drop_threshold(self):
+        with self.assertRaises(ValidationError):
+            GuruType(context_relevance_keep_threshold=0.3, context_relevance_drop_threshold=0.5).clean()
+        with self.assertRaises(ValidationError):
+            GuruType(context_relevance_keep_threshold=0.5, context_relevance_drop_threshold=0.5).clean()
+
+        GuruType(context_relevance_keep_threshold=0.8, context_relevance_drop_threshold=0.1).clean()
+        GuruType(context_relevance_keep_threshold=0.8).clean()
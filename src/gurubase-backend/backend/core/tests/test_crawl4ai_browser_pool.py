@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from crawl4ai.async_configs import CrawlerRunConfig
+from core.requester import Crawl4AIBrowserPool
+
+
+class FakeCrawler:
+    instances = []
+
+    def __init__(self, config=None):
+        self.started = False
+        self.closed = False
+        self.running = 0
+        self.max_running = 0
+        self.sessions = []
+        self.killed_sessions = []
+        self.crawler_strategy = SimpleNamespace(kill_session=self.kill_session)
+        FakeCrawler.instances.append(self)
+
+    async def start(self):
+        self.started = True
+        return self
+
+    async def close(self):
+        self.closed = True
+
+    async def kill_session(self, session_id):
+        self.killed_sessions.append(session_id)
+
+    async def arun(self, url, config):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.sessions.append(config.session_id)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if url.endswith('/crash'):
+            return SimpleNamespace(success=False, status_code=None, error_message='Target crashed', metadata=None, markdown=None)
+        return SimpleNamespace(success=True, status_code=200, error_message='', metadata={'title': url}, markdown=f'content of {url}')
+
+
+@patch('core.requester.AsyncWebCrawler', FakeCrawler)
+class Crawl4AIBrowserPoolTests(SimpleTestCase):
+    def setUp(self):
+        FakeCrawler.instances = []
+        self.run_config = CrawlerRunConfig()
+
+    def get_pool(self, **kwargs):
+        pool = Crawl4AIBrowserPool(**{
+            'size': 2,
+            'session_max_pages': 100,
+            'browser_max_pages': 100,
+            'page_timeout_seconds': 5,
+            **kwargs,
+        })
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_browser_is_reused_across_batches(self):
+        pool = self.get_pool(size=3)
+
+        first = pool.scrape([f'https://example.com/{i}' for i in range(6)], self.run_config)
+        second = pool.scrape(['https://example.com/a'], self.run_config)
+
+        self.assertEqual([result.markdown for result in first], [f'content of https://example.com/{i}' for i in range(6)])
+        self.assertTrue(second[0].success)
+        self.assertEqual(len(FakeCrawler.instances), 1)
+
+        crawler = FakeCrawler.instances[0]
+        self.assertEqual(crawler.max_running, 3)
+        self.assertEqual(len(set(crawler.sessions)), 3)
+        # The shared run config is not modified by the sessions
+        self.assertIsNone(self.run_config.session_id)
+
+    def test_sessions_are_recycled_after_max_pages(self):
+        pool = self.get_pool(size=1, session_max_pages=2)
+
+        pool.scrape([f'https://example.com/{i}' for i in range(5)], self.run_config)
+
+        crawler = FakeCrawler.instances[0]
+        self.assertEqual(len(crawler.killed_sessions), 2)
+
+    def test_browser_is_recycled_after_max_pages(self):
+        pool = self.get_pool(browser_max_pages=4)
+
+        pool.scrape([f'https://example.com/{i}' for i in range(4)], self.run_config)
+        pool.scrape([f'https://example.com/{i}' for i in range(4)], self.run_config)
+
+        self.assertEqual(len(FakeCrawler.instances), 2)
+        self.assertTrue(FakeCrawler.instances[0].closed)
+        self.assertFalse(FakeCrawler.instances[1].closed)
+
+    def test_browser_is_recycled_after_a_crash(self):
+        pool = self.get_pool(size=1)
+
+        results = pool.scrape(['https://example.com/crash', 'https://example.com/a'], self.run_config)
+
+        self.assertFalse(results[0].success)
+        self.assertTrue(results[1].success)
+        self.assertEqual(len(FakeCrawler.instances), 2)
+        self.assertTrue(FakeCrawler.instances[0].closed)
@@ -0,0 +1,120 @@
+from unittest.mock import MagicMock
+from django.test import TestCase, override_settings
+from scrapy.http import HtmlResponse, Request
+from core.data_sources import InternalLinkSpider
+from core.models import CrawlState
+
+
+LOCMEM_CACHES = {
+    'alternate': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'crawl-state-tests',
+    },
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ENV='selfhosted', CRAWL_STATE_FLUSH_INTERVAL_SECONDS=60, CRAWL_STATE_FLUSH_BATCH_SIZE=2)
+class InternalLinkSpiderTests(TestCase):
+    def setUp(self):
+        self.crawl_state = CrawlState.objects.create(url='https://example.com/docs', status=CrawlState.Status.RUNNING)
+        self.spider = InternalLinkSpider(
+            start_urls=['https://example.com/docs'],
+            original_url='https://example.com/docs',
+            crawl_state_id=self.crawl_state.id,
+            link_limit=100
+        )
+        self.spider.crawler = MagicMock()
+
+    def get_response(self, url, hrefs):
+        body = '<html lang="en"><body>' + ''.join(f'<a href="{href}">link</a>' for href in hrefs) + '</body></html>'
+        return HtmlResponse(
+            url=url,
+            body=body.encode('utf-8'),
+            encoding='utf-8',
+            headers={'Content-Type': 'text/html'},
+            request=Request(url)
+        )
+
+    def test_duplicate_links_are_scheduled_once(self):
+        response = self.get_response('https://example.com/docs', [
+            '/docs/a', '/docs/a/', '/docs/a#section', '/docs/b', 'https://other.com/docs/c', '/docs'
+        ])
+
+        requests = list(self.spider.parse(response))
+
+        self.assertEqual([request.url for request in requests], ['https://example.com/docs/a', 'https://example.com/docs/b'])
+
+        # Pages linking to already scheduled urls do not schedule them again
+        response = self.get_response('https://example.com/docs/a', ['/docs/b', '/docs/a'])
+        self.assertEqual(list(self.spider.parse(response)), [])
+
+    def test_known_urls_are_requested_and_parsed(self):
+        spider = InternalLinkSpider(
+            start_urls=['https://example.com/docs'],
+            original_url='https://example.com/docs',
+            known_urls=['https://example.com/docs/a', 'https://example.com/docs/a/', 'https://example.com/docs'],
+            link_limit=100
+        )
+
+        requests = list(spider.start_requests())
+
+        self.assertEqual([request.url for request in requests], ['https://example.com/docs', 'https://example.com/docs/a'])
+        self.assertEqual(requests[1].callback, spider.parse)
+        # Known urls are only added once their page is parsed, and the links on them are followed
+        self.assertEqual(spider.internal_links, set())
+        requests = list(spider.parse(self.get_response('https://example.com/docs/a', ['/docs/b', '/docs/a'])))
+        self.assertEqual([request.url for request in requests], ['https://example.com/docs/b'])
+        self.assertEqual(spider.internal_links, {'https://example.com/docs/a'})
+
+    def test_sitemap_and_link_counts(self):
+        spider = InternalLinkSpider(
+            start_urls=['https://example.com/docs'],
+            original_url='https://example.com/docs',
+            known_urls=['https://example.com/docs/a/', 'https://example.com/docs/old'],
+            crawl_state_id=self.crawl_state.id,
+            link_limit=100
+        )
+        spider.crawler = MagicMock()
+
+        list(spider.parse(self.get_response('https://example.com/docs', ['/docs/b'])))
+        # Sitemap urls are counted without their trailing slash, and when they redirect
+        list(spider.parse(self.get_response('https://example.com/docs/a', [])))
+        redirected = self.get_response('https://example.com/docs/new', [])
+        redirected.meta['redirect_urls'] = ['https://example.com/docs/old']
+        list(spider.parse(redirected))
+        list(spider.parse(self.get_response('https://example.com/docs/b', [])))
+        spider.closed('finished')
+
+        self.crawl_state.refresh_from_db()
+        self.assertEqual(self.crawl_state.discovered_from_sitemap, 2)
+        self.assertEqual(self.crawl_state.discovered_from_links, 2)
+
+    def test_crawl_state_is_flushed_in_batches(self):
+        list(self.spider.parse(self.get_response('https://example.com/docs', [])))
+        self.crawl_state.refresh_from_db()
+        self.assertEqual(self.crawl_state.discovered_urls, [])
+
+        list(self.spider.parse(self.get_response('https://example.com/docs/a', [])))
+        self.crawl_state.refresh_from_db()
+        self.assertEqual(sorted(self.crawl_state.discovered_urls), ['https://example.com/docs', 'https://example.com/docs/a'])
+
+    def test_stop_flag_closes_the_spider(self):
+        self.assertFalse(CrawlState.is_stop_requested(self.crawl_state.id))
+
+        self.crawl_state.stop()
+
+        self.assertTrue(CrawlState.is_stop_requested(self.crawl_state.id))
+        self.assertEqual(list(self.spider.parse(self.get_response('https://example.com/docs', ['/docs/a']))), [])
+        self.assertTrue(self.spider.should_close)
+        self.spider.crawler.engine.close_spider.assert_called_once()
+
+    def test_stop_without_flag_is_detected_on_flush(self):
+        CrawlState.objects.filter(id=self.crawl_state.id).update(status=CrawlState.Status.STOPPED)
+
+        list(self.spider.parse(self.get_response('https://example.com/docs', [])))
+        list(self.spider.parse(self.get_response('https://example.com/docs/a', [])))
+
+        self.assertTrue(self.spider.should_close)
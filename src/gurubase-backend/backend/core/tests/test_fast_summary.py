@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock, patch
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from core import views
+from core.models import Question
+from core.utils import get_fast_question_summary, is_fast_path_summary, refine_fast_summary_from_answer
+
+
+class FastQuestionSummaryTests(TestCase):
+    def setUp(self):
+        self.guru_type = MagicMock()
+        self.guru_type.name = 'Kubernetes'
+
+    def test_builds_summary_fields(self):
+        summary = get_fast_question_summary('how to scale a deployment?', self.guru_type)
+
+        self.assertEqual(summary['question'], 'How to scale a deployment?')
+        self.assertEqual(summary['user_question'], 'how to scale a deployment?')
+        self.assertEqual(summary['question_slug'], 'how-to-scale-a-deployment')
+        self.assertTrue(summary['valid_question'])
+        self.assertEqual(summary['user_intent'], 'how to')
+        self.assertEqual(summary['answer_length'], 500)
+        self.assertEqual(summary['enhanced_question'], 'Kubernetes How to scale a deployment?')
+        self.assertEqual(summary['prompt_tokens'], 0)
+
+    def test_detects_comparison_intent(self):
+        summary = get_fast_question_summary('Deployment vs StatefulSet', self.guru_type)
+        self.assertEqual(summary['user_intent'], 'comparison')
+
+    def test_unsafe_questions_fall_back(self):
+        self.assertIsNone(get_fast_question_summary('and this?', self.guru_type))
+        self.assertIsNone(get_fast_question_summary('x' * 301, self.guru_type))
+        self.assertIsNone(get_fast_question_summary('What about pods?', self.guru_type, parent_question=Question(slug='parent')))
+        self.assertIsNone(get_fast_question_summary('What about pods?', self.guru_type, github_comments=[{'body': 'Hi'}]))
+
+    def test_refine_from_answer(self):
+        answer = "# How to Scale a Deployment\n\nUse **kubectl scale** to change the replica count.\n\n## Example\n"
+        question, description = refine_fast_summary_from_answer(answer, 'how to scale', 'how to scale')
+
+        self.assertEqual(question, 'How to Scale a Deployment')
+        self.assertEqual(description, 'Use kubectl scale to change the replica count.')
+
+    def test_refine_keeps_fields_without_header(self):
+        question, description = refine_fast_summary_from_answer('No header here', 'Question', 'Description')
+
+        self.assertEqual(question, 'Question')
+        self.assertEqual(description, 'Description')
+
+
+@override_settings(ENV='selfhosted')
+class FastSummaryAnswerViewTests(TestCase):
+    def answer(self, summary_times):
+        request = APIRequestFactory().post('/kubernetes/answer/', {
+            'user_question': 'how to scale', 'question': 'How to scale?', 'description': 'How to scale?',
+            'question_slug': 'how-to-scale', 'user_intent': 'how to', 'answer_length': 500, 'times': summary_times,
+        }, format='json')
+        stream_answer = (MagicMock(), '', [], {}, [], [], 1, {}, {}, {})
+        with patch('core.views.get_guru_type_object'), \
+                patch('core.views.stream_question_answer', return_value=stream_answer), \
+                patch('core.views.stream_and_save', return_value=iter([])) as stream_and_save:
+            views.answer(request, 'kubernetes')
+        # The times given to stream_and_save, and then to save_streamed_answer
+        return stream_and_save.call_args.args[13]
+
+    def test_fast_path_of_the_summary_endpoint_is_detected(self):
+        # The summary endpoint nests the times of get_question_summary
+        times = self.answer({'total': 0.1, 'get_question_summary': {'fast_path': True, 'total': 0.01}})
+
+        self.assertTrue(is_fast_path_summary(times['summary']))
+
+    def test_llm_summary_is_not_refined(self):
+        times = self.answer({'total': 0.1, 'get_question_summary': {'get_summary': {}, 'total': 0.05}})
+
+        self.assertFalse(is_fast_path_summary(times['summary']))
+        self.assertFalse(is_fast_path_summary(None))
+        self.assertTrue(is_fast_path_summary({'fast_path': True}))
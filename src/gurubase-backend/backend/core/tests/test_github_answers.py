@@ -0,0 +1,28 @@
+from unittest.mock import MagicMock, patch
+from celery.exceptions import Retry
+from django.test import SimpleTestCase, override_settings
+from core.tasks import answer_github_event
+
+
+@override_settings(GITHUB_ANSWER_INSTALLATION_CONCURRENCY=2, GITHUB_ANSWER_SLOT_TIMEOUT_SECONDS=600, GITHUB_ANSWER_RETRY_SECONDS=10)
+class AnswerGithubEventTests(SimpleTestCase):
+    def run_task(self, token):
+        slots = MagicMock()
+        slots.acquire.return_value = token
+        with patch('core.throttling.RedisConcurrencySlots', return_value=slots) as slots_class, \
+                patch('core.tasks.Integration') as integration_class:
+            integration_class.DoesNotExist = type('DoesNotExist', (Exception,), {})
+            integration_class.objects.select_related.return_value.get.side_effect = ValueError('Database is down')
+            answer_github_event.run(installation_id=42, data={})
+        return slots_class, slots
+
+    def test_retried_while_installation_is_at_its_limit(self):
+        with self.assertRaises(Retry):
+            self.run_task(token=None)
+
+    def test_slot_is_released_after_an_error(self):
+        slots_class, slots = self.run_task(token='slot')
+
+        self.assertEqual(slots_class.call_args.args[0], 'github_answer_slots:42')
+        self.assertEqual(slots_class.call_args.kwargs['limit'], 2)
+        slots.release.assert_called_once_with('slot')
@@ -0,0 +1,59 @@
+import tempfile
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from core.models import DataSource, GithubFile, GuruType
+from core.tasks import update_github_repositories
+
+
+@patch('core.milvus_utils.delete_vectors_by_ids', MagicMock())
+@patch('core.signals.milvus_utils', MagicMock())
+class UpdateGithubRepositoriesTests(TestCase):
+    def setUp(self):
+        self.guru_type = GuruType.objects.create(name='Test Guru', slug='test-guru', domain_knowledge='Test domain knowledge')
+        self.data_source = DataSource.objects.create(
+            type=DataSource.Type.GITHUB_REPO,
+            url='https://github.com/username/repo',
+            guru_type=self.guru_type,
+            status=DataSource.Status.SUCCESS,
+            default_branch='main',
+            in_milvus=True)
+        for path in ['a.py', 'b.py', 'removed.py']:
+            GithubFile.objects.create(data_source=self.data_source, path=path, content=f'old {path}', size=10, in_milvus=True)
+
+    def run_update(self, batches, successful_repos=True):
+        clone = patch('core.github.data_source_handler.clone_repository', side_effect=lambda *args: (tempfile.mkdtemp(), MagicMock()))
+        iterate = patch('core.github.data_source_handler.iter_repository', return_value=batches)
+        with clone, iterate, patch.object(DataSource, 'write_to_milvus') as write_to_milvus:
+            update_github_repositories(successful_repos=successful_repos)
+        return write_to_milvus
+
+    def contents(self):
+        return {f.path: f.content for f in GithubFile.objects.filter(data_source=self.data_source)}
+
+    def test_failed_run_is_resumed(self):
+        def failing_batches():
+            yield [{'path': 'a.py', 'content': 'new a.py', 'size': 8}]
+            raise RuntimeError('Connection lost')
+
+        self.run_update(failing_batches())
+
+        # The first batch is saved and the rest is left as it was
+        self.data_source.refresh_from_db()
+        self.assertEqual(self.data_source.status, DataSource.Status.FAIL)
+        self.assertFalse(self.data_source.in_milvus)
+        self.assertEqual(self.contents(), {'a.py': 'new a.py', 'b.py': 'old b.py', 'removed.py': 'old removed.py'})
+        saved_file = GithubFile.objects.get(data_source=self.data_source, path='a.py')
+        self.assertFalse(saved_file.in_milvus)
+
+        batches = [
+            [{'path': 'a.py', 'content': 'new a.py', 'size': 8}],
+            [{'path': 'b.py', 'content': 'new b.py', 'size': 8}],
+        ]
+        write_to_milvus = self.run_update(batches, successful_repos=False)
+
+        # The saved file is kept and the remaining changes are applied
+        self.data_source.refresh_from_db()
+        self.assertEqual(self.data_source.status, DataSource.Status.SUCCESS)
+        self.assertEqual(self.contents(), {'a.py': 'new a.py', 'b.py': 'new b.py'})
+        self.assertEqual(GithubFile.objects.get(data_source=self.data_source, path='a.py').id, saved_file.id)
+        write_to_milvus.assert_called_once()
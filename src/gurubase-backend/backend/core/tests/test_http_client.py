@@ -0,0 +1,99 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.http_client import CappedRetry, PooledSession
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    throttles = 0
+
+    def do_GET(self):
+        if self.path == '/throttled' and UpstreamHandler.throttles < 1:
+            UpstreamHandler.throttles += 1
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'session=tenant-a; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(
+    HTTP_CLIENT_MAX_RETRIES=2, HTTP_CLIENT_BACKOFF_FACTOR=0, HTTP_CLIENT_MAX_BACKOFF_SECONDS=5, HTTP_CLIENT_POOL_HOSTS=10,
+    HTTP_CLIENT_HOST_MAX_CONCURRENCY=4, HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS=3, HTTP_CLIENT_READ_TIMEOUT_SECONDS=7,
+    HTTP_CLIENT_METRICS_LOG_INTERVAL_SECONDS=0
+)
+class PooledSessionTests(SimpleTestCase):
+    def setUp(self):
+        UpstreamHandler.throttles = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), UpstreamHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_throttled_request_is_retried(self):
+        session = PooledSession()
+
+        response = session.get(f'{self.url}/throttled')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UpstreamHandler.throttles, 1)
+
+    def test_metrics_are_recorded_per_host(self):
+        session = PooledSession()
+
+        session.get(f'{self.url}/first')
+        session.get(f'{self.url}/second')
+
+        metrics = session.metrics.snapshot()['127.0.0.1']
+        self.assertEqual(metrics['requests'], 2)
+        self.assertEqual(metrics['statuses'], {200: 2})
+        self.assertEqual(metrics['bytes'], 24)
+
+    def test_metrics_are_logged_periodically(self):
+        session = PooledSession()
+
+        with self.settings(HTTP_CLIENT_METRICS_LOG_INTERVAL_SECONDS=60), self.assertLogs('core.http_client', level='INFO') as logs:
+            session.get(f'{self.url}/first')
+            session.metrics.last_log -= 60
+            session.get(f'{self.url}/second')
+            session.get(f'{self.url}/third')
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('127.0.0.1: 2 requests, 0 errors', logs.output[0])
+
+    def test_cookies_are_not_shared_between_requests(self):
+        session = PooledSession()
+
+        session.get(f'{self.url}/first')
+
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_default_timeout(self):
+        session = PooledSession()
+
+        with patch('requests.Session.request', return_value=MagicMock(status_code=200, content=b'')) as request:
+            session.get(f'{self.url}/first')
+            session.get(f'{self.url}/first', timeout=1)
+
+        self.assertEqual(request.call_args_list[0].kwargs['timeout'], (3, 7))
+        self.assertEqual(request.call_args_list[1].kwargs['timeout'], 1)
+
+
+class CappedRetryTests(SimpleTestCase):
+    def test_retry_after_is_capped(self):
+        retry = CappedRetry(total=1, backoff_max=5)
+
+        self.assertEqual(retry.get_retry_after(MagicMock(headers={'Retry-After': '600'})), 5)
+        self.assertIsNone(retry.get_retry_after(MagicMock(headers={})))
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from django.test import SimpleTestCase
+from core.integrations.answer import ask_integration_question, get_integration_answer, stream_integration_answer
+from core.exceptions import GuruNotFoundError
+from core.requester import close_async_openai_clients, get_async_openai_client
+from core.utils import APIAskResponse, astream_and_save
+
+
+def get_chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+async def get_stream(chunks):
+    async def stream():
+        for chunk in chunks:
+            await asyncio.sleep(0)
+            yield chunk
+    return stream()
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class AsyncStreamAndSaveTests(SimpleTestCase):
+    def test_answer_is_streamed_then_saved(self):
+        last_chunk = SimpleNamespace(choices=[], usage=None)
+        chunks = [get_chunk('Install '), get_chunk(None), get_chunk('it.'), last_chunk]
+
+        with patch('core.utils.save_streamed_answer') as save_streamed_answer:
+            stream = astream_and_save(
+                user_question='how to install', question='How to install?', guru_type='gurubase', question_slug='how-to-install',
+                description='', response=get_stream(chunks), prompt='', links=[], summary_completion_tokens=0,
+                summary_prompt_tokens=0, summary_cached_tokens=0, context_vals=[], context_distances=[], times={},
+                reranked_scores=[], trust_score=0.9, processed_ctx_relevances={}, ctx_rel_usage={}, enhanced_question=''
+            )
+            self.assertEqual(asyncio.run(collect(stream)), ['Install ', 'it.', ''])
+
+        save_streamed_answer.assert_called_once()
+        answer, chunk, _ = save_streamed_answer.call_args.args
+        self.assertEqual(answer, 'Install it.')
+        self.assertIs(chunk, last_chunk)
+        self.assertEqual(save_streamed_answer.call_args.kwargs['question_slug'], 'how-to-install')
+
+
+@patch('core.integrations.answer.ask_integration_question', new_callable=AsyncMock)
+class IntegrationAnswerTests(SimpleTestCase):
+    def test_new_answer_is_streamed(self, ask_integration_question):
+        async def content():
+            for chunk in ['Install ', 'it.']:
+                yield chunk
+        ask_integration_question.return_value = APIAskResponse.from_stream(content(), 'How to install?')
+
+        chunks = asyncio.run(collect(stream_integration_answer(MagicMock(), 'how to install', MagicMock())))
+
+        self.assertEqual(chunks, ['Install ', 'it.'])
+        self.assertFalse(ask_integration_question.await_args.kwargs['fetch_existing'])
+
+    def test_errors(self, ask_integration_question):
+        ask_integration_question.return_value = APIAskResponse.from_error('This question is not related to Gurubase.')
+
+        self.assertEqual(asyncio.run(collect(stream_integration_answer(MagicMock(), 'hi', MagicMock()))), [])
+        self.assertEqual(
+            asyncio.run(get_integration_answer(MagicMock(), 'hi', MagicMock())),
+            {'msg': 'This question is not related to Gurubase.'}
+        )
+
+    def test_existing_answer_is_formatted(self, ask_integration_question):
+        question_obj = MagicMock()
+        ask_integration_question.return_value = APIAskResponse.from_existing(question_obj)
+
+        with patch('core.integrations.answer.format_integration_answer', return_value={'content': 'Install it.'}) as format_integration_answer:
+            response = asyncio.run(get_integration_answer(MagicMock(), 'how to install', MagicMock()))
+
+        self.assertEqual(response, {'content': 'Install it.'})
+        self.assertIs(format_integration_answer.call_args.args[0], question_obj)
+        self.assertTrue(ask_integration_question.await_args.kwargs['fetch_existing'])
+
+
+class IntegrationThrottleTests(SimpleTestCase):
+    @patch('core.integrations.answer.api_ask')
+    @patch('core.integrations.answer.ConcurrencyThrottleApiKey')
+    def test_throttled_api_keys_are_not_answered(self, throttle_class, api_ask):
+        throttle_class.return_value.allow_request.return_value = False
+        throttle_class.return_value.wait.return_value = 12.5
+        integration = MagicMock()
+        integration.api_key.key = 'key'
+
+        response = asyncio.run(ask_integration_question(integration, 'how to install', MagicMock(), fetch_existing=False))
+
+        self.assertEqual(response.error, 'Request was throttled. Expected available in 12 seconds.')
+        self.assertEqual(throttle_class.return_value.allow_request.call_args.args[0].META, {'HTTP_X_API_KEY': 'key'})
+        api_ask.assert_not_called()
+
+
+@patch('core.integrations.answer.check_integration_throttle', return_value=None)
+class IntegrationGuruTypeTests(SimpleTestCase):
+    @patch('core.integrations.answer.api_ask')
+    @patch('core.integrations.answer.get_guru_type_object')
+    def test_inactive_gurus_are_not_answered(self, get_guru_type_object, api_ask, _):
+        get_guru_type_object.side_effect = GuruNotFoundError({'msg': 'Guru type gurubase is not found'})
+        integration = MagicMock()
+        integration.guru_type.slug = 'gurubase'
+
+        response = asyncio.run(ask_integration_question(integration, 'how to install', MagicMock(), fetch_existing=False))
+
+        self.assertIn('Guru type gurubase is not found', response.error)
+        get_guru_type_object.assert_called_once_with('gurubase')
+        api_ask.assert_not_called()
+
+    @patch('core.integrations.answer.Question')
+    @patch('core.integrations.answer.api_ask')
+    @patch('core.integrations.answer.get_guru_type_object')
+    def test_fresh_guru_type_is_answered(self, get_guru_type_object, api_ask, question_class, _):
+        question_class.objects.filter.return_value.order_by.return_value.afirst = AsyncMock(return_value=None)
+        integration = MagicMock()
+
+        asyncio.run(ask_integration_question(integration, 'how to install', MagicMock(), fetch_existing=False))
+
+        self.assertIs(api_ask.call_args.kwargs['guru_type'], get_guru_type_object.return_value)
+
+
+@patch('openai.AsyncOpenAI')
+class AsyncOpenAIClientTests(SimpleTestCase):
+    def test_client_is_shared_in_the_event_loop(self, async_openai):
+        async_openai.side_effect = lambda **kwargs: MagicMock(close=AsyncMock())
+
+        async def get_clients():
+            first = get_async_openai_client('key', 'https://api.openai.com/v1/')
+            second = get_async_openai_client('key', 'https://api.openai.com/v1/')
+            await close_async_openai_clients()
+            return first, second
+
+        first, second = asyncio.run(get_clients())
+        other_loop_client, _ = asyncio.run(get_clients())
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_loop_client)
+        first.close.assert_awaited_once()
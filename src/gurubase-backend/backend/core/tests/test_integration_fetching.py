@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from core.data_sources import prefetch_integration_contents
+from core.models import DataSource, Integration
+from core.requester import ZendeskRequester
+
+
+def get_zendesk_requester():
+    integration = SimpleNamespace(zendesk_domain='example.zendesk.com', zendesk_user_email='user@example.com', zendesk_api_token='token')
+    with patch('core.throttling.get_integration_request_budget', return_value=None):
+        return ZendeskRequester(integration)
+
+
+class ZendeskRequestTests(SimpleTestCase):
+    def test_requests_wait_for_the_budget_of_the_account(self):
+        requester = get_zendesk_requester()
+        requester.request_budget = MagicMock()
+        requester.session = MagicMock()
+
+        requester._get('https://example.zendesk.com/api/v2/tickets/1.json', timeout=15)
+
+        requester.request_budget.acquire.assert_called_once()
+        self.assertEqual(requester.session.get.call_args.kwargs['auth'], ('user@example.com/token', 'token'))
+        self.assertEqual(requester.session.get.call_args.kwargs['timeout'], 15)
+
+
+    def test_solved_tickets_are_filtered_on_the_server(self):
+        requester = get_zendesk_requester()
+        requester.session = MagicMock()
+        next_link = 'https://example.zendesk.com/api/v2/search/export.json?page[after]=abc'
+        requester.session.get.return_value.json.side_effect = [
+            {'results': [{'id': 1}], 'meta': {'has_more': True}, 'links': {'next': next_link}},
+            {'results': [{'id': 2}], 'meta': {'has_more': False}, 'links': {}},
+        ]
+
+        with patch.object(ZendeskRequester, '_format_ticket', side_effect=lambda ticket: ticket['id']):
+            tickets = requester.list_tickets(batch_size=50)
+
+        self.assertEqual(tickets, [1, 2])
+        first_call, next_call = requester.session.get.call_args_list
+        self.assertEqual(first_call.args[0], 'https://example.zendesk.com/api/v2/search/export.json')
+        self.assertEqual(first_call.kwargs['params'], {'query': 'type:ticket status:solved', 'filter[type]': 'ticket', 'page[size]': 50})
+        self.assertEqual(next_call.args[0], next_link)
+        self.assertIsNone(next_call.kwargs['params'])
+
+
+class PrefetchIntegrationContentsTests(SimpleTestCase):
+    def test_zendesk_tickets_and_articles(self):
+        integration = SimpleNamespace(type=Integration.Type.ZENDESK)
+        data_sources = [
+            SimpleNamespace(type=DataSource.Type.ZENDESK, url='https://example.zendesk.com/agent/tickets/1'),
+            SimpleNamespace(type=DataSource.Type.ZENDESK, url='https://example.zendesk.com/agent/tickets/2'),
+            SimpleNamespace(type=DataSource.Type.ZENDESK, url='https://example.zendesk.com/hc/en-us/articles/3-Install'),
+            SimpleNamespace(type=DataSource.Type.JIRA, url='https://example.atlassian.net/browse/GURU-1'),
+        ]
+        requester = MagicMock()
+        requester.get_tickets.return_value = {'1': {'title': 'Ticket 1', 'content': 'First'}}
+        requester.get_articles.return_value = {'3': {'title': 'Install', 'content': 'Install it.'}}
+
+        with patch('core.data_sources.ZendeskRequester', return_value=requester):
+            contents = prefetch_integration_contents(integration, data_sources)
+
+        self.assertEqual(contents, {
+            'https://example.zendesk.com/agent/tickets/1': ('Ticket 1', 'First'),
+            'https://example.zendesk.com/hc/en-us/articles/3-Install': ('Install', 'Install it.'),
+        })
+        self.assertEqual(sorted(requester.get_tickets.call_args.args[0]), ['1', '2'])
+
+    def test_without_integration_data_sources(self):
+        with patch('core.data_sources.JiraRequester') as jira_requester:
+            self.assertEqual(prefetch_integration_contents(SimpleNamespace(type=Integration.Type.JIRA), []), {})
+        jira_requester.assert_not_called()
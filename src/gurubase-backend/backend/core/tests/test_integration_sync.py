@@ -0,0 +1,64 @@
+from datetime import datetime, UTC
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from core.models import DataSource, Integration
+from core.tasks import get_outdated_data_source_ids, sync_integration_data_sources
+
+
+class OutdatedDataSourcesTests(SimpleTestCase):
+    @patch('core.tasks.DataSource')
+    def test_only_data_sources_updated_after_their_index(self, data_source_class):
+        data_source_class.objects.filter.return_value.values_list.return_value = [
+            (1, 'https://example.zendesk.com/agent/tickets/1', datetime(2025, 5, 1, tzinfo=UTC)),
+            (2, 'https://example.zendesk.com/agent/tickets/2', datetime(2025, 5, 3, tzinfo=UTC)),
+        ]
+        tickets = [
+            {'link': 'https://example.zendesk.com/agent/tickets/1', 'updated_at': '2025-05-02T10:00:00Z'},
+            {'link': 'https://example.zendesk.com/agent/tickets/2', 'updated_at': '2025-05-02T10:00:00Z'},
+            {'link': 'https://example.zendesk.com/agent/tickets/3', 'updated_at': '2025-05-02T10:00:00Z'},
+        ]
+
+        self.assertEqual(get_outdated_data_source_ids(MagicMock(), DataSource.Type.ZENDESK, tickets), [1])
+        self.assertEqual(
+            data_source_class.objects.filter.call_args.kwargs['url__in'],
+            [ticket['link'] for ticket in tickets]
+        )
+
+
+@patch('core.tasks.redis_client', MagicMock())
+@patch('core.tasks.data_source_retrieval')
+@patch('core.tasks.get_outdated_data_source_ids', side_effect=[[1], [], [2]])
+@patch('core.tasks.Integration')
+@patch('core.tasks.DataSource')
+class SyncIntegrationDataSourcesTests(SimpleTestCase):
+    def test_changed_data_sources_are_reindexed(self, data_source_class, integration_class, get_outdated_data_source_ids, data_source_retrieval):
+        guru_type = SimpleNamespace(slug='gurubase')
+        zendesk = SimpleNamespace(id=1, type=Integration.Type.ZENDESK, guru_type=guru_type, zendesk_ticket_sync_cursor='c0', date_created=datetime(2025, 1, 1, tzinfo=UTC))
+        jira = SimpleNamespace(id=2, type=Integration.Type.JIRA, guru_type=guru_type, jira_sync_watermark=datetime(2025, 5, 1, tzinfo=UTC), date_created=datetime(2025, 1, 1, tzinfo=UTC))
+        integration_class.Type = Integration.Type
+        integration_class.objects.filter.return_value.select_related.return_value = [zendesk, jira]
+        data_sources = [MagicMock(), MagicMock()]
+        data_source_class.objects.filter.return_value = data_sources
+
+        zendesk_requester = MagicMock()
+        zendesk_requester.iter_changed_tickets.return_value = iter([([{}], 'c1'), ([], 'c2')])
+        jira_requester = MagicMock()
+        jira_requester.iter_updated_issues.return_value = iter([[{}]])
+        with patch('core.requester.ZendeskRequester', return_value=zendesk_requester), \
+                patch('core.requester.JiraRequester', return_value=jira_requester):
+            sync_integration_data_sources()
+
+        zendesk_requester.iter_changed_tickets.assert_called_once()
+        self.assertEqual(zendesk_requester.iter_changed_tickets.call_args.args[0], 'c0')
+        self.assertEqual(jira_requester.iter_updated_issues.call_args.args[0], jira.jira_sync_watermark)
+
+        # The cursor is saved after every page
+        updates = [call.kwargs for call in integration_class.objects.filter.return_value.update.call_args_list]
+        self.assertEqual([update.get('zendesk_ticket_sync_cursor') for update in updates[:2]], ['c1', 'c2'])
+        self.assertIn('jira_sync_watermark', updates[2])
+
+        self.assertEqual(data_source_class.objects.filter.call_args.kwargs['id__in'], [1, 2])
+        for data_source in data_sources:
+            data_source.reindex.assert_called_once()
+        data_source_retrieval.delay.assert_called_once_with(guru_type_slug='gurubase')
@@ -0,0 +1,131 @@
+import tempfile
+from django.test import SimpleTestCase, TestCase, override_settings
+from core.llm_batch import LLMBatch, LocalBatchProvider, apply_llm_batch_job, get_strict_json_schema
+from core.models import DataSource, GuruType, LLMBatchJob, Summarization, SummaryQuestionGeneration
+from core.requester import QuestionGenerationResponse
+from core.utils import finalize_data_source_summarizations
+
+
+def summarize(request):
+    return {'summary_suitable': True, 'reasoning': '', 'summary': f"Summary of {request['custom_id']}"}
+
+
+class LLMBatchTests(TestCase):
+    def setUp(self):
+        self.provider = LocalBatchProvider(tempfile.mkdtemp())
+        self.guru_type = GuruType.objects.create(
+            name='Test Guru',
+            slug='test-guru',
+            domain_knowledge='Test domain knowledge',
+            milvus_collection_name='test_guru_collection',
+            active=True
+        )
+        self.data_source = DataSource.objects.create(
+            type=DataSource.Type.WEBSITE,
+            title='Test Page',
+            guru_type=self.guru_type,
+            url='https://example.com/docs',
+            status=DataSource.Status.SUCCESS,
+            content='\n\n'.join(f'Paragraph {i}. ' + 'Lorem ipsum dolor sit amet. ' * 40 for i in range(3))
+        )
+
+    def submit_initial_summarizations(self):
+        batch = LLMBatch(self.guru_type, LLMBatchJob.Kind.SUMMARIZATION, 'gpt-4o-2024-08-06')
+        self.data_source.create_initial_summarizations(max_length=1200, chunk_overlap=0, batch=batch)
+        return batch, batch.submit(self.provider)
+
+    def test_results_are_applied_once(self):
+        batch, job = self.submit_initial_summarizations()
+        chunk_count = len(batch.requests)
+        self.assertGreater(chunk_count, 1)
+
+        self.assertFalse(apply_llm_batch_job(job, self.provider))
+        self.assertFalse(Summarization.objects.exists())
+
+        self.provider.complete(job.external_id, summarize)
+        self.assertTrue(apply_llm_batch_job(job, self.provider))
+        # The same results submitted again by another job
+        duplicate_job = LLMBatch(self.guru_type, LLMBatchJob.Kind.SUMMARIZATION, 'gpt-4o-2024-08-06')
+        duplicate_job.requests, duplicate_job.targets = batch.requests, batch.targets
+        duplicate_job = duplicate_job.submit(self.provider)
+        self.provider.complete(duplicate_job.external_id, summarize)
+        self.assertTrue(apply_llm_batch_job(duplicate_job, self.provider))
+        self.assertTrue(apply_llm_batch_job(job, self.provider))
+
+        summarizations = Summarization.objects.filter(data_source_ref=self.data_source, initial=True).order_by('split_num')
+        self.assertEqual([s.split_num for s in summarizations], list(range(1, chunk_count + 1)))
+        self.assertEqual(summarizations[0].result_content, f'Summary of initial_summarization:{self.data_source.id}:1')
+        self.assertTrue(summarizations[0].usages['batch'])
+        self.data_source.refresh_from_db()
+        self.assertTrue(self.data_source.initial_summarizations_created)
+        self.assertFalse(self.data_source.final_summarization_created)
+
+        # The merge of the chunks is the next job
+        batch = LLMBatch(self.guru_type, LLMBatchJob.Kind.SUMMARIZATION, 'gpt-4o-2024-08-06')
+        finalize_data_source_summarizations(self.data_source, batch=batch)
+        job = batch.submit(self.provider)
+        self.provider.complete(job.external_id, summarize)
+        apply_llm_batch_job(job, self.provider)
+
+        root = Summarization.objects.get(data_source_ref=self.data_source, is_root=True)
+        self.assertEqual(root.summarization_refs.count(), chunk_count)
+        self.assertFalse(Summarization.objects.filter(data_source_ref=self.data_source, initial=True, processed=False).exists())
+        self.data_source.refresh_from_db()
+        self.assertTrue(self.data_source.final_summarization_created)
+
+    @override_settings(LLM_BATCH_MAX_ATTEMPTS=2)
+    def test_failed_requests_are_submitted_again_until_max_attempts(self):
+        _, job = self.submit_initial_summarizations()
+
+        def summarize_except_first(request):
+            if request['custom_id'].endswith(':1'):
+                raise Exception('Rate limited')
+            return summarize(request)
+
+        self.provider.complete(job.external_id, summarize_except_first)
+        apply_llm_batch_job(job, self.provider)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, LLMBatchJob.Status.APPLIED)
+        self.assertIn('1 of', job.error)
+        self.assertEqual(job.failed_requests, {f'initial_summarization:{self.data_source.id}:1': 'Rate limited'})
+        self.data_source.refresh_from_db()
+        self.assertFalse(self.data_source.initial_summarizations_created)
+
+        _, job = self.submit_initial_summarizations()
+        self.assertEqual(list(job.targets), [f'initial_summarization:{self.data_source.id}:1'])
+        self.provider.complete(job.external_id, summarize_except_first)
+        apply_llm_batch_job(job, self.provider)
+
+        # The request failed twice, so it is not submitted again
+        _, job = self.submit_initial_summarizations()
+        self.assertIsNone(job)
+
+    def test_question_generation(self):
+        summarization = Summarization.objects.create(
+            guru_type=self.guru_type,
+            data_source_ref=self.data_source,
+            initial=True,
+            result_content='Summary',
+            summary_suitable=True
+        )
+        batch = LLMBatch(self.guru_type, LLMBatchJob.Kind.QUESTION_GENERATION, 'gpt-4o-mini-2024-07-18')
+        batch.add_question_generation(summarization)
+        job = batch.submit(self.provider)
+        self.provider.complete(job.external_id, lambda request: {'summary_sufficient': True, 'questions': ['What is it?']})
+
+        apply_llm_batch_job(job, self.provider)
+
+        summarization.refresh_from_db()
+        self.assertEqual(summarization.question_generation_ref.questions, ['What is it?'])
+        self.assertEqual(summarization.question_generation_ref.model, 'gpt-4o-mini-2024-07-18')
+        self.assertEqual(SummaryQuestionGeneration.objects.count(), 1)
+
+
+class StrictJsonSchemaTests(SimpleTestCase):
+    def test_all_properties_are_required(self):
+        schema = get_strict_json_schema(QuestionGenerationResponse.model_json_schema())
+
+        self.assertEqual(schema['required'], ['summary_sufficient', 'questions'])
+        self.assertIs(schema['additionalProperties'], False)
+        self.assertEqual(schema['properties']['questions']['items'], {'type': 'string'})
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+from django.test import SimpleTestCase
+from core.integrations.streaming import ChannelRateLimiter, CoalescingMessageUpdater, IncrementalFormatter, iter_answer_lines
+
+
+class ThrottleError(Exception):
+    pass
+
+
+class IncrementalFormatterTests(SimpleTestCase):
+    def test_each_line_is_formatted_once(self):
+        format_line = MagicMock(side_effect=str.upper)
+        formatter = IncrementalFormatter(format_line)
+
+        for line in ['# Title', '', '  first', 'second']:
+            formatter.add_line(line)
+
+        self.assertEqual(formatter.text, 'FIRST\nSECOND\n')
+        self.assertEqual([call.args[0] for call in format_line.call_args_list], ['first', 'second'])
+
+    def test_answer_without_header(self):
+        formatter = IncrementalFormatter(str)
+
+        self.assertEqual(formatter.add_line('  first'), '  first\n')
+        self.assertEqual(formatter.add_line('# Not a title'), '# Not a title\n')
+
+
+class AnswerLinesTests(SimpleTestCase):
+    async def collect(self, chunks):
+        return [line async for line in iter_answer_lines(iter(chunks))]
+
+    def test_lines_are_split_across_chunks(self):
+        # "é" split between two chunks
+        chunks = [b'# Ti', b'tle\nfirst \xc3', b'\xa9\n', 'second\nlast']
+
+        self.assertEqual(asyncio.run(self.collect(chunks)), ['# Title', 'first é', 'second', 'last'])
+
+    def test_errors_are_raised(self):
+        def chunks():
+            yield b'first\n'
+            raise ValueError('Failed')
+
+        with self.assertRaisesMessage(ValueError, 'Failed'):
+            asyncio.run(self.collect(chunks()))
+
+
+class CoalescingMessageUpdaterTests(SimpleTestCase):
+    def test_updates_are_coalesced(self):
+        sent = []
+
+        async def send(text):
+            sent.append(text)
+
+        async def run():
+            updater = CoalescingMessageUpdater(send, ChannelRateLimiter(0.05))
+            for i in range(20):
+                updater.update(f'text {i}')
+                await asyncio.sleep(0.01)
+            await updater.flush()
+
+        asyncio.run(run())
+
+        self.assertLess(len(sent), 10)
+        self.assertEqual(sent[-1], 'text 19')
+
+    def test_throttled_update_is_retried_after_the_wait(self):
+        sent = []
+
+        async def send(text):
+            if not sent:
+                sent.append(None)
+                raise ThrottleError()
+            sent.append(text)
+
+        def get_retry_after(error):
+            return 0.05 if isinstance(error, ThrottleError) else None
+
+        async def run():
+            rate_limiter = ChannelRateLimiter(0)
+            updater = CoalescingMessageUpdater(send, rate_limiter, get_retry_after)
+            updater.update('first')
+            await asyncio.sleep(0.01)
+            # The other answers in the channel wait for the throttle too
+            self.assertGreater(rate_limiter.next_time - time.monotonic(), 0)
+            updater.update('second')
+            await updater.flush()
+
+        asyncio.run(run())
+
+        self.assertEqual(sent, [None, 'second'])
+
+    def test_failed_update_is_raised(self):
+        async def send(text):
+            raise ValueError('Failed')
+
+        async def run():
+            updater = CoalescingMessageUpdater(send, ChannelRateLimiter(0))
+            updater.update('first')
+            await updater.flush()
+
+        with self.assertRaisesMessage(ValueError, 'Failed'):
+            asyncio.run(run())
@@ -2,7 +2,7 @@ from django.test import TestCase
 from unittest.mock import patch, MagicMock, call
 from django.contrib.auth import get_user_model
 from core.utils import get_default_embedding_dimensions
-from core.models import GuruType, DataSource, GithubFile
+from core.models import GuruType, DataSource, DataSourceChunk, GithubFile
 from django.conf import settings
 import os
 
@@ -48,13 +48,21 @@ class MilvusOperationsTests(TestCase):
             size=100
         )
 
+    def create_chunks(self, data_source, milvus_ids, github_file=None):
+        DataSourceChunk.objects.bulk_create(
+            DataSourceChunk.build(data_source, milvus_ids, [f'text {id}' for id in milvus_ids], github_file=github_file)
+        )
+
+    def get_milvus_ids(self, **filters):
+        return sorted(DataSourceChunk.objects.filter(**filters).values_list('milvus_id', flat=True))
+
     @patch('core.utils.embed_texts')
     @patch('core.milvus_utils.insert_vectors')
     def test_datasource_write_to_milvus(self, mock_insert_vectors, mock_embed_texts):
-        """Test that DataSource.write_to_milvus correctly updates doc_ids and in_milvus flag"""
+        """Test that DataSource.write_to_milvus correctly creates chunks and sets in_milvus flag"""
         # Mock the embedding and vector insertion
         mock_embed_texts.return_value = [[0.1] * get_default_embedding_dimensions()]
-        mock_insert_vectors.return_value = ['doc_id_1', 'doc_id_2']
+        mock_insert_vectors.return_value = [1, 2]
         
         # Call the method
         self.data_source.write_to_milvus()
@@ -68,15 +76,15 @@ class MilvusOperationsTests(TestCase):
         
         # Check that the model was updated correctly
         self.assertTrue(self.data_source.in_milvus)
-        self.assertEqual(self.data_source.doc_ids, ['doc_id_1', 'doc_id_2'])
+        self.assertEqual(self.get_milvus_ids(data_source=self.data_source), [1, 2])
         self.assertEqual(self.data_source.status, DataSource.Status.SUCCESS)
         self.assertIsNotNone(self.data_source.last_successful_index_date)
 
-    @patch('core.milvus_utils.delete_vectors')
-    def test_datasource_delete_from_milvus(self, mock_delete_vectors):
-        """Test that DataSource.delete_from_milvus correctly clears doc_ids and in_milvus flag"""
-        # Set up the data source with mock doc_ids
-        self.data_source.doc_ids = ['doc_id_1', 'doc_id_2']
+    @patch('core.milvus_utils.delete_vectors_by_filter')
+    def test_datasource_delete_from_milvus(self, mock_delete_vectors_by_filter):
+        """Test that DataSource.delete_from_milvus correctly deletes chunks and clears in_milvus flag"""
+        # Set up the data source with chunks
+        self.create_chunks(self.data_source, [1, 2])
         self.data_source.in_milvus = True
         self.data_source.save()
         
@@ -84,9 +92,9 @@ class MilvusOperationsTests(TestCase):
         self.data_source.delete_from_milvus()
         
         # Check that the mock was called correctly
-        mock_delete_vectors.assert_called_once_with(
+        mock_delete_vectors_by_filter.assert_called_once_with(
             self.guru_type.milvus_collection_name, 
-            ['doc_id_1', 'doc_id_2']
+            'id in [1, 2]'
         )
         
         # Refresh from database
@@ -94,15 +102,15 @@ class MilvusOperationsTests(TestCase):
         
         # Check that the model was updated correctly
         self.assertFalse(self.data_source.in_milvus)
-        self.assertEqual(self.data_source.doc_ids, [])
+        self.assertEqual(self.get_milvus_ids(data_source=self.data_source), [])
 
     @patch('core.utils.embed_texts')
     @patch('core.milvus_utils.insert_vectors')
     def test_github_file_write_to_milvus(self, mock_insert_vectors, mock_embed_texts):
-        """Test that GithubFile.write_to_milvus correctly updates doc_ids and in_milvus flag"""
+        """Test that GithubFile.write_to_milvus correctly creates chunks and sets in_milvus flag"""
         # Mock the embedding and vector insertion
         mock_embed_texts.return_value = [[0.1] * get_default_embedding_dimensions()]
-        mock_insert_vectors.return_value = ['doc_id_1', 'doc_id_2']
+        mock_insert_vectors.return_value = [1]
         
         # Call the method
         self.github_file.write_to_milvus()
@@ -116,45 +124,43 @@ class MilvusOperationsTests(TestCase):
         
         # Check that the model was updated correctly
         self.assertTrue(self.github_file.in_milvus)
-        self.assertEqual(self.github_file.doc_ids, ['doc_id_1', 'doc_id_2'])
+        chunk = DataSourceChunk.objects.get(github_file=self.github_file)
+        self.assertEqual(chunk.milvus_id, 1)
+        self.assertEqual(chunk.data_source, self.github_data_source)
+        self.assertEqual(chunk.split_num, 1)
+        self.assertEqual(chunk.content_hash, DataSourceChunk.get_content_hash(self.github_file.content))
 
-    @patch('core.milvus_utils.delete_vectors')
-    def test_github_file_delete_from_milvus(self, mock_delete_vectors):
-        """Test that GithubFile.delete_from_milvus correctly clears doc_ids and in_milvus flag"""
-        # Set up the GitHub file with mock doc_ids
-        self.github_file.doc_ids = ['doc_id_1', 'doc_id_2']
+    @patch('core.milvus_utils.delete_vectors_by_filter')
+    def test_github_file_delete_from_milvus(self, mock_delete_vectors_by_filter):
+        """Test that GithubFile.delete_from_milvus correctly deletes its chunks and clears in_milvus flag"""
+        # Set up the GitHub file with chunks
         self.github_file.in_milvus = True
         self.github_file.save()
-        
-        # Set up the data source with the same doc_ids
-        self.github_data_source.doc_ids = ['doc_id_1', 'doc_id_2']
-        self.github_data_source.save()
+        self.create_chunks(self.github_data_source, [1, 2], github_file=self.github_file)
         
         # Call the method
         self.github_file.delete_from_milvus()
         
         # Check that the mock was called correctly
-        mock_delete_vectors.assert_called_once_with(
+        mock_delete_vectors_by_filter.assert_called_once_with(
             settings.GITHUB_REPO_CODE_COLLECTION_NAME, 
-            ['doc_id_1', 'doc_id_2']
+            'id in [1, 2]'
         )
         
         # Refresh from database
         self.github_file.refresh_from_db()
-        self.github_data_source.refresh_from_db()
         
         # Check that the models were updated correctly
         self.assertFalse(self.github_file.in_milvus)
-        self.assertEqual(self.github_file.doc_ids, [])
-        self.assertEqual(self.github_data_source.doc_ids, [])
+        self.assertEqual(self.get_milvus_ids(data_source=self.github_data_source), [])
 
     @patch('core.utils.embed_texts')
     @patch('core.milvus_utils.insert_vectors')
     def test_github_datasource_write_to_milvus(self, mock_insert_vectors, mock_embed_texts):
-        """Test that GitHub DataSource.write_to_milvus correctly updates doc_ids and in_milvus flag for all files"""
+        """Test that GitHub DataSource.write_to_milvus correctly creates chunks and sets in_milvus flag for all files"""
         # Mock the embedding and vector insertion
         mock_embed_texts.return_value = [[0.1] * get_default_embedding_dimensions()] * 2
-        mock_insert_vectors.return_value = ['doc_id_1', 'doc_id_2']
+        mock_insert_vectors.return_value = [1, 2]
         
         # Create a second GitHub file
         github_file2 = GithubFile.objects.create(
@@ -182,20 +188,18 @@ class MilvusOperationsTests(TestCase):
         self.assertTrue(self.github_data_source.in_milvus)
         self.assertTrue(self.github_file.in_milvus)
         self.assertTrue(github_file2.in_milvus)
-        self.assertEqual(len(self.github_data_source.doc_ids), 2)  # 2 doc_ids per file
-        self.assertEqual(self.github_file.doc_ids, ['doc_id_1'])
-        self.assertEqual(github_file2.doc_ids, ['doc_id_2'])
+        self.assertEqual(self.get_milvus_ids(data_source=self.github_data_source), [1, 2])  # 1 chunk per file
+        self.assertEqual(self.get_milvus_ids(github_file=self.github_file), [1])
+        self.assertEqual(self.get_milvus_ids(github_file=github_file2), [2])
 
-    @patch('core.milvus_utils.delete_vectors')
-    def test_github_datasource_delete_from_milvus(self, mock_delete_vectors):
-        """Test that GitHub DataSource.delete_from_milvus correctly deletes all files"""
-        # Set up the GitHub file with mock doc_ids
-        self.github_file.doc_ids = ['doc_id_1', 'doc_id_2']
+    @patch('core.milvus_utils.delete_vectors_by_filter')
+    def test_github_datasource_delete_from_milvus(self, mock_delete_vectors_by_filter):
+        """Test that GitHub DataSource.delete_from_milvus correctly deletes all chunks"""
+        # Set up the GitHub file and the data source with chunks
         self.github_file.in_milvus = True
         self.github_file.save()
+        self.create_chunks(self.github_data_source, [1, 2], github_file=self.github_file)
         
-        # Set up the data source with the same doc_ids
-        self.github_data_source.doc_ids = ['doc_id_1', 'doc_id_2']
         self.github_data_source.in_milvus = True
         self.github_data_source.save()
         
@@ -203,59 +207,87 @@ class MilvusOperationsTests(TestCase):
         self.github_data_source.delete_from_milvus()
         
         # Check that the mock was called correctly
-        mock_delete_vectors.assert_has_calls([
-            call(
-                self.guru_type.milvus_collection_name, 
-                ['doc_id_1', 'doc_id_2']
-            ),
-            call(
-                settings.GITHUB_REPO_CODE_COLLECTION_NAME, 
-                ['doc_id_1', 'doc_id_2']
-            )
-        ])
+        mock_delete_vectors_by_filter.assert_called_once_with(
+            settings.GITHUB_REPO_CODE_COLLECTION_NAME, 
+            'id in [1, 2]'
+        )
         
         # Refresh from database
         self.github_data_source.refresh_from_db()
+        self.github_file.refresh_from_db()
         
-        # Check that the model was updated correctly
+        # Check that the models were updated correctly
         self.assertFalse(self.github_data_source.in_milvus)
-        self.assertEqual(self.github_data_source.doc_ids, [])
-        
-        # Check that all GitHub files were deleted
-        self.assertEqual(GithubFile.objects.filter(data_source=self.github_data_source).count(), 0)
+        self.assertFalse(self.github_file.in_milvus)
+        self.assertEqual(self.get_milvus_ids(data_source=self.github_data_source), [])
 
-    @patch('core.milvus_utils.delete_vectors')
-    def test_clear_github_file_signal(self, mock_delete_vectors):
+    @patch('core.milvus_utils.delete_vectors_by_filter')
+    def test_clear_github_file_signal(self, mock_delete_vectors_by_filter):
         """Test that the clear_github_file signal correctly calls delete_from_milvus"""
-        # Set up the GitHub file with mock doc_ids
-        self.github_file.doc_ids = ['doc_id_1', 'doc_id_2']
+        # Set up the GitHub file with chunks
         self.github_file.in_milvus = True
         self.github_file.save()
-        
-        # Set up the data source with the same doc_ids
-        self.github_data_source.doc_ids = ['doc_id_1', 'doc_id_2']
-        self.github_data_source.save()
+        self.create_chunks(self.github_data_source, [1, 2], github_file=self.github_file)
         
         # Delete the GitHub file (should trigger the signal)
         self.github_file.delete()
         
         # Check that the mock was called correctly
-        mock_delete_vectors.assert_called_once_with(
+        mock_delete_vectors_by_filter.assert_called_once_with(
             settings.GITHUB_REPO_CODE_COLLECTION_NAME, 
-            ['doc_id_1', 'doc_id_2']
+            'id in [1, 2]'
         )
         
-        # Refresh from database
-        self.github_data_source.refresh_from_db()
-        
-        # Check that the data source was updated correctly
-        self.assertEqual(self.github_data_source.doc_ids, [])
+        # Check that the chunks were deleted
+        self.assertEqual(self.get_milvus_ids(data_source=self.github_data_source), [])
 
-    @patch('core.milvus_utils.delete_vectors')
-    def test_clear_data_source_signal(self, mock_delete_vectors):
+    @patch('core.milvus_utils.delete_vectors_by_filter')
+    def test_github_file_bulk_delete(self, mock_delete_vectors_by_filter):
+        """Test that GithubFile.bulk_delete deletes vectors by filter in batches and deletes the chunks"""
+        self.github_file.in_milvus = True
+        self.github_file.save()
+        self.create_chunks(self.github_data_source, [1, 2], github_file=self.github_file)
+
+        github_file2 = GithubFile.objects.create(
+            data_source=self.github_data_source,
+            path='test/file2.py',
+            link='https://github.com/test/repo/blob/main/test/file2.py',
+            content='print("Hello")',
+            size=50,
+            in_milvus=True
+        )
+        self.create_chunks(self.github_data_source, [3], github_file=github_file2)
+        github_file3 = GithubFile.objects.create(
+            data_source=self.github_data_source,
+            path='test/file3.py',
+            link='https://github.com/test/repo/blob/main/test/file3.py',
+            content='print("Kept")',
+            size=50,
+            in_milvus=True
+        )
+        self.create_chunks(self.github_data_source, [4], github_file=github_file3)
+
+        with self.settings(MILVUS_DELETE_BATCH_SIZE=2):
+            deleted_count = GithubFile.bulk_delete(
+                GithubFile.objects.filter(id__in=[self.github_file.id, github_file2.id])
+            )
+
+        self.assertEqual(deleted_count, 2)
+        # One filter delete per file batch, the signals do not delete again
+        mock_delete_vectors_by_filter.assert_has_calls([
+            call(settings.GITHUB_REPO_CODE_COLLECTION_NAME, 'id in [1, 2]'),
+            call(settings.GITHUB_REPO_CODE_COLLECTION_NAME, 'id in [3]'),
+        ], any_order=True)
+        self.assertEqual(mock_delete_vectors_by_filter.call_count, 2)
+
+        self.assertEqual(self.get_milvus_ids(data_source=self.github_data_source), [4])
+        self.assertEqual(list(GithubFile.objects.filter(data_source=self.github_data_source)), [github_file3])
+
+    @patch('core.milvus_utils.delete_vectors_by_filter')
+    def test_clear_data_source_signal(self, mock_delete_vectors_by_filter):
         """Test that the clear_data_source signal correctly calls delete_from_milvus"""
-        # Set up the data source with mock doc_ids
-        self.data_source.doc_ids = ['doc_id_1', 'doc_id_2']
+        # Set up the data source with chunks
+        self.create_chunks(self.data_source, [1, 2])
         self.data_source.in_milvus = True
         self.data_source.save()
         
@@ -263,38 +295,40 @@ class MilvusOperationsTests(TestCase):
         self.data_source.delete()
         
         # Check that the mock was called correctly
-        mock_delete_vectors.assert_called_once_with(
+        mock_delete_vectors_by_filter.assert_called_once_with(
             self.guru_type.milvus_collection_name, 
-            ['doc_id_1', 'doc_id_2']
+            'id in [1, 2]'
         )
+        self.assertFalse(DataSourceChunk.objects.exists())
 
-    @patch('core.milvus_utils.delete_vectors')
+    @patch('core.milvus_utils.delete_vectors_by_filter')
     @patch('core.milvus_utils.insert_vectors')
     @patch('core.milvus_utils.fetch_vectors')
-    def test_update_data_source_in_milvus_signal(self, mock_fetch_vectors, mock_insert_vectors, mock_delete_vectors):
-        """Test that the update_data_source_in_milvus signal correctly calls delete_from_milvus when title changes"""
-        # Set up the data source with mock doc_ids
-        self.data_source.doc_ids = ['doc_id_1', 'doc_id_2']
+    def test_update_data_source_in_milvus_signal(self, mock_fetch_vectors, mock_insert_vectors, mock_delete_vectors_by_filter):
+        """Test that the update_data_source_in_milvus signal rewrites the vectors and chunks when title changes"""
+        # Set up the data source with chunks
+        self.create_chunks(self.data_source, [1, 2])
         self.data_source.in_milvus = True
         self.data_source.save()
 
         mock_fetch_vectors.return_value = [
-            {'id': 'doc_id_1', 'metadata': {'title': 'Old Title'}},
-            {'id': 'doc_id_2', 'metadata': {'title': 'Old Title'}}
+            {'id': 1, 'text': 'text 1', 'metadata': {'title': 'Old Title'}},
+            {'id': 2, 'text': 'text 2', 'metadata': {'title': 'Old Title'}}
         ]
+        mock_insert_vectors.return_value = [3, 4]
         
         # Change the title and save (should trigger the signal)
         self.data_source.title = 'Updated Title'
         self.data_source.save()
         
         # Check that the mock was called correctly
-        mock_delete_vectors.assert_called_once_with(
+        mock_delete_vectors_by_filter.assert_called_once_with(
             self.guru_type.milvus_collection_name, 
-            ['doc_id_1', 'doc_id_2']
+            'id in [1, 2]'
         ) 
-        mock_insert_vectors.assert_called_once_with(
-            self.guru_type.milvus_collection_name, 
-            [{'metadata': {'title': 'Updated Title'}}, {'metadata': {'title': 'Updated Title'}}]
-        ) 
-
-    
\ No newline at end of file
+        mock_insert_vectors.assert_called_once()
+        self.assertEqual(
+            mock_insert_vectors.call_args[0][1],
+            [{'text': 'text 1', 'metadata': {'title': 'Updated Title'}}, {'text': 'text 2', 'metadata': {'title': 'Updated Title'}}]
+        )
+        self.assertEqual(self.get_milvus_ids(data_source=self.data_source), [3, 4])
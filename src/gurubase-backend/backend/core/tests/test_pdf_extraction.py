@@ -0,0 +1,75 @@
+import os
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from core.pdf_extraction import extract_pdf_text, iter_pdf_pages
+
+
+LOCMEM_CACHES = {
+    'alternate': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pdf-extraction-tests',
+    },
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+def write_pdf(path, page_count):
+    """Writes a minimal PDF with a line of text on each page"""
+    font_id = 3 + 2 * page_count
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        f'<< /Type /Pages /Kids [{" ".join(f"{3 + 2 * i} 0 R" for i in range(page_count))}] /Count {page_count} >>',
+    ]
+    for i in range(page_count):
+        stream = f'BT /F1 12 Tf 72 712 Td (Page {i + 1}) Tj ET'
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>')
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    data = b'%PDF-1.4\n'
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(data))
+        data += f'{i + 1} 0 obj\n{obj}\nendobj\n'.encode()
+    xref_offset = len(data)
+    data += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    data += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    data += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode()
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PDF_EXTRACTION_WORKERS=2, PDF_EXTRACTION_PAGES_PER_TASK=3, PDF_MAX_PAGES=20)
+class PDFExtractionTests(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'manual.pdf')
+        write_pdf(self.path, 8)
+
+    def test_pages_are_extracted_in_order(self):
+        text = extract_pdf_text(self.path)
+
+        self.assertEqual(text, '\n'.join(f'Page {i}' for i in range(1, 9)))
+
+    def test_limits(self):
+        with self.assertRaisesMessage(ValueError, 'more than the limit of 5'):
+            list(iter_pdf_pages(self.path, max_pages=5, max_text_bytes=1024, workers=1, pages_per_task=3, page_timeout_seconds=5))
+
+        with self.assertRaisesMessage(ValueError, 'MB of text'):
+            list(iter_pdf_pages(self.path, max_pages=20, max_text_bytes=20, workers=1, pages_per_task=3, page_timeout_seconds=5))
+
+    @override_settings(PDF_MAX_FILE_SIZE_MB=0)
+    def test_file_size_limit(self):
+        with self.assertRaisesMessage(ValueError, 'larger than'):
+            extract_pdf_text(self.path)
+
+    def test_text_is_cached_by_file_hash(self):
+        text = extract_pdf_text(self.path)
+
+        with patch('core.pdf_extraction.iter_pdf_pages') as iter_pdf_pages_mock:
+            self.assertEqual(extract_pdf_text(self.path), text)
+        iter_pdf_pages_mock.assert_not_called()
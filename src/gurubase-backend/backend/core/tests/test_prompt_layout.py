@@ -0,0 +1,55 @@
+from django.test import TestCase
+from core.models import GuruType
+from core.utils import count_tokens, prepare_chat_messages, get_prompt_cache_hit_ratio
+
+
+class PromptLayoutTests(TestCase):
+    def setUp(self):
+        self.guru_variables = {
+            'guru_type': 'Kubernetes',
+            'domain_knowledge': 'Containers',
+            'custom_instruction_prompt': '',
+            'streaming_type': 'streaming',
+            'date': '2025-05-08',
+            'user_intent': 'how to',
+            'answer_length': 500,
+            'github_details_if_applicable': '',
+            'github_context': '',
+        }
+
+    def test_cache_friendly_prefix_is_static(self):
+        first = prepare_chat_messages('how to scale?', 'How to scale?', self.guru_variables, {'contexts': 'Context A'}, prompt_layout=GuruType.PromptLayout.CACHE_FRIENDLY)
+        second = prepare_chat_messages('what is a pod?', 'What is a pod?', {**self.guru_variables, 'user_intent': 'explanation', 'date': '2025-05-09'}, {'contexts': 'Context B'}, prompt_layout=GuruType.PromptLayout.CACHE_FRIENDLY)
+
+        self.assertEqual(first[0]['content'], second[0]['content'])
+        self.assertIn('Kubernetes', first[0]['content'])
+        self.assertIn('Context A', first[1]['content'])
+        self.assertIn('how to', first[1]['content'])
+        self.assertEqual(first[2]['role'], 'user')
+
+    def test_cache_friendly_prefix_can_be_cached(self):
+        messages = prepare_chat_messages('how to scale?', 'How to scale?', {**self.guru_variables, 'guru_type': 'K', 'domain_knowledge': ''}, {'contexts': ''}, prompt_layout=GuruType.PromptLayout.CACHE_FRIENDLY)
+
+        # Providers only cache prompts of at least 1024 tokens
+        self.assertGreaterEqual(count_tokens(messages[0]['content']), 1024)
+        self.assertTrue(messages[0]['content'].lstrip().startswith('Markdown guide for the answers:'))
+
+    def test_default_layout(self):
+        messages = prepare_chat_messages('how to scale?', 'How to scale?', self.guru_variables, {'contexts': 'Context A'})
+
+        self.assertEqual(len(messages), 2)
+        self.assertIn('Context A', messages[0]['content'])
+
+    def test_layouts_share_the_guidelines(self):
+        default = prepare_chat_messages('how to scale?', 'How to scale?', self.guru_variables, {'contexts': 'Context A'})
+        cached = prepare_chat_messages('how to scale?', 'How to scale?', self.guru_variables, {'contexts': 'Context A'}, prompt_layout=GuruType.PromptLayout.CACHE_FRIENDLY)
+
+        for guideline in ['8. Use exact names from contexts for functions/classes/methods.', "9. Answer the question based on the user's intent", 'Handling Edge Cases:']:
+            self.assertIn(guideline, default[0]['content'])
+            self.assertIn(guideline, cached[0]['content'])
+        self.assertIn("user's intent: how to.", default[0]['content'])
+        self.assertIn('provide a 500 words answer', default[0]['content'])
+
+    def test_prompt_cache_hit_ratio(self):
+        self.assertEqual(get_prompt_cache_hit_ratio(2000, 1500), 0.75)
+        self.assertEqual(get_prompt_cache_hit_ratio(0, 0), 0)
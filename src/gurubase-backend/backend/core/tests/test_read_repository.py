@@ -1,8 +1,10 @@
 import os
 import tempfile
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
-from core.github.data_source_handler import read_repository
+from django.test import TestCase, override_settings
+from git import Actor, Repo
+from core.github.data_source_handler import clone_repository, read_repository, iter_repository, get_sparse_checkout_patterns
+from core.exceptions import GithubRepoFileCountLimitError, GithubRepoSizeLimitError
 from core.utils import get_default_settings
 
 class TestReadRepository(TestCase):
@@ -310,3 +312,94 @@ class TestReadRepository(TestCase):
         )
         
         self.assertEqual(len(structure), 0)
+
+
+    def test_iter_repository_batches(self):
+        """Test that files are yielded in batches with the same contents as read_repository"""
+        batches = list(iter_repository(self.temp_dir, batch_size=4))
+
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        self.assertEqual([file for batch in batches for file in batch], read_repository(self.temp_dir))
+
+    def test_file_count_limit(self):
+        """Test that the file count limit aborts before any file is read"""
+        with patch('core.github.data_source_handler.get_file_content') as mock_get_file_content:
+            with self.assertRaises(GithubRepoFileCountLimitError):
+                list(iter_repository(self.temp_dir, file_count_limit=2))
+            mock_get_file_content.assert_not_called()
+
+    def test_size_limit(self):
+        """Test that the total size limit aborts reading"""
+        with self.assertRaises(GithubRepoSizeLimitError):
+            list(iter_repository(self.temp_dir, size_limit_bytes=20))
+
+    def test_pattern_with_current_directory(self):
+        """Test that ./ prefixes are ignored like glob does"""
+        structure = read_repository(
+            self.temp_dir,
+            include=True,
+            glob_pattern="./src/*.py"
+        )
+        paths = sorted(item['path'] for item in structure)
+
+        self.assertEqual(paths, ['src/api.py', 'src/test_utils.py'])
+
+class TestSparseCheckoutPatterns(TestCase):
+    def test_no_pattern(self):
+        """Test that everything except the ignored directories is checked out"""
+        patterns = get_sparse_checkout_patterns()
+
+        self.assertEqual(patterns[0], '/*')
+        self.assertIn('!node_modules/', patterns)
+        self.assertNotIn('!.git/', patterns)
+
+    def test_include_pattern(self):
+        """Test that only the included patterns are checked out, with braces expanded"""
+        patterns = get_sparse_checkout_patterns(include=True, glob_pattern="**/*.{js,ts}")
+
+        self.assertEqual(patterns[:2], ['**/*.js', '**/*.ts'])
+        self.assertNotIn('/*', patterns)
+
+    def test_exclude_pattern(self):
+        """Test that excluded patterns are negated and top level patterns are anchored"""
+        patterns = get_sparse_checkout_patterns(include=False, glob_pattern="*.py")
+
+        self.assertEqual(patterns[:2], ['/*', '!/*.py'])
+
+    def test_current_directory_pattern(self):
+        """Test that ./ prefixes and . segments are dropped, git matches nothing with them"""
+        patterns = get_sparse_checkout_patterns(include=True, glob_pattern="./src/./*.py")
+
+        self.assertEqual(patterns[0], 'src/*.py')
+
+        patterns = get_sparse_checkout_patterns(include=True, glob_pattern="./main.py")
+
+        self.assertEqual(patterns[0], '/main.py')
+
+
+@override_settings(GITHUB_REPO_MIRROR_DIR='')
+class TestSparseClone(TestCase):
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(os.system, f"rm -rf {self.source_dir}")
+        files = {'main.py': 'print("Hello")', 'src/api.py': 'def api(): pass', 'src/utils.js': 'function util() {}'}
+        for path, content in files.items():
+            os.makedirs(os.path.dirname(os.path.join(self.source_dir, path)), exist_ok=True)
+            with open(os.path.join(self.source_dir, path), 'w') as f:
+                f.write(content)
+        repo = Repo.init(self.source_dir)
+        repo.index.add(list(files))
+        repo.index.commit('Initial commit', author=Actor('Test', 'test@example.com'), committer=Actor('Test', 'test@example.com'))
+        repo.close()
+
+    def test_pattern_with_current_directory_is_checked_out(self):
+        temp_dir, repo = clone_repository(f'file://{self.source_dir}', include=True, glob_pattern="./src/*.py")
+        self.addCleanup(os.system, f"rm -rf {temp_dir}")
+        repo.close()
+
+        checked_out = sorted(
+            os.path.relpath(os.path.join(root, name), temp_dir)
+            for root, dirs, names in os.walk(temp_dir) if '.git' not in root.split(os.sep)
+            for name in names
+        )
+        self.assertEqual(checked_out, ['src/api.py'])
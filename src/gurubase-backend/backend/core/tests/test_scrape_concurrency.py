@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.data_sources import process_website_data_sources_batch
+from core.exceptions import WebsiteContentExtractionThrottleError
+from core.models import DataSource
+from core.throttling import AIMDConcurrencyLimit, ScrapeConcurrencyController
+
+
+def get_data_source(url):
+    return SimpleNamespace(url=url, status=DataSource.Status.NOT_PROCESSED, error='', user_error='')
+
+
+@override_settings(
+    WEBSITE_SCRAPE_MAX_CONCURRENCY=10,
+    WEBSITE_SCRAPE_HOST_INITIAL_CONCURRENCY=2,
+    WEBSITE_SCRAPE_HOST_MAX_CONCURRENCY=4,
+    WEBSITE_SCRAPE_HOST_REQUESTS_PER_SECOND=0
+)
+class ScrapeConcurrencyControllerTests(SimpleTestCase):
+    def get_controller(self, initial_concurrency=4):
+        return ScrapeConcurrencyController('firecrawl', initial_concurrency=initial_concurrency, pages_per_minute=0)
+
+    def test_aimd_limit(self):
+        limit = AIMDConcurrencyLimit(initial=4, minimum=1, maximum=6)
+
+        for _ in range(4):
+            limit.on_success()
+        self.assertEqual(limit.value, 4)
+        limit.on_success()
+        self.assertEqual(limit.value, 5)
+
+        limit.on_throttle()
+        self.assertEqual(limit.value, 2)
+        for _ in range(3):
+            limit.on_throttle()
+        self.assertEqual(limit.value, 1)
+
+        for _ in range(100):
+            limit.on_success()
+        self.assertEqual(limit.value, 6)
+
+    def test_next_batch_respects_backend_and_host_limits(self):
+        controller = self.get_controller()
+        pending = [get_data_source(url) for url in [
+            'https://a.com/1', 'https://a.com/2', 'https://a.com/3', 'https://b.com/1', 'https://c.com/1', 'https://c.com/2',
+        ]]
+
+        batch = controller.next_batch(pending)
+
+        self.assertEqual([ds.url for ds in batch], ['https://a.com/1', 'https://a.com/2', 'https://b.com/1', 'https://c.com/1'])
+        self.assertEqual([ds.url for ds in pending], ['https://a.com/3', 'https://c.com/2'])
+
+    def test_throttled_host_gets_smaller_batches(self):
+        controller = self.get_controller(initial_concurrency=10)
+        controller.on_throttle('https://a.com/1')
+
+        pending = [get_data_source(f'https://a.com/{i}') for i in range(5)] + [get_data_source('https://b.com/1')]
+        batch = controller.next_batch(pending)
+
+        self.assertEqual([ds.url for ds in batch], ['https://a.com/0', 'https://b.com/1'])
+
+    def test_backend_throttle_reduces_batch_size(self):
+        controller = self.get_controller(initial_concurrency=4)
+        controller.on_backend_throttle()
+
+        pending = [get_data_source(f'https://{host}.com/1') for host in 'abcdef']
+        self.assertEqual(len(controller.next_batch(pending)), 2)
+
+
+class ProcessWebsiteBatchTests(SimpleTestCase):
+    def process(self, scrape_urls_batch):
+        scraper = MagicMock()
+        scraper.scrape_urls_batch.side_effect = scrape_urls_batch
+        controller = MagicMock()
+        data_sources = [get_data_source('https://a.com/1'), get_data_source('https://b.com/1'), get_data_source('https://c.com/1')]
+        with patch('core.data_sources.get_web_scraper', return_value=(scraper, 'crawl4ai')):
+            process_website_data_sources_batch(data_sources, controller)
+        return data_sources, scraper, controller
+
+    def test_outcomes_are_reported_per_url(self):
+        def scrape_urls_batch(urls):
+            return [(url, 'Title', 'Content') for url in urls if url == 'https://a.com/1'], [
+                (url, WebsiteContentExtractionThrottleError('Status code: 429. Rate limit exceeded.') if url == 'https://b.com/1' else Exception('Timeout 60000ms exceeded'))
+                for url in urls if url != 'https://a.com/1'
+            ]
+
+        data_sources, scraper, controller = self.process(scrape_urls_batch)
+
+        self.assertEqual([ds.status for ds in data_sources], [DataSource.Status.SUCCESS, DataSource.Status.NOT_PROCESSED, DataSource.Status.FAIL])
+        # Only the timed out url is retried, the throttled one is left for a later batch
+        self.assertEqual(scraper.scrape_urls_batch.call_args_list[1].args[0], ['https://c.com/1'])
+        controller.on_success.assert_called_once_with('https://a.com/1')
+        self.assertEqual(
+            [call.args[0] for call in controller.on_throttle.call_args_list],
+            ['https://b.com/1', 'https://c.com/1', 'https://c.com/1']
+        )
+        self.assertEqual(controller.acquire.call_count, 2)
+
+    def test_errors_mentioning_429_are_not_throttles(self):
+        def scrape_urls_batch(urls):
+            return [], [(url, f'Status code: 500. Error: {url}/page-429 is 4290 bytes') for url in urls]
+
+        data_sources, _, controller = self.process(scrape_urls_batch)
+
+        self.assertTrue(all(ds.status == DataSource.Status.FAIL for ds in data_sources))
+        controller.on_throttle.assert_not_called()
+
+    def test_backend_throttle(self):
+        def scrape_urls_batch(urls):
+            raise WebsiteContentExtractionThrottleError('Status code: 429')
+
+        data_sources, _, controller = self.process(scrape_urls_batch)
+
+        self.assertTrue(all(ds.status == DataSource.Status.NOT_PROCESSED for ds in data_sources))
+        controller.on_backend_throttle.assert_called_once()
+        controller.on_throttle.assert_not_called()
@@ -0,0 +1,107 @@
+import gzip
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from core.data_sources import discover_sitemap_urls
+
+
+def sitemap_index(*locs):
+    return ('<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<sitemap><loc>{loc}</loc></sitemap>' for loc in locs) + '</sitemapindex>').encode('utf-8')
+
+
+def urlset(*locs):
+    return ('<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<url><loc>{loc}</loc></url>' for loc in locs) + '</urlset>').encode('utf-8')
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.headers = {}
+        self.proxies = {}
+        self.requested = []
+
+    def get(self, url, stream=False, timeout=None):
+        self.requested.append(url)
+        body = self.pages.get(url)
+        response = MagicMock()
+        response.status_code = 200 if body is not None else 404
+        response.text = body.decode('utf-8', errors='replace') if body is not None else ''
+        # Small chunks, so elements are split across chunks
+        response.iter_content.side_effect = lambda chunk_size: [body[i:i + 7] for i in range(0, len(body or b''), 7)]
+        response.__enter__.return_value = response
+        return response
+
+
+class SitemapDiscoveryTests(TestCase):
+    def discover(self, pages, url='https://example.com/docs', link_limit=None, should_stop=None):
+        session = FakeSession(pages)
+        with patch('core.data_sources.requests.Session', return_value=session):
+            return discover_sitemap_urls(url, link_limit=link_limit, should_stop=should_stop), session
+
+    def test_robots_sitemaps_and_nested_indexes(self):
+        urls, _ = self.discover({
+            'https://example.com/robots.txt': b'User-agent: *\nSitemap: https://example.com/sitemap_index.xml\n',
+            'https://example.com/sitemap_index.xml': sitemap_index(
+                'https://example.com/pages.xml',
+                'https://example.com/more.xml.gz',
+            ),
+            'https://example.com/pages.xml': urlset(
+                'https://example.com/docs/a',
+                'https://example.com/docs/a/',
+                'https://example.com/docs/fr/a',
+                'https://example.com/docs/v2/a',
+                'https://example.com/docs/logo.png',
+                'https://example.com/blog/post',
+            ),
+            'https://example.com/more.xml.gz': gzip.compress(urlset('https://example.com/docs/b')),
+        })
+
+        self.assertEqual(urls, ['https://example.com/docs/a', 'https://example.com/docs/b'])
+
+    def test_falls_back_to_sitemap_xml(self):
+        urls, session = self.discover({
+            'https://example.com/sitemap.xml': urlset('https://example.com/docs/a'),
+        })
+
+        self.assertEqual(urls, ['https://example.com/docs/a'])
+        self.assertEqual(session.requested, [
+            'https://example.com/robots.txt',
+            'https://example.com/docs/sitemap.xml',
+            'https://example.com/sitemap.xml',
+        ])
+
+    def test_stops_at_link_limit(self):
+        urls, session = self.discover({
+            'https://example.com/robots.txt': b'Sitemap: https://example.com/sitemap_index.xml',
+            'https://example.com/sitemap_index.xml': sitemap_index('https://example.com/1.xml', 'https://example.com/2.xml'),
+            'https://example.com/1.xml': urlset('https://example.com/docs/a', 'https://example.com/docs/b'),
+            'https://example.com/2.xml': urlset('https://example.com/docs/c'),
+        }, link_limit=2)
+
+        self.assertEqual(urls, ['https://example.com/docs/a', 'https://example.com/docs/b'])
+        self.assertNotIn('https://example.com/2.xml', session.requested)
+
+    def test_invalid_sitemap_is_skipped(self):
+        urls, _ = self.discover({
+            'https://example.com/docs/sitemap.xml': b'<html>not a sitemap',
+            'https://example.com/sitemap.xml': urlset('https://example.com/docs/a'),
+        })
+
+        self.assertEqual(urls, ['https://example.com/docs/a'])
+
+    def test_stops_between_sitemaps(self):
+        pages = {
+            'https://example.com/robots.txt': b'Sitemap: https://example.com/sitemap_index.xml',
+            'https://example.com/sitemap_index.xml': sitemap_index('https://example.com/1.xml', 'https://example.com/2.xml'),
+            'https://example.com/1.xml': urlset('https://example.com/docs/a'),
+            'https://example.com/2.xml': urlset('https://example.com/docs/b'),
+        }
+        session = FakeSession(pages)
+        should_stop = lambda: 'https://example.com/1.xml' in session.requested
+
+        with patch('core.data_sources.requests.Session', return_value=session):
+            urls = discover_sitemap_urls('https://example.com/docs', should_stop=should_stop)
+
+        self.assertEqual(urls, ['https://example.com/docs/a'])
+        self.assertNotIn('https://example.com/2.xml', session.requested)
@@ -0,0 +1,209 @@
+import asyncio
+import json
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.integrations.slack_events import SlackEventWorker, enqueue_slack_event, is_slack_bot_mention
+from core.views import answer_slack_event
+
+
+def get_event_data(event_id, team_id='T1', text='<@U1> how do I install it?'):
+    return {
+        'event_id': event_id,
+        'team_id': team_id,
+        'authorizations': [{'user_id': 'U1'}],
+        'event': {'type': 'message', 'user': 'U2', 'channel': 'C1', 'ts': '1.0', 'text': text},
+    }
+
+
+class SlackEventQueueTests(SimpleTestCase):
+    def test_only_bot_mentions_are_answered(self):
+        self.assertTrue(is_slack_bot_mention(get_event_data('E1')))
+        self.assertFalse(is_slack_bot_mention(get_event_data('E1', text='how do I install it?')))
+
+        data = get_event_data('E1')
+        data['event']['subtype'] = 'message_changed'
+        self.assertFalse(is_slack_bot_mention(data))
+
+    def test_redelivered_events_are_enqueued_once(self):
+        redis_client = MagicMock()
+        redis_client.set.side_effect = [True, None]
+
+        with patch('core.integrations.slack_events.redis_client', redis_client):
+            self.assertTrue(enqueue_slack_event(get_event_data('E1')))
+            self.assertFalse(enqueue_slack_event(get_event_data('E1')))
+
+        redis_client.xadd.assert_called_once()
+        self.assertEqual(json.loads(redis_client.xadd.call_args.args[1]['data'])['event_id'], 'E1')
+
+
+@override_settings(SLACK_EVENT_WORKER_CONCURRENCY=3, SLACK_EVENT_WORKSPACE_CONCURRENCY=2, SLACK_EVENT_MAX_ATTEMPTS=2)
+class SlackEventWorkerTests(SimpleTestCase):
+    def get_worker(self, handler, handled_event_ids=()):
+        worker = SlackEventWorker(handler=handler, consumer_name='test')
+        worker.redis = AsyncMock()
+        worker.keys = {f'slack_event_handled:{event_id}': 1 for event_id in handled_event_ids}
+
+        async def set(key, value, nx=False, ex=None):
+            if nx and key in worker.keys:
+                return None
+            worker.keys[key] = value
+            return True
+
+        async def incr(key):
+            worker.keys[key] = worker.keys.get(key, 0) + 1
+            return worker.keys[key]
+
+        worker.redis.exists.side_effect = lambda key: int(key in worker.keys)
+        worker.redis.set.side_effect = set
+        worker.redis.incr.side_effect = incr
+        worker.redis.delete.side_effect = lambda key: worker.keys.pop(key, None)
+        return worker
+
+    async def run_entries(self, worker, events):
+        worker.slots = asyncio.Semaphore(3)
+        worker.pending = asyncio.Semaphore(12)
+        await worker.start([(f'{i}-0', {'data': json.dumps(data)}) for i, data in enumerate(events)])
+        await asyncio.gather(*worker.tasks)
+
+    def test_concurrency_is_bounded_per_workspace(self):
+        running = Counter()
+        max_running = Counter()
+
+        async def handler(data):
+            for key in (data['team_id'], 'all'):
+                running[key] += 1
+                max_running[key] = max(max_running[key], running[key])
+            await asyncio.sleep(0.01)
+            for key in (data['team_id'], 'all'):
+                running[key] -= 1
+
+        worker = self.get_worker(handler)
+        events = [get_event_data(f'A{i}', team_id='A') for i in range(5)] + [get_event_data(f'B{i}', team_id='B') for i in range(2)]
+        asyncio.run(self.run_entries(worker, events))
+
+        self.assertEqual(max_running['A'], 2)
+        self.assertEqual(max_running['all'], 3)
+        self.assertEqual(worker.redis.xack.await_count, 7)
+
+    def test_handled_events_are_skipped(self):
+        handler = AsyncMock()
+        worker = self.get_worker(handler, handled_event_ids=('E1',))
+
+        asyncio.run(self.run_entries(worker, [get_event_data('E1'), get_event_data('E2')]))
+
+        handler.assert_awaited_once()
+        self.assertEqual(handler.await_args.args[0]['event_id'], 'E2')
+        self.assertEqual(worker.redis.xack.await_count, 2)
+
+    def test_failed_events_are_retried_a_bounded_number_of_times(self):
+        handler = AsyncMock(side_effect=Exception('Slack API error'))
+        worker = self.get_worker(handler)
+
+        asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+        # Left pending for another attempt
+        worker.redis.xack.assert_not_awaited()
+        self.assertNotIn('slack_event_handled:E1', worker.keys)
+        self.assertNotIn('slack_event_processing:E1', worker.keys)
+
+        asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+        self.assertEqual(handler.await_count, 2)
+        worker.redis.xack.assert_awaited_once()
+        self.assertNotIn('slack_event_handled:E1', worker.keys)
+
+    def test_events_being_handled_are_not_answered_twice(self):
+        handler = AsyncMock()
+        worker = self.get_worker(handler)
+        worker.keys['slack_event_processing:E1'] = 'other-worker'
+
+        asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+
+        handler.assert_not_awaited()
+        worker.redis.xack.assert_not_awaited()
+
+    def test_waiting_events_are_not_leased(self):
+        leased_while_waiting = []
+
+        async def handler(data):
+            leased_while_waiting.append('slack_event_processing:A2' in worker.keys)
+            await asyncio.sleep(0.01)
+
+        worker = self.get_worker(handler)
+        asyncio.run(self.run_entries(worker, [get_event_data(f'A{i}', team_id='A') for i in range(3)]))
+
+        # A2 waits for a workspace slot while A0 and A1 are answered
+        self.assertEqual(leased_while_waiting[:2], [False, False])
+        self.assertEqual(worker.redis.xack.await_count, 3)
+
+    def test_events_handled_while_waiting_are_skipped(self):
+        handler = AsyncMock()
+        worker = self.get_worker(handler)
+        # Handled by another worker between the first check and the lease
+        worker.redis.exists.side_effect = [0, 1]
+
+        asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+
+        handler.assert_not_awaited()
+        self.assertNotIn('slack_event_processing:E1', worker.keys)
+        worker.redis.xack.assert_awaited_once()
+
+    def test_handled_events_are_marked_after_success(self):
+        marked_before_handling = []
+
+        async def handler(data):
+            marked_before_handling.append(f"slack_event_handled:{data['event_id']}" in worker.keys)
+
+        worker = self.get_worker(handler)
+        asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+
+        self.assertEqual(marked_before_handling, [False])
+        self.assertIn('slack_event_handled:E1', worker.keys)
+        self.assertNotIn('slack_event_processing:E1', worker.keys)
+        worker.redis.xack.assert_awaited_once()
+
+    def test_failed_answers_stay_pending(self):
+        integration = MagicMock(channels=[{'id': 'C1', 'allowed': True}])
+        client = AsyncMock()
+        client.chat_postMessage.return_value = {'ts': '2.0'}
+        cache = MagicMock()
+        cache.get.side_effect = {'slack_integration:T1': integration}.get
+
+        with patch('core.views.caches', {'alternate': cache}), \
+                patch('core.views.AsyncWebClient', return_value=client), \
+                patch('core.views.get_or_create_thread_binge', return_value=(MagicMock(), MagicMock(id='binge'))), \
+                patch('core.views.api_answer', side_effect=Exception('LLM unavailable')):
+            worker = self.get_worker(answer_slack_event)
+            asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+
+            # The error is shown in the thread, and the event is kept to be retried
+            self.assertEqual(client.chat_update.await_args.kwargs['text'], '❌ An error occurred while processing your request')
+            worker.redis.xack.assert_not_awaited()
+            self.assertNotIn('slack_event_handled:E1', worker.keys)
+            self.assertEqual(worker.keys['slack_event_attempts:E1'], 1)
+
+    def test_retries_reuse_the_thinking_message(self):
+        integration = MagicMock(channels=[{'id': 'C1', 'allowed': True}])
+        client = AsyncMock()
+        client.chat_postMessage.return_value = {'ts': '2.0'}
+        cache_values = {'slack_integration:T1': integration}
+        cache = MagicMock()
+        cache.get.side_effect = cache_values.get
+        cache.set.side_effect = lambda key, value, timeout=None: cache_values.__setitem__(key, value)
+
+        with patch('core.views.caches', {'alternate': cache}), \
+                patch('core.views.AsyncWebClient', return_value=client), \
+                patch('core.views.get_or_create_thread_binge', return_value=(MagicMock(), MagicMock(id='binge'))), \
+                patch('core.views.api_answer', side_effect=Exception('LLM unavailable')):
+            worker = self.get_worker(answer_slack_event)
+            asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+            asyncio.run(self.run_entries(worker, [get_event_data('E1')]))
+
+        # The second attempt resets the message of the first one instead of sending another
+        client.chat_postMessage.assert_awaited_once()
+        updates = [(call.kwargs['ts'], call.kwargs['text']) for call in client.chat_update.await_args_list]
+        self.assertEqual(updates, [
+            ('2.0', '❌ An error occurred while processing your request'),
+            ('2.0', 'Thinking... 🤔'),
+            ('2.0', '❌ An error occurred while processing your request'),
+        ])
+        self.assertEqual(worker.keys['slack_event_attempts:E1'], 2)
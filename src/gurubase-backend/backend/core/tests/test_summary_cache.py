@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock, patch
+from django.test import TestCase, override_settings
+from core.utils import (
+    get_summary_cache_key,
+    get_cached_question_summary,
+    set_cached_question_summary,
+    record_summary_cache_result,
+    get_summary_cache_stats,
+    is_summary_cache_enabled,
+)
+
+
+LOCMEM_CACHES = {
+    'alternate': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'summary-cache-tests',
+    },
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SUMMARY_CACHE_TIMEOUT_SECONDS=60, ENV='test')
+class SummaryCacheTests(TestCase):
+    def setUp(self):
+        self.guru_type = MagicMock()
+        self.guru_type.slug = 'kubernetes'
+        self.guru_type.prompt_map = {'guru_type': 'Kubernetes', 'domain_knowledge': 'Containers', 'custom_instruction_prompt': ''}
+
+    def test_key_normalizes_question(self):
+        self.assertEqual(
+            get_summary_cache_key(self.guru_type, 'How to scale  a deployment?'),
+            get_summary_cache_key(self.guru_type, 'how to scale a deployment'),
+        )
+
+    def test_key_changes_with_prompt(self):
+        key = get_summary_cache_key(self.guru_type, 'How to scale a deployment?')
+        self.guru_type.prompt_map = {**self.guru_type.prompt_map, 'custom_instruction_prompt': 'Be brief'}
+        self.assertNotEqual(key, get_summary_cache_key(self.guru_type, 'How to scale a deployment?'))
+
+    def test_key_changes_with_history(self):
+        key = get_summary_cache_key(self.guru_type, 'What about pods?')
+        self.assertNotEqual(key, get_summary_cache_key(self.guru_type, 'What about pods?', github_comments=[{'body': 'Hi'}]))
+
+    @patch('core.utils.generate_jwt', return_value='jwt')
+    def test_set_and_get(self, _):
+        key = get_summary_cache_key(self.guru_type, 'How to scale a deployment?')
+        set_cached_question_summary(key, {
+            'question': 'How to scale a deployment?',
+            'user_question': 'How to scale a deployment?',
+            'question_slug': 'how-to-scale-a-deployment',
+            'user_intent': 'how to',
+            'prompt_tokens': 100,
+            'jwt': 'old',
+        })
+
+        summary = get_cached_question_summary(key, 'how to scale a deployment')
+        self.assertEqual(summary['question_slug'], 'how-to-scale-a-deployment')
+        self.assertEqual(summary['user_question'], 'how to scale a deployment')
+        self.assertEqual(summary['prompt_tokens'], 0)
+        self.assertEqual(summary['jwt'], 'jwt')
+
+    def test_failed_summaries_are_not_cached(self):
+        key = get_summary_cache_key(self.guru_type, 'How to scale a deployment?')
+        set_cached_question_summary(key, {'question': 'How to scale a deployment?', 'valid_question': False})
+        self.assertIsNone(get_cached_question_summary(key, 'How to scale a deployment?'))
+
+    @override_settings(ENV='selfhosted')
+    def test_not_cached_in_selfhosted(self):
+        key = get_summary_cache_key(self.guru_type, 'How to scale a deployment?')
+        set_cached_question_summary(key, {'question': 'How to scale a deployment?', 'user_intent': 'how to'})
+
+        self.assertFalse(is_summary_cache_enabled())
+        self.assertIsNone(get_cached_question_summary(key, 'How to scale a deployment?'))
+
+    def test_stats(self):
+        record_summary_cache_result('kubernetes', True)
+        record_summary_cache_result('kubernetes', False)
+        record_summary_cache_result('kubernetes', True)
+
+        stats = get_summary_cache_stats('kubernetes')
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
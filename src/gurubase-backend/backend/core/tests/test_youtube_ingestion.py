@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.data_sources import prefetch_youtube_contents, youtube_content_extraction
+from core.models import DataSource
+from core.requester import YouTubeRequester
+
+
+LOCMEM_CACHES = {
+    'alternate': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'youtube-ingestion-tests',
+    },
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+class FakeContentBlob:
+    blobs = {}
+
+    @classmethod
+    def store_many(cls, texts):
+        cls.blobs.update({str(hash(text)): text for text in texts})
+        return [str(hash(text)) for text in texts]
+
+    @classmethod
+    def load_many(cls, hashes):
+        return {content_hash: cls.blobs[content_hash] for content_hash in hashes if content_hash in cls.blobs}
+
+
+def get_loader(video_id, **kwargs):
+    if video_id == 'broken00000':
+        raise Exception('Transcripts are disabled')
+    loader = MagicMock()
+    metadata = {'source': video_id, **({'title': f'Video {video_id}'} if kwargs['add_video_info'] else {})}
+    loader.load.return_value = [SimpleNamespace(metadata=metadata, page_content=f'[Music] Transcript of {video_id}\n')]
+    return loader
+
+
+@override_settings(CACHES=LOCMEM_CACHES, YOUTUBE_TRANSCRIPT_CACHE_TIMEOUT_SECONDS=60, YOUTUBE_FETCH_CONCURRENCY=2)
+@patch('core.models.ContentBlob', FakeContentBlob)
+class YouTubeContentExtractionTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import caches
+        caches['alternate'].clear()
+
+    def test_transcripts_are_cached_by_video_id(self):
+        with patch('core.data_sources.YoutubeLoader') as loader_class:
+            loader_class.extract_video_id.return_value = 'abcdefghijk'
+            loader_class.side_effect = get_loader
+
+            first = youtube_content_extraction('https://www.youtube.com/watch?v=abcdefghijk')
+            second = youtube_content_extraction('https://youtu.be/abcdefghijk', title='Renamed')
+
+        self.assertEqual(loader_class.call_count, 1)
+        self.assertEqual(first['content'], 'Transcript of abcdefghijk')
+        self.assertEqual(first['metadata']['title'], 'Video abcdefghijk')
+        self.assertEqual(second['content'], 'Transcript of abcdefghijk')
+        self.assertEqual(second['metadata']['title'], 'Renamed')
+
+    def test_prefetch_isolates_the_failed_videos(self):
+        data_sources = [
+            SimpleNamespace(type=DataSource.Type.YOUTUBE, url='https://www.youtube.com/watch?v=aaaaaaaaaaa'),
+            SimpleNamespace(type=DataSource.Type.YOUTUBE, url='https://www.youtube.com/watch?v=broken00000'),
+            SimpleNamespace(type=DataSource.Type.YOUTUBE, url='https://www.youtube.com/watch?v=bbbbbbbbbbb'),
+            SimpleNamespace(type=DataSource.Type.WEBSITE, url='https://example.com'),
+        ]
+        requester = MagicMock(api_key='key')
+        requester.get_video_titles.return_value = {'aaaaaaaaaaa': 'First'}
+
+        with patch('core.data_sources.YoutubeLoader') as loader_class, \
+                patch('core.data_sources.YouTubeRequester', return_value=requester):
+            loader_class.extract_video_id.side_effect = lambda url: url.split('v=')[-1]
+            loader_class.side_effect = get_loader
+            contents = prefetch_youtube_contents(data_sources)
+
+        self.assertEqual(contents, {
+            'https://www.youtube.com/watch?v=aaaaaaaaaaa': ('First', 'Transcript of aaaaaaaaaaa'),
+            'https://www.youtube.com/watch?v=bbbbbbbbbbb': ('Video bbbbbbbbbbb', 'Transcript of bbbbbbbbbbb'),
+        })
+        self.assertEqual(sorted(requester.get_video_titles.call_args.args[0]), ['aaaaaaaaaaa', 'bbbbbbbbbbb', 'broken00000'])
+
+
+class YouTubeRequesterTests(SimpleTestCase):
+    def test_playlist_video_ids_are_paged(self):
+        session = MagicMock()
+        session.get.return_value.json.side_effect = [
+            {'items': [{'contentDetails': {'videoId': '1'}}, {'contentDetails': {'videoId': '2'}}], 'nextPageToken': 'next'},
+            {'items': [{'contentDetails': {'videoId': '3'}}]},
+        ]
+
+        with patch('core.requester.get_http_session', return_value=session):
+            pages = list(YouTubeRequester(api_key='key').iter_playlist_video_ids('playlist'))
+
+        self.assertEqual(pages, [['1', '2'], ['3']])
+        self.assertEqual(session.get.call_args.kwargs['params']['pageToken'], 'next')
+        self.assertEqual(session.get.call_args.kwargs['params']['part'], 'contentDetails')
@@ -1,10 +1,23 @@
 import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlparse
+import redis
 from django.core.cache import caches
 from django.conf import settings
 from rest_framework.throttling import SimpleRateThrottle
 from core.models import APIKey
 
 logger = logging.getLogger(__name__)
+redis_client = redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    charset="utf-8",
+    decode_responses=True,
+)
 
 class ConcurrencyThrottleApiKey(SimpleRateThrottle):
     cache = caches["alternate"] # redis, see settings.py
@@ -23,3 +36,232 @@ class ConcurrencyThrottleApiKey(SimpleRateThrottle):
             return f"api_key:{api_key_obj.user.id}"
         except Exception:
             return "9999"
+
+
+class AIMDConcurrencyLimit:
+    """
+    Additive increase / multiplicative decrease concurrency limit.
+    The limit grows by one after a full window of successes and is cut by `backoff` on a throttle or timeout.
+    """
+    def __init__(self, initial, minimum, maximum, backoff=0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.limit = float(min(max(initial, minimum), maximum))
+
+    @property
+    def value(self):
+        return int(self.limit)
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self):
+        self.limit = max(self.minimum, self.limit * self.backoff)
+
+
+class RedisTokenBucket:
+    """
+    Token bucket shared by all workers through Redis.
+    Tokens are reserved even when the bucket runs empty, and the caller waits until its reservation is refilled.
+    This way concurrent callers queue up behind each other instead of polling.
+    """
+    # Returns the seconds to wait before the reserved tokens can be used
+    RESERVE_SCRIPT = """
+        local rate = tonumber(ARGV[1])
+        local capacity = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local requested = tonumber(ARGV[4])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'timestamp')
+        local tokens = tonumber(state[1]) or capacity
+        local timestamp = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - timestamp) * rate) - requested
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'timestamp', now)
+        redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+        if tokens >= 0 then
+            return '0'
+        end
+        return tostring(-tokens / rate)
+    """
+
+    def __init__(self, key, rate, capacity):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.script = redis_client.register_script(self.RESERVE_SCRIPT)
+
+    def reserve(self, tokens=1):
+        """Reserves the tokens and returns the seconds to wait before using them"""
+        return float(self.script(keys=[self.key], args=[self.rate, self.capacity, time.time(), tokens]))
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RedisConcurrencySlots:
+    """
+    At most `limit` concurrent holders of the key, across all workers.
+    A slot not released within `timeout` seconds (e.g. its worker crashed) is freed for the others.
+    """
+    ACQUIRE_SCRIPT = """
+        local limit = tonumber(ARGV[1])
+        local timeout = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - timeout)
+        if redis.call('ZCARD', KEYS[1]) >= limit then
+            return 0
+        end
+        redis.call('ZADD', KEYS[1], now, ARGV[4])
+        redis.call('EXPIRE', KEYS[1], math.ceil(timeout))
+        return 1
+    """
+
+    def __init__(self, key, limit, timeout):
+        self.key = key
+        self.limit = limit
+        self.timeout = timeout
+        self.script = redis_client.register_script(self.ACQUIRE_SCRIPT)
+
+    def acquire(self):
+        """Returns the token of the acquired slot, None if all slots are taken"""
+        token = uuid.uuid4().hex
+        if int(self.script(keys=[self.key], args=[self.limit, self.timeout, time.time(), token])):
+            return token
+        return None
+
+    def release(self, token):
+        redis_client.zrem(self.key, token)
+
+
+def get_url_host(url):
+    return (urlparse(url).hostname or url).lower()
+
+
+class ScrapeConcurrencyController:
+    """
+    Adapts the website scraping concurrency of a scraper backend and of each target host.
+    - The backend and each host have an AIMD limit, so batches grow while pages are scraped successfully
+      and shrink on throttles and timeouts.
+    - The scraped pages are paced by token buckets shared by all workers: one per backend (its rate limit)
+      and one per host (politeness towards the scraped site).
+    The limits are kept per worker process, see get_scrape_concurrency_controller.
+    """
+    max_tracked_hosts = 10000
+
+    def __init__(self, scrape_tool, initial_concurrency, pages_per_minute):
+        self.scrape_tool = scrape_tool
+        self.limit = AIMDConcurrencyLimit(
+            initial=initial_concurrency,
+            minimum=1,
+            maximum=settings.WEBSITE_SCRAPE_MAX_CONCURRENCY
+        )
+        self.host_limits = {}
+        self.bucket = None
+        if pages_per_minute > 0:
+            self.bucket = RedisTokenBucket(
+                f'scrape_rate:{scrape_tool}',
+                rate=pages_per_minute / 60,
+                capacity=settings.WEBSITE_SCRAPE_MAX_CONCURRENCY
+            )
+        self.lock = threading.Lock()
+
+    def get_host_limit(self, host):
+        host_limit = self.host_limits.get(host)
+        if host_limit is None:
+            if len(self.host_limits) >= self.max_tracked_hosts:
+                # Forget the least recently added host
+                del self.host_limits[next(iter(self.host_limits))]
+            host_limit = self.host_limits[host] = AIMDConcurrencyLimit(
+                initial=settings.WEBSITE_SCRAPE_HOST_INITIAL_CONCURRENCY,
+                minimum=1,
+                maximum=settings.WEBSITE_SCRAPE_HOST_MAX_CONCURRENCY
+            )
+        return host_limit
+
+    def next_batch(self, data_sources):
+        """
+        Takes the next batch to scrape from the pending data sources, within the backend and host limits.
+        The batch keeps the order of the data sources and is removed from the list.
+        """
+        batch = []
+        remaining = []
+        host_counts = Counter()
+        with self.lock:
+            for data_source in data_sources:
+                host = get_url_host(data_source.url)
+                if len(batch) < self.limit.value and host_counts[host] < self.get_host_limit(host).value:
+                    batch.append(data_source)
+                    host_counts[host] += 1
+                else:
+                    remaining.append(data_source)
+
+        data_sources[:] = remaining
+        return batch
+
+    def acquire(self, urls):
+        """Waits until the urls can be scraped within the backend rate limit and the host politeness limits"""
+        if self.bucket:
+            self.bucket.acquire(len(urls))
+
+        if settings.WEBSITE_SCRAPE_HOST_REQUESTS_PER_SECOND > 0:
+            for host, count in Counter(get_url_host(url) for url in urls).items():
+                RedisTokenBucket(
+                    f'scrape_rate:host:{host}',
+                    rate=settings.WEBSITE_SCRAPE_HOST_REQUESTS_PER_SECOND,
+                    capacity=settings.WEBSITE_SCRAPE_HOST_MAX_CONCURRENCY
+                ).acquire(count)
+
+    def on_success(self, url):
+        with self.lock:
+            self.limit.on_success()
+            self.get_host_limit(get_url_host(url)).on_success()
+
+    def on_throttle(self, url):
+        """The host of the url throttled or timed out"""
+        with self.lock:
+            host_limit = self.get_host_limit(get_url_host(url))
+            host_limit.on_throttle()
+            logger.info(f"Reduced the {self.scrape_tool} scraping concurrency of {get_url_host(url)} to {host_limit.value}")
+
+    def on_backend_throttle(self):
+        """The scraper backend itself throttled"""
+        with self.lock:
+            self.limit.on_throttle()
+            logger.info(f"Reduced the {self.scrape_tool} scraping concurrency to {self.limit.value}")
+
+
+_scrape_concurrency_controllers = {}
+_scrape_concurrency_controllers_lock = threading.Lock()
+
+
+def get_scrape_concurrency_controller(scrape_tool):
+    """Returns the concurrency controller of the scraper backend, shared by the scrapes of this process"""
+    with _scrape_concurrency_controllers_lock:
+        if scrape_tool not in _scrape_concurrency_controllers:
+            if scrape_tool == 'firecrawl':
+                initial_concurrency, pages_per_minute = settings.FIRECRAWL_BATCH_SIZE, settings.FIRECRAWL_PAGES_PER_MINUTE
+            else:
+                initial_concurrency, pages_per_minute = settings.CRAWL4AI_BATCH_SIZE, settings.CRAWL4AI_PAGES_PER_MINUTE
+            _scrape_concurrency_controllers[scrape_tool] = ScrapeConcurrencyController(
+                scrape_tool,
+                initial_concurrency=initial_concurrency,
+                pages_per_minute=pages_per_minute
+            )
+        return _scrape_concurrency_controllers[scrape_tool]
+
+
+def get_integration_request_budget(service, domain, requests_per_minute):
+    """
+    Returns the request budget of the account of an integration (e.g. a Zendesk subdomain), shared by all workers.
+    None if requests_per_minute is 0.
+    """
+    if not requests_per_minute:
+        return None
+    return RedisTokenBucket(
+        f'{service}_request_budget:{domain}',
+        rate=requests_per_minute / 60,
+        capacity=max(1, requests_per_minute // 6)
+    )
@@ -12,6 +12,7 @@ import time
 import traceback
 import uuid
 from django.db.models.functions import Lower
+from asgiref.sync import sync_to_async
 from openai import OpenAI
 from django.conf import settings
 import requests
@@ -29,12 +30,13 @@ import jwt
 from colorthief import ColorThief
 from io import BytesIO
 from slugify import slugify
+from core.http_client import get_http_session
 from core.requester import GeminiEmbedder, GeminiRequester, OpenAIRequester, CloudflareRequester, get_openai_api_key, OllamaRequester
 from PIL import Image
 from core.models import DataSource, Binge
 from accounts.models import User
 from dataclasses import dataclass
-from typing import Optional, Generator, Union, Dict
+from typing import AsyncGenerator, Optional, Generator, Union, Dict
 from django.db.models import Model, Q
 from django.core.cache import caches
 import hashlib
@@ -93,24 +95,163 @@ def stream_and_save(
     
     start_stream = time.perf_counter()
     total_response = []
-    chunks = []
     for chunk in response:
-        chunks.append(chunk)
         try:
-            if len(chunk.choices) == 0:
-                # Last chunk
-                yield ''
-            else:
-                data = chunk.choices[0].delta.content
-                if data is None:
-                    continue
-                total_response.append(data)
-                yield data
+            data = get_stream_chunk_text(chunk)
+            if data is None:
+                continue
+            total_response.append(data)
+            yield data
+        except Exception as e:
+            logger.error(f'Error while streaming the response: {e}', exc_info=True)
+            break
+    times['stream_and_save']['time_to_stream'] = time.perf_counter() - start_stream
+
+    save_streamed_answer(
+        ''.join(total_response),
+        chunk,
+        start_total,
+        user_question=user_question,
+        question=question,
+        guru_type=guru_type,
+        question_slug=question_slug,
+        description=description,
+        prompt=prompt,
+        links=links,
+        summary_completion_tokens=summary_completion_tokens,
+        summary_prompt_tokens=summary_prompt_tokens,
+        summary_cached_tokens=summary_cached_tokens,
+        context_vals=context_vals,
+        context_distances=context_distances,
+        times=times,
+        reranked_scores=reranked_scores,
+        trust_score=trust_score,
+        processed_ctx_relevances=processed_ctx_relevances,
+        ctx_rel_usage=ctx_rel_usage,
+        enhanced_question=enhanced_question,
+        user=user,
+        parent=parent,
+        binge=binge,
+        source=source
+    )
+
+
+async def astream_and_save(
+        user_question, 
+        question, 
+        guru_type, 
+        question_slug, 
+        description, 
+        response, 
+        prompt, 
+        links, 
+        summary_completion_tokens, 
+        summary_prompt_tokens, 
+        summary_cached_tokens, 
+        context_vals, 
+        context_distances, 
+        times, # Includes before_stream and summary
+        reranked_scores, 
+        trust_score, 
+        processed_ctx_relevances, 
+        ctx_rel_usage,
+        enhanced_question,
+        user=None,
+        parent=None, 
+        binge=None, 
+        source=Question.Source.USER.value):
+    """
+    Async version of stream_and_save, for the response of ask_question_with_async_stream.
+    The answer is streamed on the event loop, only the save at the end runs in a thread.
+    """
+    start_total = time.perf_counter()
+    times['total'] = 0
+    times['stream_and_save'] = {
+        'time_to_stream': 0,
+        'processing_before_save': 0,
+        'total': 0
+    }
+
+    start_stream = time.perf_counter()
+    total_response = []
+    chunk = None
+    async for chunk in await response:
+        try:
+            data = get_stream_chunk_text(chunk)
+            if data is None:
+                continue
+            total_response.append(data)
+            yield data
         except Exception as e:
             logger.error(f'Error while streaming the response: {e}', exc_info=True)
             break
     times['stream_and_save']['time_to_stream'] = time.perf_counter() - start_stream
 
+    await sync_to_async(save_streamed_answer, thread_sensitive=False)(
+        ''.join(total_response),
+        chunk,
+        start_total,
+        user_question=user_question,
+        question=question,
+        guru_type=guru_type,
+        question_slug=question_slug,
+        description=description,
+        prompt=prompt,
+        links=links,
+        summary_completion_tokens=summary_completion_tokens,
+        summary_prompt_tokens=summary_prompt_tokens,
+        summary_cached_tokens=summary_cached_tokens,
+        context_vals=context_vals,
+        context_distances=context_distances,
+        times=times,
+        reranked_scores=reranked_scores,
+        trust_score=trust_score,
+        processed_ctx_relevances=processed_ctx_relevances,
+        ctx_rel_usage=ctx_rel_usage,
+        enhanced_question=enhanced_question,
+        user=user,
+        parent=parent,
+        binge=binge,
+        source=source
+    )
+
+
+def get_stream_chunk_text(chunk):
+    """Returns the text of the answer stream chunk, '' for the last chunk, None if it has no text"""
+    if len(chunk.choices) == 0:
+        # Last chunk
+        return ''
+    return chunk.choices[0].delta.content
+
+
+def save_streamed_answer(
+        answer,
+        last_chunk,
+        start_total,
+        user_question, 
+        question, 
+        guru_type, 
+        question_slug, 
+        description, 
+        prompt, 
+        links, 
+        summary_completion_tokens, 
+        summary_prompt_tokens, 
+        summary_cached_tokens, 
+        context_vals, 
+        context_distances, 
+        times,
+        reranked_scores, 
+        trust_score, 
+        processed_ctx_relevances, 
+        ctx_rel_usage,
+        enhanced_question,
+        user=None,
+        parent=None, 
+        binge=None, 
+        source=Question.Source.USER.value):
+    """Saves the streamed answer as a question, with its usage (from the last chunk of the stream) and times"""
+    chunk = last_chunk
     start_processing = time.perf_counter()
     prompt_tokens, completion_tokens, cached_prompt_tokens = get_tokens_from_openai_response(chunk)
 
@@ -118,13 +259,15 @@ def stream_and_save(
     
     guru_type_object = get_guru_type_object(guru_type)
 
-    answer = ''.join(total_response)
+    if is_fast_path_summary(times.get('summary')):
+        question, description = refine_fast_summary_from_answer(answer, question, description)
 
     llm_usages = {}
     llm_usages['summary'] = {
         'prompt_tokens': summary_prompt_tokens,
         'completion_tokens': summary_completion_tokens,
         'cached_prompt_tokens': summary_cached_tokens,
+        'prompt_cache_hit_ratio': get_prompt_cache_hit_ratio(summary_prompt_tokens, summary_cached_tokens),
         'cost_dollars': get_llm_usage(settings.GPT_MODEL, summary_prompt_tokens, summary_completion_tokens, summary_cached_tokens),
         'model': settings.GPT_MODEL
     }
@@ -134,10 +277,14 @@ def stream_and_save(
         'prompt_tokens': prompt_tokens,
         'completion_tokens': completion_tokens,
         'cached_prompt_tokens': cached_prompt_tokens,
+        'prompt_cache_hit_ratio': get_prompt_cache_hit_ratio(prompt_tokens, cached_prompt_tokens),
+        'prompt_layout': guru_type_object.prompt_layout,
         'cost_dollars': get_llm_usage(settings.GPT_MODEL, prompt_tokens, completion_tokens, cached_prompt_tokens),
         'model': settings.GPT_MODEL
     }
 
+    if ctx_rel_usage:
+        ctx_rel_usage['prompt_cache_hit_ratio'] = get_prompt_cache_hit_ratio(ctx_rel_usage['prompt_tokens'], ctx_rel_usage['cached_prompt_tokens'])
     llm_usages['context_relevance'] = ctx_rel_usage
 
     existing_question = Question.objects.filter(
@@ -447,17 +594,294 @@ def merge_splits(milvus_client, text_embedding, code_embedding, fetched_doc, col
             merged_text[split_num] = result['entity']['text']
             used_indices.add(split_num)
 
+    fetched_doc['entity']['text'] = join_splits(merged_text)
+    # Kept to trim the merged neighbors while packing the contexts into the token budget
+    fetched_doc['entity']['merged_splits'] = merged_text
+    return fetched_doc
+
+
+def join_splits(splits: dict):
     # Merge them in order with truncation indicators
-    sorted_indices = sorted(merged_text.keys())
+    sorted_indices = sorted(splits.keys())
     merged_parts = []
     
     for i, idx in enumerate(sorted_indices):
         if i > 0 and sorted_indices[i] - sorted_indices[i-1] > 1:
             merged_parts.append("\n...truncated...\n")
-        merged_parts.append(merged_text[idx])
+        merged_parts.append(splits[idx])
 
-    fetched_doc['entity']['text'] = '\n'.join(merged_parts)
-    return fetched_doc
+    return '\n'.join(merged_parts)
+
+
+_tokenizer = None
+_tokenizer_failed_at = None
+# Seconds to wait before loading the tokenizer again after a failure
+TOKENIZER_RETRY_INTERVAL = 300
+
+
+def get_tokenizer():
+    global _tokenizer, _tokenizer_failed_at
+    if _tokenizer is not None:
+        return _tokenizer
+    if _tokenizer_failed_at and time.time() - _tokenizer_failed_at < TOKENIZER_RETRY_INTERVAL:
+        return None
+
+    try:
+        import tiktoken
+        _tokenizer = tiktoken.get_encoding('o200k_base')
+        _tokenizer_failed_at = None
+    except Exception as e:
+        # The encoding is downloaded on first use, which fails without network access
+        logger.error(f'Could not load the tokenizer, token counts will be estimated until it loads: {e}', exc_info=True)
+        _tokenizer_failed_at = time.time()
+    return _tokenizer
+
+
+def count_tokens(text: str):
+    tokenizer = get_tokenizer()
+    if tokenizer:
+        return len(tokenizer.encode(text, disallowed_special=()))
+    # Roughly 4 characters per token for English text
+    return len(text) // 4 + 1
+
+
+# Metadata and tags added to each context by prepare_contexts
+CONTEXT_TOKEN_OVERHEAD = 60
+
+
+def get_context_segments(context):
+    """
+    Splits a context into token counted segments of its merged docs.
+    Required segments are the closest splits of the main docs, the context is dropped if they do not fit.
+    Optional segments are the merged neighbors, ordered by their distance to the closest split, and the other answers of stackoverflow contexts.
+    Each segment is a tuple of (doc index, split num, text, token count).
+    """
+    if 'question' in context and context['question']:
+        main_docs = [context['question']]
+        if context.get('accepted_answer'):
+            main_docs.append(context['accepted_answer'])
+        other_docs = sorted(context.get('other_answers', []), key=lambda x: x['entity']['metadata'].get('score', 0), reverse=True)
+    else:
+        main_docs = [context]
+        other_docs = []
+
+    required = []
+    neighbors = []
+    others = []
+    for doc_index, doc in enumerate(main_docs + other_docs):
+        entity = doc['entity']
+        closest_split_num = entity['metadata'].get('split_num', 1)
+        splits = entity.get('merged_splits') or {closest_split_num: entity['text']}
+        if closest_split_num not in splits:
+            closest_split_num = min(splits)
+
+        for split_num, text in splits.items():
+            distance = abs(split_num - closest_split_num)
+            segment = (doc_index, split_num, text, count_tokens(text))
+            if doc_index >= len(main_docs):
+                others.append((doc_index, distance, segment))
+            elif distance == 0:
+                required.append(segment)
+            else:
+                neighbors.append((distance, doc_index, segment))
+
+    neighbors.sort(key=lambda x: (x[0], x[1]))
+    others.sort(key=lambda x: (x[0], x[1]))
+    optional = [segment for _, _, segment in neighbors] + [segment for _, _, segment in others]
+    return main_docs + other_docs, required, optional
+
+
+def build_packed_context(context, docs, kept_segments):
+    kept_splits = {}
+    for doc_index, split_num, text, _ in kept_segments:
+        kept_splits.setdefault(doc_index, {})[split_num] = text
+
+    packed_docs = []
+    for doc_index, doc in enumerate(docs):
+        if doc_index not in kept_splits:
+            packed_docs.append(None)
+            continue
+        packed_docs.append({**doc, 'entity': {**doc['entity'], 'text': join_splits(kept_splits[doc_index])}})
+
+    if 'question' in context and context['question']:
+        packed_context = {**context, 'question': packed_docs[0]}
+        other_docs_start = 1
+        if context.get('accepted_answer'):
+            packed_context['accepted_answer'] = packed_docs[1]
+            other_docs_start = 2
+        packed_context['other_answers'] = [doc for doc in packed_docs[other_docs_start:] if doc]
+        return packed_context
+
+    return packed_docs[0]
+
+
+def pack_contexts(contexts: list, reranked_scores: list, token_limit: int):
+    """
+    Fits the contexts into the token budget of the answer prompt.
+    The contexts are expected to be sorted by their trust scores, with reranked_scores in the same order.
+
+    First, the closest split of each context is packed in order and the contexts that do not fit are dropped.
+    Then the remaining budget is allocated to the packed contexts proportional to their rerank scores to add back their merged neighbors.
+    The budget left over from the contexts that need less than their share is given to the others in order.
+    """
+    stats = {
+        'token_limit': token_limit,
+        'total_tokens': 0,
+        'packed_tokens': 0,
+        'trimmed_tokens': 0,
+        'dropped_tokens': 0,
+        'dropped_contexts': 0,
+        'trimmed_contexts': 0,
+    }
+    if not token_limit or not contexts:
+        return contexts, reranked_scores, stats
+
+    plans = []
+    used_tokens = 0
+    for i, context in enumerate(contexts):
+        docs, required, optional = get_context_segments(context)
+        required_tokens = CONTEXT_TOKEN_OVERHEAD + sum(segment[3] for segment in required)
+        total_tokens = required_tokens + sum(segment[3] for segment in optional)
+        stats['total_tokens'] += total_tokens
+
+        # The first context is always kept, an answer without contexts is out of context
+        if plans and used_tokens + required_tokens > token_limit:
+            stats['dropped_tokens'] += total_tokens
+            stats['dropped_contexts'] += 1
+            continue
+
+        used_tokens += required_tokens
+        plans.append({
+            'index': i,
+            'docs': docs,
+            'kept': list(required),
+            'optional': optional,
+            'score': max(reranked_scores[i]['score'], 0),
+        })
+
+    remaining_tokens = max(token_limit - used_tokens, 0)
+    total_score = sum(plan['score'] for plan in plans)
+    for plan in plans:
+        share = plan['score'] / total_score if total_score else 1 / len(plans)
+        allowance = int(remaining_tokens * share)
+        while plan['optional'] and plan['optional'][0][3] <= allowance:
+            segment = plan['optional'].pop(0)
+            plan['kept'].append(segment)
+            allowance -= segment[3]
+            used_tokens += segment[3]
+
+    for plan in plans:
+        while plan['optional'] and used_tokens + plan['optional'][0][3] <= token_limit:
+            segment = plan['optional'].pop(0)
+            plan['kept'].append(segment)
+            used_tokens += segment[3]
+
+    packed_contexts = []
+    packed_reranked_scores = []
+    for plan in plans:
+        if plan['optional']:
+            stats['trimmed_contexts'] += 1
+            stats['trimmed_tokens'] += sum(segment[3] for segment in plan['optional'])
+            packed_contexts.append(build_packed_context(contexts[plan['index']], plan['docs'], plan['kept']))
+        else:
+            packed_contexts.append(contexts[plan['index']])
+        packed_reranked_scores.append(reranked_scores[plan['index']])
+
+    stats['packed_tokens'] = used_tokens
+    return packed_contexts, packed_reranked_scores, stats
+
+
+CONTEXT_RELEVANCE_CACHE_KEY_PREFIX = 'ctx_relevance'
+
+
+def get_context_relevance_cache_keys(guru_type_obj: GuruType, question: str, user_question: str, enhanced_question: str, contexts: list):
+    """
+    Returns the cache keys of the relevance scores of the contexts.
+    Keys are built from a digest of the questions (and the guru prompt variables, the relevance prompt and the model) and the hash of the context content.
+    """
+    from core.prompts import context_relevance_prompt
+
+    question_digest = hashlib.sha256(json.dumps(
+        [guru_type_obj.prompt_map, context_relevance_prompt, settings.GPT_MODEL, question, user_question, enhanced_question],
+        sort_keys=True, default=str).encode()).hexdigest()
+
+    cache_keys = []
+    # Contexts are formatted one by one so that the content hash does not depend on the position of the context
+    for context in contexts:
+        context_hash = hashlib.sha256(prepare_contexts_for_context_relevance([context])[0].encode()).hexdigest()
+        cache_keys.append(f'{CONTEXT_RELEVANCE_CACHE_KEY_PREFIX}:{guru_type_obj.slug}:{question_digest}:{context_hash}')
+    return cache_keys
+
+
+def get_cached_context_relevances(cache_keys: list):
+    """
+    Returns the cached relevance scores in the order of the cache keys, None for the missing ones.
+    Not cached in selfhosted, where the model can be switched to an Ollama model that is not part of the keys.
+    """
+    if not cache_keys or settings.ENV == 'selfhosted' or settings.CONTEXT_RELEVANCE_CACHE_TIMEOUT_SECONDS <= 0:
+        return [None for _ in cache_keys]
+
+    try:
+        cached_scores = caches['alternate'].get_many(cache_keys)
+    except Exception as e:
+        logger.error(f'Error while getting the context relevances from the cache: {e}')
+        cached_scores = {}
+    return [cached_scores.get(key) for key in cache_keys]
+
+
+def set_cached_context_relevances(scores: dict):
+    if not scores or settings.ENV == 'selfhosted' or settings.CONTEXT_RELEVANCE_CACHE_TIMEOUT_SECONDS <= 0:
+        return
+
+    try:
+        caches['alternate'].set_many(scores, timeout=settings.CONTEXT_RELEVANCE_CACHE_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.error(f'Error while setting the context relevances to the cache: {e}')
+
+
+def get_judged_context_relevances(missing_indices: list, judged_contexts: list):
+    """
+    Maps the contexts judged by the LLM back to the indices of the contexts, by their context_num.
+    The judged contexts are numbered from 1 in the order of missing_indices. Out of range and repeated numbers are skipped,
+    so a dropped, merged or reordered item never gives its score to another context.
+    """
+    scores = {}
+    for ctx in judged_contexts:
+        try:
+            context_num = int(ctx['context_num'])
+            score = float(ctx['score'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 1 <= context_num <= len(missing_indices):
+            continue
+        index = missing_indices[context_num - 1]
+        if index in scores:
+            continue
+        scores[index] = score
+    return scores
+
+
+def get_context_relevance_bypass_scores(guru_type_obj: GuruType, reranked_scores: list):
+    """
+    Returns the relevance scores of the contexts from their reranked scores (floats, in the order of the contexts) if the reranker clearly separates relevant contexts from irrelevant ones.
+    Returns None if the contexts should be judged by the LLM.
+    """
+    keep_threshold = guru_type_obj.context_relevance_keep_threshold
+    drop_threshold = guru_type_obj.context_relevance_drop_threshold
+    if keep_threshold is None or drop_threshold is None:
+        return None
+
+    # Contexts are not reranked in selfhosted, their scores are meaningless
+    if settings.ENV == 'selfhosted' or not reranked_scores:
+        return None
+
+    if not any(score >= keep_threshold for score in reranked_scores):
+        return None
+
+    if any(drop_threshold < score < keep_threshold for score in reranked_scores):
+        return None
+
+    return [min(max(score, 0), 1) for score in reranked_scores]
 
 
 def vector_db_fetch(
@@ -924,8 +1348,44 @@ def vector_db_fetch(
         return github_repo_sources, reranked_scores        
 
     def filter_by_trust_score(contexts, reranked_scores, question, user_question, enhanced_question, guru_type_slug):
-        context_relevance, ctx_rel_usage, prompt, user_prompt = get_openai_requester().get_context_relevance(question, user_question, enhanced_question, guru_type_slug, contexts, cot=False)
-        ctx_rel_usage['cost_dollars'] = get_llm_usage(settings.GPT_MODEL, ctx_rel_usage['prompt_tokens'], ctx_rel_usage['completion_tokens'], ctx_rel_usage['cached_prompt_tokens'])
+        ctx_rel_usage = {
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cached_prompt_tokens': 0,
+            'total_tokens': 0,
+            'model': settings.GPT_MODEL,
+            'cost_dollars': 0,
+        }
+        times['context_relevance'] = {
+            'bypassed': False,
+            'cached': 0,
+            'judged': 0,
+        }
+
+        scores = get_context_relevance_bypass_scores(guru_type, [reranked_score['score'] for reranked_score in reranked_scores])
+        if scores is not None:
+            times['context_relevance']['bypassed'] = True
+            sources = ['rerank' for _ in scores]
+        else:
+            cache_keys = get_context_relevance_cache_keys(guru_type, question, user_question, enhanced_question, contexts)
+            scores = get_cached_context_relevances(cache_keys)
+            sources = ['cache' if score is not None else 'llm' for score in scores]
+            missing_indices = [i for i, score in enumerate(scores) if score is None]
+            times['context_relevance']['cached'] = len(contexts) - len(missing_indices)
+            times['context_relevance']['judged'] = len(missing_indices)
+
+            if missing_indices:
+                missing_contexts = [contexts[i] for i in missing_indices]
+                context_relevance, ctx_rel_usage, prompt, user_prompt = get_openai_requester().get_context_relevance(question, user_question, enhanced_question, guru_type_slug, missing_contexts, cot=False)
+                ctx_rel_usage['cost_dollars'] = get_llm_usage(settings.GPT_MODEL, ctx_rel_usage['prompt_tokens'], ctx_rel_usage['completion_tokens'], ctx_rel_usage['cached_prompt_tokens'])
+
+                judged_scores = {}
+                # Only the contexts the LLM scored are cached, the others stay None
+                for i, score in get_judged_context_relevances(missing_indices, context_relevance.get('contexts', [])).items():
+                    scores[i] = score
+                    judged_scores[cache_keys[i]] = score
+                set_cached_context_relevances(judged_scores)
+
         filtered_contexts = []
         filtered_reranked_scores = []
         trust_score = 0
@@ -942,17 +1402,27 @@ def vector_db_fetch(
 
         # Calculate dynamic threshold
         final_threshold = default_threshold
-        if context_relevance and 'contexts' in context_relevance and context_relevance['contexts']:
-            scores = [ctx['score'] for ctx in context_relevance['contexts']]
-            if scores:
-                max_score = max(scores)
-                dynamic_threshold = max_score - 0.2
-                final_threshold = max(default_threshold, dynamic_threshold)
+        judged_scores = [score for score in scores if score is not None]
+        if times['context_relevance']['bypassed']:
+            # Reranked scores are not on the scale of the LLM scores
+            final_threshold = max(default_threshold, guru_type.context_relevance_keep_threshold)
+        elif judged_scores:
+            max_score = max(judged_scores)
+            dynamic_threshold = max_score - 0.2
+            final_threshold = max(default_threshold, dynamic_threshold)
         
         # Create a list of tuples containing (context, reranked_score, trust_score) for sorting
         context_data = []
-        for i, ctx in enumerate(context_relevance['contexts']):
-            ctx['context'] = formatted_contexts[i]
+        for i, score in enumerate(scores):
+            if score is None:
+                # Not returned by the LLM
+                continue
+            ctx = {
+                'context_num': i + 1,
+                'score': score,
+                'source': sources[i],
+                'context': formatted_contexts[i],
+            }
             # Filter using the final calculated threshold
             if ctx['score'] >= final_threshold:
                 context_data.append((contexts[i], reranked_scores[i], ctx['score']))
@@ -1046,6 +1516,14 @@ def get_contexts(
 
     logger.debug(f'Contexts: {contexts}')
     
+    start_pack_contexts = time.perf_counter()
+    try:
+        guru_type_obj = get_guru_type_object(guru_type_slug)
+        contexts, reranked_scores, times['context_packing'] = pack_contexts(contexts, reranked_scores, guru_type_obj.context_token_limit)
+    except Exception as e:
+        logger.error(f'Error while packing the contexts: {e}', exc_info=True)
+    times['pack_contexts'] = time.perf_counter() - start_pack_contexts
+
     start_prepare_contexts = time.perf_counter()
     context_vals, links = prepare_contexts(contexts, reranked_scores)
     times['prepare_contexts'] = time.perf_counter() - start_prepare_contexts
@@ -1216,9 +1694,13 @@ def format_question_history(history):
         history_text += f"{i}. User Question: {h['user_question']}\n   Question: {h['question']}\n"
     return history_text.strip()
 
-def prepare_chat_messages(user_question, question, guru_variables, context_vals, history=None):
-    from core.prompts import prompt_template, binge_answer_prompt
-    """Prepare messages for the chat completion API."""
+def prepare_chat_messages(user_question, question, guru_variables, context_vals, history=None, prompt_layout=GuruType.PromptLayout.DEFAULT):
+    from core.prompts import prompt_template, binge_answer_prompt, cached_prompt_template_prefix, cached_prompt_template_suffix
+    """
+    Prepare messages for the chat completion API.
+    With the cache friendly layout, the static guru prompt is sent as the first system message and
+    the per question parts (contexts, history, intent, date) as the second one, so that providers can cache the prefix.
+    """
     user_message = f"User Question: {user_question}\nQuestion: {question}"
     
     if history:
@@ -1238,6 +1720,28 @@ def prepare_chat_messages(user_question, question, guru_variables, context_vals,
     else:
         custom_instruction_section = ""
     
+    if prompt_layout == GuruType.PromptLayout.CACHE_FRIENDLY:
+        # Only the static variables are used in the prefix, its bytes should not change between questions
+        static_prompt = cached_prompt_template_prefix.format(
+            guru_type=guru_variables['guru_type'],
+            domain_knowledge=guru_variables['domain_knowledge'],
+            github_details_if_applicable=guru_variables.get('github_details_if_applicable', ''),
+            custom_instruction_section=custom_instruction_section,
+        )
+        dynamic_prompt = cached_prompt_template_suffix.format(
+            binge_answer_prompt=binge_answer_prompt,
+            github_context=guru_variables.get('github_context', ''),
+            user_intent=guru_variables['user_intent'],
+            answer_length=guru_variables['answer_length'],
+            date=guru_variables['date'],
+            **context_vals
+        )
+        return [
+            {'role': 'system', 'content': static_prompt},
+            {'role': 'system', 'content': dynamic_prompt},
+            {'role': 'user', 'content': user_message}
+        ]
+
     # Insert binge_answer_prompt into the main prompt
     final_prompt = prompt_template.format(
         binge_answer_prompt=binge_answer_prompt if history else "",
@@ -1266,7 +1770,8 @@ def ask_question_with_stream(
     source,
     enhanced_question,
     user=None,
-    github_comments: list | None = None):
+    github_comments: list | None = None,
+    async_stream: bool = False):
     from core.prompts import github_context_template
     from core.github.app_handler import GithubAppHandler
 
@@ -1320,13 +1825,17 @@ def ask_question_with_stream(
     times['get_question_history'] = time.perf_counter() - start_history
 
     start_prepare_messages = time.perf_counter()
-    messages = prepare_chat_messages(user_question, question, guru_variables, context_vals, history)
+    guru_type_obj = get_guru_type_object(guru_type)
+    messages = prepare_chat_messages(user_question, question, guru_variables, context_vals, history, guru_type_obj.prompt_layout)
     times['prepare_chat_messages'] = time.perf_counter() - start_prepare_messages
     
-    used_prompt = messages[0]['content']
+    used_prompt = '\n'.join(message['content'] for message in messages if message['role'] == 'system')
 
     start_chatgpt = time.perf_counter()
-    response = get_openai_requester().ask_question_with_stream(messages)
+    if async_stream:
+        response = get_openai_requester().ask_question_with_async_stream(messages)
+    else:
+        response = get_openai_requester().ask_question_with_stream(messages)
     times['chatgpt_completion'] = time.perf_counter() - start_chatgpt
     times['total'] = time.perf_counter() - start_total
 
@@ -1398,12 +1907,234 @@ def get_summary(question, guru_type, short_answer=False, github_comments: list |
     return response, times
 
 
+# (keywords, user intent, answer length in words). Checked in order, first match wins.
+FAST_SUMMARY_INTENTS = [
+    (('difference between', ' vs ', ' vs. ', 'versus', 'compare'), 'comparison', 500),
+    (('how do', 'how to', 'how can', 'how should', 'how does'), 'how to', 500),
+    (('why ',), 'why', 300),
+    (('what is', 'what are', 'explain', 'describe'), 'explanation', 400),
+]
+FAST_SUMMARY_DEFAULT_INTENT = ('explanation', 400)
+FAST_SUMMARY_MIN_LENGTH = 10
+FAST_SUMMARY_MAX_LENGTH = 300
+
+
+def get_fast_question_summary(question: str, guru_type_obj: GuruType, short_answer: bool = False, github_comments: list | None = None, parent_question: Question | None = None):
+    """
+    Builds the summary fields of a question locally, without an LLM call.
+    Returns None if the question is not safe to summarize this way and the LLM summary should be used instead.
+
+    Follow-up questions and GitHub threads are never summarized locally, as their question and enhanced question
+    depend on the conversation history. Question validity is left to context retrieval: unrelated questions
+    do not pass the rerank and trust score thresholds and are answered as out of context.
+    """
+    if parent_question or github_comments:
+        return None
+
+    normalized = ' '.join(question.split())
+    if len(normalized) < FAST_SUMMARY_MIN_LENGTH or len(normalized) > FAST_SUMMARY_MAX_LENGTH:
+        return None
+
+    slug = validate_slug(normalized)[:50].strip('-')
+    if not slug:
+        return None
+
+    lowered = f' {normalized.lower()} '
+    user_intent, answer_length = FAST_SUMMARY_DEFAULT_INTENT
+    for keywords, intent, length in FAST_SUMMARY_INTENTS:
+        if any(keyword in lowered for keyword in keywords):
+            user_intent, answer_length = intent, length
+            break
+
+    if short_answer:
+        answer_length = min(answer_length, get_default_settings().widget_answer_max_length)
+
+    polished_question = normalized[0].upper() + normalized[1:]
+    description = polished_question if len(polished_question) <= 150 else polished_question[:147].rsplit(' ', 1)[0] + '...'
+
+    return {
+        'question': polished_question,
+        'user_question': question,
+        'question_slug': slug,
+        'description': description,
+        'valid_question': True,
+        'completion_tokens': 0,
+        'prompt_tokens': 0,
+        'cached_prompt_tokens': 0,
+        'user_intent': user_intent,
+        'answer_length': answer_length,
+        'enhanced_question': f'{guru_type_obj.name} {polished_question}',
+        'jwt': generate_jwt(),
+    }
+
+
+def is_fast_path_summary(summary_times):
+    """
+    Whether the question was summarized by the fast path, from the summary times.
+    The API passes the times of get_question_summary, the web answer endpoint the times of the summary endpoint that nest them.
+    """
+    if not isinstance(summary_times, dict):
+        return False
+    question_summary_times = summary_times.get('get_question_summary')
+    if isinstance(question_summary_times, dict) and question_summary_times.get('fast_path'):
+        return True
+    return bool(summary_times.get('fast_path'))
+
+
+def refine_fast_summary_from_answer(answer: str, question: str, description: str):
+    """
+    The answer prompt requires the answer to start with an h1 header of the question.
+    For the questions summarized by the fast path, the polished question and the description are taken from the answer.
+    """
+    lines = [line.strip() for line in answer.strip().split('\n')]
+    lines = [line for line in lines if line]
+    if not lines or not lines[0].startswith('# '):
+        return question, description
+
+    header = lines[0][2:].strip()
+    if header:
+        question = header
+
+    for line in lines[1:]:
+        if line.startswith(('#', '```', '-', '*', '|', '>')) or line[0].isdigit():
+            continue
+        paragraph = line.replace('**', '').replace('`', '')
+        description = paragraph if len(paragraph) <= 150 else paragraph[:147].rsplit(' ', 1)[0] + '...'
+        break
+
+    return question, description
+
+
+SUMMARY_CACHE_KEY_PREFIX = 'summary'
+SUMMARY_CACHE_STATS_KEY_PREFIX = 'summary_cache_stats'
+# Fields that belong to the request, not to the summary itself
+SUMMARY_CACHE_EXCLUDED_FIELDS = ('jwt', 'user_question', 'prompt_tokens', 'completion_tokens', 'cached_prompt_tokens')
+
+
+def get_summary_cache_key(guru_type_obj: GuruType, question: str, short_answer: bool = False, github_comments: list | None = None, parent_question: Question | None = None):
+    """
+    Builds the cache key of a question summary.
+    The key includes a digest of the guru prompt variables, the summary prompts and the model, so updating any of them invalidates the cached summaries.
+    """
+    from core.prompts import summary_template, summary_short_answer_addition, summary_addition, github_summary_template, binge_summary_prompt
+
+    prompt_parts = [
+        guru_type_obj.prompt_map,
+        summary_template,
+        summary_addition,
+        github_summary_template,
+        binge_summary_prompt,
+        settings.GPT_MODEL,
+    ]
+    if short_answer:
+        prompt_parts.append(summary_short_answer_addition)
+        prompt_parts.append(get_default_settings().widget_answer_max_length)
+    prompt_digest = hashlib.sha256(json.dumps(prompt_parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    history = []
+    if parent_question:
+        history = [(item['user_question'], item['answer']) for item in get_question_history(parent_question)]
+    history_digest = hashlib.sha256(json.dumps([history, github_comments or []], sort_keys=True, default=str).encode()).hexdigest()
+
+    normalized_question = ' '.join(question.lower().split()).rstrip('?!. ')
+
+    key = hashlib.sha256(f'{prompt_digest}:{short_answer}:{history_digest}:{normalized_question}'.encode()).hexdigest()
+    return f'{SUMMARY_CACHE_KEY_PREFIX}:{guru_type_obj.slug}:{key}'
+
+
+def record_summary_cache_result(guru_type_slug: str, hit: bool):
+    try:
+        cache = caches['alternate']
+        key = f'{SUMMARY_CACHE_STATS_KEY_PREFIX}:{guru_type_slug}:{"hits" if hit else "misses"}'
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.error(f'Error while recording the summary cache result: {e}. Guru type: {guru_type_slug}')
+
+
+def get_summary_cache_stats(guru_type_slug: str):
+    """
+    Returns the hit count, miss count and hit rate of the summary cache of a guru type.
+    """
+    cache = caches['alternate']
+    hits = cache.get(f'{SUMMARY_CACHE_STATS_KEY_PREFIX}:{guru_type_slug}:hits') or 0
+    misses = cache.get(f'{SUMMARY_CACHE_STATS_KEY_PREFIX}:{guru_type_slug}:misses') or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0,
+    }
+
+
+def get_cached_question_summary(cache_key: str, question: str):
+    try:
+        cached_summary = caches['alternate'].get(cache_key)
+    except Exception as e:
+        logger.error(f'Error while getting the summary from the cache: {e}. Cache key: {cache_key}')
+        return None
+
+    if not cached_summary:
+        return None
+
+    summary = pickle.loads(cached_summary)
+    summary['user_question'] = question
+    summary['prompt_tokens'] = 0
+    summary['completion_tokens'] = 0
+    summary['cached_prompt_tokens'] = 0
+    summary['jwt'] = generate_jwt()
+    return summary
+
+
+def is_summary_cache_enabled():
+    """Like the context relevance cache, not used in selfhosted, where an Ollama model that is not part of the keys can summarize"""
+    return settings.ENV != 'selfhosted' and settings.SUMMARY_CACHE_TIMEOUT_SECONDS > 0
+
+
+def set_cached_question_summary(cache_key: str, summary: dict):
+    if not is_summary_cache_enabled():
+        return
+
+    # Failed summaries do not have the user intent, they should be retried instead
+    if 'user_intent' not in summary:
+        return
+
+    cached_summary = {key: value for key, value in summary.items() if key not in SUMMARY_CACHE_EXCLUDED_FIELDS}
+    try:
+        caches['alternate'].set(cache_key, pickle.dumps(cached_summary), timeout=settings.SUMMARY_CACHE_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.error(f'Error while setting the summary to the cache: {e}. Cache key: {cache_key}')
+
+
 def get_question_summary(question: str, guru_type: str, binge: Binge, short_answer: bool = False, github_comments: list | None = None, parent_question: Question | None = None):
     times = {
         'total': 0,
     }
     start_total = time.perf_counter()
 
+    guru_type_obj = get_guru_type_object(guru_type)
+    if guru_type_obj.summary_mode == GuruType.SummaryMode.FAST:
+        fast_summary = get_fast_question_summary(question, guru_type_obj, short_answer, github_comments, parent_question)
+        if fast_summary:
+            fast_summary['question_slug'] = f'{fast_summary["question_slug"]}-{uuid.uuid4()}'
+            # Read by stream_and_save to refine the question from the answer
+            times['fast_path'] = True
+            times['total'] = time.perf_counter() - start_total
+            return fast_summary, times
+
+    cache_key = None
+    if is_summary_cache_enabled():
+        start_cache_lookup = time.perf_counter()
+        cache_key = get_summary_cache_key(guru_type_obj, question, short_answer, github_comments, parent_question)
+        cached_summary = get_cached_question_summary(cache_key, question)
+        times['cache_lookup'] = time.perf_counter() - start_cache_lookup
+        times['cache_hit'] = cached_summary is not None
+        record_summary_cache_result(guru_type, cached_summary is not None)
+        if cached_summary:
+            cached_summary['question_slug'] = f'{cached_summary["question_slug"]}-{uuid.uuid4()}'
+            times['total'] = time.perf_counter() - start_total
+            return cached_summary, times
+
     response, get_summary_times = get_summary(question, guru_type, short_answer, github_comments, parent_question)
     times['get_summary'] = get_summary_times
 
@@ -1411,6 +2142,9 @@ def get_question_summary(question: str, guru_type: str, binge: Binge, short_answ
     parsed_response = parse_summary_response(question, response)
     times['parse_summary_response'] = time.perf_counter() - start_parse_summary_response
 
+    if cache_key:
+        set_cached_question_summary(cache_key, parsed_response)
+
     # if binge:
     parsed_response['question_slug'] = f'{parsed_response["question_slug"]}-{uuid.uuid4()}'
     times['total'] = time.perf_counter() - start_total
@@ -1428,7 +2162,8 @@ def stream_question_answer(
         enhanced_question,
         parent_question=None,
         user=None,
-        github_comments: list | None = None
+        github_comments: list | None = None,
+        async_stream: bool = False
     ):
     guru_type_obj = get_guru_type_object(guru_type)
     collection_name = guru_type_obj.milvus_collection_name
@@ -1446,7 +2181,8 @@ def stream_question_answer(
         source,
         enhanced_question,
         user,
-        github_comments
+        github_comments,
+        async_stream
     )
     if not response:
         return None, None, None, None, None, None, None, None, None, times
@@ -1526,7 +2262,7 @@ def rerank_texts(query, texts):
             data = json.dumps({"query": query, "texts": truncated_texts})
             
             try:
-                response = requests.post(url, headers=headers, data=data, timeout=30)
+                response = get_http_session().post(url, headers=headers, data=data, timeout=30)
             except Exception as e:
                 logger.error(f'Reranking: Error while reranking the batch {batch_start}-{batch_end}: {[text[:100] for text in batch_texts]}. Response: {e}. Url: {url}')
                 continue  # Try with a smaller limit instead of returning None immediately
@@ -1550,7 +2286,7 @@ def rerank_texts(query, texts):
                 data = json.dumps({"query": short_query, "texts": truncated_texts})
                 
                 try:
-                    response = requests.post(url, headers=headers, data=data, timeout=30)
+                    response = get_http_session().post(url, headers=headers, data=data, timeout=30)
                 except Exception as e:
                     logger.error(f'Reranking: Error while reranking with shortened query: {e}. Url: {url}')
                     continue
@@ -2005,13 +2741,14 @@ def create_guru_type_object(slug, name, intro_text, domain_knowledge, icon_url,
         guru_type.maintainers.add(maintainer)
     return guru_type
 
-def finalize_data_source_summarizations(data_source, max_length=settings.SUMMARIZATION_MAX_LENGTH):
+def finalize_data_source_summarizations(data_source, max_length=settings.SUMMARIZATION_MAX_LENGTH, batch=None):
     """
     Finalizes the data source summarizations by merging and summarizing the content of the summarizations.
 
     Args:
         data_source: The data source object to finalize the summarizations for.
         max_length: The maximum length of the merged content.
+        batch: If given, the merges are added to this LLMBatch instead, and created when its job is applied.
     """
 
     if data_source.final_summarization_created:
@@ -2049,24 +2786,27 @@ def finalize_data_source_summarizations(data_source, max_length=settings.SUMMARI
             try:
                 merged_content = current_content.strip()
                 merged_content = f'\n<METADATA>{content_metadata}</METADATA>\n\n{merged_content}'
-                summarized, model_name, usages, summary_suitable, reasoning = summarize_text(merged_content, data_source.guru_type)
-                new_summarization = Summarization.objects.create(
-                    guru_type=data_source.guru_type,
-                    is_data_source_summarization=True,
-                    content_metadata=content_metadata,
-                    data_source_ref=data_source,
-                    source_content=merged_content,
-                    result_content=summarized,
-                    is_root=False,
-                    processed=False,
-                    initial=False,
-                    model=model_name,
-                    usages=usages,
-                    summary_suitable=summary_suitable,
-                    reasoning=reasoning
-                )
-                new_summarization.summarization_refs.set(current_summarizations)
-                Summarization.objects.filter(id__in=[s.id for s in current_summarizations]).update(processed=True)
+                if batch:
+                    batch.add_merged_summarization(merged_content, content_metadata, current_summarizations, is_root=False, data_source=data_source)
+                else:
+                    summarized, model_name, usages, summary_suitable, reasoning = summarize_text(merged_content, data_source.guru_type)
+                    new_summarization = Summarization.objects.create(
+                        guru_type=data_source.guru_type,
+                        is_data_source_summarization=True,
+                        content_metadata=content_metadata,
+                        data_source_ref=data_source,
+                        source_content=merged_content,
+                        result_content=summarized,
+                        is_root=False,
+                        processed=False,
+                        initial=False,
+                        model=model_name,
+                        usages=usages,
+                        summary_suitable=summary_suitable,
+                        reasoning=reasoning
+                    )
+                    new_summarization.summarization_refs.set(current_summarizations)
+                    Summarization.objects.filter(id__in=[s.id for s in current_summarizations]).update(processed=True)
                 
                 current_content = summarization.result_content
                 current_summarizations = [summarization]
@@ -2083,6 +2823,9 @@ def finalize_data_source_summarizations(data_source, max_length=settings.SUMMARI
             is_root = len(unprocessed_summarizations) == len(current_summarizations)
             merged_content = current_content.strip()
             merged_content = f'\n<METADATA>{content_metadata}</METADATA>\n\n{merged_content}'
+            if batch:
+                batch.add_merged_summarization(merged_content, content_metadata, current_summarizations, is_root=is_root, data_source=data_source)
+                return
             summarized, model_name, usages, summary_suitable, reasoning = summarize_text(merged_content, data_source.guru_type)
             new_summarization = Summarization.objects.create(
                 guru_type=data_source.guru_type,
@@ -2111,7 +2854,7 @@ def finalize_data_source_summarizations(data_source, max_length=settings.SUMMARI
     # logger.info(f"Successfully merged and summarized content for a layer of the data source {data_source.id}")
 
 
-def create_guru_type_summarization(guru_type, max_length=settings.SUMMARIZATION_MAX_LENGTH):
+def create_guru_type_summarization(guru_type, max_length=settings.SUMMARIZATION_MAX_LENGTH, batch=None):
     """
     Gets a guru type, and then fetches a list of final data source summaries belonging to that guru type.
     It then merges them until a single summarization is created.
@@ -2120,6 +2863,7 @@ def create_guru_type_summarization(guru_type, max_length=settings.SUMMARIZATION_
     Args:
         guru_type: The guru type object to merge summarizations for.
         max_length: The maximum length of the merged content.
+        batch: If given, the merges are added to this LLMBatch instead, and created when its job is applied.
     """
 
     # Finished data source summarizations
@@ -2151,7 +2895,8 @@ def create_guru_type_summarization(guru_type, max_length=settings.SUMMARIZATION_
         is_root=True
     ).first()
 
-    if final_summarization:
+    # With a batch, it is set as not root once it is merged
+    if final_summarization and not batch:
         # Set it as not root 
         final_summarization.is_root = False
         final_summarization.save()
@@ -2167,23 +2912,26 @@ def create_guru_type_summarization(guru_type, max_length=settings.SUMMARIZATION_
                 return
             try:
                 merged_content = current_content.strip()
-                summarized, model_name, usages, summary_suitable, reasoning = summarize_text(text=merged_content, guru_type=guru_type)
-                new_summarization = Summarization.objects.create(
-                    guru_type=guru_type,
-                    is_data_source_summarization=False,
-                    source_content=merged_content,
-                    result_content=summarized,
-                    content_metadata=current_content_metadata,
-                    is_root=False,
-                    processed=False,
-                    initial=False,
-                    model=model_name,
-                    usages=usages,
-                    summary_suitable=summary_suitable,
-                    reasoning=reasoning
-                )
-                new_summarization.summarization_refs.set(current_summarizations)
-                Summarization.objects.filter(id__in=[s.id for s in current_summarizations]).update(processed=True)
+                if batch:
+                    batch.add_merged_summarization(merged_content, current_content_metadata, current_summarizations, is_root=False)
+                else:
+                    summarized, model_name, usages, summary_suitable, reasoning = summarize_text(text=merged_content, guru_type=guru_type)
+                    new_summarization = Summarization.objects.create(
+                        guru_type=guru_type,
+                        is_data_source_summarization=False,
+                        source_content=merged_content,
+                        result_content=summarized,
+                        content_metadata=current_content_metadata,
+                        is_root=False,
+                        processed=False,
+                        initial=False,
+                        model=model_name,
+                        usages=usages,
+                        summary_suitable=summary_suitable,
+                        reasoning=reasoning
+                    )
+                    new_summarization.summarization_refs.set(current_summarizations)
+                    Summarization.objects.filter(id__in=[s.id for s in current_summarizations]).update(processed=True)
                 
                 current_content = f'\n<METADATA>{summarization.content_metadata}</METADATA>\n\n{summarization.result_content}'
                 current_summarizations = [summarization]
@@ -2202,6 +2950,9 @@ def create_guru_type_summarization(guru_type, max_length=settings.SUMMARIZATION_
         try:
             is_root = len(summarizations) == len(current_summarizations)
             merged_content = current_content.strip()
+            if batch:
+                batch.add_merged_summarization(merged_content, current_content_metadata, current_summarizations, is_root=is_root)
+                return
             summarized, model_name, usages, summary_suitable, reasoning = summarize_text(text=merged_content, guru_type=guru_type)
             new_summarization = Summarization.objects.create(
                 guru_type=guru_type,
@@ -2358,6 +3109,7 @@ def simulate_summary_and_answer(question, guru_type, check_existence, save, sour
         'prompt_tokens': summary_prompt_tokens,
         'completion_tokens': summary_completion_tokens,
         'cached_prompt_tokens': summary_cached_prompt_tokens,
+        'prompt_cache_hit_ratio': get_prompt_cache_hit_ratio(summary_prompt_tokens, summary_cached_prompt_tokens),
         'cost_dollars': get_llm_usage(settings.GPT_MODEL, summary_prompt_tokens, summary_completion_tokens, summary_cached_prompt_tokens),
         'model': settings.GPT_MODEL
     }
@@ -2366,10 +3118,14 @@ def simulate_summary_and_answer(question, guru_type, check_existence, save, sour
         'prompt_tokens': prompt_tokens,
         'completion_tokens': completion_tokens,
         'cached_prompt_tokens': cached_prompt_tokens,
+        'prompt_cache_hit_ratio': get_prompt_cache_hit_ratio(prompt_tokens, cached_prompt_tokens),
+        'prompt_layout': guru_type.prompt_layout,
         'cost_dollars': get_llm_usage(settings.GPT_MODEL, prompt_tokens, completion_tokens, cached_prompt_tokens),
         'model': settings.GPT_MODEL
     }
 
+    if ctx_rel_usage:
+        ctx_rel_usage['prompt_cache_hit_ratio'] = get_prompt_cache_hit_ratio(ctx_rel_usage['prompt_tokens'], ctx_rel_usage['cached_prompt_tokens'])
     llm_usages['context_relevance'] = ctx_rel_usage
 
     if save:
@@ -2556,6 +3312,13 @@ def get_tokens_from_openai_response(response):
         return 0, 0, 0
 
 
+def get_prompt_cache_hit_ratio(prompt_tokens, cached_prompt_tokens):
+    """Ratio of the prompt tokens served from the provider's prompt cache."""
+    if not prompt_tokens:
+        return 0
+    return round((cached_prompt_tokens or 0) / prompt_tokens, 4)
+
+
 def get_llm_usage(model_name, prompt_tokens, completion_tokens, cached_tokens=None):
     settings = get_default_settings()
     pricing = settings.pricings.get(model_name, {})
@@ -2666,7 +3429,7 @@ def get_llm_usage_from_response(response, model):
     elif model == 'gemini-1.5-flash-002':
         prompt_tokens = response.usage_metadata.prompt_token_count
         completion_tokens = response.usage_metadata.candidates_token_count
-        cached_prompt_tokens = 0
+        cached_prompt_tokens = getattr(response.usage_metadata, 'cached_content_token_count', 0) or 0
     else:
         usages['price_eval_success'] = False
         return usages
@@ -2676,6 +3439,7 @@ def get_llm_usage_from_response(response, model):
     usages['completion_tokens'] = completion_tokens
     usages['cost_dollars'] = cost_dollars
     usages['cached_prompt_tokens'] = cached_prompt_tokens
+    usages['prompt_cache_hit_ratio'] = get_prompt_cache_hit_ratio(prompt_tokens, cached_prompt_tokens)
     return usages
 
     
@@ -2969,7 +3733,7 @@ def handle_failed_root_reanswer(question_slug: str, guru_type_slug: str, user_qu
 @dataclass
 class APIAskResponse:
     """Response object for widget_ask function containing all possible return values"""
-    content: Optional[Union[str, Generator]]  # Either direct content or stream generator
+    content: Optional[Union[str, Generator, AsyncGenerator]]  # Either direct content or stream generator
     error: Optional[str]                      # Error message if any
     question_obj: Optional[Question]                 # Question model instance if exists
     is_existing: bool                         # Whether this is an existing question
@@ -3036,7 +3800,8 @@ def api_ask(question: str,
             fetch_existing: bool, 
             api_type: APIType, 
             user: User | None,
-            github_comments: list | None = None) -> APIAskResponse:
+            github_comments: list | None = None,
+            async_stream: bool = False) -> APIAskResponse:
     """
     API ask endpoint.
     It either returns the existing answer or streams the new one
@@ -3050,6 +3815,7 @@ def api_ask(question: str,
         api_type (APIType): The type of API call (WIDGET, API, DISCORD, SLACK, GITHUB).
         user (User): The user making the request.
         github_comments (list): The comments for the GitHub issue.
+        async_stream (bool): Whether to stream the new answer with an async generator, to be consumed in an event loop.
 
     Returns:
         APIAskResponse: A dataclass containing all response information
@@ -3120,7 +3886,8 @@ def api_ask(question: str,
             enhanced_question,
             parent,
             user,
-            github_comments
+            github_comments,
+            async_stream
         )
 
         if not response:
@@ -3130,7 +3897,7 @@ def api_ask(question: str,
         times['before_stream'] = before_stream_times
         times['summary'] = summary_times
 
-        stream_generator = stream_and_save(
+        stream_generator = (astream_and_save if async_stream else stream_and_save)(
             user_question=user_question,
             question=question,
             guru_type=guru_type.slug,
@@ -3527,7 +4294,7 @@ def embed_texts_with_model(texts, model_choice, batch_size=32):
             headers = {"Content-Type": "application/json"}
             if settings.EMBED_API_KEY:
                 headers["Authorization"] = f"Bearer {settings.EMBED_API_KEY}"
-            response = requests.post(url, headers=headers, data=json.dumps({"inputs": texts[i:i+batch_size]}), timeout=30)
+            response = get_http_session().post(url, headers=headers, data=json.dumps({"inputs": texts[i:i+batch_size]}), timeout=30)
             
             if response.status_code == 200:
                 embeddings.extend(response.json())
@@ -3576,7 +4343,7 @@ def embed_text_with_model(text, model_choice):
         headers = {"Content-Type": "application/json"}
         if settings.EMBED_API_KEY:
             headers["Authorization"] = f"Bearer {settings.EMBED_API_KEY}"
-        response = requests.post(url, headers=headers, data=json.dumps({"inputs": [text]}), timeout=30)
+        response = get_http_session().post(url, headers=headers, data=json.dumps({"inputs": [text]}), timeout=30)
         
         if response.status_code == 200:
             embedding = response.json()[0]
@@ -18,6 +18,7 @@ from django.db.models import Q
 from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
 from core.github.exceptions import GithubAppHandlerError
 from core.requester import ConfluenceRequester, GeminiRequester, OpenAIRequester, OllamaRequester
 from core.data_sources import CrawlService, YouTubeService
@@ -53,6 +54,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from core.integrations.helpers import IntegrationError, cleanup_title, get_trust_score_emoji, strip_first_header, NotEnoughData, NotRelated
 from core.integrations.factory import IntegrationFactory
+from core.integrations.slack_events import enqueue_slack_event, is_slack_bot_mention
+from core.integrations.streaming import STREAMING_INDICATOR, CoalescingMessageUpdater, IncrementalFormatter, get_channel_rate_limiter, iter_answer_lines
 from rest_framework.decorators import api_view, parser_classes, throttle_classes
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import FormParser, MultiPartParser
@@ -2141,19 +2144,35 @@ def format_slack_response(content: str, trust_score: int, references: list, ques
     
     return "\n".join(formatted_msg)
 
+def get_slack_retry_after(error):
+    """Returns the seconds Slack asks to wait if the error is a rate limit, None otherwise"""
+    if isinstance(error, SlackApiError) and error.response.status_code == 429:
+        return float(error.response.headers.get('Retry-After', 1))
+    return None
+
+def get_slack_message_updater(client: AsyncWebClient, channel_id: str, message_ts: str) -> CoalescingMessageUpdater:
+    """Returns an updater for the Slack message, sharing the update rate limit of its channel."""
+    async def send(text):
+        await client.chat_update(channel=channel_id, ts=message_ts, text=text)
+
+    return CoalescingMessageUpdater(
+        send=send,
+        rate_limiter=get_channel_rate_limiter(f'slack:{channel_id}', settings.SLACK_MESSAGE_UPDATE_INTERVAL_SECONDS),
+        get_retry_after=get_slack_retry_after
+    )
+
 async def stream_and_update_message(
     session: aiohttp.ClientSession,
     url: str,
     headers: dict,
     payload: dict,
-    client: WebClient,
+    client: AsyncWebClient,
     channel_id: str,
-    message_ts: str,
-    update_interval: float = 0.5
+    message_ts: str
 ) -> None:
-    """Stream the response and update the Slack message periodically."""
-    last_update = time.time()
-    current_content = ""
+    """Stream the response and update the Slack message as the lines complete."""
+    updater = get_slack_message_updater(client, channel_id, message_ts)
+    formatter = IncrementalFormatter(convert_markdown_to_slack)
     
     try:
         # Create request using APIRequestFactory
@@ -2168,89 +2187,26 @@ async def stream_and_update_message(
         )
         
         # Call api_answer directly in a sync context
-        response = await sync_to_async(api_answer)(request, guru_type)
+        response = await sync_to_async(api_answer, thread_sensitive=False)(request, guru_type)
         
         # Handle StreamingHttpResponse
         if hasattr(response, 'streaming_content'):
-            buffer = ""
-            line_buffer = ""
-            
-            # Create an async wrapper for the generator iteration
-            @sync_to_async
-            def get_next_chunk():
-                try:
-                    return next(response.streaming_content)
-                except StopIteration:
-                    return None
-            
-            # Iterate over the generator asynchronously
-            while True:
-                chunk = await get_next_chunk()
-                if chunk is None:
-                    # Yield any remaining text in the buffer
-                    if line_buffer.strip():
-                        buffer += line_buffer
-                        # Strip header and convert markdown
-                        cleaned_content = strip_first_header(buffer)
-                        if cleaned_content.strip():
-                            formatted_content = convert_markdown_to_slack(cleaned_content)
-                            formatted_content += '\n\n:clock1: _streaming..._'
-                            try:
-                                client.chat_update(
-                                    channel=channel_id,
-                                    ts=message_ts,
-                                    text=formatted_content
-                                )
-                            except SlackApiError as e:
-                                logger.error(f"Error updating message: {e.response}", exc_info=True)
-                    break
-                    
-                if chunk:
-                    text = chunk.decode('utf-8') if isinstance(chunk, bytes) else str(chunk)
-                    line_buffer += text
-                    
-                    # Check if we have complete lines
-                    while '\n' in line_buffer:
-                        line, line_buffer = line_buffer.split('\n', 1)
-                        if line.strip():
-                            buffer += line + '\n'
-                            # Strip header and convert markdown
-                            cleaned_content = strip_first_header(buffer)
-                            if cleaned_content.strip():
-                                formatted_content = convert_markdown_to_slack(cleaned_content)
-                                formatted_content += '\n\n:clock1: _streaming..._'
-                                current_time = time.time()
-                                if current_time - last_update >= update_interval:
-                                    try:
-                                        client.chat_update(
-                                            channel=channel_id,
-                                            ts=message_ts,
-                                            text=formatted_content
-                                        )
-                                        last_update = current_time
-                                    except SlackApiError as e:
-                                        logger.error(f"Error updating message: {e.response}", exc_info=True)
-                                        client.chat_update(
-                                            channel=channel_id,
-                                            ts=message_ts,
-                                            text="❌ Failed to update message"
-                                        )
-                                        return
-    except Exception as e:
-        logger.error(f"Error in stream_and_update_message: {str(e)}", exc_info=True)
-        client.chat_update(
-            channel=channel_id,
-            ts=message_ts,
-            text="❌ An error occurred while processing your request"
-        )
-        return
+            async for line in iter_answer_lines(response.streaming_content):
+                # Only the new line is formatted, the updates in between are coalesced by the updater
+                if formatter.add_line(line) and formatter.text.strip():
+                    updater.update(formatter.text + '\n' + STREAMING_INDICATOR)
+            await updater.flush()
+    except Exception:
+        # The error is shown on the message by answer_slack_message
+        updater.cancel()
+        raise
 
 async def get_final_response(
     session: aiohttp.ClientSession,
     url: str,
     headers: dict,
     payload: dict,
-    client: WebClient,
+    client: AsyncWebClient,
     channel_id: str,
     message_ts: str
 ) -> None:
@@ -2268,7 +2224,7 @@ async def get_final_response(
         )
         
         # Call api_answer directly
-        response = await sync_to_async(api_answer)(request, guru_type)
+        response = await sync_to_async(api_answer, thread_sensitive=False)(request, guru_type)
         
         # Convert response to dict if it's a Response object
         if hasattr(response, 'data'):
@@ -2290,162 +2246,140 @@ async def get_final_response(
 
         final_text = format_slack_response(content, trust_score, references, question_url)
         if final_text.strip():  # Only update if there's content after stripping header
-            client.chat_update(
-                channel=channel_id,
-                ts=message_ts,
-                text=final_text
-            )
+            updater = get_slack_message_updater(client, channel_id, message_ts)
+            updater.update(final_text)
+            await updater.flush()
     except NotEnoughData as e:
         logger.error(f"Not enough data: {str(e)}", exc_info=True)
-        client.chat_update(
+        await client.chat_update(
             channel=channel_id,
             ts=message_ts,
             text=f"❌ {str(e)}"
         )
     except NotRelated as e:
         logger.error(f"Not related to the question: {str(e)}", exc_info=True)
-        client.chat_update(
+        await client.chat_update(
             channel=channel_id,
             ts=message_ts,
             text=f"❌ {str(e)}"
         )
-    except Exception as e:
-        logger.error(f"Error in get_final_response: {str(e)}", exc_info=True)
-        client.chat_update(
-            channel=channel_id,
-            ts=message_ts,
-            text="❌ An error occurred while processing your request"
-        )
 
-async def handle_slack_message(
-    client: WebClient,
+async def send_thinking_message(
+    client: AsyncWebClient,
+    channel_id: str,
+    thread_ts: str,
+    event_id: str = None
+) -> str:
+    """
+    Send the thinking message of the event and return its ts.
+    The message sent by a failed attempt of the event is reset and reused, so retries do not stack thinking messages.
+    """
+    cache = caches['alternate']
+    cache_key = f"slack_event_message:{event_id}"
+    message_ts = await sync_to_async(cache.get)(cache_key) if event_id else None
+
+    if message_ts:
+        try:
+            updater = get_slack_message_updater(client, channel_id, message_ts)
+            updater.update("Thinking... 🤔")
+            await updater.flush()
+            return message_ts
+        except SlackApiError as e:
+            # Deleted in the meantime, a new one is sent
+            logger.warning(f"Could not reuse the thinking message of Slack event {event_id}: {e}")
+
+    thinking_response = await client.chat_postMessage(
+        channel=channel_id,
+        thread_ts=thread_ts,
+        text="Thinking... 🤔"
+    )
+    if event_id:
+        await sync_to_async(cache.set)(cache_key, thinking_response["ts"], timeout=settings.SLACK_EVENT_DEDUP_TIMEOUT_SECONDS)
+    return thinking_response["ts"]
+
+async def answer_slack_message(
+    client: AsyncWebClient,
     integration: Integration,
     channel_id: str,
     thread_ts: str,
-    clean_message: str
+    clean_message: str,
+    event_id: str = None
 ) -> None:
-    """Handle a single Slack message."""
+    """Answer a single Slack message. Errors are shown on the thinking message, then raised."""
+    # First send a thinking message
+    message_ts = await send_thinking_message(client, channel_id, thread_ts, event_id)
 
+    error_text = "❌ An error occurred while processing your request"
     try:
-        # First send a thinking message
-        thinking_response = client.chat_postMessage(
-            channel=channel_id,
-            thread_ts=thread_ts,
-            text="Thinking... 🤔"
-        )
-        
         try:
             # Get or create thread and binge
             thread, binge = await sync_to_async(get_or_create_thread_binge)(thread_ts, integration)
-        except Exception as e:
-            logger.error(f"Error creating thread/binge: {str(e)}", exc_info=True)
-            client.chat_update(
-                channel=channel_id,
-                ts=thinking_response["ts"],
-                text="❌ Failed to create conversation thread"
-            )
-            return
-        
+        except Exception:
+            error_text = "❌ Failed to create conversation thread"
+            raise
+
         guru_type_slug = await sync_to_async(lambda integration: integration.guru_type.slug)(integration)
         api_key = await sync_to_async(lambda integration: integration.api_key.key)(integration)
-        
-        try:
-            # First get streaming response
-            stream_payload = {
+
+        # First get streaming response
+        stream_payload = {
+            'question': clean_message,
+            'stream': True,
+            'short_answer': True,
+            'session_id': str(binge.id),
+            'guru_type': guru_type_slug
+        }
+
+        headers = {
+            'X-API-KEY': api_key,
+            'Content-Type': 'application/json'
+        }
+
+        async with aiohttp.ClientSession() as session:
+            await stream_and_update_message(
+                session=session,
+                url='',  # Not used anymore
+                headers=headers,
+                payload=stream_payload,
+                client=client,
+                channel_id=channel_id,
+                message_ts=message_ts
+            )
+
+            # Then get final formatted response
+            final_payload = {
                 'question': clean_message,
-                'stream': True,
+                'stream': False,
                 'short_answer': True,
+                'fetch_existing': True,
                 'session_id': str(binge.id),
                 'guru_type': guru_type_slug
             }
-            
-            headers = {
-                'X-API-KEY': api_key,
-                'Content-Type': 'application/json'
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                await stream_and_update_message(
-                    session=session,
-                    url='',  # Not used anymore
-                    headers=headers,
-                    payload=stream_payload,
-                    client=client,
-                    channel_id=channel_id,
-                    message_ts=thinking_response["ts"]
-                )
-                
-                # Then get final formatted response
-                final_payload = {
-                    'question': clean_message,
-                    'stream': False,
-                    'short_answer': True,
-                    'fetch_existing': True,
-                    'session_id': str(binge.id),
-                    'guru_type': guru_type_slug
-                }
-                
-                await get_final_response(
-                    session=session,
-                    url='',  # Not used anymore
-                    headers=headers,
-                    payload=final_payload,
-                    client=client,
-                    channel_id=channel_id,
-                    message_ts=thinking_response["ts"]
-                )
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error: {str(e)}", exc_info=True)
-            client.chat_update(
-                channel=channel_id,
-                ts=thinking_response["ts"],
-                text="❌ Network error occurred while processing your request"
-            )
-        except Exception as e:
-            logger.error(f"Error in API communication: {str(e)}", exc_info=True)
-            client.chat_update(
-                channel=channel_id,
-                ts=thinking_response["ts"],
-                text="❌ An error occurred while processing your request"
+
+            await get_final_response(
+                session=session,
+                url='',  # Not used anymore
+                headers=headers,
+                payload=final_payload,
+                client=client,
+                channel_id=channel_id,
+                message_ts=message_ts
             )
-    except SlackApiError as e:
-        logger.error(f"Slack API error: {str(e)}", exc_info=True)
-        # If we can't even send the thinking message, we can't update it later
-        try:
-            if thinking_response:
-                client.chat_update(
-                    channel=channel_id,
-                    ts=thinking_response["ts"],
-                    text="❌ Failed to process your request due to a Slack API error"
-                )
-            else:
-                client.chat_postMessage(
-                    channel=channel_id,
-                    thread_ts=thread_ts,
-                    text="❌ Failed to process your request due to a Slack API error"
-                )
-        except:
-            pass  # If this fails too, we can't do much
     except Exception as e:
-        logger.error(f"Unexpected error in handle_slack_message: {str(e)}", exc_info=True)
+        if isinstance(e, aiohttp.ClientError):
+            error_text = "❌ Network error occurred while processing your request"
         try:
-            if thinking_response:
-                client.chat_update(
-                    channel=channel_id,
-                    ts=thinking_response["ts"],
-                    text="❌ An unexpected error occurred"
-                )
-            else:
-                client.chat_postMessage(
-                    channel=channel_id,
-                    thread_ts=thread_ts,
-                    text="❌ An unexpected error occurred"
-                )
-        except:
-            pass  # If this fails too, we can't do much
+            await client.chat_update(
+                channel=channel_id,
+                ts=message_ts,
+                text=error_text
+            )
+        except SlackApiError as update_error:
+            logger.error(f"Error showing the error on the Slack message: {update_error}", exc_info=True)
+        raise
 
 async def send_channel_unauthorized_message(
-    client: WebClient,
+    client: AsyncWebClient,
     channel_id: str,
     thread_ts: str,
     guru_slug: str
@@ -2458,7 +2392,7 @@ async def send_channel_unauthorized_message(
             f"Please visit <{settings_url}|Gurubase Settings> to configure "
             "the bot and add this channel to the allowed channels list."
         )
-        client.chat_postMessage(
+        await client.chat_postMessage(
             channel=channel_id,
             thread_ts=thread_ts,
             text=message
@@ -2467,140 +2401,119 @@ async def send_channel_unauthorized_message(
         logger.error(f"Error sending unauthorized channel message: {e.response}", exc_info=True)
 
 
+async def answer_slack_event(data: dict) -> None:
+    """
+    Answer a Slack event mentioning the bot. Called by the slackEventWorker command for the queued events.
+    Raises if answering fails, so the worker keeps the event to retry it.
+    """
+    event = data["event"]
+
+    # Only proceed if it's a message event mentioning the bot and not from a bot
+    if not is_slack_bot_mention(data):
+        return
+
+    # Get bot user ID from authorizations
+    bot_user_id = data.get("authorizations", [{}])[0].get("user_id")
+    user_message = event["text"]
+
+    team_id = data.get('team_id')
+    if not team_id:
+        return
+
+    # Try to get integration from cache first
+    cache = caches['alternate']
+    cache_key = f"slack_integration:{team_id}"
+    integration = await sync_to_async(cache.get)(cache_key)
+
+    if not integration:
+        try:
+            # If not in cache, get from database
+            integration = await sync_to_async(Integration.objects.select_related('guru_type', 'api_key').get)(
+                type=Integration.Type.SLACK,
+                external_id=team_id
+            )
+            # Set cache timeout to 0. This is because dynamic channel updates are not immediately reflected
+            # And this may result in bad UX, and false positive bug reports
+            await sync_to_async(cache.set)(cache_key, integration, timeout=0)
+        except Integration.DoesNotExist:
+            logger.error(f"No integration found for team {team_id}", exc_info=True)
+            return
+
+    # Get the Slack client for this team
+    client = AsyncWebClient(token=integration.access_token)
+
+    channel_id = event["channel"]
+
+    # Check if the current channel is allowed
+    channels = integration.channels
+    channel_allowed = False
+    for channel in channels:
+        if str(channel.get('id')) == channel_id and channel.get('allowed', False):
+            channel_allowed = True
+            break
+
+    # Get thread_ts if it exists (means we're in a thread)
+    thread_ts = event.get("thread_ts") or event.get("ts")
+
+    if not channel_allowed:
+        await send_channel_unauthorized_message(
+            client=client,
+            channel_id=channel_id,
+            thread_ts=thread_ts,
+            guru_slug=integration.guru_type.slug
+        )
+        return
+
+    # Remove the bot mention from the message
+    clean_message = user_message.replace(f"<@{bot_user_id}>", "").strip()
+
+    try:
+        await answer_slack_message(
+            client=client,
+            integration=integration,
+            channel_id=channel_id,
+            thread_ts=thread_ts,
+            clean_message=clean_message,
+            event_id=data.get('event_id')
+        )
+    except SlackApiError as e:
+        if e.response.data.get('msg') not in ['token_expired', 'invalid_auth', 'not_authed']:
+            raise
+
+        # Get fresh integration data from DB
+        integration = await sync_to_async(Integration.objects.select_related('guru_type', 'api_key').get)(id=integration.id)
+        # Try to refresh the token
+        strategy = IntegrationFactory.get_strategy(integration.type, integration)
+        new_token = await sync_to_async(strategy.handle_token_refresh)()
+
+        # Update cache with new integration data
+        await sync_to_async(cache.set)(cache_key, integration, timeout=300)
+
+        # Retry with new token
+        client = AsyncWebClient(token=new_token)
+        await answer_slack_message(
+            client=client,
+            integration=integration,
+            channel_id=channel_id,
+            thread_ts=thread_ts,
+            clean_message=clean_message,
+            event_id=data.get('event_id')
+        )
+
+
 @api_view(['GET', 'POST'])
 def slack_events(request):
     """Handle Slack events including verification and message processing."""
-    from slack_sdk import WebClient
-    from slack_sdk.errors import SlackApiError
-    import asyncio
-    import threading
-    from django.core.cache import caches
-    
     data = request.data
     
     # If this is a verification request, respond with the challenge parameter
     if "challenge" in data:
         return Response(data["challenge"], status=status.HTTP_200_OK)
     
-    # Handle the event in a separate thread
-    if "event" in data:
-        def process_event():
-            try:
-                event = data["event"]
-                
-                # Only proceed if it's a message event and not from a bot
-                if event["type"] == "message" and "subtype" not in event and event.get("user") != event.get("bot_id"):
-                    # Get bot user ID from authorizations
-                    bot_user_id = data.get("authorizations", [{}])[0].get("user_id")
-                    user_message = event["text"]
-                    
-                    # First check if the bot is mentioned
-                    if not (bot_user_id and f"<@{bot_user_id}>" in user_message):
-                        return
-                        
-                    team_id = data.get('team_id')
-                    if not team_id:
-                        return
-                        
-                    # Try to get integration from cache first
-                    cache = caches['alternate']
-                    cache_key = f"slack_integration:{team_id}"
-                    integration = cache.get(cache_key)
-                    
-                    if not integration:
-                        try:
-                            # If not in cache, get from database
-                            integration = Integration.objects.get(type=Integration.Type.SLACK, external_id=team_id)
-                            # Set cache timeout to 0. This is because dynamic channel updates are not immediately reflected
-                            # And this may result in bad UX, and false positive bug reports
-                            cache.set(cache_key, integration, timeout=0)
-                        except Integration.DoesNotExist:
-                            logger.error(f"No integration found for team {team_id}", exc_info=True)
-                            return
-                    
-                    try:
-                        # Get the Slack client for this team
-                        client = WebClient(token=integration.access_token)
-                        
-                        channel_id = event["channel"]
-                        
-                        # Check if the current channel is allowed
-                        channels = integration.channels
-                        channel_allowed = False
-                        for channel in channels:
-                            if str(channel.get('id')) == channel_id and channel.get('allowed', False):
-                                channel_allowed = True
-                                break
-
-                        # Get thread_ts if it exists (means we're in a thread)
-                        thread_ts = event.get("thread_ts") or event.get("ts")
-                        
-                        if not channel_allowed:
-                            # Run the unauthorized message handler in the event loop
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            try:
-                                loop.run_until_complete(send_channel_unauthorized_message(
-                                    client=client,
-                                    channel_id=channel_id,
-                                    thread_ts=thread_ts,
-                                    guru_slug=integration.guru_type.slug
-                                ))
-                            finally:
-                                loop.close()
-                            return
-                        
-                        # Remove the bot mention from the message
-                        clean_message = user_message.replace(f"<@{bot_user_id}>", "").strip()
-                        
-                        # Run the async handler in a new event loop
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            loop.run_until_complete(handle_slack_message(
-                                client=client,
-                                integration=integration,
-                                channel_id=channel_id,
-                                thread_ts=thread_ts,
-                                clean_message=clean_message
-                            ))
-                        except SlackApiError as e:
-                            if e.response.data.get('msg') in ['token_expired', 'invalid_auth', 'not_authed']:
-                                try:
-                                    # Get fresh integration data from DB
-                                    integration = Integration.objects.get(id=integration.id)
-                                    # Try to refresh the token
-                                    strategy = IntegrationFactory.get_strategy(integration.type, integration)
-                                    new_token = strategy.handle_token_refresh()
-                                    
-                                    # Update cache with new integration data
-                                    cache.set(cache_key, integration, timeout=300)
-                                    
-                                    # Retry with new token
-                                    client = WebClient(token=new_token)
-                                    loop.run_until_complete(handle_slack_message(
-                                        client=client,
-                                        integration=integration,
-                                        channel_id=channel_id,
-                                        thread_ts=thread_ts,
-                                        clean_message=clean_message
-                                    ))
-                                except Exception as refresh_error:
-                                    logger.error(f"Error refreshing token: {refresh_error}", exc_info=True)
-                            else:
-                                logger.error(f"Slack API error: {e}", exc_info=True)
-                        finally:
-                            loop.close()
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing Slack event: {e}", exc_info=True)
-            except Exception as e:
-                logger.error(f"Error in process_event thread: {e}", exc_info=True)
-        
-        # Start processing in a separate thread
-        thread = threading.Thread(target=process_event)
-        thread.daemon = True  # Make thread daemon so it doesn't block server shutdown
-        thread.start()
+    # Queue the event for the slackEventWorker command, so the web workers only acknowledge it
+    if "event" in data and is_slack_bot_mention(data):
+        if not enqueue_slack_event(data):
+            logger.info(f"Skipping duplicate Slack event {data.get('event_id')}, retry {request.headers.get('X-Slack-Retry-Num')}")
     
     # Return 200 immediately
     return Response(status=200)
@@ -2833,7 +2746,8 @@ def start_crawl_admin(request, guru_slug):
             guru_slug,
             request.user,
             request.data.get('url'),
-            source=CrawlState.Source.UI
+            source=CrawlState.Source.UI,
+            discovery_mode=request.data.get('discovery_mode')
         )
     except Exception as e:
         return Response({'msg': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -2848,7 +2762,8 @@ def start_crawl_api(request, guru_slug):
             guru_slug,
             request.user,
             request.data.get('url'),
-            source=CrawlState.Source.API
+            source=CrawlState.Source.API,
+            discovery_mode=request.data.get('discovery_mode')
         )
     except Exception as e:
         return Response({'msg': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -3024,10 +2939,9 @@ def github_webhook(request):
     if not integration:
         try:
             # If not in cache, get from database
-            integration = Integration.objects.get(type=Integration.Type.GITHUB, external_id=installation_id)
-            # Set cache timeout to 0. This is because dynamic updates are not immediately reflected
-            # And this may result in bad UX, and false positive bug reports
-            cache.set(cache_key, integration, timeout=0)
+            integration = Integration.objects.select_related('guru_type').get(type=Integration.Type.GITHUB, external_id=installation_id)
+            # Cleared when the integration is updated, so the updates apply right away
+            cache.set(cache_key, integration, timeout=settings.GITHUB_INTEGRATION_CACHE_TIMEOUT_SECONDS)
         except Integration.DoesNotExist:
             logger.error(f"No integration found for installation {installation_id}", exc_info=True)
             return Response({'message': 'No integration found'}, status=status.HTTP_400_BAD_REQUEST)
@@ -3071,38 +2985,15 @@ def github_webhook(request):
         if not github_handler.will_answer(event_data['body'], bot_name, event_type, channel['mode']):
             return Response({'message': 'Webhook received'}, status=status.HTTP_200_OK)
 
-        # Create a new binge
-        binge = create_fresh_binge(integration.guru_type, None)
-        guru_type = integration.guru_type.slug
-        
-        # Create request using APIRequestFactory
-        factory = APIRequestFactory()
-        
-        # Prepare payload for the API
-        payload = {
-            'question': github_handler.cleanup_user_question(event_data['body'], bot_name),
-            'stream': False,
-            'short_answer': True,
-            'fetch_existing': False,
-            'session_id': binge.id
-        }
+        # GitHub redelivers the webhooks it does not get a response for in 10 seconds, with the same delivery id.
+        # So the answer is enqueued once, and answered by the workers.
+        delivery_id = request.headers.get('x-github-delivery')
+        if delivery_id and not cache.add(f"github_delivery:{delivery_id}", 1, timeout=settings.GITHUB_DELIVERY_DEDUP_TIMEOUT_SECONDS):
+            logger.info(f"Skipping the already received GitHub delivery {delivery_id}")
+            return Response({'message': 'Webhook received'}, status=status.HTTP_200_OK)
 
-        if event_data['api_url']:
-            payload['github_api_url'] = event_data['api_url']
-        
-        # Create request with API key from integration
-        request = factory.post(
-            f'/api/v1/{guru_type}/answer/',
-            payload,
-            HTTP_X_API_KEY=integration.api_key.key,
-            format='json'
-        )
-        
-        # Call api_answer directly
-        response = api_answer(request, guru_type)
-        
-        # Handle the response using the event handler
-        event_handler.handle_response(response, event_data, bot_name)
+        from core.tasks import answer_github_event
+        answer_github_event.delay(installation_id=installation_id, data=data)
 
     except Exception as e:
         logger.error(f"Error processing GitHub webhook: {e}", exc_info=True)
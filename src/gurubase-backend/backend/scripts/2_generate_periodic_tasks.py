@@ -232,6 +232,14 @@ periodic_tasks = {
         'last_run_at': datetime.utcnow() - timedelta(days=90),
         'kwargs': {'successful_repos': False}
     },
+    'task_sync_integration_data_sources': {
+        'every': 15,
+        'period': MINUTES,
+        'task': 'core.tasks.sync_integration_data_sources',
+        'enabled': True,
+        'last_run_at': datetime.utcnow() - timedelta(days=90),
+        'kwargs': {}
+    },
     'task_stop_inactive_ui_crawls': {
         'every': 3,  # Change settings.LOGGING.filters.hide_info_specific_task when changing this
         'period': SECONDS,
@@ -0,0 +1,110 @@
+import os
+import sys
+import argparse
+import django
+import logging
+from datetime import timedelta
+from tqdm import tqdm
+from time import sleep
+# Setup Django environment
+sys.path.append('/workspaces/gurubase/src/gurubase-backend/backend')
+sys.path.append('/workspaces/gurubase-backend/backend')
+sys.path.append('/workspace/backend')
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+from django.db import transaction
+from django.utils import timezone
+from core.fields import get_compressed_text_fields, save_compressed_text
+from core.models import ContentBlob, DataSource, GithubFile
+
+logger = logging.getLogger(__name__)
+
+MODELS = [DataSource, GithubFile]
+
+
+def total_legacy_rows(model):
+    return sum(
+        model.objects.filter(**{f'{field.legacy_field}__isnull': False}).count()
+        for field in get_compressed_text_fields(model)
+    )
+
+
+def backfill_model(model, batch_size):
+    """
+    Moves the legacy text columns of the model into content blobs, batch by batch.
+    Identical texts are compressed and stored once.
+    """
+    for field in get_compressed_text_fields(model):
+        legacy_rows = model.objects.filter(**{f'{field.legacy_field}__isnull': False})
+        total = legacy_rows.count()
+        logger.info(f"Found {total} {model.__name__} rows to backfill for {field.name}")
+
+        processed = 0
+        with tqdm(total=total, desc=f"Backfilling {model.__name__}.{field.name}") as pbar:
+            while True:
+                # Backfilled rows no longer match the filter, so the first batch is always the next one
+                batch = list(legacy_rows.only('id', field.name, field.legacy_field).order_by('id')[:batch_size])
+                if not batch:
+                    break
+
+                for obj in batch:
+                    # Moves the text to the content blob and clears the legacy column
+                    setattr(obj, field.name, getattr(obj, field.legacy_field))
+
+                with transaction.atomic():
+                    save_compressed_text(batch)
+                    model.objects.bulk_update(batch, [field.name, field.legacy_field])
+
+                processed += len(batch)
+                pbar.update(len(batch))
+                if processed % (batch_size * 10) == 0:
+                    sleep(1)
+
+        logger.info(f"Backfilled {processed} {model.__name__} rows for {field.name}")
+
+
+def prune_content_blobs(min_age_hours=1):
+    """
+    Deletes the content blobs that are not referenced by any compressed text field.
+    Recent blobs are kept, as their rows may not be saved yet.
+    """
+    blobs = ContentBlob.objects.filter(date_created__lt=timezone.now() - timedelta(hours=min_age_hours))
+    for model in MODELS:
+        for field in get_compressed_text_fields(model):
+            blobs = blobs.exclude(hash__in=model.objects.filter(**{f'{field.name}__isnull': False}).values(field.name))
+
+    deleted_count, _ = blobs.delete()
+    logger.info(f"Pruned {deleted_count} unreferenced content blobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the legacy content columns into compressed content blobs")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--prune', action='store_true', help="Delete unreferenced content blobs after the backfill")
+    args = parser.parse_args()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        for model in MODELS:
+            backfill_model(model, args.batch_size)
+
+        if args.prune:
+            prune_content_blobs()
+
+        logger.info("Successfully completed the content blob backfill")
+    except Exception as e:
+        logger.error(f"Script failed: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    for model in MODELS:
+        print(f"Total {model.__name__} rows to backfill: {total_legacy_rows(model)}")
+    print("Do you want to continue? (y/n)")
+    if input() == "y":
+        main()
@@ -12,7 +12,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 django.setup()
 
 from django.db import transaction
-from core.models import DataSource, GithubFile
+from core.models import DataSource, DataSourceChunk, GithubFile
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +42,7 @@ def reset_datasources():
                 with transaction.atomic():
                     datasource.status = DataSource.Status.NOT_PROCESSED
                     datasource.in_milvus = False
-                    datasource.doc_ids = []
+                    DataSourceChunk.objects.filter(data_source=datasource).delete()
                     datasource.save()
                     processed += 1
                     pbar.update(1)
@@ -0,0 +1,6 @@
+#!/bin/bash
+
+set -o errexit
+set -o nounset
+
+cd backend && exec celery --app backend worker --queues github-answers --concurrency ${GITHUB_ANSWER_WORKER_CONCURRENCY:-8} --pool=threads --hostname githubworker1@%h